@@ -0,0 +1,82 @@
+"""create usage rollups table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 创建usage_rollups表（按小时/天预聚合的请求统计）
+    op.create_table(
+        "usage_rollups",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("granularity", sa.String(length=10), nullable=False, comment="汇总粒度：hour/day"),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False, comment="时间桶开始时间"),
+        sa.Column("api_key_id", sa.String(length=64), nullable=False, comment="API Key ID"),
+        sa.Column(
+            "organization_id",
+            sa.String(length=64),
+            nullable=False,
+            server_default="",
+            comment="组织ID（无组织为空串）",
+        ),
+        sa.Column("model", sa.String(length=255), nullable=False, comment="模型标识"),
+        sa.Column("provider", sa.String(length=50), nullable=False, comment="提供商"),
+        sa.Column("requests", sa.BigInteger(), nullable=False, server_default="0", comment="请求数"),
+        sa.Column(
+            "prompt_tokens",
+            sa.BigInteger(),
+            nullable=False,
+            server_default="0",
+            comment="输入Token数",
+        ),
+        sa.Column(
+            "completion_tokens",
+            sa.BigInteger(),
+            nullable=False,
+            server_default="0",
+            comment="输出Token数",
+        ),
+        sa.Column(
+            "total_tokens", sa.BigInteger(), nullable=False, server_default="0", comment="总Token数"
+        ),
+        sa.Column(
+            "cost",
+            sa.Numeric(precision=14, scale=6),
+            nullable=False,
+            server_default="0",
+            comment="费用",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "api_key_id",
+            "organization_id",
+            "model",
+            "provider",
+            name="uq_usage_rollups_bucket",
+        ),
+    )
+    op.create_index(
+        "ix_usage_rollups_granularity_bucket",
+        "usage_rollups",
+        ["granularity", "bucket_start"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_usage_rollups_granularity_bucket", table_name="usage_rollups")
+    op.drop_table("usage_rollups")
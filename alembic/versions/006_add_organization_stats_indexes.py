@@ -0,0 +1,34 @@
+"""add organization stats indexes
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 组织统计按 organization_id + 时间范围查询
+    op.create_index(
+        "ix_request_stats_organization_timestamp",
+        "request_stats",
+        ["organization_id", "timestamp"],
+    )
+    op.create_index(
+        "ix_usage_rollups_organization_bucket",
+        "usage_rollups",
+        ["organization_id", "granularity", "bucket_start"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_usage_rollups_organization_bucket", table_name="usage_rollups")
+    op.drop_index("ix_request_stats_organization_timestamp", table_name="request_stats")
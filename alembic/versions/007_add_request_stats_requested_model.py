@@ -0,0 +1,34 @@
+"""add request_stats requested_model
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # model 记录实际提供服务的目标模型，requested_model 记录客户端请求的模型
+    op.add_column(
+        "request_stats",
+        sa.Column(
+            "requested_model",
+            sa.String(length=255),
+            nullable=True,
+            comment="客户端请求的模型标识（逻辑模型或回退前的模型）",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("request_stats", "requested_model")
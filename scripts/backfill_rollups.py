@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+根据原始请求统计回填用量汇总表（usage_rollups）
+
+按天重建汇总，可重复执行（会先删除该天已有的汇总行）。
+新写入的统计会实时更新汇总表，因此通常只需在升级后回填历史数据，
+确认回填完成后再设置 STATS_QUERY_SOURCE=rollups。
+
+统计收集器仍在增量更新的桶不会被重建：当天只重建已结束的小时桶，当前小时和当天的天桶不处理。
+升级当天的天桶需要在当天结束后再执行一次（例如 --start 升级当天的日期）。
+
+使用方法:
+    python scripts/backfill_rollups.py                      # 回填截至当前小时的全部历史数据
+    python scripts/backfill_rollups.py --start 2025-12-01 --end 2026-01-01
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func
+
+from src.gaiarouter.database import RequestStat, get_db
+from src.gaiarouter.stats.rollups import GRANULARITY_HOUR
+from src.gaiarouter.stats.storage import get_stats_storage
+
+
+def parse_date(value: str) -> datetime:
+    """解析 YYYY-MM-DD 格式的日期"""
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def get_first_stat_date() -> Optional[datetime]:
+    """获取最早一条请求统计所在的日期"""
+    db = next(get_db())
+    try:
+        first = db.query(func.min(RequestStat.timestamp)).scalar()
+    finally:
+        db.close()
+    if first is None:
+        return None
+    return datetime(first.year, first.month, first.day)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="回填用量汇总表")
+    parser.add_argument("--start", type=parse_date, help="开始日期（包含），默认为最早的统计记录")
+    parser.add_argument("--end", type=parse_date, help="结束日期（不包含），默认为当前小时")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("用量汇总回填工具")
+    print("=" * 60)
+
+    now = datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    end = min(args.end or current_hour, current_hour)
+    start = args.start or get_first_stat_date()
+    if start is None:
+        print("\n✓ 没有需要回填的请求统计")
+        return
+
+    storage = get_stats_storage()
+    total = 0
+    day = start
+    try:
+        while day < end:
+            next_day = day + timedelta(days=1)
+            if next_day <= today:
+                count = storage.rebuild_rollups(day, next_day)
+            else:
+                # 当天未结束，只重建已结束的小时桶
+                count = storage.rebuild_rollups(day, end, granularities=[GRANULARITY_HOUR])
+            total += count
+            print(f"  {day.strftime('%Y-%m-%d')}: {count} 条记录")
+            day = next_day
+    except Exception as e:
+        print(f"\n❌ 回填失败: {e}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"✓ 回填完成！共处理 {total} 条记录")
+    if end > today:
+        print(f"  当天（{today.strftime('%Y-%m-%d')}）的天桶未重建，请在当天结束后再执行一次")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+JSON编解码基准测试
+
+对比标准库 json 和 orjson 在请求路径上几种典型负载的耗时：
+  - chunk:    序列化一个流式响应块（非直通模式下每个数据块一次）
+  - response: 序列化一个普通模式的完整聊天响应
+  - upstream: 解析上游返回的完整聊天响应
+  - log:      序列化一条结构化日志
+
+使用方法:
+    python scripts/dev/bench_json_codec.py
+    python scripts/dev/bench_json_codec.py --iterations 200000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.gaiarouter.utils.json_codec import JSONCodec, OrjsonCodec, orjson
+
+CHUNK = {
+    "id": "chatcmpl-AbCdEf123456",
+    "object": "chat.completion.chunk",
+    "created": 1760000000,
+    "model": "openai/gpt-4o",
+    "choices": [{"index": 0, "delta": {"content": " 你好，世界"}, "finish_reason": None}],
+}
+
+RESPONSE = {
+    "id": "chatcmpl-AbCdEf123456",
+    "object": "chat.completion",
+    "created": 1760000000,
+    "model": "openai/gpt-4o",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "这是一段较长的回复。" * 80},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 120, "completion_tokens": 480, "total_tokens": 600},
+}
+
+LOG_EVENT = {
+    "method": "POST",
+    "path": "/v1/chat/completions",
+    "status_code": 200,
+    "process_time": "0.812s",
+    "ttfb": "0.214s",
+    "event": "Request completed",
+    "logger": "gaiarouter.api.middleware.logging",
+    "level": "info",
+    "timestamp": "2026-01-01T00:00:00.000000Z",
+}
+
+
+def main(iterations: int) -> None:
+    """运行基准测试并打印每次调用的平均耗时"""
+    codecs = [JSONCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson 未安装，只测试标准库实现")
+
+    upstream_body = JSONCodec().dumps_bytes(RESPONSE)
+    print(f"iterations={iterations} (单位: 微秒/次)")
+    print(f"{'codec':<8} {'chunk':>9} {'response':>9} {'upstream':>9} {'log':>9}")
+    for codec in codecs:
+        results = [
+            timeit.timeit(lambda: codec.dumps(CHUNK), number=iterations),
+            timeit.timeit(lambda: codec.dumps_bytes(RESPONSE), number=iterations),
+            timeit.timeit(lambda: codec.loads(upstream_body), number=iterations),
+            timeit.timeit(lambda: codec.dumps(LOG_EVENT), number=iterations),
+        ]
+        print(
+            f"{codec.name:<8} "
+            + " ".join(f"{seconds / iterations * 1e6:>9.2f}" for seconds in results)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON编解码基准测试")
+    parser.add_argument("--iterations", type=int, default=50000, help="每项测试的调用次数")
+    args = parser.parse_args()
+    main(args.iterations)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+日志中间件基准测试
+
+在进程内直接驱动ASGI应用（不经过网络），对比三种配置的总耗时和首字节时间：
+  - none:   不加日志中间件
+  - legacy: 旧的 BaseHTTPMiddleware 实现
+  - asgi:   当前的纯ASGI实现
+
+测试两个接口：普通JSON响应和逐块输出的SSE流式响应。日志输出被替换为空操作，
+只测量中间件本身的开销。
+
+使用方法:
+    python scripts/dev/bench_logging_middleware.py
+    python scripts/dev/bench_logging_middleware.py --requests 5000 --chunks 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.gaiarouter.api.middleware import logging as logging_middleware
+
+
+class NullLogger:
+    """空操作日志对象"""
+
+    def info(self, *args, **kwargs):
+        pass
+
+
+null_logger = NullLogger()
+logging_middleware.logger = null_logger
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """旧的日志中间件实现（BaseHTTPMiddleware）"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        null_logger.info(
+            "Request received",
+            method=request.method,
+            path=request.url.path,
+            client_ip=request.client.host if request.client else None,
+        )
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        null_logger.info(
+            "Request completed",
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            process_time=f"{process_time:.3f}s",
+        )
+        return response
+
+
+def create_app(variant: str, chunks: int) -> FastAPI:
+    """创建测试应用"""
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_endpoint():
+        return JSONResponse({"status": "ok"})
+
+    @app.get("/stream")
+    async def stream_endpoint():
+        async def generate():
+            for i in range(chunks):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(0)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    if variant == "legacy":
+        app.add_middleware(LegacyLoggingMiddleware)
+    elif variant == "asgi":
+        app.add_middleware(logging_middleware.LoggingMiddleware, sample_rate=1.0)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> Dict[str, float]:
+    """发送一个请求，返回总耗时和首字节时间（秒）"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    first_byte = None
+    request_sent = False
+    disconnected = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        # 第一次返回请求体，之后阻塞到请求结束（模拟客户端保持连接）
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte
+        if first_byte is None and message["type"] == "http.response.body" and message.get("body"):
+            first_byte = time.perf_counter() - start
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return {"total": time.perf_counter() - start, "ttfb": first_byte or 0.0}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def bench(variant: str, path: str, requests: int, chunks: int) -> Dict[str, float]:
+    """对一种配置的一个接口执行基准测试"""
+    app = create_app(variant, chunks)
+    for _ in range(min(100, requests)):
+        await call(app, path)
+
+    totals, ttfbs = [], []
+    for _ in range(requests):
+        result = await call(app, path)
+        totals.append(result["total"] * 1e6)
+        ttfbs.append(result["ttfb"] * 1e6)
+    return {
+        "mean": statistics.mean(totals),
+        "p50": percentile(totals, 0.5),
+        "p99": percentile(totals, 0.99),
+        "ttfb_mean": statistics.mean(ttfbs),
+    }
+
+
+async def main(requests: int, chunks: int) -> None:
+    """运行全部基准测试并打印结果"""
+    print(f"requests={requests} stream_chunks={chunks} (单位: 微秒)")
+    print(f"{'endpoint':<8} {'variant':<8} {'mean':>9} {'p50':>9} {'p99':>9} {'ttfb':>9}")
+    for path in ("/json", "/stream"):
+        for variant in ("none", "legacy", "asgi"):
+            result = await bench(variant, path, requests, chunks)
+            print(
+                f"{path:<8} {variant:<8} {result['mean']:>9.1f} {result['p50']:>9.1f} "
+                f"{result['p99']:>9.1f} {result['ttfb_mean']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="日志中间件基准测试")
+    parser.add_argument("--requests", type=int, default=2000, help="每种配置的请求数")
+    parser.add_argument("--chunks", type=int, default=20, help="流式响应的数据块数")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.chunks))
@@ -4,7 +4,7 @@ Anthropic适配器
 处理Anthropic的请求和响应格式转换
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from ..providers.base import ProviderResponse
 from .base import RequestAdapter, ResponseAdapter
@@ -100,3 +100,23 @@ class AnthropicResponseAdapter(ResponseAdapter):
                 ],
             }
         return chunk
+
+    def extract_stream_usage(self, chunk: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """
+        提取流式用量（message_start携带输入用量，message_delta携带累计输出用量）
+        """
+        chunk_type = chunk.get("type")
+        if chunk_type == "message_start":
+            usage = (chunk.get("message") or {}).get("usage") or {}
+            if not usage:
+                return None
+            return {
+                "prompt_tokens": usage.get("input_tokens", 0),
+                "completion_tokens": usage.get("output_tokens", 0),
+            }
+        if chunk_type == "message_delta":
+            usage = chunk.get("usage") or {}
+            if "output_tokens" not in usage:
+                return None
+            return {"completion_tokens": usage["output_tokens"]}
+        return None
@@ -5,7 +5,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from ..providers.base import ProviderResponse
 
@@ -55,3 +55,15 @@ class ResponseAdapter(ABC):
           统一格式的chunk字典
         """
         pass
+
+    def extract_stream_usage(self, chunk: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """
+        从提供商原始流式chunk中提取用量
+
+        Args:
+          chunk: 提供商返回的chunk字典
+
+        Returns:
+          用量字典（prompt_tokens / completion_tokens，可只包含其一），chunk不含用量时返回None
+        """
+        return None
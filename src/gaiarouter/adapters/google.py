@@ -4,7 +4,7 @@ Google适配器
 处理Google的请求和响应格式转换
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from ..providers.base import ProviderResponse
 from .base import RequestAdapter, ResponseAdapter
@@ -96,3 +96,17 @@ class GoogleResponseAdapter(ResponseAdapter):
                 ],
             }
         return chunk
+
+    def extract_stream_usage(self, chunk: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """
+        提取流式用量（每个chunk的usageMetadata为截至当前的累计值）
+        """
+        usage = chunk.get("usageMetadata")
+        if not usage:
+            return None
+        result = {}
+        if "promptTokenCount" in usage:
+            result["prompt_tokens"] = usage["promptTokenCount"]
+        if "candidatesTokenCount" in usage:
+            result["completion_tokens"] = usage["candidatesTokenCount"]
+        return result or None
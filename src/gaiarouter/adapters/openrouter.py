@@ -4,7 +4,7 @@ OpenRouter适配器
 处理OpenRouter的请求和响应格式转换
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from ..providers.base import ProviderResponse
 from .base import RequestAdapter, ResponseAdapter
@@ -81,3 +81,15 @@ class OpenRouterResponseAdapter(ResponseAdapter):
         OpenRouter格式与OpenAI格式兼容
         """
         return chunk
+
+    def extract_stream_usage(self, chunk: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """
+        提取流式用量（请求中设置 stream_options.include_usage 后，最后一个chunk携带usage）
+        """
+        usage = chunk.get("usage")
+        if not usage:
+            return None
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
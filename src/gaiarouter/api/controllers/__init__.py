@@ -2,6 +2,6 @@
 API控制器模块
 """
 
-from . import api_keys, auth, chat, models, organizations, stats
+from . import api_keys, auth, chat, metrics, models, organizations, stats
 
-__all__ = ["chat", "models", "stats", "api_keys", "organizations", "auth"]
+__all__ = ["chat", "models", "stats", "api_keys", "organizations", "auth", "metrics"]
@@ -10,6 +10,7 @@ from pydantic import BaseModel
 from ...database.models import User
 from ...models.manager import get_model_manager
 from ...models.sync import sync_models_from_openrouter
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 from ..middleware.user_auth import verify_user_token
 
@@ -109,7 +110,8 @@ async def list_models(
     """
     try:
         manager = get_model_manager()
-        models, total = manager.list_models(
+        models, total = await run_blocking(
+            manager.list_models,
             enabled_only=enabled_only,
             provider=provider,
             is_free=is_free,
@@ -167,7 +169,7 @@ async def enable_model(
             raise HTTPException(status_code=403, detail="Insufficient permissions")
 
         manager = get_model_manager()
-        if not manager.enable_model(model_id):
+        if not await run_blocking(manager.enable_model, model_id):
             raise HTTPException(status_code=404, detail="Model not found")
 
         return {"success": True, "message": "模型已启用"}
@@ -195,7 +197,7 @@ async def disable_model(
             raise HTTPException(status_code=403, detail="Insufficient permissions")
 
         manager = get_model_manager()
-        if not manager.disable_model(model_id):
+        if not await run_blocking(manager.disable_model, model_id):
             raise HTTPException(status_code=404, detail="Model not found")
 
         return {"success": True, "message": "模型已禁用"}
@@ -221,7 +223,9 @@ async def batch_update_models(request: BatchUpdateRequest, user: User = Depends(
             raise HTTPException(status_code=403, detail="Insufficient permissions")
 
         manager = get_model_manager()
-        count = manager.batch_update_enabled(request.model_ids, request.is_enabled)
+        count = await run_blocking(
+            manager.batch_update_enabled, request.model_ids, request.is_enabled
+        )
 
         action = "启用" if request.is_enabled else "禁用"
         return {"success": True, "count": count, "message": f"已{action} {count} 个模型"}
@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from ...auth.api_key_manager import get_api_key_manager
 from ...database.models import User
 from ...utils.errors import AuthenticationError, InvalidRequestError
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 from ..middleware.user_auth import verify_user_token
 from ..schemas.api_key import (
@@ -69,14 +70,18 @@ async def create_api_key(
         from ...organizations.manager import get_organization_manager
 
         org_manager = get_organization_manager()
-        org = org_manager.get_organization(request.organization_id)
+        org = await run_blocking(org_manager.get_organization, request.organization_id)
         if not org:
             raise InvalidRequestError(f"Organization not found: {request.organization_id}")
 
         # 检查该组织是否已经有活跃的API Key（一个组织只能有一个活跃的API Key）
         api_key_manager = get_api_key_manager()
-        existing_keys, total = api_key_manager.list_keys(
-            organization_id=request.organization_id, page=1, limit=1, status="active"
+        existing_keys, total = await run_blocking(
+            api_key_manager.list_keys,
+            organization_id=request.organization_id,
+            page=1,
+            limit=1,
+            status="active",
         )
 
         if total > 0:
@@ -92,7 +97,8 @@ async def create_api_key(
         permissions = ["read", "write"]
 
         # 创建API Key（不设置过期时间）
-        new_key, key_value = api_key_manager.create_key(
+        new_key, key_value = await run_blocking(
+            api_key_manager.create_key,
             organization_id=request.organization_id,
             name=key_name,
             description=key_description,
@@ -157,8 +163,13 @@ async def list_api_keys(
         # 查询API Key列表（登录用户都可以查看）
         api_key_manager = get_api_key_manager()
         # 如果指定了组织ID，只查询该组织的；否则查询所有（admin用户）或根据用户权限查询
-        keys, total = api_key_manager.list_keys(
-            organization_id=organization_id, page=page, limit=limit, status=status, search=search
+        keys, total = await run_blocking(
+            api_key_manager.list_keys,
+            organization_id=organization_id,
+            page=page,
+            limit=limit,
+            status=status,
+            search=search,
         )
 
         # 获取组织管理器，用于查询组织名称
@@ -170,7 +181,7 @@ async def list_api_keys(
         org_ids = list(set(k.organization_id for k in keys))
         org_map = {}
         for org_id in org_ids:
-            org = org_manager.get_organization(org_id)
+            org = await run_blocking(org_manager.get_organization, org_id)
             if org:
                 org_map[org_id] = org.name
 
@@ -210,7 +221,7 @@ async def get_api_key(key_id: str, user: User = Depends(verify_user_token)) -> A
     try:
         # 查询API Key
         api_key_manager = get_api_key_manager()
-        key = api_key_manager.get_key(key_id)
+        key = await run_blocking(api_key_manager.get_key, key_id)
 
         if not key:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API Key not found")
@@ -252,7 +263,7 @@ async def update_api_key(
 
         # 查询API Key
         api_key_manager = get_api_key_manager()
-        key = api_key_manager.get_key(key_id)
+        key = await run_blocking(api_key_manager.get_key, key_id)
 
         if not key:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API Key not found")
@@ -266,7 +277,8 @@ async def update_api_key(
                 raise InvalidRequestError(f"Invalid expires_at format: {request.expires_at}")
 
         # 更新API Key
-        updated_key = api_key_manager.update_key(
+        updated_key = await run_blocking(
+            api_key_manager.update_key,
             key_id=key_id,
             name=request.name,
             description=request.description,
@@ -311,13 +323,13 @@ async def delete_api_key(key_id: str, user: User = Depends(verify_user_token)) -
 
         # 查询API Key
         api_key_manager = get_api_key_manager()
-        key = api_key_manager.get_key(key_id)
+        key = await run_blocking(api_key_manager.get_key, key_id)
 
         if not key:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API Key not found")
 
         # 删除API Key
-        success = api_key_manager.delete_key(key_id)
+        success = await run_blocking(api_key_manager.delete_key, key_id)
 
         if not success:
             raise HTTPException(
@@ -50,7 +50,7 @@ async def login(
       LoginResponse: 登录响应（包含JWT token）
     """
     try:
-        user = user_manager.verify_user(request.username, request.password)
+        user = await user_manager.verify_user_async(request.username, request.password)
 
         if not user:
             raise HTTPException(
@@ -4,33 +4,69 @@
 处理聊天完成请求（普通模式和流式模式）
 """
 
-import json
+import asyncio
 import time
-from typing import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, List, Optional
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import StreamingResponse
 from starlette.responses import Response
 
-from ...database.connection import get_db
-from ...database.models import Organization
-from ...models.manager import get_model_manager
+from ...config import get_settings
+from ...metrics import UNKNOWN_LABEL, get_metrics
+from ...models.catalog import get_model_catalog
 from ...organizations.limits import get_limit_checker
-from ...router import get_model_router
+from ...organizations.storage import get_organization_storage
+from ...providers.circuit_breaker import get_circuit_breakers
+from ...providers.retry import is_retryable
+from ...router import get_health_tracker, get_model_registry, get_model_router
 from ...stats.collector import get_stats_collector
-from ...utils.errors import ModelNotFoundError
+from ...stats.stream_usage import StreamUsageAccumulator
+from ...utils import json_codec
+from ...utils.errors import ModelNotFoundError, ProviderUnavailableError
 from ...utils.logger import get_logger
+from ...utils.sse import content_chars, ensure_model, parse_usage_chunk
+from ...utils.timing import RequestTimer, get_request_timer, start_request_timer, timed
 from ..middleware.auth import verify_api_key
 from ..schemas.request import ChatRequest
 from ..schemas.response import ChatResponse
+from ..streaming import ClosingStreamingResponse, coalesce_events
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/v1", tags=["chat"])
 
+# 流式响应过程中检查客户端是否断开的最小间隔（秒）
+DISCONNECT_CHECK_INTERVAL = 0.25
+
+# 指定流式响应合并写入时间窗口的请求头（毫秒，或off）
+COALESCE_HEADER = "X-Stream-Coalesce"
+
+# 分阶段耗时响应头
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+@dataclass
+class _UpstreamTarget:
+    """一次上游调用的目标（已路由并转换请求格式）"""
+
+    model_id: str  # 完整模型ID
+    provider_name: str
+    provider: Any
+    response_adapter: Any
+    adapted_request: dict
+    model_name: str  # 发送给上游的模型名称
+    passthrough: bool = False  # 流式响应是否直通转发上游的SSE数据行
+
 
 @router.post("/chat/completions")
-async def create_completion(request: ChatRequest, api_key=Depends(verify_api_key)) -> Response:
+async def create_completion(
+    request: ChatRequest,
+    api_key=Depends(verify_api_key),
+    raw_request: Request = None,
+    response: Response = None,
+) -> Response:
     """
     创建聊天完成请求
 
@@ -39,16 +75,38 @@ async def create_completion(request: ChatRequest, api_key=Depends(verify_api_key
     Args:
       request: 聊天请求
       api_key: API Key（通过中间件验证）
+      raw_request: 原始HTTP请求（流式模式下用于检测客户端断开和读取合并写入请求头）
+      response: 普通模式下用于设置 Server-Timing 响应头
 
     Returns:
       聊天响应（普通模式）或流式响应（流式模式）
     """
     start_time = time.time()
+    settings = get_settings()
+    # 分阶段计时器（由日志中间件创建，直接调用时在这里创建）
+    timer = get_request_timer() or start_request_timer()
+    streaming = False
+    metrics = get_metrics()
+
+    # 提取提供商名称（逻辑模型在选定目标后更新）
+    model_id = request.model
+    provider_name = model_id.split("/")[0] if "/" in model_id else "unknown"
 
     try:
-        # 验证模型是否启用
-        model_manager = get_model_manager()
-        db_model = model_manager.get_model(request.model)
+        # 验证模型是否启用（查询内存中的模型目录，不访问数据库）
+        with timer.stage("model_lookup"):
+            catalog = get_model_catalog()
+            db_model = catalog.get_model(model_id)
+
+            # 逻辑模型（别名）：按上游健康状况选择一个已启用的目标模型
+            if db_model is None and get_model_registry().get_alias(model_id) is not None:
+                model_id = get_model_router().resolve(
+                    model_id,
+                    stream=bool(request.stream),
+                    is_enabled=lambda target: _is_model_enabled(catalog, target),
+                )
+                provider_name = model_id.split("/")[0]
+                db_model = catalog.get_model(model_id)
 
         if not db_model:
             raise ModelNotFoundError(f"Model not found: {request.model}")
@@ -56,121 +114,378 @@ async def create_completion(request: ChatRequest, api_key=Depends(verify_api_key
         if not db_model.is_enabled:
             raise ModelNotFoundError(f"Model is not enabled: {request.model}")
 
-        # 检查组织使用限制
+        # 检查组织使用限制（异步查询，不阻塞事件循环）
         if api_key.organization_id:
-            db = next(get_db())
-            try:
-                org = (
-                    db.query(Organization)
-                    .filter(Organization.id == api_key.organization_id)
-                    .first()
-                )
+            with timer.stage("limit_check"):
+                org = await get_organization_storage().get_async(api_key.organization_id)
                 if org:
                     limit_checker = get_limit_checker()
                     # 预检查（使用估算值）
-                    limit_checker.check_limits(org, additional_requests=1, additional_tokens=100)
-            finally:
-                db.close()
-
-        # 路由到对应的提供商
-        model_router = get_model_router()
-        route_result = model_router.route(request.model)
-        provider = route_result[0]
-        request_adapter = route_result[1]
-        response_adapter = route_result[2]
-        model_name = route_result[3]
-
-        # 提取提供商名称
-        provider_name = request.model.split("/")[0] if "/" in request.model else "unknown"
-
-        # 转换请求格式
-        request_dict = request.dict(exclude_none=True)
-        adapted_request = request_adapter.adapt(request_dict)
+                    await limit_checker.check_limits_async(
+                        org, additional_requests=1, additional_tokens=100
+                    )
+
+        with timer.stage("adapt_request"):
+            # 路由到对应的提供商并转换请求格式（熔断中时改用回退目标）
+            request_dict = request.dict(exclude_none=True)
+            fallbacks = _FallbackChain(model_id, request.model, request_dict, catalog)
+            try:
+                target = _route_target(model_id, request_dict)
+            except ProviderUnavailableError as e:
+                target = fallbacks.next(e)
+                if target is None:
+                    raise
+                _log_fallback(model_id, target, e)
+                model_id, provider_name = target.model_id, target.provider_name
 
         # 如果是流式模式
         if request.stream:
-            return StreamingResponse(
-                _stream_chat_completion(
-                    provider, response_adapter, adapted_request, model_name, request.model
-                ),
-                media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                },
+            # 计时器由流式生成器结束时汇总
+            streaming = True
+            body = _stream_chat_completion(
+                target.provider,
+                target.response_adapter,
+                target.adapted_request,
+                target.model_name,
+                model_id,
+                api_key=api_key,
+                provider_name=provider_name,
+                passthrough=target.passthrough,
+                is_disconnected=raw_request.is_disconnected if raw_request else None,
+                timer=timer,
+                server_timing=settings.server_timing_enabled,
+                requested_model=request.model,
+                fallback=fallbacks.next,
             )
 
-        # 普通模式
-        provider_response = await provider.chat_completion(
-            messages=adapted_request["messages"],
-            model=model_name,
-            temperature=adapted_request.get("temperature"),
-            max_tokens=adapted_request.get("max_tokens"),
-            top_p=adapted_request.get("top_p"),
-            frequency_penalty=adapted_request.get("frequency_penalty"),
-            presence_penalty=adapted_request.get("presence_penalty"),
-            stream=False,
-        )
-
-        # 转换响应格式
-        response_data = response_adapter.adapt(provider_response)
+            # 合并写入（减少高吞吐客户端的写入次数）
+            coalesce_window = _coalesce_window(raw_request)
+            if coalesce_window > 0:
+                body = coalesce_events(body, coalesce_window, settings.stream_coalesce_max_bytes)
+
+            headers = {
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            }
+            # 响应头只包含开始推送前的阶段，完整耗时在流结尾的SSE注释中
+            if settings.server_timing_enabled:
+                headers[SERVER_TIMING_HEADER] = timer.header_value()
+
+            return ClosingStreamingResponse(
+                body,
+                media_type="text/event-stream",
+                headers=headers,
+            )
 
-        # 确保响应ID和时间戳存在
-        if "id" not in response_data or not response_data["id"]:
-            response_data["id"] = f"chatcmpl-{int(time.time())}"
-        if "created" not in response_data or not response_data["created"]:
-            response_data["created"] = int(time.time())
+        # 普通模式（可重试的失败依次改用回退目标）
+        while True:
+            adapted_request = target.adapted_request
+            upstream_start = time.perf_counter()
+            try:
+                with timer.stage("upstream"):
+                    provider_response = await target.provider.chat_completion(
+                        messages=adapted_request["messages"],
+                        model=target.model_name,
+                        temperature=adapted_request.get("temperature"),
+                        max_tokens=adapted_request.get("max_tokens"),
+                        top_p=adapted_request.get("top_p"),
+                        frequency_penalty=adapted_request.get("frequency_penalty"),
+                        presence_penalty=adapted_request.get("presence_penalty"),
+                        stream=False,
+                    )
+                break
+            except Exception as e:
+                metrics.record_upstream_error(provider_name, model_id, e)
+                _record_upstream_failure(model_id, e)
+                target = fallbacks.next(e)
+                if target is None:
+                    raise
+                _log_fallback(model_id, target, e)
+                model_id, provider_name = target.model_id, target.provider_name
+        get_health_tracker().record_success(model_id, latency=time.perf_counter() - upstream_start)
+
+        with timer.stage("adapt_response"):
+            # 转换响应格式
+            response_data = target.response_adapter.adapt(provider_response)
+
+            # 确保响应ID和时间戳存在
+            if "id" not in response_data or not response_data["id"]:
+                response_data["id"] = f"chatcmpl-{int(time.time())}"
+            if "created" not in response_data or not response_data["created"]:
+                response_data["created"] = int(time.time())
+
+            chat_response = ChatResponse(**response_data)
 
         process_time = time.time() - start_time
 
-        # 记录统计数据
+        # 记录统计数据（放入队列后台批量写入，费用在写入时计算）
         try:
-            stats_collector = get_stats_collector()
-            # 计算费用（如果有的话，这里简化处理）
-            cost = None  # TODO: 根据模型和token数计算费用
-
-            stats_collector.record_request_sync(
-                api_key_id=api_key.id,
-                organization_id=api_key.organization_id,
-                model=request.model,
-                provider=provider_name,
-                prompt_tokens=provider_response.prompt_tokens,
-                completion_tokens=provider_response.completion_tokens,
-                total_tokens=provider_response.total_tokens,
-                cost=cost,
-            )
+            with timer.stage("stats_enqueue"):
+                stats_collector = get_stats_collector()
+                cost = None
+
+                stats_collector.enqueue(
+                    api_key_id=api_key.id,
+                    organization_id=api_key.organization_id,
+                    model=model_id,
+                    provider=provider_name,
+                    prompt_tokens=provider_response.prompt_tokens,
+                    completion_tokens=provider_response.completion_tokens,
+                    total_tokens=provider_response.total_tokens,
+                    cost=cost,
+                    requested_model=request.model,
+                )
         except Exception as e:
             logger.warning(f"Failed to record stats: {e}", exc_info=e)
 
         logger.info(
             "Chat completion completed",
-            model=request.model,
+            model=model_id,
             process_time=f"{process_time:.3f}s",
             tokens=provider_response.total_tokens,
         )
 
-        return ChatResponse(**response_data)
+        metrics.record_request(
+            provider_name,
+            model_id,
+            api_key.organization_id,
+            stream=False,
+            status="success",
+            duration=timer.elapsed(),
+            prompt_tokens=provider_response.prompt_tokens,
+            completion_tokens=provider_response.completion_tokens,
+        )
+
+        if settings.server_timing_enabled and response is not None:
+            response.headers[SERVER_TIMING_HEADER] = timer.header_value()
+
+        return chat_response
 
     except ModelNotFoundError as e:
         logger.error(f"Model not found: {request.model}")
+        # 模型ID来自请求，不存在的模型不作为标签值
+        metrics.record_request(
+            UNKNOWN_LABEL,
+            UNKNOWN_LABEL,
+            api_key.organization_id,
+            stream=bool(request.stream),
+            status="error",
+            duration=timer.elapsed(),
+        )
         raise
     except Exception as e:
         logger.exception("Chat completion error", exc_info=e)
+        metrics.record_request(
+            provider_name,
+            model_id,
+            api_key.organization_id,
+            stream=bool(request.stream),
+            status="error",
+            duration=timer.elapsed(),
+        )
         raise
+    finally:
+        if not streaming:
+            timer.finish()
+
+
+def _is_model_enabled(catalog, model_id: str) -> bool:
+    """模型是否在模型目录中且已启用"""
+    entry = catalog.get_model(model_id)
+    return entry is not None and entry.is_enabled
+
+
+def _route_target(model_id: str, request_dict: dict) -> _UpstreamTarget:
+    """
+    路由到目标模型并转换请求格式
+
+    Args:
+      model_id: 目标模型ID
+      request_dict: 客户端请求
+
+    Returns:
+      _UpstreamTarget: 上游目标
+
+    Raises:
+      ModelNotFoundError: 模型或提供商不存在
+      ProviderUnavailableError: 提供商或模型熔断中
+    """
+    provider, request_adapter, response_adapter, model_name = get_model_router().route(model_id)
+    provider_name = model_id.split("/")[0] if "/" in model_id else "unknown"
+    adapted_request = request_adapter.adapt(request_dict)
+    # 提供商或模型熔断中时立即失败（流式请求在发送响应头之前失败）
+    get_circuit_breakers().ensure_available(provider_name, model_name)
+    return _UpstreamTarget(
+        model_id=model_id,
+        provider_name=provider_name,
+        provider=provider,
+        response_adapter=response_adapter,
+        adapted_request=adapted_request,
+        model_name=model_name,
+        passthrough=get_settings().stream_passthrough and provider.supports_raw_stream,
+    )
+
+
+def _should_fall_back(error: BaseException) -> bool:
+    """
+    判断上游失败是否应改用回退目标
+
+    与重试的判断一致（超时、连接错误、408、429和5xx），熔断中也回退；
+    其他4xx（参数错误、认证失败等）换一个上游也不会成功
+
+    Args:
+      error: 调用上游时的异常
+
+    Returns:
+      bool: 是否回退
+    """
+    return isinstance(error, ProviderUnavailableError) or is_retryable(error)
+
+
+class _FallbackChain:
+    """一次请求的回退目标（第一次失败时才解析回退链）"""
+
+    def __init__(self, model_id: str, requested_model: str, request_dict: dict, catalog):
+        """
+        初始化回退目标
+
+        Args:
+          model_id: 首选的目标模型ID
+          requested_model: 客户端请求的模型ID（可能是逻辑模型）
+          request_dict: 客户端请求（按回退目标的适配器重新转换）
+          catalog: 模型目录（跳过未启用的回退目标）
+        """
+        self.model_id = model_id
+        self.requested_model = requested_model
+        self.request_dict = request_dict
+        self.catalog = catalog
+        self._targets: Optional[List[str]] = None
+
+    def next(self, error: BaseException) -> Optional[_UpstreamTarget]:
+        """
+        当前目标失败后选择下一个回退目标
+
+        熔断中或无法路由的回退目标直接跳过
+
+        Args:
+          error: 当前目标的异常
+
+        Returns:
+          _UpstreamTarget: 下一个目标，不应回退或没有可用的回退目标时返回None
+        """
+        settings = get_settings()
+        if not settings.fallback_enabled or not _should_fall_back(error):
+            return None
+        if self._targets is None:
+            self._targets = get_model_router().fallback_chain(
+                self.model_id,
+                requested_model=self.requested_model,
+                is_enabled=lambda target: _is_model_enabled(self.catalog, target),
+            )[: settings.fallback_max_attempts]
+
+        while self._targets:
+            model_id = self._targets.pop(0)
+            try:
+                return _route_target(model_id, self.request_dict)
+            except (ModelNotFoundError, ProviderUnavailableError) as e:
+                logger.warning(f"Skipping fallback target {model_id}: {e}")
+        return None
+
+
+def _log_fallback(model_id: str, target: _UpstreamTarget, error: BaseException) -> None:
+    """记录改用回退目标"""
+    logger.warning(
+        f"Upstream {model_id} failed, falling back to {target.model_id}",
+        error_type=type(error).__name__,
+        error=str(error),
+    )
+    get_metrics().record_fallback(model_id, target.model_id)
+
+
+def _record_upstream_failure(model_id: str, error: BaseException) -> None:
+    """
+    记录上游调用失败（用于逻辑模型的目标选择）
+
+    熔断中未调用上游的请求不计入
+
+    Args:
+      model_id: 目标模型ID
+      error: 异常
+    """
+    if not isinstance(error, ProviderUnavailableError):
+        get_health_tracker().record_failure(model_id)
+
+
+def _coalesce_window(raw_request: Optional[Request]) -> float:
+    """
+    获取流式响应合并写入的时间窗口
+
+    请求头 X-Stream-Coalesce 优先（毫秒，off或0表示不合并，不超过配置的最大值），
+    未指定或无效时使用配置的默认值
+
+    Args:
+      raw_request: 原始HTTP请求
+
+    Returns:
+      float: 时间窗口（秒），0表示不合并
+    """
+    settings = get_settings()
+    window_ms = settings.stream_coalesce_window_ms
+    value = raw_request.headers.get(COALESCE_HEADER) if raw_request is not None else None
+    if value is not None:
+        value = value.strip().lower()
+        if value in ("off", "false", "no"):
+            window_ms = 0.0
+        else:
+            try:
+                window_ms = min(max(float(value), 0.0), settings.stream_coalesce_max_window_ms)
+            except ValueError:
+                pass
+    return window_ms / 1000
 
 
 async def _stream_chat_completion(
-    provider, response_adapter, adapted_request: dict, model_name: str, model_id: str
+    provider,
+    response_adapter,
+    adapted_request: dict,
+    model_name: str,
+    model_id: str,
+    api_key=None,
+    provider_name: str = "unknown",
+    passthrough: bool = False,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    timer: Optional[RequestTimer] = None,
+    server_timing: bool = False,
+    requested_model: Optional[str] = None,
+    fallback: Optional[Callable[[BaseException], Optional[_UpstreamTarget]]] = None,
 ) -> AsyncIterator[str]:
     """
     流式聊天完成处理
 
+    客户端断开时停止读取并关闭上游流（不再消耗上游Token和连接），
+    流结束（包括出错或客户端断开）时按累计的用量记录一条统计
+
+    上游在返回第一个数据块之前失败时（客户端还没有收到任何内容），按 fallback
+    改用回退目标重新发起；之后的失败只能以错误块结束流
+
+    提供计时器时记录上游首字节时间（upstream_ttfb）和等待上游的总时间（upstream，
+    包含逐块的格式转换，不含向客户端写入的时间），流结束时汇总到耗时直方图。
+    请求指标（首Token时间、总耗时、Token用量）在流结束时记录
+
     Args:
       provider: 提供商实例
       response_adapter: 响应适配器
       adapted_request: 适配后的请求
       model_name: 模型名称
       model_id: 完整模型ID
+      api_key: API Key（用于记录统计，为None时不记录）
+      provider_name: 提供商名称
+      passthrough: 是否直通转发上游的SSE数据行（仅OpenAI兼容格式的提供商）
+      is_disconnected: 检查客户端是否已断开的回调（每 DISCONNECT_CHECK_INTERVAL 秒最多检查一次）
+      timer: 请求的分阶段计时器
+      server_timing: 是否在结束标记前发送分阶段耗时（SSE注释，客户端会忽略）
+      requested_model: 客户端请求的模型ID（用于记录统计）
+      fallback: 当前目标失败后返回下一个回退目标的回调，返回None时不回退
 
     Yields:
       SSE格式的响应块
@@ -179,39 +494,104 @@ async def _stream_chat_completion(
 
     stream_id = f"chatcmpl-{int(time.time())}"
     created_time = int(time.time())
+    usage = StreamUsageAccumulator(adapted_request.get("messages"))
+    received = False
+    disconnected = False
+    next_disconnect_check = time.monotonic() + DISCONNECT_CHECK_INTERVAL
+    metrics = get_metrics()
+    request_start = timer.start if timer is not None else time.perf_counter()
+    status = "success"
+    content_sent = False
+    ttft = None
+    # 当前目标开始请求的时间（健康状况的首Token时间不包含已失败目标的耗时）
+    attempt_start = time.perf_counter()
+    upstream_ttft = None
+
+    def open_events() -> AsyncGenerator[Optional[str], None]:
+        """向当前目标发起流式请求"""
+        request_kwargs = {
+            "messages": adapted_request["messages"],
+            "model": model_name,
+            "temperature": adapted_request.get("temperature"),
+            "max_tokens": adapted_request.get("max_tokens"),
+            "top_p": adapted_request.get("top_p"),
+            "frequency_penalty": adapted_request.get("frequency_penalty"),
+            "presence_penalty": adapted_request.get("presence_penalty"),
+        }
+        if passthrough:
+            return _passthrough_events(provider, response_adapter, request_kwargs, model_id, usage)
+        return _adapted_events(
+            provider, response_adapter, request_kwargs, model_id, usage, stream_id, created_time
+        )
 
+    events = open_events()
+    metrics.stream_started(provider_name)
     try:
-        async for chunk in provider.stream_chat_completion(
-            messages=adapted_request["messages"],
-            model=model_name,
-            temperature=adapted_request.get("temperature"),
-            max_tokens=adapted_request.get("max_tokens"),
-            top_p=adapted_request.get("top_p"),
-            frequency_penalty=adapted_request.get("frequency_penalty"),
-            presence_penalty=adapted_request.get("presence_penalty"),
-        ):
-            # 转换响应块格式
-            adapted_chunk = response_adapter.adapt_stream_chunk(chunk)
-
-            # 确保必需的字段存在
-            if "id" not in adapted_chunk:
-                adapted_chunk["id"] = stream_id
-            if "object" not in adapted_chunk:
-                adapted_chunk["object"] = "chat.completion.chunk"
-            if "created" not in adapted_chunk:
-                adapted_chunk["created"] = created_time
-            if "model" not in adapted_chunk:
-                adapted_chunk["model"] = model_id
-
-            # 格式化为SSE格式
-            chunk_json = json.dumps(adapted_chunk, ensure_ascii=False)
-            yield f"data: {chunk_json}\n\n"
-
-        # 发送结束标记
-        yield "data: [DONE]\n\n"
-
+        wait_start = time.perf_counter()
+        while True:
+            try:
+                async for event in events:
+                    if timer is not None:
+                        waited = time.perf_counter() - wait_start
+                        if not received:
+                            timer.add("upstream_ttfb", waited)
+                        timer.add("upstream", waited)
+                    received = True
+                    if is_disconnected is not None and time.monotonic() >= next_disconnect_check:
+                        next_disconnect_check = time.monotonic() + DISCONNECT_CHECK_INTERVAL
+                        if await is_disconnected():
+                            disconnected = True
+                            break
+                    if event is not None:
+                        if not content_sent and content_chars(event) > 0:
+                            content_sent = True
+                            ttft = time.perf_counter() - request_start
+                            upstream_ttft = time.perf_counter() - attempt_start
+                            metrics.record_time_to_first_token(provider_name, model_id, ttft)
+                        yield event
+                    wait_start = time.perf_counter()
+                break
+            except Exception as e:
+                # 只在还没有收到上游数据时回退（客户端尚未收到任何内容）
+                target = fallback(e) if fallback is not None and not received else None
+                if target is None:
+                    raise
+                metrics.record_upstream_error(provider_name, model_id, e)
+                _record_upstream_failure(model_id, e)
+                _log_fallback(model_id, target, e)
+                await events.aclose()
+                metrics.stream_finished(provider_name)
+
+                provider = target.provider
+                response_adapter = target.response_adapter
+                adapted_request = target.adapted_request
+                model_name = target.model_name
+                model_id = target.model_id
+                provider_name = target.provider_name
+                passthrough = target.passthrough
+                usage = StreamUsageAccumulator(adapted_request.get("messages"))
+                events = open_events()
+                metrics.stream_started(provider_name)
+                attempt_start = time.perf_counter()
+
+        if timer is not None and not disconnected:
+            timer.add("upstream", time.perf_counter() - wait_start)
+
+        # 发送分阶段耗时和结束标记（客户端已断开时不再发送）
+        if not disconnected:
+            if server_timing and timer is not None:
+                yield f": server-timing {timer.header_value()}\n\n"
+            yield "data: [DONE]\n\n"
+
+    except (GeneratorExit, asyncio.CancelledError):
+        # 响应被关闭或发送任务被取消（客户端断开）
+        disconnected = True
+        raise
     except Exception as e:
         logger.exception("Stream chat completion error", exc_info=e)
+        status = "error"
+        metrics.record_upstream_error(provider_name, model_id, e)
+        _record_upstream_failure(model_id, e)
         # 发送错误信息（SSE格式）
         error_chunk = {
             "id": stream_id,
@@ -220,4 +600,165 @@ async def _stream_chat_completion(
             "model": model_id,
             "error": {"message": str(e), "type": "stream_error"},
         }
-        yield f"data: {json.dumps(error_chunk, ensure_ascii=False)}\n\n"
+        yield f"data: {json_codec.dumps(error_chunk)}\n\n"
+    finally:
+        # 关闭上游流（退出httpx的stream上下文，释放连接）
+        await events.aclose()
+        metrics.stream_finished(provider_name)
+        if disconnected:
+            status = "cancelled"
+            logger.info(
+                "Client disconnected, upstream stream cancelled",
+                model=model_id,
+                chunks=usage.chunks,
+            )
+        if api_key is not None and received:
+            enqueue_start = time.perf_counter()
+            _record_stream_usage(api_key, model_id, provider_name, usage, requested_model)
+            if timer is not None:
+                timer.add("stats_enqueue", time.perf_counter() - enqueue_start)
+        if status == "success":
+            get_health_tracker().record_success(model_id, ttft=upstream_ttft)
+        totals = usage.totals() if received else {}
+        metrics.record_request(
+            provider_name,
+            model_id,
+            api_key.organization_id if api_key is not None else None,
+            stream=True,
+            status=status,
+            duration=time.perf_counter() - request_start,
+            prompt_tokens=totals.get("prompt_tokens", 0),
+            completion_tokens=totals.get("completion_tokens", 0),
+        )
+        if timer is not None:
+            timer.finish()
+
+
+async def _adapted_events(
+    provider,
+    response_adapter,
+    request_kwargs: dict,
+    model_id: str,
+    usage: StreamUsageAccumulator,
+    stream_id: str,
+    created_time: int,
+) -> AsyncGenerator[Optional[str], None]:
+    """
+    解析上游chunk，经响应适配器转换后重新序列化为SSE事件
+
+    Args:
+      provider: 提供商实例
+      response_adapter: 响应适配器
+      request_kwargs: 提供商流式接口的参数
+      model_id: 完整模型ID
+      usage: 用量累计器
+      stream_id: 缺少id时使用的响应ID
+      created_time: 缺少created时使用的时间戳
+
+    Yields:
+      SSE事件，不转发给客户端的chunk返回None
+    """
+    async with aclosing(provider.stream_chat_completion(**request_kwargs)) as chunks:
+        async for chunk in chunks:
+            chunk_usage = response_adapter.extract_stream_usage(chunk)
+            usage.add_usage(chunk_usage)
+            # 仅携带用量的chunk（无choices）不转发给客户端
+            if chunk_usage and "choices" in chunk and not chunk["choices"]:
+                yield None
+                continue
+
+            with timed("adapt_response"):
+                # 转换响应块格式
+                adapted_chunk = response_adapter.adapt_stream_chunk(chunk)
+                usage.add_chunk(adapted_chunk)
+
+                # 确保必需的字段存在
+                if "id" not in adapted_chunk:
+                    adapted_chunk["id"] = stream_id
+                if "object" not in adapted_chunk:
+                    adapted_chunk["object"] = "chat.completion.chunk"
+                if "created" not in adapted_chunk:
+                    adapted_chunk["created"] = created_time
+                if "model" not in adapted_chunk:
+                    adapted_chunk["model"] = model_id
+
+                # 格式化为SSE格式
+                chunk_json = json_codec.dumps(adapted_chunk)
+            yield f"data: {chunk_json}\n\n"
+
+
+async def _passthrough_events(
+    provider,
+    response_adapter,
+    request_kwargs: dict,
+    model_id: str,
+    usage: StreamUsageAccumulator,
+) -> AsyncGenerator[Optional[str], None]:
+    """
+    直通转发上游的SSE数据行
+
+    上游已经是统一格式，不做JSON解析和重新序列化：只解析携带用量的数据行，
+    缺少 model 字段时按字符串插入
+
+    Args:
+      provider: 提供商实例（supports_raw_stream 为True）
+      response_adapter: 响应适配器（用于提取用量）
+      request_kwargs: 提供商流式接口的参数
+      model_id: 完整模型ID
+      usage: 用量累计器
+
+    Yields:
+      SSE事件，不转发给客户端的chunk返回None
+    """
+    async with aclosing(provider.stream_chat_completion_raw(**request_kwargs)) as lines:
+        async for data in lines:
+            chunk = parse_usage_chunk(data)
+            if chunk is not None:
+                chunk_usage = response_adapter.extract_stream_usage(chunk)
+                usage.add_usage(chunk_usage)
+                # 仅携带用量的chunk（无choices）不转发给客户端
+                if chunk_usage and "choices" in chunk and not chunk["choices"]:
+                    yield None
+                    continue
+
+            usage.add_raw_chunk(data)
+            yield f"data: {ensure_model(data, model_id)}\n\n"
+
+
+def _record_stream_usage(
+    api_key,
+    model_id: str,
+    provider_name: str,
+    usage: StreamUsageAccumulator,
+    requested_model: Optional[str] = None,
+) -> None:
+    """
+    记录流式请求的统计数据
+
+    Args:
+      api_key: API Key
+      model_id: 完整模型ID（实际提供服务的目标模型）
+      provider_name: 提供商名称
+      usage: 用量累计器
+      requested_model: 客户端请求的模型ID
+    """
+    try:
+        totals = usage.totals()
+        get_stats_collector().enqueue(
+            api_key_id=api_key.id,
+            organization_id=api_key.organization_id,
+            model=model_id,
+            provider=provider_name,
+            prompt_tokens=totals["prompt_tokens"],
+            completion_tokens=totals["completion_tokens"],
+            total_tokens=totals["total_tokens"],
+            requested_model=requested_model,
+        )
+        logger.info(
+            "Stream chat completion recorded",
+            model=model_id,
+            tokens=totals["total_tokens"],
+            estimated=usage.estimated,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to record stream stats: {e}", exc_info=e)
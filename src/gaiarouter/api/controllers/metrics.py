@@ -0,0 +1,48 @@
+"""
+监控指标控制器
+
+提供Prometheus抓取的 /metrics 接口
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.responses import Response
+
+from ...config import get_settings
+from ...metrics import get_metrics
+from ...utils.errors import AuthenticationError
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None, alias="Authorization")) -> Response:
+    """
+    获取Prometheus文本格式的指标
+
+    配置了 METRICS_TOKEN 时需要携带 Authorization: Bearer <token>
+
+    Args:
+      authorization: Authorization header值
+
+    Returns:
+      指标内容
+
+    Raises:
+      HTTPException: 指标接口未开放（404）
+      AuthenticationError: Token不匹配
+    """
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if settings.metrics_token:
+        token = authorization[7:] if authorization and authorization.startswith("Bearer ") else ""
+        if not secrets.compare_digest(token, settings.metrics_token):
+            raise AuthenticationError("Invalid metrics token")
+
+    # CONTENT_TYPE_LATEST 已包含charset，通过media_type传入时Starlette会再追加一次
+    return Response(get_metrics().render(), headers={"Content-Type": CONTENT_TYPE_LATEST})
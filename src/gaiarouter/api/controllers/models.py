@@ -9,6 +9,7 @@ import time
 from fastapi import APIRouter, Depends
 
 from ...models.manager import get_model_manager
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 from ..middleware.auth import verify_api_key
 from ..schemas.response import ModelInfo, ModelsResponse
@@ -31,7 +32,7 @@ async def list_models(api_key=Depends(verify_api_key)) -> ModelsResponse:
     """
     # 从数据库获取启用的模型
     manager = get_model_manager()
-    models, _ = manager.list_models(enabled_only=True, limit=1000)
+    models, _ = await run_blocking(manager.list_models, enabled_only=True, limit=1000)
 
     model_list = []
     current_time = int(time.time())
@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from ...database.models import User
 from ...organizations.manager import get_organization_manager
 from ...utils.errors import AuthenticationError, InvalidRequestError
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 from ..middleware.user_auth import verify_user_token
 from ..schemas.api_key import APIKeyResponse, CreateAPIKeyRequest
@@ -66,7 +67,8 @@ async def create_organization(
 
         # 创建组织
         org_manager = get_organization_manager()
-        org = org_manager.create_organization(
+        org = await run_blocking(
+            org_manager.create_organization,
             name=request.name,
             description=request.description,
             admin_user_id=None,  # 创建组织时不需要管理员ID
@@ -112,8 +114,8 @@ async def list_organizations(
     try:
         # 查询组织列表（登录用户都可以查看）
         org_manager = get_organization_manager()
-        orgs, total = org_manager.list_organizations(
-            page=page, limit=limit, status=status, search=search
+        orgs, total = await run_blocking(
+            org_manager.list_organizations, page=page, limit=limit, status=status, search=search
         )
 
         # 转换为响应格式
@@ -153,7 +155,7 @@ async def get_organization(
     try:
         # 查询组织（登录用户都可以查看）
         org_manager = get_organization_manager()
-        org = org_manager.get_organization(org_id)
+        org = await run_blocking(org_manager.get_organization, org_id)
 
         if not org:
             raise HTTPException(
@@ -193,7 +195,7 @@ async def update_organization(
 
         # 查询组织
         org_manager = get_organization_manager()
-        org = org_manager.get_organization(org_id)
+        org = await run_blocking(org_manager.get_organization, org_id)
 
         if not org:
             raise HTTPException(
@@ -201,7 +203,8 @@ async def update_organization(
             )
 
         # 更新组织
-        updated_org = org_manager.update_organization(
+        updated_org = await run_blocking(
+            org_manager.update_organization,
             org_id=org_id,
             name=request.name,
             description=request.description,
@@ -250,7 +253,7 @@ async def delete_organization(org_id: str, user: User = Depends(verify_user_toke
 
         # 查询组织
         org_manager = get_organization_manager()
-        org = org_manager.get_organization(org_id)
+        org = await run_blocking(org_manager.get_organization, org_id)
 
         if not org:
             raise HTTPException(
@@ -258,7 +261,7 @@ async def delete_organization(org_id: str, user: User = Depends(verify_user_toke
             )
 
         # 删除组织
-        success = org_manager.delete_organization(org_id)
+        success = await run_blocking(org_manager.delete_organization, org_id)
 
         if not success:
             raise HTTPException(
@@ -324,52 +327,11 @@ async def get_organization_stats(
                 f"Invalid group_by: {group_by}. Must be one of {valid_group_by}"
             )
 
-        # 使用统计查询（通过组织ID查询该组织下所有API Key的统计）
-        from ...stats.query import StatsQuery, StatsQueryParams, get_stats_query
+        # 按统计记录的组织ID在数据库中分组聚合（单次查询，不逐个API Key加载）
+        from ...stats.query import StatsQueryParams, get_stats_query
 
         params = StatsQueryParams(start_date=start_dt, end_date=end_dt, group_by=group_by)
-
-        # 查询该组织下所有API Key的统计
-        from ...auth.key_storage import get_key_storage
-
-        key_storage = get_key_storage()
-        keys, _ = key_storage.list(filters={"organization_id": org_id}, page=1, limit=1000)
-
-        # 聚合所有API Key的统计
-        from ...stats.storage import get_stats_storage
-
-        stats_storage = get_stats_storage()
-
-        all_stats = []
-        for key in keys:
-            key_stats = stats_storage.get_key_stats(
-                key_id=key.id, start_date=start_dt, end_date=end_dt, group_by=group_by
-            )
-            all_stats.extend(key_stats)
-
-        # 获取摘要
-        summary = stats_storage.get_summary(all_stats)
-
-        # 构建响应
-        response = {
-            "organization_id": org_id,
-            "period": {
-                "start": (start_dt or datetime.utcnow()).isoformat() + "Z",
-                "end": (end_dt or datetime.utcnow()).isoformat() + "Z",
-            },
-            "summary": summary,
-        }
-
-        # 根据分组方式聚合数据
-        if params.group_by == "day":
-            by_date = stats_storage.aggregate_by_date(all_stats)
-            response["by_date"] = list(by_date.values())
-        elif params.group_by == "model":
-            by_model = stats_storage.aggregate_by_model(all_stats)
-            response["by_model"] = list(by_model.values())
-        elif params.group_by == "provider":
-            by_provider = stats_storage.aggregate_by_provider(all_stats)
-            response["by_provider"] = list(by_provider.values())
+        response = await run_blocking(get_stats_query().query_organization_stats, org_id, params)
 
         logger.info(f"Organization stats queried: {org_id}")
         return response
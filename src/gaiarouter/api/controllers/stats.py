@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, Query
 from ...database.models import User
 from ...stats.query import StatsQuery, StatsQueryParams, get_stats_query
 from ...utils.errors import InvalidRequestError
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 from ..middleware.user_auth import verify_user_token
 
@@ -70,7 +71,7 @@ async def get_key_stats(
 
         # 执行查询
         stats_query = get_stats_query()
-        result = stats_query.query_key_stats(key_id, params)
+        result = await run_blocking(stats_query.query_key_stats, key_id, params)
 
         logger.info("Key stats queried", key_id=key_id, group_by=group_by)
 
@@ -131,7 +132,7 @@ async def get_global_stats(
 
         # 执行查询
         stats_query = get_stats_query()
-        result = stats_query.query_global_stats(params)
+        result = await run_blocking(stats_query.query_global_stats, params)
 
         logger.info("Global stats queried", group_by=group_by)
 
@@ -12,6 +12,7 @@ from ...auth.api_key_manager import get_api_key_manager
 from ...database.models import APIKey
 from ...utils.errors import AuthenticationError
 from ...utils.logger import get_logger
+from ...utils.timing import timed
 
 logger = get_logger(__name__)
 
@@ -43,9 +44,10 @@ async def verify_api_key(
     if not api_key_value:
         raise AuthenticationError("Empty API Key")
 
-    # 从数据库验证API Key
+    # 验证API Key（优先查询缓存，未命中时通过异步引擎查询数据库）
     api_key_manager = get_api_key_manager()
-    api_key = api_key_manager.verify_key(api_key_value)
+    with timed("auth"):
+        api_key = await api_key_manager.verify_key_async(api_key_value)
 
     logger.debug("API Key verified", api_key_id=api_key.id)
     return api_key
@@ -2,6 +2,8 @@
 错误处理中间件
 """
 
+import math
+
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -56,8 +58,12 @@ async def error_handler(request: Request, exc: Exception) -> JSONResponse:
         error_response = ErrorResponse(
             error=ErrorDetail(message=exc.message, type=error_type, code=exc.code)
         )
+        headers = dict(cors_headers)
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            headers["Retry-After"] = str(max(math.ceil(retry_after), 1))
         return JSONResponse(
-            status_code=exc.status_code, content=error_response.dict(), headers=cors_headers
+            status_code=exc.status_code, content=error_response.dict(), headers=headers
         )
 
     elif isinstance(exc, RequestValidationError):
@@ -2,59 +2,96 @@
 日志中间件
 
 记录请求和响应日志
+
+实现为纯ASGI中间件：只从 http.response.start 消息中读取状态码和首字节时间，
+不包装响应体，流式响应（SSE）的每个数据块都直接传给服务器
 """
 
+import random
 import time
+from typing import Optional
 
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from ...config import get_settings
 from ...utils.logger import get_logger
+from ...utils.timing import start_request_timer
 
 logger = get_logger(__name__)
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """日志中间件"""
+class LoggingMiddleware:
+    """日志中间件（纯ASGI）"""
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp, sample_rate: Optional[float] = None):
         """
-        处理请求并记录日志
+        初始化中间件
 
         Args:
-          request: FastAPI请求对象
-          call_next: 下一个中间件或路由处理函数
+          app: 下游ASGI应用
+          sample_rate: "Request received" 日志的采样率（0-1），默认从配置读取
+        """
+        self.app = app
+        if sample_rate is None:
+            sample_rate = get_settings().request_log_sample_rate
+        self.sample_rate = sample_rate
 
-        Returns:
-          Response: HTTP响应
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        处理请求并记录日志
+
+        Args:
+          scope: ASGI连接信息
+          receive: 接收消息的可调用对象
+          send: 发送消息的可调用对象
         """
-        start_time = time.time()
-
-        # 记录请求信息
-        logger.info(
-            "Request received",
-            method=request.method,
-            path=request.url.path,
-            client_ip=request.client.host if request.client else None,
-        )
-
-        # 处理请求
-        response = await call_next(request)
-
-        # 计算处理时间
-        process_time = time.time() - start_time
-
-        # 记录响应信息
-        logger.info(
-            "Request completed",
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            process_time=f"{process_time:.3f}s",
-        )
-
-        return response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        # 分阶段计时器（认证、上游调用等阶段的耗时记录在这里）
+        start_request_timer()
+        method = scope["method"]
+        path = scope["path"]
+
+        # 记录请求信息（按采样率）
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            client = scope.get("client")
+            logger.info(
+                "Request received",
+                method=method,
+                path=path,
+                client_ip=client[0] if client else None,
+            )
+
+        status_code = 500
+        ttfb: Optional[float] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, ttfb
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                ttfb = time.perf_counter() - start_time
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 计算处理时间（流式响应为最后一个数据块发送完成的时间）
+            process_time = time.perf_counter() - start_time
+
+            # 记录响应信息
+            logger.info(
+                "Request completed",
+                method=method,
+                path=path,
+                status_code=status_code,
+                process_time=f"{process_time:.3f}s",
+                ttfb=f"{ttfb:.3f}s" if ttfb is not None else None,
+            )
 
 
 def log_request(request: Request, response: Response, duration: float):
@@ -12,6 +12,7 @@ from ...auth.jwt_token import get_token_manager
 from ...auth.user_manager import get_user_manager
 from ...database.models import User
 from ...utils.errors import AuthenticationError
+from ...utils.executor import run_blocking
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -53,7 +54,7 @@ async def verify_user_token(
 
     # 获取用户信息
     user_manager = get_user_manager()
-    user = user_manager.get_user(payload.get("user_id"))
+    user = await run_blocking(user_manager.get_user, payload.get("user_id"))
 
     if not user:
         raise AuthenticationError("User not found")
@@ -0,0 +1,129 @@
+"""
+流式响应
+
+客户端断开时确保响应生成器被关闭，以及将短时间内的多个SSE事件合并为一次写入
+"""
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from typing import AsyncIterator, Deque, List, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from ..utils.sse import content_chars
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    响应结束后（包括客户端断开和发送失败）关闭响应生成器的流式响应
+
+    Starlette收到 http.disconnect 时只取消发送任务，停在 yield 处的生成器不会被关闭，
+    要等到垃圾回收才执行其 finally；这里显式关闭，使上游连接立即释放、用量立即记录
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        发送流式响应
+
+        Args:
+          scope: ASGI连接信息
+          receive: 接收消息的可调用对象
+          send: 发送消息的可调用对象
+        """
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+async def coalesce_events(
+    events: AsyncIterator[str], window: float, max_bytes: int
+) -> AsyncIterator[str]:
+    """
+    将时间窗口内的多个SSE事件合并为一次写入
+
+    事件本身不做修改（客户端收到的事件序列不变），只减少写入次数。
+    第一个携带内容的事件及其之前的事件立即发送，不影响首字延迟；之后的事件从缓冲区
+    第一个事件起最多等待 window 秒，或缓冲区达到 max_bytes 时发送。上游由后台任务读取，
+    上游停顿时缓冲区仍会按时发送
+
+    Args:
+      events: SSE事件（字符串）
+      window: 合并窗口（秒）
+      max_bytes: 缓冲区达到该字符数时立即发送
+
+    Yields:
+      一个或多个SSE事件拼接成的字符串
+    """
+    loop = asyncio.get_running_loop()
+    queue: Deque[str] = deque()
+    wake = asyncio.Event()
+    finished = False
+    error: Optional[BaseException] = None
+
+    async def pump() -> None:
+        nonlocal finished, error
+        try:
+            async for event in events:
+                queue.append(event)
+                wake.set()
+        except Exception as e:
+            error = e
+        finally:
+            finished = True
+            wake.set()
+
+    task = asyncio.create_task(pump())
+    buffer: List[str] = []
+    size = 0
+    flush_at = 0.0
+    timer: Optional[asyncio.TimerHandle] = None
+    content_sent = False
+
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+
+            while queue:
+                event = queue.popleft()
+                if not content_sent:
+                    content_sent = content_chars(event) > 0
+                    yield event
+                    continue
+
+                if not buffer:
+                    flush_at = loop.time() + window
+                    timer = loop.call_at(flush_at, wake.set)
+                buffer.append(event)
+                size += len(event)
+                if size >= max_bytes:
+                    timer.cancel()
+                    data, buffer, size = "".join(buffer), [], 0
+                    yield data
+
+            if buffer and (finished or loop.time() >= flush_at):
+                timer.cancel()
+                data, buffer, size = "".join(buffer), [], 0
+                yield data
+
+            if finished and not queue:
+                break
+
+        if error is not None:
+            raise error
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not task.done():
+            # 取消读取任务会关闭上游事件流（客户端断开时）
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -5,13 +5,18 @@
 """
 
 from .api_key_manager import APIKeyManager, get_api_key_manager
+from .key_cache import APIKeyCache
 from .key_storage import KeyStorage, get_key_storage
+from .last_used import LastUsedTracker, get_last_used_tracker
 from .permission import Permission
 
 __all__ = [
     "APIKeyManager",
     "get_api_key_manager",
+    "APIKeyCache",
     "KeyStorage",
     "get_key_storage",
+    "LastUsedTracker",
+    "get_last_used_tracker",
     "Permission",
 ]
@@ -9,10 +9,13 @@ import secrets
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+from ..config import get_settings
 from ..database.models import APIKey
 from ..utils.errors import AuthenticationError, InvalidRequestError
 from ..utils.logger import get_logger
+from .key_cache import APIKeyCache
 from .key_storage import KeyStorage, get_key_storage
+from .last_used import get_last_used_tracker
 from .permission import Permission
 
 logger = get_logger(__name__)
@@ -29,6 +32,13 @@ class APIKeyManager:
         self.logger = get_logger(__name__)
         self.storage = get_key_storage()
 
+        settings = get_settings()
+        self.cache = APIKeyCache(
+            max_size=settings.api_key_cache_size,
+            ttl=settings.api_key_cache_ttl,
+            negative_ttl=settings.api_key_cache_negative_ttl,
+        )
+
     def _generate_key_id(self) -> str:
         """
         生成唯一的API Key ID
@@ -109,6 +119,7 @@ class APIKeyManager:
 
             # 保存到数据库
             if self.storage.save(api_key):
+                self.cache.invalidate(api_key_value)
                 self.logger.info(f"API Key created: {key_id}")
                 return api_key, api_key_value
             else:
@@ -199,7 +210,9 @@ class APIKeyManager:
 
             if updates:
                 updates["updated_at"] = datetime.utcnow()
-                if self.storage.update(key_id, updates):
+                updated = self.storage.update(key_id, updates)
+                self.cache.invalidate_id(key_id)
+                if updated:
                     return self.get_key(key_id)
 
             return None
@@ -217,7 +230,9 @@ class APIKeyManager:
         Returns:
           bool: 是否成功删除
         """
-        return self.storage.delete(key_id)
+        deleted = self.storage.delete(key_id)
+        self.cache.invalidate_id(key_id)
+        return deleted
 
     def verify_key(self, api_key: str) -> APIKey:
         """
@@ -233,26 +248,40 @@ class APIKeyManager:
           AuthenticationError: 如果API Key无效
         """
         try:
-            # 直接查询数据库（使用原始key）
-            db_key = self.storage.get_by_key(api_key)
+            # 优先查询缓存，未命中时查询数据库（使用原始key）
+            cached, db_key = self.cache.get(api_key)
+            if not cached:
+                db_key = self.storage.get_by_key(api_key)
+                self._cache_lookup(api_key, db_key)
 
-            if not db_key:
-                raise AuthenticationError("Invalid API Key")
+            return self._validate(db_key)
 
-            # 检查状态
-            if db_key.status != "active":
-                raise AuthenticationError(f"API Key is {db_key.status}")
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            self.logger.exception("Failed to verify API Key", exc_info=e)
+            raise AuthenticationError("Failed to verify API Key")
 
-            # 检查过期时间
-            if db_key.expires_at and db_key.expires_at < datetime.utcnow():
-                # 更新状态为过期
-                self.update_key(db_key.id, status="expired")
-                raise AuthenticationError("API Key has expired")
+    async def verify_key_async(self, api_key: str) -> APIKey:
+        """
+        验证API Key有效性（异步，缓存未命中时通过异步引擎查询数据库）
 
-            # 更新最后使用时间
-            self.storage.update_last_used(db_key.id)
+        Args:
+          api_key: API Key值
+
+        Returns:
+          APIKey: API Key对象
+
+        Raises:
+          AuthenticationError: 如果API Key无效
+        """
+        try:
+            cached, db_key = self.cache.get(api_key)
+            if not cached:
+                db_key = await self.storage.get_by_key_async(api_key)
+                self._cache_lookup(api_key, db_key)
 
-            return db_key
+            return self._validate(db_key)
 
         except AuthenticationError:
             raise
@@ -260,6 +289,44 @@ class APIKeyManager:
             self.logger.exception("Failed to verify API Key", exc_info=e)
             raise AuthenticationError("Failed to verify API Key")
 
+    def _cache_lookup(self, api_key: str, db_key: Optional[APIKey]) -> None:
+        """缓存数据库查询结果（不存在的Key写入负缓存）"""
+        if db_key:
+            self.cache.set(api_key, db_key)
+        else:
+            self.cache.set_missing(api_key)
+
+    def _validate(self, db_key: Optional[APIKey]) -> APIKey:
+        """
+        检查API Key状态和过期时间，并记录最后使用时间
+
+        Args:
+          db_key: API Key对象
+
+        Returns:
+          APIKey: API Key对象
+
+        Raises:
+          AuthenticationError: 如果API Key无效
+        """
+        if not db_key:
+            raise AuthenticationError("Invalid API Key")
+
+        # 检查状态
+        if db_key.status != "active":
+            raise AuthenticationError(f"API Key is {db_key.status}")
+
+        # 检查过期时间
+        if db_key.expires_at and db_key.expires_at < datetime.utcnow():
+            # 更新状态为过期（之后的请求会因状态检查失败，不再写库）
+            self.update_key(str(db_key.id), status="expired")
+            raise AuthenticationError("API Key has expired")
+
+        # 记录最后使用时间（后台批量写入）
+        get_last_used_tracker().touch(str(db_key.id))
+
+        return db_key
+
 
 def get_api_key_manager() -> APIKeyManager:
     """
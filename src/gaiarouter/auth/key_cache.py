@@ -0,0 +1,164 @@
+"""
+API Key验证缓存
+
+进程内LRU缓存，带TTL和未知Key的负缓存，避免每次请求都查询数据库
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..database.models import APIKey
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class APIKeyCache:
+    """API Key验证缓存（按Key原始值索引）"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, negative_ttl: float = 10.0):
+        """
+        初始化缓存
+
+        Args:
+          max_size: 最大缓存条目数（超出后淘汰最久未使用的条目）
+          ttl: 有效Key的缓存时间（秒）
+          negative_ttl: 未知Key的负缓存时间（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        # key_value -> (APIKey或None, 过期时间)
+        self._entries: "OrderedDict[str, Tuple[Optional[APIKey], float]]" = OrderedDict()
+        # key_id -> key_value，用于按ID失效
+        self._id_index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key_value: str) -> Tuple[bool, Optional[APIKey]]:
+        """
+        查询缓存
+
+        Args:
+          key_value: API Key原始值
+
+        Returns:
+          tuple: (是否命中, APIKey对象)，负缓存命中时返回 (True, None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key_value)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            api_key, expires_at = entry
+            if expires_at <= now:
+                self._remove(key_value)
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key_value)
+            if api_key is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, api_key
+
+    def set(self, key_value: str, api_key: APIKey) -> None:
+        """
+        缓存有效的API Key
+
+        Args:
+          key_value: API Key原始值
+          api_key: API Key对象
+        """
+        with self._lock:
+            if self._store(key_value, api_key, self.ttl):
+                self._id_index[str(api_key.id)] = key_value
+
+    def set_missing(self, key_value: str) -> None:
+        """
+        负缓存不存在的API Key
+
+        Args:
+          key_value: API Key原始值
+        """
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._store(key_value, None, self.negative_ttl)
+
+    def invalidate(self, key_value: str) -> None:
+        """
+        按Key原始值失效
+
+        Args:
+          key_value: API Key原始值
+        """
+        with self._lock:
+            self._remove(key_value)
+
+    def invalidate_id(self, key_id: str) -> None:
+        """
+        按API Key ID失效（更新或删除Key时调用）
+
+        Args:
+          key_id: API Key ID
+        """
+        with self._lock:
+            key_value = self._id_index.get(key_id)
+            if key_value is not None:
+                self._remove(key_value)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._id_index.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        获取缓存统计（用于评估缓存大小）
+
+        Returns:
+          dict: 命中/未命中计数、当前大小和命中率
+        """
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store(self, key_value: str, api_key: Optional[APIKey], ttl: float) -> bool:
+        """写入条目并按LRU淘汰（调用方需持有锁），缓存被禁用时返回False"""
+        if self.max_size <= 0:
+            return False
+        self._entries[key_value] = (api_key, time.monotonic() + ttl)
+        self._entries.move_to_end(key_value)
+
+        while len(self._entries) > self.max_size:
+            _, (evicted_key, _) = self._entries.popitem(last=False)
+            if evicted_key is not None:
+                self._id_index.pop(str(evicted_key.id), None)
+            self.evictions += 1
+        return True
+
+    def _remove(self, key_value: str) -> None:
+        """删除条目（调用方需持有锁）"""
+        entry = self._entries.pop(key_value, None)
+        if entry is not None and entry[0] is not None:
+            self._id_index.pop(str(entry[0].id), None)
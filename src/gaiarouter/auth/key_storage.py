@@ -7,10 +7,10 @@ API Key存储模块
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, or_, select, update
 from sqlalchemy.orm import Session
 
-from ..database.connection import get_db
+from ..database.connection import get_async_session, get_db
 from ..database.models import APIKey
 from ..utils.logger import get_logger
 
@@ -96,25 +96,22 @@ class KeyStorage:
             self.logger.exception("Failed to get API Key by value", exc_info=e)
             return None
 
-    def get_by_key_hash(self, key_hash: str) -> Optional[APIKey]:
+    async def get_by_key_async(self, key_value: str) -> Optional[APIKey]:
         """
-        通过API Key哈希值查询
+        通过API Key原始值查询（异步，不阻塞事件循环）
 
         Args:
-          key_hash: API Key哈希值
+          key_value: API Key原始值
 
         Returns:
           Optional[APIKey]: API Key对象，如果不存在返回None
         """
         try:
-            db = next(get_db())
-            try:
-                key = db.query(APIKey).filter(APIKey.key_hash == key_hash).first()
-                return key
-            finally:
-                db.close()
+            async with get_async_session() as db:
+                result = await db.execute(select(APIKey).where(APIKey.key == key_value))
+                return result.scalars().first()
         except Exception as e:
-            self.logger.exception("Failed to get API Key by hash", exc_info=e)
+            self.logger.exception("Failed to get API Key by value", exc_info=e)
             return None
 
     def list(
@@ -263,6 +260,40 @@ class KeyStorage:
             self.logger.exception("Failed to update last used", exc_info=e)
             return False
 
+    def bulk_update_last_used(self, last_used: Dict[str, datetime]) -> int:
+        """
+        批量更新API Key最后使用时间（单条UPDATE语句）
+
+        Args:
+          last_used: API Key ID到最后使用时间的映射
+
+        Returns:
+          int: 更新的行数
+
+        Raises:
+          Exception: 数据库写入失败（由调用方决定是否重试）
+        """
+        if not last_used:
+            return 0
+
+        db = next(get_db())
+        try:
+            stmt = (
+                update(APIKey)
+                .where(APIKey.id.in_(list(last_used.keys())))
+                .values(last_used_at=case(last_used, value=APIKey.id))
+                .execution_options(synchronize_session=False)
+            )
+            result = db.execute(stmt)
+            db.commit()
+            return result.rowcount
+        except Exception as e:
+            db.rollback()
+            self.logger.error(f"Failed to bulk update last used: {e}", exc_info=e)
+            raise
+        finally:
+            db.close()
+
 
 def get_key_storage() -> KeyStorage:
     """
@@ -0,0 +1,122 @@
+"""
+API Key最后使用时间的延迟写入
+
+在内存中合并last_used_at更新，定期以一条批量UPDATE写入数据库
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..config import get_settings
+from ..utils.executor import run_blocking
+from ..utils.logger import get_logger
+from .key_storage import get_key_storage
+
+logger = get_logger(__name__)
+
+# 全局追踪器实例
+_last_used_tracker: Optional["LastUsedTracker"] = None
+
+
+class LastUsedTracker:
+    """API Key最后使用时间追踪器（write-behind）"""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        """
+        初始化追踪器
+
+        Args:
+          flush_interval: 刷新间隔（秒），默认从配置读取
+        """
+        if flush_interval is None:
+            flush_interval = get_settings().api_key_last_used_flush_interval
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        """待写入的Key数量"""
+        return len(self._pending)
+
+    def touch(self, key_id: str, used_at: Optional[datetime] = None) -> None:
+        """
+        记录API Key被使用（仅更新内存，不访问数据库）
+
+        Args:
+          key_id: API Key ID
+          used_at: 使用时间，默认为当前时间
+        """
+        used_at = used_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending.get(key_id)
+            if previous is None or used_at > previous:
+                self._pending[key_id] = used_at
+
+    def flush(self) -> int:
+        """
+        将合并后的最后使用时间写入数据库
+
+        写入失败时将数据放回待写入队列，等待下次刷新
+
+        Returns:
+          int: 写入的Key数量
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = {}
+
+        try:
+            get_key_storage().bulk_update_last_used(batch)
+            logger.debug("Flushed API Key last used timestamps", count=len(batch))
+            return len(batch)
+        except Exception as e:
+            logger.warning(f"Failed to flush last used timestamps: {e}")
+            with self._lock:
+                for key_id, used_at in batch.items():
+                    previous = self._pending.get(key_id)
+                    if previous is None or used_at > previous:
+                        self._pending[key_id] = used_at
+            return 0
+
+    async def start(self) -> None:
+        """启动后台定期刷新任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Last used tracker started", flush_interval=self.flush_interval)
+
+    async def stop(self) -> None:
+        """停止后台任务并写入剩余数据"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_blocking(self.flush)
+
+    async def _run(self) -> None:
+        """后台刷新循环"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await run_blocking(self.flush)
+
+
+def get_last_used_tracker() -> LastUsedTracker:
+    """
+    获取最后使用时间追踪器实例（单例模式）
+
+    Returns:
+      LastUsedTracker: 追踪器实例
+    """
+    global _last_used_tracker
+    if _last_used_tracker is None:
+        _last_used_tracker = LastUsedTracker()
+    return _last_used_tracker
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 
 from ..database.connection import get_db
 from ..database.models import User
+from ..utils.executor import CRYPTO_EXECUTOR, get_executor, run_blocking
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -37,6 +38,12 @@ class UserManager:
             self.logger.error(f"Password verification failed: {e}")
             return False
 
+    async def _verify_password_async(self, password: str, password_hash: str) -> bool:
+        """验证密码（在密码哈希线程池中执行）"""
+        return await get_executor(CRYPTO_EXECUTOR).run(
+            self._verify_password, password, password_hash
+        )
+
     def _generate_user_id(self) -> str:
         """生成用户ID"""
         return f"user_{secrets.token_hex(16)}"
@@ -150,6 +157,54 @@ class UserManager:
         finally:
             db.close()
 
+    async def verify_user_async(self, username: str, password: str) -> Optional[User]:
+        """
+        验证用户登录（不阻塞事件循环）
+
+        数据库查询在数据库调用线程池中执行，bcrypt校验在独立的密码哈希线程池中执行
+
+        Args:
+          username: 用户名
+          password: 密码
+
+        Returns:
+          User: 用户对象，如果验证失败返回None
+        """
+        try:
+            user = await run_blocking(self.get_user_by_username, username)
+
+            if not user:
+                return None
+
+            if user.status != "active":
+                return None
+
+            if not await self._verify_password_async(password, str(user.password_hash)):
+                return None
+
+            # 更新最后登录时间
+            await run_blocking(self._update_last_login, user.id)
+
+            return user
+
+        except Exception as e:
+            self.logger.exception("Failed to verify user", exc_info=e)
+            return None
+
+    def _update_last_login(self, user_id: str) -> None:
+        """更新最后登录时间"""
+        db = next(get_db())
+        try:
+            db.query(User).filter(User.id == user_id).update(
+                {User.last_login_at: datetime.utcnow()}
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     def get_user(self, user_id: str) -> Optional[User]:
         """获取用户"""
         db = next(get_db())
@@ -6,7 +6,7 @@
 
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
 from dotenv import load_dotenv
@@ -66,6 +66,39 @@ class DatabaseSettings(BaseSettings):
 
     pool_size: int = Field(10, env="DB_POOL_SIZE", description="连接池大小")
     max_overflow: int = Field(20, env="DB_MAX_OVERFLOW", description="最大溢出连接数")
+    # 自动匹配 DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW
+    async_pool_size: Optional[int] = Field(
+        None, description="异步引擎占用的连接池大小（从 DB_POOL_SIZE 中划分，默认一半）"
+    )
+    async_max_overflow: Optional[int] = Field(
+        None, description="异步引擎占用的最大溢出连接数（从 DB_MAX_OVERFLOW 中划分，默认一半）"
+    )
+
+    def pool_limits(self, async_engine: bool = False) -> Tuple[int, int]:
+        """
+        获取引擎的连接池大小和最大溢出连接数
+
+        DB_POOL_SIZE / DB_MAX_OVERFLOW 是每个进程的总预算，由同步和异步引擎划分，
+        两个引擎的最大连接数之和不超过预算
+
+        Args:
+          async_engine: 是否为异步引擎
+
+        Returns:
+          Tuple[int, int]: (pool_size, max_overflow)
+        """
+        async_pool_size = self.async_pool_size
+        if async_pool_size is None:
+            async_pool_size = self.pool_size // 2
+        async_max_overflow = self.async_max_overflow
+        if async_max_overflow is None:
+            async_max_overflow = self.max_overflow // 2
+
+        if async_engine:
+            return max(async_pool_size, 1), max(async_max_overflow, 0)
+        sync_pool_size = self.pool_size - async_pool_size
+        sync_max_overflow = self.max_overflow - async_max_overflow
+        return max(sync_pool_size, 1), max(sync_max_overflow, 0)
 
     @property
     def database_url(self) -> str:
@@ -74,6 +107,13 @@ class DatabaseSettings(BaseSettings):
             f"mysql+pymysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
         )
 
+    @property
+    def async_database_url(self) -> str:
+        """获取异步数据库连接URL（aiomysql驱动）"""
+        return (
+            f"mysql+aiomysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+        )
+
 
 class ProviderSettings(BaseSettings):
     """提供商配置"""
@@ -89,6 +129,12 @@ class ProviderSettings(BaseSettings):
     google_api_key: Optional[str] = Field(None, env="GOOGLE_API_KEY")
     openrouter_api_key: Optional[str] = Field(None, env="OPENROUTER_API_KEY")
 
+    # 多个API Key（逗号分隔，可用 ":权重" 后缀），与单个Key合并为凭证池
+    openai_api_keys: Optional[str] = None
+    anthropic_api_keys: Optional[str] = None
+    google_api_keys: Optional[str] = None
+    openrouter_api_keys: Optional[str] = None
+
 
 class ServerSettings(BaseSettings):
     """服务器配置"""
@@ -146,6 +192,172 @@ class Settings(BaseSettings):
     # 请求配置
     request_timeout: int = Field(60, env="REQUEST_TIMEOUT", description="请求超时时间（秒）")
     max_retries: int = Field(3, env="MAX_RETRIES", description="最大重试次数")
+    retry_base_delay: float = Field(
+        0.5,
+        description="第一次重试的退避上限（秒），之后每次翻倍并随机抖动",
+    )
+    retry_max_delay: float = Field(
+        10.0,
+        description="重试退避时间上限（秒），上游 Retry-After 超过该值时不再重试",
+    )
+    retry_budget_ratio: float = Field(0.2, description="每个提供商的重试次数占请求数的最大比例")
+    retry_budget_min_per_second: float = Field(1.0, description="低流量时每秒允许的最少重试次数")
+    retry_budget_burst: float = Field(10.0, description="重试预算的令牌上限（允许的突发重试次数）")
+
+    # 上游熔断配置（按提供商和模型分别熔断）
+    circuit_breaker_enabled: bool = Field(True, description="是否启用上游熔断")
+    circuit_breaker_failure_threshold: int = Field(5, description="打开熔断的连续失败次数")
+    circuit_breaker_recovery_timeout: float = Field(
+        30.0,
+        description="熔断打开后放行探测请求前的冷却时间（秒）",
+    )
+    circuit_breaker_half_open_max_calls: int = Field(
+        1, description="半开状态下同时放行的探测请求数"
+    )
+
+    # 逻辑模型（别名）路由配置
+    model_aliases: Optional[str] = Field(
+        None,
+        description="逻辑模型配置（JSON对象，逻辑模型ID到目标模型列表）",
+    )
+    routing_ewma_alpha: float = Field(0.2, description="上游耗时和错误率EWMA的平滑系数（0~1）")
+    routing_latency_sensitivity: float = Field(
+        2.0,
+        description="选择上游时对耗时的敏感度（权重按耗时的该次方反比分配）",
+    )
+    routing_error_penalty: float = Field(
+        10.0,
+        description="错误率惩罚系数（错误率10%且系数为10时，相当于耗时翻倍）",
+    )
+    routing_cost_weight: float = Field(1.0, description="目标相对成本的惩罚系数（0表示忽略成本）")
+
+    # 上游失败回退配置
+    fallback_enabled: bool = Field(True, description="上游可重试的失败是否改用回退目标")
+    fallback_max_attempts: int = Field(2, description="一次请求最多尝试的回退目标数")
+    model_fallbacks: Optional[str] = Field(
+        None,
+        description="模型回退链配置（JSON对象，模型ID到按顺序尝试的回退模型列表）",
+    )
+
+    # 对冲请求配置（非流式短请求，首个请求较慢时再发出一个相同的请求）
+    hedging_enabled: bool = Field(False, description="是否对非流式请求使用对冲请求")
+    hedging_max_tokens: int = Field(
+        512,
+        description="只对冲 max_tokens 不超过该值的请求（0表示不限制，包括未指定 max_tokens 的请求）",
+    )
+    hedging_percentile: float = Field(95.0, description="对冲延迟使用的近期耗时分位（0~100）")
+    hedging_min_samples: int = Field(20, description="每个模型开始对冲前需要的耗时样本数")
+    hedging_window: int = Field(200, description="每个模型保留的最近耗时样本数")
+    hedging_min_delay: float = Field(0.05, description="对冲延迟下限（秒）")
+    hedging_budget_ratio: float = Field(
+        0.05, description="每个提供商的对冲请求数占请求数的最大比例"
+    )
+    hedging_budget_min_per_second: float = Field(
+        0.0, description="低流量时每秒允许的最少对冲请求数"
+    )
+    hedging_budget_burst: float = Field(
+        5.0, description="对冲预算的令牌上限（允许的突发对冲请求数）"
+    )
+
+    # 上游多Key负载均衡配置
+    upstream_key_strategy: str = Field(
+        "least_inflight",
+        description="多个API Key的选择策略：least_inflight 或 weighted_round_robin",
+    )
+    upstream_key_cooldown: float = Field(
+        60.0,
+        description="API Key返回429且上游未给出 Retry-After 时的冷却时间（秒）",
+    )
+
+    # 上游HTTP连接池配置（每个上游主机一个连接池）
+    http_max_connections: int = Field(100, description="每个上游主机的最大连接数")
+    http_max_keepalive_connections: int = Field(20, description="每个上游主机保持的空闲长连接数")
+    http_keepalive_expiry: float = Field(30.0, description="空闲长连接的过期时间（秒）")
+    http_connect_timeout: float = Field(10.0, description="建立上游连接的超时时间（秒）")
+
+    # 流式响应配置
+    stream_passthrough: bool = Field(
+        True,
+        description="OpenAI兼容格式的提供商直通转发上游SSE数据行（不逐行解析和重新序列化）",
+    )
+
+    stream_coalesce_window_ms: float = Field(
+        0.0,
+        description="流式响应合并写入的默认时间窗口（毫秒，0表示不合并）",
+    )
+    stream_coalesce_max_window_ms: float = Field(
+        250.0,
+        description="X-Stream-Coalesce请求头允许的最大时间窗口（毫秒）",
+    )
+    stream_coalesce_max_bytes: int = Field(16384, description="合并缓冲区达到该字符数时立即发送")
+
+    # JSON编解码配置
+    json_codec: str = Field(
+        "auto",
+        description="JSON编解码实现（auto: 安装了orjson时使用orjson，orjson，json: 标准库）",
+    )
+
+    # 请求日志配置
+    request_log_sample_rate: float = Field(
+        1.0,
+        description='"Request received" 日志的采样率（0-1，请求完成日志始终记录）',
+    )
+    server_timing_enabled: bool = Field(
+        False,
+        description="是否在聊天完成响应中返回分阶段耗时（Server-Timing 头，流式响应为结尾的SSE注释）",
+    )
+
+    # 监控指标配置
+    metrics_enabled: bool = Field(False, description="是否开放 /metrics 接口（默认关闭）")
+    metrics_token: Optional[str] = Field(
+        None, description="访问 /metrics 需要的Bearer Token（不设置则不校验）"
+    )
+    metrics_max_model_labels: int = Field(
+        100,
+        description="指标中model标签的最大取值数（超出后记为other）",
+    )
+    metrics_max_organization_labels: int = Field(
+        0,
+        description="指标中organization标签的最大取值数（超出后记为other，默认0表示不区分组织）",
+    )
+
+    # 阻塞调用线程池配置
+    blocking_executor_max_workers: int = Field(16, description="同步数据库调用的线程池大小")
+    crypto_executor_max_workers: int = Field(2, description="bcrypt密码哈希的线程池大小")
+
+    # API Key验证缓存配置
+    api_key_cache_size: int = Field(10000, description="API Key缓存最大条目数（0表示禁用）")
+    api_key_cache_ttl: float = Field(60.0, description="有效API Key的缓存时间（秒）")
+    api_key_cache_negative_ttl: float = Field(10.0, description="未知API Key的负缓存时间（秒）")
+    api_key_last_used_flush_interval: float = Field(
+        30.0,
+        description="API Key最后使用时间的批量写入间隔（秒）",
+    )
+
+    # 请求统计异步批量写入配置
+    stats_queue_size: int = Field(10000, description="统计记录内存队列容量（满后落盘）")
+    stats_batch_size: int = Field(200, description="每批写入的最大记录数")
+    stats_flush_interval: float = Field(1.0, description="批量写入的最长等待时间（秒）")
+    stats_spill_path: str = Field(
+        "data/stats_spill.jsonl",
+        description="数据库不可用或队列已满时统计记录的落盘文件",
+    )
+    stats_query_source: str = Field(
+        "raw",
+        description="统计查询的数据来源（rollups: 用量汇总表，raw: 原始统计记录分组聚合）",
+    )
+
+    # 模型目录快照配置
+    model_catalog_refresh_interval: float = Field(
+        60.0,
+        description="模型目录定时刷新间隔（秒，0表示不定时刷新）",
+    )
+
+    # 组织用量计数器配置
+    org_usage_reconcile_interval: float = Field(
+        300.0,
+        description="组织月度用量计数器与数据库对账的间隔（秒，0表示不对账）",
+    )
 
 
 # 全局配置实例
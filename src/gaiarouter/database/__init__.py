@@ -4,17 +4,34 @@
 提供数据库连接和初始化功能
 """
 
-from .connection import get_db, get_engine, init_db
-from .models import APIKey, Base, Model, Organization, RequestStat, User
+from .connection import (
+    close_async_db,
+    get_async_db,
+    get_async_engine,
+    get_async_session,
+    get_db,
+    get_engine,
+    init_async_db,
+    init_db,
+    pool_stats,
+)
+from .models import APIKey, Base, Model, Organization, RequestStat, UsageRollup, User
 
 __all__ = [
     "init_db",
     "get_db",
     "get_engine",
+    "init_async_db",
+    "get_async_db",
+    "get_async_session",
+    "get_async_engine",
+    "close_async_db",
+    "pool_stats",
     "Base",
     "Organization",
     "APIKey",
     "RequestStat",
     "User",
     "Model",
+    "UsageRollup",
 ]
@@ -2,20 +2,33 @@
 数据库连接管理
 
 使用SQLAlchemy管理数据库连接（阿里云RDS）
+
+同步引擎（pymysql）用于后台任务和管理接口，异步引擎（aiomysql）用于请求路径上的查询，
+避免慢查询阻塞事件循环
 """
 
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import QueuePool
 
 from ..config import get_settings
+from .pool import CheckoutTimingMixin, TimedAsyncAdaptedQueuePool, TimedQueuePool
 
 # 全局数据库引擎和会话工厂
 _engine = None
 _SessionLocal = None
 
+# 全局异步数据库引擎和会话工厂
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
 
 def init_db() -> None:
     """
@@ -26,13 +39,15 @@ def init_db() -> None:
     global _engine, _SessionLocal
 
     settings = get_settings()
+    # 与异步引擎划分 DB_POOL_SIZE / DB_MAX_OVERFLOW
+    pool_size, max_overflow = settings.database.pool_limits()
 
     # 创建数据库引擎
     _engine = create_engine(
         settings.database.database_url,
-        poolclass=QueuePool,
-        pool_size=settings.database.pool_size,
-        max_overflow=settings.database.max_overflow,
+        poolclass=TimedQueuePool,  # QueuePool，记录获取连接的等待时间
+        pool_size=pool_size,
+        max_overflow=max_overflow,
         pool_pre_ping=True,  # 连接前检查连接是否有效
         echo=settings.server.debug,  # 调试模式下打印SQL
     )
@@ -68,3 +83,90 @@ def get_engine():
     if _engine is None:
         init_db()
     return _engine
+
+
+def init_async_db(database_url: Optional[str] = None) -> None:
+    """
+    初始化异步数据库连接
+
+    表结构由同步的 init_db 创建，这里只创建异步引擎和会话工厂
+
+    Args:
+      database_url: 异步数据库连接URL，默认使用配置中的 aiomysql 连接
+    """
+    global _async_engine, _AsyncSessionLocal
+
+    settings = get_settings()
+    database_url = database_url or settings.database.async_database_url
+
+    engine_options: Dict[str, Any] = {}
+    if not database_url.startswith("sqlite"):
+        pool_size, max_overflow = settings.database.pool_limits(async_engine=True)
+        engine_options.update(
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=True,
+        )
+
+    _async_engine = create_async_engine(database_url, echo=settings.server.debug, **engine_options)
+    _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_async_session() -> AsyncSession:
+    """
+    创建异步数据库会话（配合 async with 使用，退出时自动关闭）
+
+    Returns:
+      AsyncSession: 异步数据库会话
+    """
+    if _AsyncSessionLocal is None:
+        init_async_db()
+    return _AsyncSessionLocal()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取异步数据库会话（依赖注入）
+
+    Yields:
+      AsyncSession: 异步数据库会话
+    """
+    async with get_async_session() as db:
+        yield db
+
+
+def get_async_engine() -> AsyncEngine:
+    """获取异步数据库引擎"""
+    if _async_engine is None:
+        init_async_db()
+    return _async_engine
+
+
+async def close_async_db() -> None:
+    """关闭异步数据库引擎，释放连接池"""
+    global _async_engine, _AsyncSessionLocal
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _AsyncSessionLocal = None
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取已初始化引擎的连接池统计（不会初始化引擎）
+
+    Returns:
+      dict: 引擎名称（sync / async）到连接池统计的映射
+    """
+    pools = {}
+    if _engine is not None:
+        pools["sync"] = _engine.pool
+    if _async_engine is not None:
+        pools["async"] = _async_engine.sync_engine.pool
+    return {
+        name: pool.checkout_stats()
+        for name, pool in pools.items()
+        if isinstance(pool, CheckoutTimingMixin)
+    }
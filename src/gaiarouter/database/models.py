@@ -7,11 +7,25 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String, Text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-
-Base = declarative_base()
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import DeclarativeBase, relationship
+
+
+class Base(DeclarativeBase):
+    """数据表模型基类"""
 
 
 class User(Base):
@@ -91,6 +105,9 @@ class RequestStat(Base):
     """请求统计表"""
 
     __tablename__ = "request_stats"
+    __table_args__ = (
+        Index("ix_request_stats_organization_timestamp", "organization_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="统计ID")
     api_key_id = Column(String(64), ForeignKey("api_keys.id"), nullable=False, comment="API Key ID")
@@ -98,6 +115,7 @@ class RequestStat(Base):
 
     model = Column(String(255), nullable=False, comment="模型标识")
     provider = Column(String(50), nullable=False, comment="提供商")
+    requested_model = Column(String(255), comment="客户端请求的模型标识（逻辑模型或回退前的模型）")
 
     prompt_tokens = Column(Integer, default=0, comment="输入Token数")
     completion_tokens = Column(Integer, default=0, comment="输出Token数")
@@ -111,6 +129,47 @@ class RequestStat(Base):
     organization = relationship("Organization", back_populates="stats")
 
 
+class UsageRollup(Base):
+    """用量汇总表（按小时/天预聚合的请求统计）"""
+
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "api_key_id",
+            "organization_id",
+            "model",
+            "provider",
+            name="uq_usage_rollups_bucket",
+        ),
+        Index("ix_usage_rollups_granularity_bucket", "granularity", "bucket_start"),
+        Index(
+            "ix_usage_rollups_organization_bucket",
+            "organization_id",
+            "granularity",
+            "bucket_start",
+        ),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    granularity = Column(String(10), nullable=False, comment="汇总粒度：hour/day")
+    bucket_start = Column(DateTime, nullable=False, comment="时间桶开始时间")
+
+    api_key_id = Column(String(64), nullable=False, comment="API Key ID")
+    organization_id = Column(
+        String(64), nullable=False, default="", comment="组织ID（无组织为空串）"
+    )
+    model = Column(String(255), nullable=False, comment="模型标识")
+    provider = Column(String(50), nullable=False, comment="提供商")
+
+    requests = Column(BigInteger, nullable=False, default=0, comment="请求数")
+    prompt_tokens = Column(BigInteger, nullable=False, default=0, comment="输入Token数")
+    completion_tokens = Column(BigInteger, nullable=False, default=0, comment="输出Token数")
+    total_tokens = Column(BigInteger, nullable=False, default=0, comment="总Token数")
+    cost = Column(Numeric(14, 6), nullable=False, default=0, comment="费用")
+
+
 class Model(Base):
     """模型表"""
 
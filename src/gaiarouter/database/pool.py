@@ -0,0 +1,62 @@
+"""
+数据库连接池
+
+在SQLAlchemy连接池上记录获取连接的等待时间（包括连接池耗尽时的排队和新建连接），
+用于判断请求延迟是否来自连接池不足
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from ..utils.timing import LatencyHistogram
+
+
+class CheckoutTimingMixin:
+    """记录获取连接等待时间的连接池"""
+
+    # 以下方法由混入的 QueuePool 提供
+    size: Callable[[], int]
+    checkedout: Callable[[], int]
+    overflow: Callable[[], int]
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = LatencyHistogram()
+        self._checkout_wait_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            # 获取超时（连接池耗尽）也记录，这正是需要关注的长尾
+            elapsed = time.perf_counter() - start
+            with self._checkout_wait_lock:
+                self.checkout_wait.observe(elapsed)
+
+    def checkout_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计
+
+        Returns:
+          dict: 连接池大小、已借出连接数、溢出连接数和获取连接等待时间直方图
+        """
+        with self._checkout_wait_lock:
+            checkout_wait = self.checkout_wait.snapshot()
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkout_wait": checkout_wait,
+        }
+
+
+class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+    """同步引擎的连接池"""
+
+
+class TimedAsyncAdaptedQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """异步引擎的连接池"""
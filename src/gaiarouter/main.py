@@ -9,10 +9,20 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException
 
-from .api.controllers import admin_models, api_keys, auth, chat, models, organizations, stats
+from .api.controllers import (
+    admin_models,
+    api_keys,
+    auth,
+    chat,
+    metrics,
+    models,
+    organizations,
+    stats,
+)
 from .api.middleware.error import error_handler
 from .api.middleware.logging import LoggingMiddleware
 from .config import get_settings
+from .utils.json_codec import FastJSONResponse
 from .utils.logger import get_logger, setup_logger
 
 # 初始化日志
@@ -28,6 +38,8 @@ app = FastAPI(
     description="AI模型路由服务，提供统一的API接口访问多个AI模型",
     version="0.1.0",
     debug=settings.server.debug,
+    # JSON响应使用统一编解码器（安装了orjson时使用orjson）
+    default_response_class=FastJSONResponse,
 )
 
 # 配置CORS
@@ -67,6 +79,7 @@ app.include_router(api_keys.router)
 app.include_router(organizations.router)
 app.include_router(auth.router)  # 管理后台认证路由
 app.include_router(admin_models.router)  # 模型管理路由
+app.include_router(metrics.router)  # Prometheus指标
 
 
 @app.on_event("startup")
@@ -74,10 +87,36 @@ async def startup_event():
     """应用启动事件"""
     logger.info("Starting GaiaRouter application")
 
-    # 初始化数据库
-    from .database import init_db
+    # 初始化数据库（同步引擎用于后台任务和管理接口，异步引擎用于请求路径）
+    from .database import init_async_db, init_db
 
     init_db()
+    init_async_db()
+
+    # 初始化上游HTTP连接池
+    from .providers import get_http_client_pool
+
+    get_http_client_pool()
+
+    # 启动API Key最后使用时间的后台批量写入
+    from .auth import get_last_used_tracker
+
+    await get_last_used_tracker().start()
+
+    # 启动请求统计的后台批量写入
+    from .stats import get_stats_collector
+
+    await get_stats_collector().start()
+
+    # 加载模型目录快照并启动定时刷新
+    from .models import get_model_catalog
+
+    await get_model_catalog().start()
+
+    # 启动组织月度用量计数器的定期对账
+    from .organizations import get_usage_counters
+
+    await get_usage_counters().start()
 
     logger.info("GaiaRouter application started successfully")
 
@@ -87,6 +126,41 @@ async def shutdown_event():
     """应用关闭事件"""
     logger.info("Shutting down GaiaRouter application")
 
+    # 写完队列中剩余的请求统计
+    from .stats import get_stats_collector
+
+    await get_stats_collector().stop()
+
+    # 停止模型目录定时刷新
+    from .models import get_model_catalog
+
+    await get_model_catalog().stop()
+
+    # 停止组织用量对账
+    from .organizations import get_usage_counters
+
+    await get_usage_counters().stop()
+
+    # 关闭上游HTTP连接池
+    from .providers import close_http_client_pool
+
+    await close_http_client_pool()
+
+    # 写入剩余的API Key最后使用时间
+    from .auth import get_last_used_tracker
+
+    await get_last_used_tracker().stop()
+
+    # 关闭异步数据库连接池
+    from .database import close_async_db
+
+    await close_async_db()
+
+    # 关闭阻塞调用线程池（等待执行中的数据库写入完成）
+    from .utils.executor import shutdown_executors
+
+    shutdown_executors()
+
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,16 @@
+"""
+监控指标模块
+
+提供Prometheus格式的请求指标和运行时指标
+"""
+
+from .collectors import RuntimeCollector
+from .registry import UNKNOWN_LABEL, LabelLimiter, Metrics, get_metrics
+
+__all__ = [
+    "Metrics",
+    "get_metrics",
+    "LabelLimiter",
+    "RuntimeCollector",
+    "UNKNOWN_LABEL",
+]
@@ -0,0 +1,260 @@
+"""
+运行时指标
+
+抓取时从各组件已有的统计中读取：数据库连接池、API Key缓存、阻塞调用线程池、
+请求统计收集器、上游熔断器、上游API Key、上游健康状况和分阶段耗时直方图。只读取已经创建的实例，不会因为抓取指标而初始化组件
+"""
+
+from typing import Any, Dict, Iterator
+
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 熔断器状态对应的指标值
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _histogram_buckets(snapshot: Dict[str, Any]) -> list:
+    """将毫秒直方图的累计计数转换为Prometheus的桶（秒）"""
+    return [
+        ("+Inf" if bound == float("inf") else repr(bound / 1000), count)
+        for bound, count in snapshot["buckets"].items()
+    ]
+
+
+class RuntimeCollector(Collector):
+    """运行时指标收集器（抓取时读取）"""
+
+    def collect(self) -> Iterator[Metric]:
+        """
+        生成指标
+
+        Yields:
+          各组件的指标，某个组件读取失败时跳过该组件
+        """
+        for collect in (
+            self._collect_db_pools,
+            self._collect_api_key_cache,
+            self._collect_executors,
+            self._collect_stats_collector,
+            self._collect_circuit_breakers,
+            self._collect_upstream_keys,
+            self._collect_upstream_health,
+            self._collect_stage_timings,
+        ):
+            try:
+                yield from collect()
+            except Exception as e:
+                logger.warning(f"Failed to collect metrics: {e}", collector=collect.__name__)
+
+    def _collect_db_pools(self) -> Iterator[Metric]:
+        """数据库连接池"""
+        from ..database.connection import pool_stats
+
+        pools = pool_stats()
+        wait = HistogramMetricFamily(
+            "gaiarouter_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a database connection from the pool",
+            labels=["engine"],
+        )
+        size = GaugeMetricFamily("gaiarouter_db_pool_size", "Database pool size", labels=["engine"])
+        checked_out = GaugeMetricFamily(
+            "gaiarouter_db_pool_checked_out",
+            "Database connections currently checked out",
+            labels=["engine"],
+        )
+        overflow = GaugeMetricFamily(
+            "gaiarouter_db_pool_overflow",
+            "Database connections above pool_size (negative while the pool is filling)",
+            labels=["engine"],
+        )
+        for engine, stats in pools.items():
+            snapshot = stats["checkout_wait"]
+            wait.add_metric(
+                [engine], _histogram_buckets(snapshot), sum_value=snapshot["sum_ms"] / 1000
+            )
+            size.add_metric([engine], stats["size"])
+            checked_out.add_metric([engine], stats["checked_out"])
+            overflow.add_metric([engine], stats["overflow"])
+        yield from (wait, size, checked_out, overflow)
+
+    def _collect_api_key_cache(self) -> Iterator[Metric]:
+        """API Key验证缓存"""
+        from ..auth import api_key_manager
+
+        manager = api_key_manager._api_key_manager
+        if manager is None:
+            return
+        stats = manager.cache.stats()
+
+        lookups = CounterMetricFamily(
+            "gaiarouter_cache_lookups", "Cache lookups by result", labels=["cache", "result"]
+        )
+        lookups.add_metric(["api_key", "hit"], stats["hits"])
+        lookups.add_metric(["api_key", "negative_hit"], stats["negative_hits"])
+        lookups.add_metric(["api_key", "miss"], stats["misses"])
+        yield lookups
+
+        hit_ratio = GaugeMetricFamily(
+            "gaiarouter_cache_hit_ratio", "Cache hit ratio since start", labels=["cache"]
+        )
+        hit_ratio.add_metric(["api_key"], stats["hit_ratio"])
+        yield hit_ratio
+
+        size = GaugeMetricFamily("gaiarouter_cache_size", "Cache entries", labels=["cache"])
+        size.add_metric(["api_key"], stats["size"])
+        yield size
+
+    def _collect_executors(self) -> Iterator[Metric]:
+        """阻塞调用线程池"""
+        from ..utils.executor import executor_stats
+
+        stats = executor_stats()
+        queued = GaugeMetricFamily(
+            "gaiarouter_executor_queued",
+            "Blocking calls waiting for a worker thread",
+            labels=["executor"],
+        )
+        active = GaugeMetricFamily(
+            "gaiarouter_executor_active", "Blocking calls running", labels=["executor"]
+        )
+        max_workers = GaugeMetricFamily(
+            "gaiarouter_executor_max_workers", "Executor thread count", labels=["executor"]
+        )
+        completed = CounterMetricFamily(
+            "gaiarouter_executor_completed", "Blocking calls completed", labels=["executor"]
+        )
+        failed = CounterMetricFamily(
+            "gaiarouter_executor_failed", "Blocking calls that raised", labels=["executor"]
+        )
+        for name, executor in stats.items():
+            queued.add_metric([name], executor["queued"])
+            active.add_metric([name], executor["active"])
+            max_workers.add_metric([name], executor["max_workers"])
+            completed.add_metric([name], executor["completed"])
+            failed.add_metric([name], executor["failed"])
+        yield from (queued, active, max_workers, completed, failed)
+
+    def _collect_stats_collector(self) -> Iterator[Metric]:
+        """请求统计收集器"""
+        from ..stats import collector
+
+        stats_collector = collector._stats_collector
+        if stats_collector is None:
+            return
+        stats = stats_collector.stats()
+
+        queued = GaugeMetricFamily(
+            "gaiarouter_stats_queue_size", "Request stats waiting to be written"
+        )
+        queued.add_metric([], stats["queued"])
+        yield queued
+
+        for key, description in (
+            ("written", "Request stats written to the database"),
+            ("spilled", "Request stats spilled to disk"),
+            ("failed_batches", "Request stats batches that failed to write"),
+        ):
+            counter = CounterMetricFamily(f"gaiarouter_stats_{key}", description)
+            counter.add_metric([], stats[key])
+            yield counter
+
+    def _collect_circuit_breakers(self) -> Iterator[Metric]:
+        """上游熔断器（模型级别只导出未关闭的，控制时间序列数量）"""
+        from ..providers import circuit_breaker
+
+        registry = circuit_breaker._circuit_breakers
+        if registry is None:
+            return
+
+        state = GaugeMetricFamily(
+            "gaiarouter_circuit_breaker_state",
+            "Upstream circuit breaker state (0 closed, 1 half-open, 2 open); model=all is the "
+            "provider-wide breaker",
+            labels=["provider", "model"],
+        )
+        for breaker in registry.snapshot():
+            if breaker["model"] is not None and breaker["state"] == "closed":
+                continue
+            state.add_metric(
+                [breaker["provider"], breaker["model"] or "all"],
+                CIRCUIT_STATE_VALUES[breaker["state"]],
+            )
+        yield state
+
+    def _collect_upstream_keys(self) -> Iterator[Metric]:
+        """上游API Key的进行中请求数和冷却状态"""
+        from ..router import model_router
+
+        router = model_router._router
+        if router is None:
+            return
+
+        in_flight = GaugeMetricFamily(
+            "gaiarouter_upstream_key_inflight",
+            "Upstream calls in flight per API key",
+            labels=["provider", "key"],
+        )
+        cooling_down = GaugeMetricFamily(
+            "gaiarouter_upstream_key_cooling_down",
+            "Whether the API key is cooling down after a 429 (1) or available (0)",
+            labels=["provider", "key"],
+        )
+        for name, provider in router._providers.items():
+            for credential in provider.credentials.snapshot():
+                in_flight.add_metric([name, credential["key"]], credential["in_flight"])
+                cooling_down.add_metric(
+                    [name, credential["key"]], 1 if credential["cooling_down"] else 0
+                )
+        yield from (in_flight, cooling_down)
+
+    def _collect_upstream_health(self) -> Iterator[Metric]:
+        """逻辑模型选择目标时使用的上游耗时和错误率（EWMA）"""
+        from ..router import health
+
+        tracker = health._health_tracker
+        if tracker is None:
+            return
+
+        latency = GaugeMetricFamily(
+            "gaiarouter_upstream_latency_ewma_seconds",
+            "EWMA of upstream latency per target model (kind=total for non-streaming, ttft for "
+            "streaming)",
+            labels=["model", "kind"],
+        )
+        error_rate = GaugeMetricFamily(
+            "gaiarouter_upstream_error_rate_ewma",
+            "EWMA of the upstream error rate per target model",
+            labels=["model"],
+        )
+        for target in tracker.snapshot():
+            if target["latency"] is not None:
+                latency.add_metric([target["model"], "total"], target["latency"])
+            if target["ttft"] is not None:
+                latency.add_metric([target["model"], "ttft"], target["ttft"])
+            error_rate.add_metric([target["model"]], target["error_rate"])
+        yield from (latency, error_rate)
+
+    def _collect_stage_timings(self) -> Iterator[Metric]:
+        """分阶段耗时"""
+        from ..utils.timing import get_timing_histograms
+
+        stages = HistogramMetricFamily(
+            "gaiarouter_request_stage_seconds",
+            "Chat completion latency by stage (see Server-Timing)",
+            labels=["stage"],
+        )
+        for stage, snapshot in get_timing_histograms().snapshot().items():
+            stages.add_metric(
+                [stage], _histogram_buckets(snapshot), sum_value=snapshot["sum_ms"] / 1000
+            )
+        yield stages
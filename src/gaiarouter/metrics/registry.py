@@ -0,0 +1,321 @@
+"""
+请求指标
+
+聊天完成请求的计数、延迟、Token用量和上游错误，按提供商和模型打标签。
+模型ID和组织ID的取值由 LabelLimiter 限制数量，超出后记为 other，
+避免同步上百个OpenRouter模型后时间序列数量失控
+"""
+
+import threading
+from typing import Optional, Set
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+from ..config import get_settings
+from .collectors import RuntimeCollector
+
+# 超出标签取值上限时使用的值
+OTHER_LABEL = "other"
+
+# 未知模型（请求的模型不存在）和无组织时使用的值
+UNKNOWN_LABEL = "unknown"
+NO_ORGANIZATION_LABEL = "none"
+
+# 请求总耗时的桶（秒）
+REQUEST_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 首Token时间的桶（秒）
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 30)
+
+# 全局指标实例
+_metrics: Optional["Metrics"] = None
+
+
+class LabelLimiter:
+    """
+    标签取值数量限制
+
+    按出现顺序保留前 max_values 个取值，之后的新取值统一记为 other
+    """
+
+    def __init__(self, max_values: int):
+        """
+        初始化
+
+        Args:
+          max_values: 最多保留的取值数（0表示全部记为 other）
+        """
+        self.max_values = max_values
+        self._values: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: str) -> str:
+        """
+        获取标签值
+
+        Args:
+          value: 原始取值
+
+        Returns:
+          str: 已保留或仍有余量时返回原值，否则返回 other
+        """
+        if value in self._values:
+            return value
+        with self._lock:
+            if value in self._values:
+                return value
+            if len(self._values) < self.max_values:
+                self._values.add(value)
+                return value
+        return OTHER_LABEL
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class Metrics:
+    """请求指标"""
+
+    def __init__(
+        self,
+        max_model_labels: Optional[int] = None,
+        max_organization_labels: Optional[int] = None,
+        registry: Optional[CollectorRegistry] = None,
+    ):
+        """
+        初始化指标
+
+        Args:
+          max_model_labels: model标签的最大取值数，默认从配置读取
+          max_organization_labels: organization标签的最大取值数，默认从配置读取
+          registry: 指标注册表，默认新建（同时注册连接池、缓存等运行时指标）
+        """
+        settings = get_settings()
+        if max_model_labels is None:
+            max_model_labels = settings.metrics_max_model_labels
+        if max_organization_labels is None:
+            max_organization_labels = settings.metrics_max_organization_labels
+
+        self.model_label = LabelLimiter(max_model_labels)
+        self.organization_label = LabelLimiter(max_organization_labels)
+
+        if registry is None:
+            registry = CollectorRegistry()
+            registry.register(RuntimeCollector())
+        self.registry = registry
+
+        self.requests = Counter(
+            "gaiarouter_requests",
+            "Chat completion requests",
+            ["provider", "model", "organization", "stream", "status"],
+            registry=registry,
+        )
+        self.request_duration = Histogram(
+            "gaiarouter_request_duration_seconds",
+            "Chat completion duration (streams: until the last chunk)",
+            ["provider", "model", "stream"],
+            buckets=REQUEST_DURATION_BUCKETS,
+            registry=registry,
+        )
+        self.time_to_first_token = Histogram(
+            "gaiarouter_time_to_first_token_seconds",
+            "Time from request start to the first streamed content chunk",
+            ["provider", "model"],
+            buckets=TTFT_BUCKETS,
+            registry=registry,
+        )
+        self.tokens = Counter(
+            "gaiarouter_tokens",
+            "Tokens processed",
+            ["provider", "model", "organization", "type"],
+            registry=registry,
+        )
+        self.upstream_errors = Counter(
+            "gaiarouter_upstream_errors",
+            "Errors returned by or while talking to upstream providers",
+            ["provider", "model", "error_type"],
+            registry=registry,
+        )
+        self.upstream_retries = Counter(
+            "gaiarouter_upstream_retries",
+            "Upstream request retries",
+            ["provider"],
+            registry=registry,
+        )
+        self.retry_budget_exhausted = Counter(
+            "gaiarouter_upstream_retry_budget_exhausted",
+            "Retryable upstream failures not retried because the retry budget was exhausted",
+            ["provider"],
+            registry=registry,
+        )
+        self.upstream_fallbacks = Counter(
+            "gaiarouter_upstream_fallbacks",
+            "Requests re-dispatched to a fallback target after a retryable upstream failure",
+            ["from_model", "to_model"],
+            registry=registry,
+        )
+        self.upstream_hedges = Counter(
+            "gaiarouter_upstream_hedges",
+            "Hedgeable upstream calls by outcome (not_hedged, budget_exhausted, primary_won, "
+            "hedge_won, failed)",
+            ["provider", "outcome"],
+            registry=registry,
+        )
+        self.upstream_key_requests = Counter(
+            "gaiarouter_upstream_key_requests",
+            "Upstream calls per API key by outcome (success, rate_limited, error, cancelled)",
+            ["provider", "key", "outcome"],
+            registry=registry,
+        )
+        self.inflight_streams = Gauge(
+            "gaiarouter_inflight_streams",
+            "Streaming responses currently being sent",
+            ["provider"],
+            registry=registry,
+        )
+
+    def _organization(self, organization_id: Optional[str]) -> str:
+        """组织标签值"""
+        if not organization_id:
+            return NO_ORGANIZATION_LABEL
+        return self.organization_label(organization_id)
+
+    def record_request(
+        self,
+        provider: str,
+        model: str,
+        organization_id: Optional[str],
+        stream: bool,
+        status: str,
+        duration: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        """
+        记录一次聊天完成请求
+
+        Args:
+          provider: 提供商名称
+          model: 完整模型ID（不存在的模型应传入 unknown）
+          organization_id: 组织ID
+          stream: 是否为流式请求
+          status: success、error 或 cancelled（客户端断开）
+          duration: 总耗时（秒）
+          prompt_tokens: 输入Token数
+          completion_tokens: 输出Token数
+        """
+        model = self.model_label(model)
+        organization = self._organization(organization_id)
+        stream_label = "true" if stream else "false"
+
+        self.requests.labels(provider, model, organization, stream_label, status).inc()
+        self.request_duration.labels(provider, model, stream_label).observe(duration)
+        if prompt_tokens:
+            self.tokens.labels(provider, model, organization, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            self.tokens.labels(provider, model, organization, "completion").inc(completion_tokens)
+
+    def record_time_to_first_token(self, provider: str, model: str, seconds: float) -> None:
+        """
+        记录首Token时间
+
+        Args:
+          provider: 提供商名称
+          model: 完整模型ID
+          seconds: 请求开始到发送第一个内容块的时间（秒）
+        """
+        self.time_to_first_token.labels(provider, self.model_label(model)).observe(seconds)
+
+    def record_upstream_error(self, provider: str, model: str, error: BaseException) -> None:
+        """
+        记录上游错误
+
+        Args:
+          provider: 提供商名称
+          model: 完整模型ID
+          error: 异常（按异常类名分类）
+        """
+        self.upstream_errors.labels(provider, self.model_label(model), type(error).__name__).inc()
+
+    def record_upstream_retry(self, provider: str) -> None:
+        """
+        记录一次上游重试
+
+        Args:
+          provider: 提供商名称
+        """
+        self.upstream_retries.labels(provider).inc()
+
+    def record_retry_budget_exhausted(self, provider: str) -> None:
+        """
+        记录一次因重试预算用尽而放弃的重试
+
+        Args:
+          provider: 提供商名称
+        """
+        self.retry_budget_exhausted.labels(provider).inc()
+
+    def record_fallback(self, from_model: str, to_model: str) -> None:
+        """
+        记录一次改用回退目标
+
+        Args:
+          from_model: 失败的目标模型ID
+          to_model: 回退目标模型ID
+        """
+        self.upstream_fallbacks.labels(
+            self.model_label(from_model), self.model_label(to_model)
+        ).inc()
+
+    def record_hedge(self, provider: str, outcome: str) -> None:
+        """
+        记录一次可对冲的上游调用
+
+        对冲率为 outcome 不是 not_hedged、budget_exhausted 的比例，对冲胜率为其中 hedge_won 的比例
+
+        Args:
+          provider: 提供商名称
+          outcome: not_hedged、budget_exhausted、primary_won、hedge_won 或 failed
+        """
+        self.upstream_hedges.labels(provider, outcome).inc()
+
+    def record_upstream_key_request(self, provider: str, key: str, outcome: str) -> None:
+        """
+        记录一次使用某个API Key的上游调用
+
+        Args:
+          provider: 提供商名称
+          key: Key标识（只含末4位）
+          outcome: success、rate_limited、error 或 cancelled
+        """
+        self.upstream_key_requests.labels(provider, key, outcome).inc()
+
+    def stream_started(self, provider: str) -> None:
+        """流式响应开始发送"""
+        self.inflight_streams.labels(provider).inc()
+
+    def stream_finished(self, provider: str) -> None:
+        """流式响应结束"""
+        self.inflight_streams.labels(provider).dec()
+
+    def render(self) -> bytes:
+        """
+        生成Prometheus文本格式的指标
+
+        Returns:
+          bytes: 指标内容
+        """
+        return generate_latest(self.registry)
+
+
+def get_metrics() -> Metrics:
+    """
+    获取指标实例（单例模式）
+
+    Returns:
+      Metrics: 指标实例
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -2,6 +2,7 @@
 模型管理模块
 """
 
+from .catalog import CatalogEntry, ModelCatalog, get_model_catalog
 from .manager import get_model_manager
 from .sync import get_model_syncer, sync_models_from_openrouter
 
@@ -9,4 +10,7 @@ __all__ = [
     "sync_models_from_openrouter",
     "get_model_syncer",
     "get_model_manager",
+    "CatalogEntry",
+    "ModelCatalog",
+    "get_model_catalog",
 ]
@@ -0,0 +1,225 @@
+"""
+模型目录快照
+
+将 models 表加载为不可变的内存快照，聊天请求路径上的模型查询和启用检查不再访问数据库；
+模型启用状态变更、同步完成后以及定时任务会重建快照并整体替换
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, cast
+
+from ..config import get_settings
+from ..database.connection import get_db
+from ..database.models import Model
+from ..utils.executor import run_blocking
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 全局模型目录实例
+_catalog: Optional["ModelCatalog"] = None
+
+# 快照尚未加载成功时的重试间隔（秒）
+_LOAD_RETRY_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """模型目录条目（不可变）"""
+
+    id: str
+    name: str
+    provider: Optional[str]
+    is_enabled: bool
+    is_free: bool
+    pricing_prompt: Optional[float]
+    pricing_completion: Optional[float]
+    context_length: Optional[int]
+    max_completion_tokens: Optional[int]
+    supports_streaming: bool
+
+    @classmethod
+    def from_model(cls, model: Model) -> "CatalogEntry":
+        """
+        从数据库模型创建条目
+
+        Args:
+          model: 模型对象
+
+        Returns:
+          CatalogEntry: 目录条目
+        """
+        return cls(
+            id=str(model.id),
+            name=str(model.name),
+            provider=cast(Optional[str], model.provider),
+            is_enabled=bool(model.is_enabled),
+            is_free=bool(model.is_free),
+            pricing_prompt=_to_float(model.pricing_prompt),
+            pricing_completion=_to_float(model.pricing_completion),
+            context_length=cast(Optional[int], model.context_length),
+            max_completion_tokens=cast(Optional[int], model.max_completion_tokens),
+            supports_streaming=model.supports_streaming is not False,
+        )
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """模型目录快照（某一版本的全部模型）"""
+
+    version: int
+    built_at: datetime
+    entries: Mapping[str, CatalogEntry]
+
+    def get(self, model_id: str) -> Optional[CatalogEntry]:
+        """按模型ID查询条目"""
+        return self.entries.get(model_id)
+
+
+# 快照尚未加载时使用的空快照
+_EMPTY_SNAPSHOT = CatalogSnapshot(version=0, built_at=datetime.min, entries=MappingProxyType({}))
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """将Numeric字段转换为float"""
+    return float(value) if value is not None else None
+
+
+class ModelCatalog:
+    """模型目录（持有当前快照，刷新时整体替换）"""
+
+    def __init__(self, refresh_interval: Optional[float] = None):
+        """
+        初始化模型目录
+
+        Args:
+          refresh_interval: 定时刷新间隔（秒），默认从配置读取
+        """
+        if refresh_interval is None:
+            refresh_interval = get_settings().model_catalog_refresh_interval
+        self.refresh_interval = refresh_interval
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._refresh_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """当前快照（尚未加载时为不含模型的空快照，不在请求路径上访问数据库）"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return _EMPTY_SNAPSHOT
+        return snapshot
+
+    @property
+    def loaded(self) -> bool:
+        """快照是否已从数据库加载"""
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> int:
+        """当前快照版本号（未加载时为0）"""
+        return self._snapshot.version if self._snapshot is not None else 0
+
+    def get_model(self, model_id: str) -> Optional[CatalogEntry]:
+        """
+        查询模型（不访问数据库）
+
+        Args:
+          model_id: 模型ID
+
+        Returns:
+          CatalogEntry: 目录条目，不存在时返回None
+        """
+        return self.snapshot.get(model_id)
+
+    def refresh(self) -> CatalogSnapshot:
+        """
+        从数据库重建快照并替换当前快照
+
+        Returns:
+          CatalogSnapshot: 新快照
+
+        Raises:
+          Exception: 数据库查询失败时抛出，当前快照保持不变
+        """
+        with self._refresh_lock:
+            db = next(get_db())
+            try:
+                entries = {
+                    entry.id: entry for entry in map(CatalogEntry.from_model, db.query(Model))
+                }
+            finally:
+                db.close()
+
+            self._version += 1
+            snapshot = CatalogSnapshot(
+                version=self._version,
+                built_at=datetime.utcnow(),
+                entries=MappingProxyType(entries),
+            )
+            self._snapshot = snapshot
+
+        logger.debug("Model catalog refreshed", version=snapshot.version, models=len(entries))
+        return snapshot
+
+    async def start(self) -> None:
+        """加载快照并启动定时刷新任务（加载失败时由后台任务重试）"""
+        try:
+            await run_blocking(self.refresh)
+        except Exception as e:
+            logger.warning(f"Failed to load model catalog at startup: {e}")
+        if (self.refresh_interval > 0 or not self.loaded) and (
+            self._task is None or self._task.done()
+        ):
+            self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Model catalog started",
+            version=self.version,
+            refresh_interval=self.refresh_interval,
+        )
+
+    async def stop(self) -> None:
+        """停止定时刷新任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """定时刷新循环（失败时保留旧快照；未加载时按较短间隔重试）"""
+        while True:
+            if not self.loaded:
+                interval = _LOAD_RETRY_INTERVAL
+                if self.refresh_interval > 0:
+                    interval = min(interval, self.refresh_interval)
+            elif self.refresh_interval > 0:
+                interval = self.refresh_interval
+            else:
+                return
+            await asyncio.sleep(interval)
+            try:
+                await run_blocking(self.refresh)
+            except Exception as e:
+                logger.warning(f"Failed to refresh model catalog: {e}")
+
+
+def get_model_catalog() -> ModelCatalog:
+    """
+    获取模型目录实例（单例模式）
+
+    Returns:
+      ModelCatalog: 模型目录实例
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = ModelCatalog()
+    return _catalog
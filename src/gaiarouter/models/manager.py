@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional
 from ..database.connection import get_db
 from ..database.models import Model
 from ..utils.logger import get_logger
+from .catalog import get_model_catalog
 
 logger = get_logger(__name__)
 
@@ -94,6 +95,13 @@ class ModelManager:
         Returns:
             更新后的模型对象
         """
+        model = self._update_model(model_id, updates)
+        if model is not None:
+            self.refresh_catalog()
+        return model
+
+    def _update_model(self, model_id: str, updates: Dict[str, Any]) -> Optional[Model]:
+        """更新模型（不刷新模型目录）"""
         db = next(get_db())
         try:
             model = db.query(Model).filter(Model.id == model_id).first()
@@ -157,10 +165,19 @@ class ModelManager:
         """
         count = 0
         for model_id in model_ids:
-            if self.update_model(model_id, {"is_enabled": enabled}):
+            if self._update_model(model_id, {"is_enabled": enabled}):
                 count += 1
+        if count:
+            self.refresh_catalog()
         return count
 
+    def refresh_catalog(self) -> None:
+        """刷新模型目录快照（失败时保留旧快照，由定时任务重试）"""
+        try:
+            get_model_catalog().refresh()
+        except Exception as e:
+            self.logger.warning(f"Failed to refresh model catalog: {e}")
+
 
 def get_model_manager() -> ModelManager:
     """获取模型管理器实例（单例）"""
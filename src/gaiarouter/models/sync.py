@@ -12,7 +12,9 @@ import httpx
 from ..config import get_settings
 from ..database.connection import get_db
 from ..database.models import Model
+from ..utils.executor import run_blocking
 from ..utils.logger import get_logger
+from .manager import get_model_manager
 
 logger = get_logger(__name__)
 
@@ -135,6 +137,48 @@ class ModelSyncer:
         finally:
             db.close()
 
+    def _sync_models(self, models_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        将模型列表同步到数据库（同步执行）
+
+        Args:
+            models_data: OpenRouter 模型数据列表
+
+        Returns:
+            同步统计信息 {"total": 总数, "created": 新建数, "updated": 更新数, "failed": 失败数}
+        """
+        stats = {
+            "total": len(models_data),
+            "created": 0,
+            "updated": 0,
+            "failed": 0,
+        }
+
+        # 同步每个模型
+        for model_data in models_data:
+            try:
+                db = next(get_db())
+                original_model_id = model_data.get("id")
+                # 使用带前缀的 ID 检查
+                model_id = f"openrouter/{original_model_id}"
+                existing = db.query(Model).filter(Model.id == model_id).first()
+                db.close()
+
+                self.sync_model_to_db(model_data)
+
+                if existing:
+                    stats["updated"] += 1
+                else:
+                    stats["created"] += 1
+
+            except Exception as e:
+                stats["failed"] += 1
+                self.logger.error(f"Failed to sync model: {model_data.get('id')}, error: {e}")
+
+        if stats["created"] or stats["updated"]:
+            get_model_manager().refresh_catalog()
+        return stats
+
     async def sync_all_models(self) -> Dict[str, int]:
         """
         同步所有 OpenRouter 模型
@@ -148,33 +192,8 @@ class ModelSyncer:
             # 获取 OpenRouter 模型列表
             models_data = await self.fetch_openrouter_models()
 
-            stats = {
-                "total": len(models_data),
-                "created": 0,
-                "updated": 0,
-                "failed": 0,
-            }
-
-            # 同步每个模型
-            for model_data in models_data:
-                try:
-                    db = next(get_db())
-                    original_model_id = model_data.get("id")
-                    # 使用带前缀的 ID 检查
-                    model_id = f"openrouter/{original_model_id}"
-                    existing = db.query(Model).filter(Model.id == model_id).first()
-                    db.close()
-
-                    self.sync_model_to_db(model_data)
-
-                    if existing:
-                        stats["updated"] += 1
-                    else:
-                        stats["created"] += 1
-
-                except Exception as e:
-                    stats["failed"] += 1
-                    self.logger.error(f"Failed to sync model: {model_data.get('id')}, error: {e}")
+            # 逐个写入数据库（在线程池中执行，不阻塞事件循环）
+            stats = await run_blocking(self._sync_models, models_data)
 
             self.logger.info(f"Sync completed: {stats}")
             return stats
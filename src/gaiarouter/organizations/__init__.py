@@ -7,6 +7,7 @@
 from .limits import LimitChecker, get_limit_checker
 from .manager import OrganizationManager, get_organization_manager
 from .storage import OrganizationStorage, get_organization_storage
+from .usage_counters import UsageCounters, get_usage_counters
 
 __all__ = [
     "OrganizationManager",
@@ -15,4 +16,6 @@ __all__ = [
     "get_organization_storage",
     "LimitChecker",
     "get_limit_checker",
+    "UsageCounters",
+    "get_usage_counters",
 ]
@@ -4,15 +4,12 @@
 检查组织是否超出使用限制
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import and_, func
-
-from ..database.connection import get_db
-from ..database.models import Organization, RequestStat
+from ..database.models import Organization
 from ..utils.errors import OrganizationLimitError
 from ..utils.logger import get_logger
+from .usage_counters import get_usage_counters
 
 logger = get_logger(__name__)
 
@@ -27,32 +24,25 @@ class LimitChecker:
         """初始化限制检查器"""
         self.logger = get_logger(__name__)
 
-    def _get_month_start(self) -> datetime:
-        """
-        获取当前月份的开始时间
-
-        Returns:
-          datetime: 月份开始时间
+    def _get_monthly_stats(self, organization_id: str) -> dict:
         """
-        now = datetime.utcnow()
-        return datetime(now.year, now.month, 1, 0, 0, 0)
+        获取组织本月统计数据（读取内存计数器，首次查询时从数据库加载）
 
-    def _get_month_end(self) -> datetime:
-        """
-        获取当前月份的结束时间
+        Args:
+          organization_id: 组织ID
 
         Returns:
-          datetime: 月份结束时间
+          dict: 统计数据（requests, tokens, cost）
         """
-        now = datetime.utcnow()
-        if now.month == 12:
-            return datetime(now.year + 1, 1, 1, 0, 0, 0) - timedelta(seconds=1)
-        else:
-            return datetime(now.year, now.month + 1, 1, 0, 0, 0) - timedelta(seconds=1)
+        try:
+            return get_usage_counters().get(organization_id)
+        except Exception as e:
+            self.logger.exception("Failed to get monthly stats", exc_info=e)
+            return {"requests": 0, "tokens": 0, "cost": 0.0}
 
-    def _get_monthly_stats(self, organization_id: str) -> dict:
+    async def _get_monthly_stats_async(self, organization_id: str) -> dict:
         """
-        获取组织本月统计数据
+        获取组织本月统计数据（异步，首次查询时通过异步引擎加载）
 
         Args:
           organization_id: 组织ID
@@ -61,35 +51,7 @@ class LimitChecker:
           dict: 统计数据（requests, tokens, cost）
         """
         try:
-            db = next(get_db())
-            try:
-                month_start = self._get_month_start()
-                month_end = self._get_month_end()
-
-                # 查询本月统计数据
-                stats = (
-                    db.query(
-                        func.count(RequestStat.id).label("requests"),
-                        func.sum(RequestStat.total_tokens).label("tokens"),
-                        func.sum(RequestStat.cost).label("cost"),
-                    )
-                    .filter(
-                        and_(
-                            RequestStat.organization_id == organization_id,
-                            RequestStat.timestamp >= month_start,
-                            RequestStat.timestamp <= month_end,
-                        )
-                    )
-                    .first()
-                )
-
-                return {
-                    "requests": int(stats.requests or 0),
-                    "tokens": int(stats.tokens or 0),
-                    "cost": float(stats.cost or 0.0),
-                }
-            finally:
-                db.close()
+            return await get_usage_counters().get_async(organization_id)
         except Exception as e:
             self.logger.exception("Failed to get monthly stats", exc_info=e)
             return {"requests": 0, "tokens": 0, "cost": 0.0}
@@ -116,10 +78,63 @@ class LimitChecker:
         Raises:
           OrganizationLimitError: 如果超出限制
         """
-        try:
-            # 获取本月统计数据
-            stats = self._get_monthly_stats(organization.id)
+        stats = self._get_monthly_stats(organization.id)
+        return self._check(
+            organization, stats, additional_requests, additional_tokens, additional_cost
+        )
 
+    async def check_limits_async(
+        self,
+        organization: Organization,
+        additional_requests: int = 0,
+        additional_tokens: int = 0,
+        additional_cost: float = 0.0,
+    ) -> bool:
+        """
+        检查组织是否超出使用限制（异步，不阻塞事件循环）
+
+        Args:
+          organization: 组织对象
+          additional_requests: 额外请求数（用于预检查）
+          additional_tokens: 额外Token数（用于预检查）
+          additional_cost: 额外费用（用于预检查）
+
+        Returns:
+          bool: 是否超出限制
+
+        Raises:
+          OrganizationLimitError: 如果超出限制
+        """
+        stats = await self._get_monthly_stats_async(str(organization.id))
+        return self._check(
+            organization, stats, additional_requests, additional_tokens, additional_cost
+        )
+
+    def _check(
+        self,
+        organization: Organization,
+        stats: dict,
+        additional_requests: int,
+        additional_tokens: int,
+        additional_cost: float,
+    ) -> bool:
+        """
+        根据本月统计数据检查使用限制
+
+        Args:
+          organization: 组织对象
+          stats: 本月统计数据（requests, tokens, cost）
+          additional_requests: 额外请求数
+          additional_tokens: 额外Token数
+          additional_cost: 额外费用
+
+        Returns:
+          bool: 是否超出限制
+
+        Raises:
+          OrganizationLimitError: 如果超出限制
+        """
+        try:
             # 检查请求次数限制
             if organization.monthly_requests_limit:
                 total_requests = stats["requests"] + additional_requests
@@ -7,10 +7,10 @@
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
-from ..database.connection import get_db
+from ..database.connection import get_async_session, get_db
 from ..database.models import Organization
 from ..utils.logger import get_logger
 
@@ -75,6 +75,24 @@ class OrganizationStorage:
             self.logger.exception("Failed to get organization", exc_info=e)
             return None
 
+    async def get_async(self, org_id: str) -> Optional[Organization]:
+        """
+        从数据库获取组织（异步，不阻塞事件循环）
+
+        Args:
+          org_id: 组织ID
+
+        Returns:
+          Optional[Organization]: 组织对象，如果不存在返回None
+        """
+        try:
+            async with get_async_session() as db:
+                result = await db.execute(select(Organization).where(Organization.id == org_id))
+                return result.scalars().first()
+        except Exception as e:
+            self.logger.exception("Failed to get organization", exc_info=e)
+            return None
+
     def list(
         self, filters: Optional[Dict] = None, page: int = 1, limit: int = 20
     ) -> tuple[List[Organization], int]:
@@ -0,0 +1,362 @@
+"""
+组织月度用量计数器
+
+在内存中维护每个组织本月的请求数、Token数和费用：
+首次查询时从数据库加载，统计记录写入后增量累加，定期与数据库对账，跨月时自动清零
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, func, select
+
+from ..config import get_settings
+from ..database.connection import get_async_session, get_db
+from ..database.models import RequestStat
+from ..utils.executor import run_blocking
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 全局计数器实例
+_usage_counters: Optional["UsageCounters"] = None
+
+
+@dataclass
+class MonthlyUsage:
+    """组织本月用量"""
+
+    requests: int = 0
+    tokens: int = 0
+    cost: float = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典"""
+        return {"requests": self.requests, "tokens": self.tokens, "cost": self.cost}
+
+    def merge(self, other: "MonthlyUsage") -> "MonthlyUsage":
+        """累加另一份用量，返回自身"""
+        self.requests += other.requests
+        self.tokens += other.tokens
+        self.cost += other.cost
+        return self
+
+
+def month_range(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    获取当前月份的起止时间
+
+    Args:
+      now: 参考时间，默认为当前UTC时间
+
+    Returns:
+      tuple: (月份开始时间, 下月开始时间)
+    """
+    now = now or datetime.utcnow()
+    start = datetime(now.year, now.month, 1)
+    if now.month == 12:
+        end = datetime(now.year + 1, 1, 1)
+    else:
+        end = datetime(now.year, now.month + 1, 1)
+    return start, end
+
+
+class UsageCounters:
+    """组织月度用量计数器"""
+
+    def __init__(self, reconcile_interval: Optional[float] = None):
+        """
+        初始化计数器
+
+        Args:
+          reconcile_interval: 与数据库对账的间隔（秒），默认从配置读取
+        """
+        if reconcile_interval is None:
+            reconcile_interval = get_settings().org_usage_reconcile_interval
+        self.reconcile_interval = reconcile_interval
+
+        self._usage: Dict[str, MonthlyUsage] = {}
+        # 正在从数据库加载的组织：加载期间的增量和进行中的加载数
+        self._pending: Dict[str, MonthlyUsage] = {}
+        self._loading: Dict[str, int] = {}
+        self._month_start, _ = month_range()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, organization_id: str) -> Dict[str, float]:
+        """
+        获取组织本月用量（未加载时从数据库加载一次）
+
+        Args:
+          organization_id: 组织ID
+
+        Returns:
+          dict: 用量（requests, tokens, cost）
+        """
+        with self._lock:
+            self._rollover()
+            usage = self._usage.get(organization_id)
+            if usage is not None:
+                return usage.to_dict()
+            month_start = self._begin_load([organization_id])
+
+        loaded: Optional[Dict[str, MonthlyUsage]] = None
+        try:
+            loaded = self._load(organization_ids=[organization_id])
+        finally:
+            with self._lock:
+                self._finish_load([organization_id], loaded, month_start)
+        return self._published(organization_id)
+
+    async def get_async(self, organization_id: str) -> Dict[str, float]:
+        """
+        获取组织本月用量（异步，未加载时通过异步引擎从数据库加载一次）
+
+        Args:
+          organization_id: 组织ID
+
+        Returns:
+          dict: 用量（requests, tokens, cost）
+        """
+        with self._lock:
+            self._rollover()
+            usage = self._usage.get(organization_id)
+            if usage is not None:
+                return usage.to_dict()
+            month_start = self._begin_load([organization_id])
+
+        loaded: Optional[Dict[str, MonthlyUsage]] = None
+        try:
+            loaded = await self._load_async([organization_id])
+        finally:
+            with self._lock:
+                self._finish_load([organization_id], loaded, month_start)
+        return self._published(organization_id)
+
+    def add(
+        self,
+        organization_id: Optional[str],
+        requests: int = 1,
+        tokens: int = 0,
+        cost: Optional[float] = None,
+        timestamp: Optional[datetime] = None,
+    ) -> None:
+        """
+        累加已写入数据库的用量（组织正在加载时同时暂存，加载完成后合并；未加载时忽略，首次查询时会从数据库加载）
+
+        Args:
+          organization_id: 组织ID
+          requests: 请求数
+          tokens: Token数
+          cost: 费用
+          timestamp: 请求时间（不属于本月的记录不计入）
+        """
+        if not organization_id:
+            return
+        with self._lock:
+            self._rollover()
+            if timestamp is not None and timestamp < self._month_start:
+                return
+            delta = MonthlyUsage(requests=requests, tokens=tokens or 0, cost=float(cost or 0.0))
+            # 已发布的计数和进行中的加载（含对账）都要记上，加载完成时合并暂存增量
+            for counts in (self._usage, self._pending):
+                usage = counts.get(organization_id)
+                if usage is not None:
+                    usage.merge(delta)
+
+    def reconcile(self) -> int:
+        """
+        与数据库对账，用数据库中的本月汇总覆盖已加载组织的计数
+
+        Returns:
+          int: 对账的组织数
+        """
+        with self._lock:
+            self._rollover()
+            organization_ids = list(self._usage.keys())
+            if not organization_ids:
+                return 0
+            month_start = self._begin_load(organization_ids)
+
+        loaded: Optional[Dict[str, MonthlyUsage]] = None
+        try:
+            loaded = self._load(organization_ids)
+        finally:
+            with self._lock:
+                self._finish_load(organization_ids, loaded, month_start, replace=True)
+        logger.debug("Organization usage reconciled", organizations=len(organization_ids))
+        return len(organization_ids)
+
+    def clear(self) -> None:
+        """清空所有计数"""
+        with self._lock:
+            self._usage.clear()
+            self._pending.clear()
+
+    def _begin_load(self, organization_ids: List[str]) -> datetime:
+        """
+        登记开始加载的组织，加载期间的增量暂存在 _pending 中（调用方需持有锁）
+
+        Returns:
+          datetime: 开始加载时的月份（跨月后加载结果作废）
+        """
+        for organization_id in organization_ids:
+            self._loading[organization_id] = self._loading.get(organization_id, 0) + 1
+            self._pending.setdefault(organization_id, MonthlyUsage())
+        return self._month_start
+
+    def _finish_load(
+        self,
+        organization_ids: List[str],
+        loaded: Optional[Dict[str, MonthlyUsage]],
+        month_start: datetime,
+        replace: bool = False,
+    ) -> None:
+        """
+        发布加载结果：数据库用量加上加载期间暂存的增量（调用方需持有锁）
+
+        加载期间写入的记录可能同时出现在查询结果和暂存增量中（宁可多计，不会少计），
+        下次对账时纠正
+
+        Args:
+          organization_ids: 组织ID列表
+          loaded: 加载结果，加载失败时为None
+          month_start: 开始加载时的月份
+          replace: 是否覆盖已发布的计数（对账），否则以先发布者为准
+        """
+        if month_start != self._month_start:
+            loaded = None
+        for organization_id in organization_ids:
+            pending = self._pending.get(organization_id)
+            if loaded is not None and pending is not None:
+                if replace or organization_id not in self._usage:
+                    usage = loaded.get(organization_id) or MonthlyUsage()
+                    self._usage[organization_id] = usage.merge(pending)
+                # 之后的增量直接累加到已发布的计数
+                self._pending[organization_id] = MonthlyUsage()
+
+            remaining = self._loading.get(organization_id, 0) - 1
+            if remaining > 0:
+                self._loading[organization_id] = remaining
+            else:
+                self._loading.pop(organization_id, None)
+                self._pending.pop(organization_id, None)
+
+    def _published(self, organization_id: str) -> Dict[str, float]:
+        """获取已发布的用量（加载失败或跨月作废时为0）"""
+        with self._lock:
+            usage = self._usage.get(organization_id)
+            return usage.to_dict() if usage is not None else MonthlyUsage().to_dict()
+
+    def _rollover(self) -> None:
+        """跨月时清空计数（调用方需持有锁）"""
+        month_start, _ = month_range()
+        if month_start != self._month_start:
+            self._usage.clear()
+            self._pending.clear()
+            self._month_start = month_start
+            logger.info(
+                "Organization usage counters rolled over", month=month_start.strftime("%Y-%m")
+            )
+
+    def _load(self, organization_ids: Iterable[str]) -> Dict[str, MonthlyUsage]:
+        """
+        从数据库加载组织本月用量（单条GROUP BY查询）
+
+        Args:
+          organization_ids: 组织ID列表
+
+        Returns:
+          dict: 组织ID到用量的映射
+        """
+        db = next(get_db())
+        try:
+            rows = db.execute(self._usage_query(organization_ids)).all()
+        finally:
+            db.close()
+        return self._to_usage(rows)
+
+    async def _load_async(self, organization_ids: Iterable[str]) -> Dict[str, MonthlyUsage]:
+        """
+        通过异步引擎从数据库加载组织本月用量
+
+        Args:
+          organization_ids: 组织ID列表
+
+        Returns:
+          dict: 组织ID到用量的映射
+        """
+        async with get_async_session() as db:
+            rows = (await db.execute(self._usage_query(organization_ids))).all()
+        return self._to_usage(rows)
+
+    @staticmethod
+    def _usage_query(organization_ids: Iterable[str]) -> Select:
+        """构建组织本月用量的GROUP BY查询"""
+        month_start, month_end = month_range()
+        return (
+            select(
+                RequestStat.organization_id,
+                func.count(RequestStat.id),
+                func.sum(RequestStat.total_tokens),
+                func.sum(RequestStat.cost),
+            )
+            .where(
+                and_(
+                    RequestStat.organization_id.in_(list(organization_ids)),
+                    RequestStat.timestamp >= month_start,
+                    RequestStat.timestamp < month_end,
+                )
+            )
+            .group_by(RequestStat.organization_id)
+        )
+
+    @staticmethod
+    def _to_usage(rows: Iterable[Sequence[Any]]) -> Dict[str, MonthlyUsage]:
+        """将查询结果转换为用量映射"""
+        return {
+            row[0]: MonthlyUsage(
+                requests=int(row[1] or 0), tokens=int(row[2] or 0), cost=float(row[3] or 0.0)
+            )
+            for row in rows
+        }
+
+    async def start(self) -> None:
+        """启动定期对账任务"""
+        if self.reconcile_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止定期对账任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """定期对账循环"""
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await run_blocking(self.reconcile)
+            except Exception as e:
+                logger.warning(f"Failed to reconcile organization usage: {e}")
+
+
+def get_usage_counters() -> UsageCounters:
+    """
+    获取组织用量计数器实例（单例模式）
+
+    Returns:
+      UsageCounters: 计数器实例
+    """
+    global _usage_counters
+    if _usage_counters is None:
+        _usage_counters = UsageCounters()
+    return _usage_counters
@@ -7,6 +7,7 @@
 from .anthropic import AnthropicProvider
 from .base import Provider, ProviderResponse
 from .google import GoogleProvider
+from .http_client import HTTPClientPool, close_http_client_pool, get_http_client_pool
 from .openai import OpenAIProvider
 from .openrouter import OpenRouterProvider
 
@@ -17,4 +18,7 @@ __all__ = [
     "AnthropicProvider",
     "GoogleProvider",
     "OpenRouterProvider",
+    "HTTPClientPool",
+    "get_http_client_pool",
+    "close_http_client_pool",
 ]
@@ -7,6 +7,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 import httpx
 
 from ..config import get_settings
+from ..utils import json_codec
 from ..utils.errors import AuthenticationError, TimeoutError
 from .base import Provider, ProviderResponse
 
@@ -14,18 +15,21 @@ from .base import Provider, ProviderResponse
 class AnthropicProvider(Provider):
     """Anthropic提供商"""
 
+    name = "anthropic"
+
     def get_default_base_url(self) -> str:
         """获取Anthropic API基础URL"""
         return "https://api.anthropic.com/v1"
 
-    def get_headers(self) -> Dict[str, str]:
+    def get_headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
         """获取请求头（Anthropic需要特殊的header格式）"""
+        api_key = api_key or self.api_key
         headers = {
             "Content-Type": "application/json",
             "anthropic-version": "2023-06-01",
         }
-        if self.api_key:
-            headers["x-api-key"] = self.api_key
+        if api_key:
+            headers["x-api-key"] = api_key
         return headers
 
     async def chat_completion(
@@ -69,13 +73,17 @@ class AnthropicProvider(Provider):
         payload.update(kwargs)
 
         async def _make_request():
-            async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-                response = await client.post(url, json=payload, headers=self.get_headers())
+            async with self.credentials.lease() as api_key:
+                response = await self.client.post(
+                    url, json=payload, headers=self.get_headers(api_key)
+                )
                 response.raise_for_status()
-                return response.json()
+                return json_codec.loads(response.content)
 
         try:
-            data = await self._retry_request(_make_request)
+            data = await self._retry_request(
+                _make_request, model=model, hedge=self.should_hedge(max_tokens)
+            )
             content = data["content"][0]["text"]
             usage = data.get("usage", {})
 
@@ -132,29 +140,30 @@ class AnthropicProvider(Provider):
 
         payload.update(kwargs)
 
-        async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-            try:
-                async with client.stream(
-                    "POST", url, json=payload, headers=self.get_headers()
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            if data_str == "[DONE]":
-                                break
-
-                            import json
-
-                            try:
-                                data = json.loads(data_str)
-                                yield data
-                            except json.JSONDecodeError:
-                                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    raise AuthenticationError("Invalid Anthropic API Key")
-                raise
-            except httpx.TimeoutException:
-                raise TimeoutError("Anthropic API request timeout")
+        try:
+            async with (
+                self.circuit(model),
+                self.credentials.lease() as api_key,
+                self.client.stream(
+                    "POST", url, json=payload, headers=self.get_headers(api_key)
+                ) as response,
+            ):
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]
+                        if data_str == "[DONE]":
+                            break
+
+                        try:
+                            data = json_codec.loads(data_str)
+                            yield data
+                        except json_codec.JSONDecodeError:
+                            continue
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                raise AuthenticationError("Invalid Anthropic API Key")
+            raise
+        except httpx.TimeoutException:
+            raise TimeoutError("Anthropic API request timeout")
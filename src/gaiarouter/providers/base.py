@@ -6,12 +6,21 @@
 
 import asyncio
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import Any, AsyncIterator, Dict, List, Optional
 
+import httpx
+
 from ..config import get_settings
-from ..utils.errors import TimeoutError
+from ..metrics import get_metrics
+from ..utils.errors import ProviderUnavailableError
 from ..utils.logger import get_logger
+from .circuit_breaker import get_circuit_breakers, is_circuit_failure
+from .credentials import CredentialPool
+from .hedging import get_hedger
+from .http_client import get_http_client_pool
+from .retry import RetryPolicy, get_retry_budgets, is_rate_limited
 
 logger = get_logger(__name__)
 
@@ -32,23 +41,47 @@ class ProviderResponse:
 class Provider(ABC):
     """提供商抽象基类"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    # 提供商名称（熔断器和监控指标使用）
+    name = "unknown"
+
+    # 是否支持返回原始SSE数据行（OpenAI兼容格式，可直通转发给客户端），
+    # 为True的提供商实现 stream_chat_completion_raw()，返回 AsyncGenerator[str, None]
+    supports_raw_stream: bool = False
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        api_keys: Optional[List[str]] = None,
+    ):
         """
         初始化提供商
 
         Args:
           api_key: API密钥
           base_url: API基础URL
+          api_keys: 多个API密钥（可带 ":权重" 后缀），每次调用上游时从中选择一个
         """
-        self.api_key = api_key
         self.base_url = base_url or self.get_default_base_url()
         self.settings = get_settings()
+        self.credentials = CredentialPool(
+            self.name,
+            api_keys or ([api_key] if api_key else []),
+            strategy=self.settings.upstream_key_strategy,
+            cooldown=self.settings.upstream_key_cooldown,
+        )
+        self.api_key = self.credentials.credentials[0].key if self.credentials else None
 
     @abstractmethod
     def get_default_base_url(self) -> str:
         """获取默认的API基础URL"""
         pass
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """获取该提供商上游主机的共享HTTP客户端"""
+        return get_http_client_pool().get_client(self.base_url)
+
     @abstractmethod
     async def chat_completion(
         self,
@@ -99,57 +132,141 @@ class Provider(ABC):
         """
         pass
 
-    def get_headers(self) -> Dict[str, str]:
+    @asynccontextmanager
+    async def circuit(self, model: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        经过熔断器调用上游（提供商级别和模型级别）
+
+        代码块内的超时、连接错误和5xx计入失败，其他结果（包括4xx）计入成功，
+        被取消（客户端断开）时不计入
+
+        Args:
+          model: 上游模型名称，为None时只经过提供商级别的熔断器
+
+        Raises:
+          ProviderUnavailableError: 处于熔断状态，未调用上游
+        """
+        breakers = get_circuit_breakers().acquire(self.name, model)
+        try:
+            yield
+        except (GeneratorExit, asyncio.CancelledError):
+            for breaker in breakers:
+                breaker.release()
+            raise
+        except Exception as e:
+            failed = is_circuit_failure(e)
+            for breaker in breakers:
+                if failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            raise
+        else:
+            for breaker in breakers:
+                breaker.record_success()
+
+    def should_hedge(self, max_tokens: Optional[int]) -> bool:
+        """
+        非流式请求是否使用对冲（只对冲短请求，长请求的耗时主要取决于生成长度）
+
+        Args:
+          max_tokens: 请求的最大token数
+
+        Returns:
+          bool: 启用对冲，且 max_tokens 不超过 HEDGING_MAX_TOKENS（为0时不限制）
+        """
+        if not self.settings.hedging_enabled:
+            return False
+        limit = self.settings.hedging_max_tokens
+        return not limit or (max_tokens is not None and max_tokens <= limit)
+
+    def get_headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
         """
         获取请求头
 
+        Args:
+          api_key: 本次调用使用的API密钥，默认使用第一个
+
         Returns:
           请求头字典
         """
+        api_key = api_key or self.api_key
         headers = {
             "Content-Type": "application/json",
         }
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
         return headers
 
     async def _retry_request(
-        self, func, max_retries: Optional[int] = None, retry_delay: float = 1.0, *args, **kwargs
+        self,
+        func,
+        max_retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        *args,
+        model: Optional[str] = None,
+        hedge: bool = False,
+        **kwargs,
     ):
         """
         重试请求的通用方法
 
+        只重试超时、连接错误、408、429和5xx，退避时间使用全抖动，上游返回 Retry-After 时按其等待；
+        重试受提供商的重试预算限制。每次尝试从凭证池重新选择API Key。每次尝试都经过熔断器，熔断打开后立即失败，不再重试
+
         Args:
           func: 要执行的异步函数
           max_retries: 最大重试次数，默认从配置读取
-          retry_delay: 重试延迟（秒）
+          retry_delay: 第一次重试的退避上限（秒），默认从配置读取
           *args: 函数位置参数
+          model: 上游模型名称（用于模型级别的熔断）
+          hedge: 每次尝试是否使用对冲请求（首个请求较慢时再发出一个，对冲的两个请求算作一次尝试）
           **kwargs: 函数关键字参数
 
         Returns:
           函数执行结果
 
         Raises:
+          ProviderUnavailableError: 处于熔断状态
           最后一次尝试的异常
         """
         if max_retries is None:
             max_retries = self.settings.max_retries
+        if retry_delay is None:
+            retry_delay = self.settings.retry_base_delay
+        policy = RetryPolicy(max_retries, retry_delay, self.settings.retry_max_delay)
+        budget = get_retry_budgets().get(self.name)
+        budget.deposit()
 
-        last_exception = None
-
-        for attempt in range(max_retries + 1):
+        attempt = 0
+        while True:
             try:
-                return await func(*args, **kwargs)
-            except (TimeoutError, Exception) as e:
-                last_exception = e
-                if attempt < max_retries:
-                    wait_time = retry_delay * (2**attempt)  # 指数退避
+                async with self.circuit(model):
+                    if hedge:
+                        return await get_hedger().run(
+                            self.name, model, lambda: func(*args, **kwargs)
+                        )
+                    return await func(*args, **kwargs)
+            except ProviderUnavailableError:
+                raise
+            except Exception as e:
+                # 429只针对当前API Key，还有其他可用Key时直接换Key重试，不必等待 Retry-After
+                switch_key = is_rate_limited(e) and self.credentials.has_available()
+                wait_time = policy.delay(attempt, e, honor_retry_after=not switch_key)
+                if wait_time is None:
+                    if attempt:
+                        logger.error(f"Request failed after {attempt + 1} attempts: {str(e)}")
+                    raise
+                if not budget.try_withdraw():
                     logger.warning(
-                        f"Request failed (attempt {attempt + 1}/{max_retries + 1}), "
-                        f"retrying in {wait_time}s: {str(e)}"
+                        f"Retry budget exhausted, not retrying: {str(e)}", provider=self.name
                     )
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(f"Request failed after {max_retries + 1} attempts: {str(e)}")
-
-        raise last_exception
+                    get_metrics().record_retry_budget_exhausted(self.name)
+                    raise
+                logger.warning(
+                    f"Request failed (attempt {attempt + 1}/{max_retries + 1}), "
+                    f"retrying in {wait_time:.2f}s: {str(e)}"
+                )
+                get_metrics().record_upstream_retry(self.name)
+                await asyncio.sleep(wait_time)
+                attempt += 1
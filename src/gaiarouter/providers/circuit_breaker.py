@@ -0,0 +1,302 @@
+"""
+熔断器
+
+按提供商和模型分别熔断：连续失败达到阈值后打开，打开期间请求立即失败（不再访问上游）；
+冷却时间过后进入半开状态，放行少量探测请求，探测成功则关闭，失败则重新打开。
+熔断器在进程内所有请求间共享
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..config import get_settings
+from ..utils.errors import ProviderUnavailableError, TimeoutError
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 全局熔断器注册表
+_circuit_breakers: Optional["CircuitBreakerRegistry"] = None
+
+
+def is_circuit_failure(error: BaseException) -> bool:
+    """
+    判断异常是否说明上游不可用（计入熔断失败）
+
+    超时、连接错误和5xx计入失败；4xx（包括认证失败）说明上游可以正常响应，不计入
+
+    Args:
+      error: 调用上游时的异常
+
+    Returns:
+      bool: 是否计入失败
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (TimeoutError, httpx.TransportError))
+
+
+class CircuitBreaker:
+    """单个熔断器"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化熔断器
+
+        Args:
+          name: 名称（用于日志）
+          failure_threshold: 打开熔断的连续失败次数
+          recovery_timeout: 打开后进入半开状态的冷却时间（秒）
+          half_open_max_calls: 半开状态下同时放行的探测请求数
+          clock: 时钟函数（测试用）
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+    def _transition(self, state: str) -> None:
+        """切换状态并记录日志"""
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = self._clock()
+            logger.warning(
+                "Circuit breaker opened",
+                circuit=self.name,
+                previous=previous,
+                failures=self.failures,
+            )
+        else:
+            logger.info("Circuit breaker state changed", circuit=self.name, state=state)
+        if state != HALF_OPEN:
+            self._probes = 0
+
+    def retry_after(self) -> float:
+        """
+        距离进入半开状态的剩余时间
+
+        Returns:
+          float: 秒，未打开时为0
+        """
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.recovery_timeout - self._clock(), 0.0)
+
+    def is_rejecting(self) -> bool:
+        """
+        当前是否会拒绝请求（只查看状态，不占用半开探测名额）
+
+        Returns:
+          bool: 打开且冷却时间未到，或半开且探测名额已满时返回True
+        """
+        if self.state == OPEN:
+            return self.retry_after() > 0
+        if self.state == HALF_OPEN:
+            return self._probes >= self.half_open_max_calls
+        return False
+
+    def allow_request(self) -> bool:
+        """
+        请求是否可以访问上游（半开状态下放行的请求占用一个探测名额）
+
+        放行后必须调用 record_success、record_failure 或 release 之一
+
+        Returns:
+          bool: 是否放行
+        """
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def record_success(self) -> None:
+        """记录成功：半开状态下关闭熔断，关闭状态下清零失败次数"""
+        self.failures = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """记录失败：半开状态下重新打开，关闭状态下连续失败达到阈值时打开"""
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self._transition(OPEN)
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """请求被取消（既不算成功也不算失败），释放半开探测名额"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+
+class CircuitBreakerRegistry:
+    """熔断器注册表（按提供商、按提供商+模型）"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        failure_threshold: Optional[int] = None,
+        recovery_timeout: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None,
+    ):
+        """
+        初始化注册表
+
+        Args:
+          enabled: 是否启用熔断，默认从配置读取
+          failure_threshold: 打开熔断的连续失败次数，默认从配置读取
+          recovery_timeout: 冷却时间（秒），默认从配置读取
+          half_open_max_calls: 半开状态下的探测请求数，默认从配置读取
+        """
+        settings = get_settings()
+        if enabled is None:
+            enabled = settings.circuit_breaker_enabled
+        if failure_threshold is None:
+            failure_threshold = settings.circuit_breaker_failure_threshold
+        if recovery_timeout is None:
+            recovery_timeout = settings.circuit_breaker_recovery_timeout
+        if half_open_max_calls is None:
+            half_open_max_calls = settings.circuit_breaker_half_open_max_calls
+
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+
+    def get(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        """
+        获取熔断器（不存在时创建）
+
+        Args:
+          provider: 提供商名称
+          model: 模型名称，为None时返回提供商级别的熔断器
+
+        Returns:
+          CircuitBreaker: 熔断器
+        """
+        key = (provider, model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                f"{provider}/{model}" if model else provider,
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+                half_open_max_calls=self.half_open_max_calls,
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    def breakers_for(self, provider: str, model: Optional[str]) -> List[CircuitBreaker]:
+        """
+        获取一次请求需要经过的熔断器（提供商级别和模型级别）
+
+        Args:
+          provider: 提供商名称
+          model: 模型名称，为None时只经过提供商级别的熔断器
+
+        Returns:
+          list: 熔断器列表，未启用熔断时为空
+        """
+        if not self.enabled:
+            return []
+        if model is None:
+            return [self.get(provider)]
+        return [self.get(provider), self.get(provider, model)]
+
+    def ensure_available(self, provider: str, model: Optional[str]) -> None:
+        """
+        检查提供商和模型是否处于熔断状态（不占用半开探测名额）
+
+        用于流式请求在返回响应头之前快速失败
+
+        Args:
+          provider: 提供商名称
+          model: 模型名称
+
+        Raises:
+          ProviderUnavailableError: 处于熔断状态
+        """
+        for breaker in self.breakers_for(provider, model):
+            if breaker.is_rejecting():
+                raise ProviderUnavailableError(breaker.name, retry_after=breaker.retry_after())
+
+    def acquire(self, provider: str, model: Optional[str]) -> List[CircuitBreaker]:
+        """
+        为一次上游调用获取放行（提供商和模型级别都放行才可调用）
+
+        Args:
+          provider: 提供商名称
+          model: 模型名称
+
+        Returns:
+          list: 已放行的熔断器（调用结束后记录结果）
+
+        Raises:
+          ProviderUnavailableError: 任一熔断器拒绝
+        """
+        acquired: List[CircuitBreaker] = []
+        for breaker in self.breakers_for(provider, model):
+            if not breaker.allow_request():
+                for other in acquired:
+                    other.release()
+                raise ProviderUnavailableError(breaker.name, retry_after=breaker.retry_after())
+            acquired.append(breaker)
+        return acquired
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        获取所有熔断器的状态
+
+        Returns:
+          list: 每个熔断器的 provider、model（提供商级别为None）、state、failures
+        """
+        return [
+            {
+                "provider": provider,
+                "model": model,
+                "state": breaker.state,
+                "failures": breaker.failures,
+            }
+            for (provider, model), breaker in list(self._breakers.items())
+        ]
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    获取熔断器注册表（单例模式）
+
+    Returns:
+      CircuitBreakerRegistry: 注册表实例
+    """
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = CircuitBreakerRegistry()
+    return _circuit_breakers
@@ -0,0 +1,232 @@
+"""
+上游凭证池
+
+每个提供商可以配置多个API Key，每次调用上游时从池中选择一个：
+按进行中请求数最少（least_inflight）或平滑加权轮询（weighted_round_robin）选择，
+返回429的Key在冷却期内不再使用，从而突破单个Key的上游速率限制
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from ..metrics import get_metrics
+from ..utils.logger import get_logger
+from .retry import parse_retry_after
+
+logger = get_logger(__name__)
+
+# 选择策略
+LEAST_INFLIGHT = "least_inflight"
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+STRATEGIES = (LEAST_INFLIGHT, WEIGHTED_ROUND_ROBIN)
+
+
+def split_api_keys(value: Optional[str]) -> List[str]:
+    """
+    解析逗号分隔的API Key列表
+
+    Args:
+      value: 配置值，如 "sk-a,sk-b:3"
+
+    Returns:
+      list: 去除空白后的Key（保留权重后缀）
+    """
+    if not value:
+        return []
+    return [key.strip() for key in value.split(",") if key.strip()]
+
+
+def parse_weighted_key(entry: str) -> "Credential":
+    """
+    解析带权重的Key
+
+    Key后可以用 ":权重" 指定权重（正整数），如 "sk-b:3"；没有后缀时权重为1
+
+    Args:
+      entry: 配置项
+
+    Returns:
+      Credential: 凭证
+    """
+    key, separator, weight = entry.rpartition(":")
+    if separator and key and weight.isdigit() and int(weight) > 0:
+        return Credential(key=key, weight=int(weight))
+    return Credential(key=entry)
+
+
+@dataclass
+class Credential:
+    """单个上游凭证及其使用状态"""
+
+    key: str
+    weight: int = 1
+    in_flight: int = 0
+    requests: int = 0
+    cooldown_until: float = 0.0
+    # 平滑加权轮询的当前权重
+    current_weight: int = 0
+
+    @property
+    def label(self) -> str:
+        """日志和监控指标中使用的Key标识（只保留末4位）"""
+        return f"...{self.key[-4:]}"
+
+
+class CredentialPool:
+    """提供商的上游凭证池"""
+
+    def __init__(
+        self,
+        provider: str,
+        keys: List[str],
+        strategy: str = LEAST_INFLIGHT,
+        cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化凭证池
+
+        Args:
+          provider: 提供商名称（日志和监控指标使用）
+          keys: API Key列表，每项可带 ":权重" 后缀
+          strategy: 选择策略，least_inflight 或 weighted_round_robin
+          cooldown: Key返回429且上游未给出 Retry-After 时的冷却时间（秒）
+          clock: 时钟函数（测试用）
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown credential strategy: {strategy}")
+        self.provider = provider
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._clock = clock
+        self.credentials: List[Credential] = []
+        for entry in keys:
+            credential = parse_weighted_key(entry)
+            if all(existing.key != credential.key for existing in self.credentials):
+                self.credentials.append(credential)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def _available(self) -> List[Credential]:
+        """不在冷却期的凭证；全部冷却时返回最早结束冷却的一个"""
+        now = self._clock()
+        available = [c for c in self.credentials if c.cooldown_until <= now]
+        if available:
+            return available
+        return [min(self.credentials, key=lambda c: c.cooldown_until)]
+
+    def select(self) -> Optional[Credential]:
+        """
+        选择一个凭证（不占用，调用上游请使用 lease）
+
+        Returns:
+          Credential: 选中的凭证，未配置Key时返回None
+        """
+        if not self.credentials:
+            return None
+        available = self._available()
+
+        if self.strategy == WEIGHTED_ROUND_ROBIN:
+            total = 0
+            for credential in available:
+                credential.current_weight += credential.weight
+                total += credential.weight
+            selected = max(available, key=lambda c: c.current_weight)
+            selected.current_weight -= total
+            return selected
+
+        # 进行中请求数（按权重折算）相同时轮流选择，避免总是命中第一个Key
+        start = self._next % len(available)
+        self._next += 1
+        rotated = available[start:] + available[:start]
+        return min(rotated, key=lambda c: c.in_flight / c.weight)
+
+    def has_available(self) -> bool:
+        """
+        是否有不在冷却期的Key
+
+        Returns:
+          bool: 是否有可用Key
+        """
+        now = self._clock()
+        return any(credential.cooldown_until <= now for credential in self.credentials)
+
+    def mark_rate_limited(self, credential: Credential, retry_after: Optional[float]) -> None:
+        """
+        Key返回429后进入冷却
+
+        Args:
+          credential: 凭证
+          retry_after: 上游建议的等待时间（秒），没有时使用默认冷却时间
+        """
+        cooldown = self.cooldown if retry_after is None else retry_after
+        credential.cooldown_until = max(credential.cooldown_until, self._clock() + cooldown)
+        logger.warning(
+            "Upstream key rate limited, cooling down",
+            provider=self.provider,
+            key=credential.label,
+            cooldown=cooldown,
+        )
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Optional[str]]:
+        """
+        选择并占用一个Key用于一次上游调用
+
+        代码块内抛出429时该Key进入冷却；调用结果按Key计入监控指标
+
+        Yields:
+          str: API Key，未配置Key时为None
+        """
+        credential = self.select()
+        if credential is None:
+            yield None
+            return
+
+        credential.in_flight += 1
+        credential.requests += 1
+        outcome = "success"
+        try:
+            yield credential.key
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429:
+                outcome = "rate_limited"
+                self.mark_rate_limited(credential, parse_retry_after(e))
+            else:
+                outcome = "error"
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            credential.in_flight -= 1
+            get_metrics().record_upstream_key_request(self.provider, credential.label, outcome)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        获取所有Key的状态
+
+        Returns:
+          list: 每个Key的 key（末4位）、weight、in_flight、requests、cooling_down
+        """
+        now = self._clock()
+        return [
+            {
+                "key": credential.label,
+                "weight": credential.weight,
+                "in_flight": credential.in_flight,
+                "requests": credential.requests,
+                "cooling_down": credential.cooldown_until > now,
+            }
+            for credential in self.credentials
+        ]
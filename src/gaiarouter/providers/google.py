@@ -7,6 +7,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 import httpx
 
 from ..config import get_settings
+from ..utils import json_codec
 from ..utils.errors import AuthenticationError, TimeoutError
 from .base import Provider, ProviderResponse
 
@@ -14,17 +15,24 @@ from .base import Provider, ProviderResponse
 class GoogleProvider(Provider):
     """Google提供商"""
 
+    name = "google"
+
     def get_default_base_url(self) -> str:
         """获取Google API基础URL"""
         return "https://generativelanguage.googleapis.com/v1"
 
-    def get_headers(self) -> Dict[str, str]:
-        """获取请求头"""
+    def get_headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
+        """获取请求头（Google的API Key通过查询参数传递）"""
         headers = {
             "Content-Type": "application/json",
         }
         return headers
 
+    def get_params(self, api_key: Optional[str] = None) -> Dict[str, str]:
+        """获取查询参数（API Key）"""
+        api_key = api_key or self.api_key
+        return {"key": api_key} if api_key else {}
+
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -72,20 +80,18 @@ class GoogleProvider(Provider):
 
         payload.update(kwargs)
 
-        params = {}
-        if self.api_key:
-            params["key"] = self.api_key
-
         async def _make_request():
-            async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-                response = await client.post(
-                    url, json=payload, headers=self.get_headers(), params=params
+            async with self.credentials.lease() as api_key:
+                response = await self.client.post(
+                    url, json=payload, headers=self.get_headers(), params=self.get_params(api_key)
                 )
                 response.raise_for_status()
-                return response.json()
+                return json_codec.loads(response.content)
 
         try:
-            data = await self._retry_request(_make_request)
+            data = await self._retry_request(
+                _make_request, model=model, hedge=self.should_hedge(max_tokens)
+            )
 
             # 解析响应
             if stream:
@@ -159,29 +165,30 @@ class GoogleProvider(Provider):
 
         payload.update(kwargs)
 
-        params = {}
-        if self.api_key:
-            params["key"] = self.api_key
-
-        async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-            try:
-                async with client.stream(
-                    "POST", url, json=payload, headers=self.get_headers(), params=params
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            import json
-
-                            try:
-                                data = json.loads(line)
-                                yield data
-                            except json.JSONDecodeError:
-                                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    raise AuthenticationError("Invalid Google API Key")
-                raise
-            except httpx.TimeoutException:
-                raise TimeoutError("Google API request timeout")
+        try:
+            async with (
+                self.circuit(model),
+                self.credentials.lease() as api_key,
+                self.client.stream(
+                    "POST",
+                    url,
+                    json=payload,
+                    headers=self.get_headers(),
+                    params=self.get_params(api_key),
+                ) as response,
+            ):
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        try:
+                            data = json_codec.loads(line)
+                            yield data
+                        except json_codec.JSONDecodeError:
+                            continue
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                raise AuthenticationError("Invalid Google API Key")
+            raise
+        except httpx.TimeoutException:
+            raise TimeoutError("Google API request timeout")
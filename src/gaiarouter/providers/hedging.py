@@ -0,0 +1,189 @@
+"""
+对冲请求
+
+非流式请求在按近期耗时分位数计算的延迟内没有返回时，再向上游发出一个相同的请求
+（凭证池按进行中请求数选择Key，通常会使用另一个API Key），采用先成功的结果并取消另一个。
+对冲请求受提供商的对冲预算限制，额外请求数不超过正常请求的一定比例
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from ..config import get_settings
+from ..metrics import get_metrics
+from ..utils.logger import get_logger
+from .retry import RetryBudgets
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 对冲结果（监控指标的 outcome 标签）
+NOT_HEDGED = "not_hedged"  # 首个请求在延迟内返回，或耗时样本不足
+BUDGET_EXHAUSTED = "budget_exhausted"  # 需要对冲但预算已用尽
+PRIMARY_WON = "primary_won"  # 已对冲，首个请求先成功
+HEDGE_WON = "hedge_won"  # 已对冲，对冲请求先成功
+FAILED = "failed"  # 已对冲，两个请求都失败
+
+# 全局对冲器
+_hedger: Optional["Hedger"] = None
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    """计算分位数（最近秩法，q为0~100）"""
+    ordered = sorted(samples)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class Hedger:
+    """对冲请求（按提供商和模型记录耗时，按提供商限制预算）"""
+
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        window: Optional[int] = None,
+        min_delay: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化对冲器
+
+        Args:
+          percentile: 对冲延迟使用的耗时分位（0~100），默认从配置读取
+          min_samples: 开始对冲前需要的耗时样本数，默认从配置读取
+          window: 每个模型保留的最近耗时样本数，默认从配置读取
+          min_delay: 对冲延迟下限（秒），默认从配置读取
+          clock: 时钟函数（测试用）
+        """
+        settings = get_settings()
+        self.percentile = settings.hedging_percentile if percentile is None else percentile
+        self.min_samples = settings.hedging_min_samples if min_samples is None else min_samples
+        self.window = settings.hedging_window if window is None else window
+        self.min_delay = settings.hedging_min_delay if min_delay is None else min_delay
+        self.budgets = RetryBudgets(
+            ratio=settings.hedging_budget_ratio,
+            min_per_second=settings.hedging_budget_min_per_second,
+            burst=settings.hedging_budget_burst,
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies: Dict[Tuple[str, Optional[str]], Deque[float]] = {}
+
+    def record_latency(self, provider: str, model: Optional[str], seconds: float) -> None:
+        """
+        记录一次成功调用的耗时
+
+        Args:
+          provider: 提供商名称
+          model: 上游模型名称
+          seconds: 耗时（秒）
+        """
+        with self._lock:
+            samples = self._latencies.get((provider, model))
+            if samples is None:
+                samples = self._latencies[(provider, model)] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def delay(self, provider: str, model: Optional[str]) -> Optional[float]:
+        """
+        发出对冲请求前的等待时间
+
+        Args:
+          provider: 提供商名称
+          model: 上游模型名称
+
+        Returns:
+          float: 近期耗时的分位数（秒，不低于下限），样本不足时返回None（不对冲）
+        """
+        with self._lock:
+            samples = list(self._latencies.get((provider, model), ()))
+        if len(samples) < self.min_samples:
+            return None
+        return max(_percentile(samples, self.percentile), self.min_delay)
+
+    async def run(self, provider: str, model: Optional[str], call: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行一次可对冲的调用
+
+        首个请求在对冲延迟内没有返回且预算允许时再发出一个相同的请求，返回先成功的结果，
+        取消另一个；两个请求都失败时抛出首个请求的异常。记录的耗时为首个请求开始到得到成功结果的时间
+
+        Args:
+          provider: 提供商名称
+          model: 上游模型名称
+          call: 发起一次上游请求的函数（每次调用发起一个新请求）
+
+        Returns:
+          先成功的请求结果
+
+        Raises:
+          两个请求都失败时为首个请求的异常
+        """
+        budget = self.budgets.get(provider)
+        budget.deposit()
+        metrics = get_metrics()
+        delay = self.delay(provider, model)
+        start = self._clock()
+
+        primary = asyncio.ensure_future(call())
+        hedge = None
+        outcome = NOT_HEDGED
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if delay is None or primary.done():
+                result = await primary
+                self.record_latency(provider, model, self._clock() - start)
+                return result
+
+            if not budget.try_withdraw():
+                outcome = BUDGET_EXHAUSTED
+                result = await primary
+                self.record_latency(provider, model, self._clock() - start)
+                return result
+
+            logger.debug(
+                "Hedging upstream request", provider=provider, model=model, delay=f"{delay:.3f}s"
+            )
+            hedge = asyncio.ensure_future(call())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 读取所有已完成请求的异常，避免未读取异常的警告
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    winner = primary if primary in succeeded else succeeded[0]
+                    outcome = PRIMARY_WON if winner is primary else HEDGE_WON
+                    self.record_latency(provider, model, self._clock() - start)
+                    return winner.result()
+
+            outcome = FAILED
+            # 两个请求都失败，result() 抛出首个请求的异常
+            return primary.result()
+        finally:
+            losers = [task for task in (primary, hedge) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                # 等待被取消的请求退出（释放API Key和连接）
+                await asyncio.wait(losers)
+            metrics.record_hedge(provider, outcome)
+
+
+def get_hedger() -> Hedger:
+    """
+    获取对冲器（单例模式）
+
+    Returns:
+      Hedger: 对冲器实例
+    """
+    global _hedger
+    if _hedger is None:
+        _hedger = Hedger()
+    return _hedger
@@ -0,0 +1,101 @@
+"""
+上游HTTP连接池
+
+为每个上游主机维护一个共享的httpx.AsyncClient，在应用生命周期内复用TCP/TLS连接
+"""
+
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import get_settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 全局连接池实例
+_http_client_pool: Optional["HTTPClientPool"] = None
+
+
+class HTTPClientPool:
+    """上游HTTP连接池（按主机划分）"""
+
+    def __init__(self):
+        """初始化连接池"""
+        self.settings = get_settings()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """
+        创建新的AsyncClient
+
+        每个上游主机独享一个客户端，因此客户端的连接上限即为该主机的连接上限
+
+        Returns:
+          httpx.AsyncClient: 客户端实例
+        """
+        limits = httpx.Limits(
+            max_connections=self.settings.http_max_connections,
+            max_keepalive_connections=self.settings.http_max_keepalive_connections,
+            keepalive_expiry=self.settings.http_keepalive_expiry,
+        )
+        timeout = httpx.Timeout(
+            self.settings.request_timeout, connect=self.settings.http_connect_timeout
+        )
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    def get_client(self, base_url: str) -> httpx.AsyncClient:
+        """
+        获取指定上游的客户端（不存在或已关闭时创建）
+
+        Args:
+          base_url: 上游API基础URL
+
+        Returns:
+          httpx.AsyncClient: 共享的客户端实例
+        """
+        parts = urlsplit(base_url)
+        host = f"{parts.scheme}://{parts.netloc}"
+
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[host] = client
+            logger.info("HTTP client pool created", host=host)
+        return client
+
+    async def close(self) -> None:
+        """关闭所有客户端，释放连接"""
+        clients = list(self._clients.items())
+        self._clients.clear()
+
+        for host, client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client for {host}: {e}")
+
+        if clients:
+            logger.info("HTTP client pools closed", count=len(clients))
+
+
+def get_http_client_pool() -> HTTPClientPool:
+    """
+    获取上游HTTP连接池实例（单例模式）
+
+    Returns:
+      HTTPClientPool: 连接池实例
+    """
+    global _http_client_pool
+    if _http_client_pool is None:
+        _http_client_pool = HTTPClientPool()
+    return _http_client_pool
+
+
+async def close_http_client_pool() -> None:
+    """关闭全局连接池（应用关闭时调用）"""
+    global _http_client_pool
+    if _http_client_pool is not None:
+        await _http_client_pool.close()
+        _http_client_pool = None
@@ -2,11 +2,13 @@
 OpenAI提供商实现
 """
 
-from typing import Any, AsyncIterator, Dict, List, Optional
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
 
 import httpx
 
 from ..config import get_settings
+from ..utils import json_codec
 from ..utils.errors import AuthenticationError, TimeoutError
 from .base import Provider, ProviderResponse
 
@@ -14,6 +16,10 @@ from .base import Provider, ProviderResponse
 class OpenAIProvider(Provider):
     """OpenAI提供商"""
 
+    name = "openai"
+
+    supports_raw_stream = True
+
     def get_default_base_url(self) -> str:
         """获取OpenAI API基础URL"""
         return "https://api.openai.com/v1"
@@ -57,13 +63,17 @@ class OpenAIProvider(Provider):
         payload.update(kwargs)
 
         async def _make_request():
-            async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-                response = await client.post(url, json=payload, headers=self.get_headers())
+            async with self.credentials.lease() as api_key:
+                response = await self.client.post(
+                    url, json=payload, headers=self.get_headers(api_key)
+                )
                 response.raise_for_status()
-                return response.json()
+                return json_codec.loads(response.content)
 
         try:
-            data = await self._retry_request(_make_request)
+            data = await self._retry_request(
+                _make_request, model=model, hedge=self.should_hedge(max_tokens)
+            )
             choice = data["choices"][0]
             usage = data.get("usage", {})
 
@@ -104,11 +114,45 @@ class OpenAIProvider(Provider):
         Yields:
           Dict: 流式响应块
         """
+        lines = self.stream_chat_completion_raw(
+            messages, model, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        # 提前关闭时同时关闭原始流，释放上游连接
+        async with aclosing(lines):
+            async for data_str in lines:
+                try:
+                    yield json_codec.loads(data_str)
+                except json_codec.JSONDecodeError:
+                    continue
+
+    async def stream_chat_completion_raw(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncGenerator[str, None]:
+        """
+        流式调用OpenAI聊天完成接口，返回原始SSE数据行（不解析JSON，用于直通转发）
+
+        Args:
+          messages: 消息列表
+          model: 模型名称
+          temperature: 温度参数
+          max_tokens: 最大token数
+          **kwargs: 其他参数
+
+        Yields:
+          str: data: 行的内容（不含前缀，不含 [DONE]）
+        """
         url = f"{self.base_url}/chat/completions"
         payload = {
             "model": model,
             "messages": messages,
             "stream": True,
+            # 让上游在最后一个chunk中返回用量，用于流式请求的统计
+            "stream_options": {"include_usage": True},
         }
 
         if temperature is not None:
@@ -118,29 +162,25 @@ class OpenAIProvider(Provider):
 
         payload.update(kwargs)
 
-        async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-            try:
-                async with client.stream(
-                    "POST", url, json=payload, headers=self.get_headers()
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # 移除"data: "前缀
-                            if data_str == "[DONE]":
-                                break
-
-                            import json
-
-                            try:
-                                data = json.loads(data_str)
-                                yield data
-                            except json.JSONDecodeError:
-                                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    raise AuthenticationError("Invalid OpenAI API Key")
-                raise
-            except httpx.TimeoutException:
-                raise TimeoutError("OpenAI API request timeout")
+        try:
+            async with (
+                self.circuit(model),
+                self.credentials.lease() as api_key,
+                self.client.stream(
+                    "POST", url, json=payload, headers=self.get_headers(api_key)
+                ) as response,
+            ):
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]  # 移除"data: "前缀
+                        if data_str == "[DONE]":
+                            break
+                        yield data_str
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                raise AuthenticationError("Invalid OpenAI API Key")
+            raise
+        except httpx.TimeoutException:
+            raise TimeoutError("OpenAI API request timeout")
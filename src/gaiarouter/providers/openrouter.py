@@ -2,11 +2,13 @@
 OpenRouter提供商实现
 """
 
-from typing import Any, AsyncIterator, Dict, List, Optional
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
 
 import httpx
 
 from ..config import get_settings
+from ..utils import json_codec
 from ..utils.errors import AuthenticationError, TimeoutError
 from .base import Provider, ProviderResponse
 
@@ -14,10 +16,21 @@ from .base import Provider, ProviderResponse
 class OpenRouterProvider(Provider):
     """OpenRouter提供商"""
 
+    name = "openrouter"
+
+    supports_raw_stream = True
+
     def get_default_base_url(self) -> str:
         """获取OpenRouter API基础URL"""
         return "https://openrouter.ai/api/v1"
 
+    def get_headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
+        """获取请求头（OpenRouter要求 HTTP-Referer 和 X-Title）"""
+        headers = super().get_headers(api_key)
+        headers["HTTP-Referer"] = "https://github.com/your-repo"
+        headers["X-Title"] = "OpenRouter Service"
+        return headers
+
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -56,18 +69,18 @@ class OpenRouterProvider(Provider):
 
         payload.update(kwargs)
 
-        headers = self.get_headers()
-        headers["HTTP-Referer"] = "https://github.com/your-repo"  # OpenRouter要求
-        headers["X-Title"] = "OpenRouter Service"  # OpenRouter要求
-
         async def _make_request():
-            async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-                response = await client.post(url, json=payload, headers=headers)
+            async with self.credentials.lease() as api_key:
+                response = await self.client.post(
+                    url, json=payload, headers=self.get_headers(api_key)
+                )
                 response.raise_for_status()
-                return response.json()
+                return json_codec.loads(response.content)
 
         try:
-            data = await self._retry_request(_make_request)
+            data = await self._retry_request(
+                _make_request, model=model, hedge=self.should_hedge(max_tokens)
+            )
             choice = data["choices"][0]
             usage = data.get("usage", {})
 
@@ -108,11 +121,45 @@ class OpenRouterProvider(Provider):
         Yields:
           Dict: 流式响应块
         """
+        lines = self.stream_chat_completion_raw(
+            messages, model, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        # 提前关闭时同时关闭原始流，释放上游连接
+        async with aclosing(lines):
+            async for data_str in lines:
+                try:
+                    yield json_codec.loads(data_str)
+                except json_codec.JSONDecodeError:
+                    continue
+
+    async def stream_chat_completion_raw(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncGenerator[str, None]:
+        """
+        流式调用OpenRouter聊天完成接口，返回原始SSE数据行（不解析JSON，用于直通转发）
+
+        Args:
+          messages: 消息列表
+          model: 模型标识符
+          temperature: 温度参数
+          max_tokens: 最大token数
+          **kwargs: 其他参数
+
+        Yields:
+          str: data: 行的内容（不含前缀，不含 [DONE]）
+        """
         url = f"{self.base_url}/chat/completions"
         payload = {
             "model": model,
             "messages": messages,
             "stream": True,
+            # 让上游在最后一个chunk中返回用量，用于流式请求的统计
+            "stream_options": {"include_usage": True},
         }
 
         if temperature is not None:
@@ -122,31 +169,25 @@ class OpenRouterProvider(Provider):
 
         payload.update(kwargs)
 
-        headers = self.get_headers()
-        headers["HTTP-Referer"] = "https://github.com/your-repo"
-        headers["X-Title"] = "OpenRouter Service"
+        try:
+            async with (
+                self.circuit(model),
+                self.credentials.lease() as api_key,
+                self.client.stream(
+                    "POST", url, json=payload, headers=self.get_headers(api_key)
+                ) as response,
+            ):
+                response.raise_for_status()
 
-        async with httpx.AsyncClient(timeout=self.settings.request_timeout) as client:
-            try:
-                async with client.stream("POST", url, json=payload, headers=headers) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            if data_str == "[DONE]":
-                                break
-
-                            import json
-
-                            try:
-                                data = json.loads(data_str)
-                                yield data
-                            except json.JSONDecodeError:
-                                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    raise AuthenticationError("Invalid OpenRouter API Key")
-                raise
-            except httpx.TimeoutException:
-                raise TimeoutError("OpenRouter API request timeout")
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]
+                        if data_str == "[DONE]":
+                            break
+                        yield data_str
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                raise AuthenticationError("Invalid OpenRouter API Key")
+            raise
+        except httpx.TimeoutException:
+            raise TimeoutError("OpenRouter API request timeout")
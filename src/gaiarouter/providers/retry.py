@@ -0,0 +1,278 @@
+"""
+重试策略
+
+对上游错误分类（只重试超时、连接错误、429和5xx），遵循上游返回的 Retry-After，
+退避时间使用全抖动（full jitter）避免大量请求同时重试；并按提供商限制重试预算，
+重试次数不超过正常请求的一定比例，避免上游故障时重试放大流量
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from ..config import get_settings
+from ..utils.errors import TimeoutError
+
+# 可重试的HTTP状态码（5xx之外）
+RETRYABLE_STATUS_CODES = frozenset({408, 429})
+
+# 全局重试预算
+_retry_budgets: Optional["RetryBudgets"] = None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    判断异常是否可以重试
+
+    超时、连接错误、408、429和5xx可以重试；其他4xx（参数错误、认证失败等）重试也不会成功
+
+    Args:
+      error: 调用上游时的异常
+
+    Returns:
+      bool: 是否可以重试
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code >= 500 or status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, httpx.TransportError))
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    判断异常是否为上游429
+
+    Args:
+      error: 调用上游时的异常
+
+    Returns:
+      bool: 是否为429
+    """
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429
+
+
+def parse_retry_after(error: BaseException) -> Optional[float]:
+    """
+    从上游响应中读取建议的重试等待时间
+
+    支持 retry-after-ms（毫秒）和 Retry-After（秒数或HTTP日期）
+
+    Args:
+      error: 调用上游时的异常
+
+    Returns:
+      float: 等待时间（秒），没有或无法解析时返回None
+    """
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    headers = error.response.headers
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryBudget:
+    """
+    重试预算（令牌桶）
+
+    每个请求存入 ratio 个令牌，每次重试取出一个令牌；另外每秒补充 min_per_second 个令牌，
+    保证低流量时也能重试。令牌数不超过 burst
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 1.0,
+        burst: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化重试预算
+
+        Args:
+          ratio: 重试次数占请求数的最大比例
+          min_per_second: 每秒补充的令牌数
+          burst: 令牌上限
+          clock: 时钟函数（测试用）
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        """按时间补充令牌（调用方持有锁）"""
+        now = self._clock()
+        elapsed = max(now - self._updated_at, 0.0)
+        self._updated_at = now
+        self._tokens = min(self._tokens + elapsed * self.min_per_second, self.burst)
+
+    def deposit(self) -> None:
+        """记录一个请求"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_withdraw(self) -> bool:
+        """
+        为一次重试取出令牌
+
+        Returns:
+          bool: 预算是否允许重试
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        """当前令牌数"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RetryBudgets:
+    """按提供商的重试预算"""
+
+    def __init__(
+        self,
+        ratio: Optional[float] = None,
+        min_per_second: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        """
+        初始化重试预算
+
+        Args:
+          ratio: 重试次数占请求数的最大比例，默认从配置读取
+          min_per_second: 每秒补充的令牌数，默认从配置读取
+          burst: 令牌上限，默认从配置读取
+        """
+        settings = get_settings()
+        self.ratio = settings.retry_budget_ratio if ratio is None else ratio
+        self.min_per_second = (
+            settings.retry_budget_min_per_second if min_per_second is None else min_per_second
+        )
+        self.burst = settings.retry_budget_burst if burst is None else burst
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> RetryBudget:
+        """
+        获取提供商的重试预算（不存在时创建）
+
+        Args:
+          provider: 提供商名称
+
+        Returns:
+          RetryBudget: 重试预算
+        """
+        budget = self._budgets.get(provider)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.setdefault(
+                    provider, RetryBudget(self.ratio, self.min_per_second, self.burst)
+                )
+        return budget
+
+
+def get_retry_budgets() -> RetryBudgets:
+    """
+    获取重试预算（单例模式）
+
+    Returns:
+      RetryBudgets: 重试预算实例
+    """
+    global _retry_budgets
+    if _retry_budgets is None:
+        _retry_budgets = RetryBudgets()
+    return _retry_budgets
+
+
+class RetryPolicy:
+    """重试策略（重试次数和退避时间）"""
+
+    def __init__(
+        self,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        初始化重试策略
+
+        Args:
+          max_retries: 最大重试次数
+          base_delay: 第一次重试的退避上限（秒），之后每次翻倍
+          max_delay: 退避时间上限（秒），上游要求等待更久时不再重试
+          rng: 随机数生成器（测试用）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        全抖动退避时间：在0到指数退避上限之间均匀随机
+
+        Args:
+          attempt: 已失败的尝试序号（从0开始）
+
+        Returns:
+          float: 等待时间（秒）
+        """
+        cap = min(self.max_delay, self.base_delay * (2**attempt))
+        return self._rng.uniform(0, cap)
+
+    def delay(
+        self, attempt: int, error: BaseException, honor_retry_after: bool = True
+    ) -> Optional[float]:
+        """
+        计算下一次重试前的等待时间
+
+        Args:
+          attempt: 已失败的尝试序号（从0开始）
+          error: 本次尝试的异常
+          honor_retry_after: 是否按上游 Retry-After 等待（换用其他API Key重试时不需要）
+
+        Returns:
+          float: 等待时间（秒），不应重试时返回None
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        retry_after = parse_retry_after(error) if honor_retry_after else None
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_delay:
+            return None
+        return retry_after
@@ -4,8 +4,9 @@
 模型路由和注册表
 """
 
+from .health import HealthTracker, get_health_tracker
 from .model_router import ModelRouter, get_model_router
-from .registry import ModelConfig, ModelRegistry, get_model_registry
+from .registry import AliasTarget, ModelAlias, ModelConfig, ModelRegistry, get_model_registry
 
 __all__ = [
     "ModelRouter",
@@ -13,4 +14,8 @@ __all__ = [
     "ModelRegistry",
     "ModelConfig",
     "get_model_registry",
+    "ModelAlias",
+    "AliasTarget",
+    "HealthTracker",
+    "get_health_tracker",
 ]
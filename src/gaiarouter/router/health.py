@@ -0,0 +1,138 @@
+"""
+上游健康状况
+
+按目标模型（如 openai/gpt-4）记录指数加权移动平均（EWMA）的总耗时、首Token时间和错误率，
+供逻辑模型（别名）在多个等价上游之间选择
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import get_settings
+
+# 全局健康状况记录
+_health_tracker: Optional["HealthTracker"] = None
+
+
+@dataclass
+class TargetHealth:
+    """单个目标模型的健康状况"""
+
+    latency: Optional[float] = None  # 非流式请求总耗时EWMA（秒）
+    ttft: Optional[float] = None  # 流式请求首Token时间EWMA（秒）
+    error_rate: float = 0.0  # 错误率EWMA（0~1）
+    samples: int = 0
+    updated_at: float = 0.0
+
+
+def _ewma(current: Optional[float], value: float, alpha: float) -> float:
+    """更新EWMA（没有历史值时直接使用新值）"""
+    if current is None:
+        return value
+    return current + alpha * (value - current)
+
+
+class HealthTracker:
+    """上游健康状况记录"""
+
+    def __init__(self, alpha: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化健康状况记录
+
+        Args:
+          alpha: EWMA平滑系数（0~1，越大越偏向最近的请求），默认从配置读取
+          clock: 时钟函数（测试用）
+        """
+        self.alpha = get_settings().routing_ewma_alpha if alpha is None else alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._targets: Dict[str, TargetHealth] = {}
+
+    def _target(self, model_id: str) -> TargetHealth:
+        """获取目标模型的记录（不存在时创建，调用方持有锁）"""
+        health = self._targets.get(model_id)
+        if health is None:
+            health = self._targets[model_id] = TargetHealth()
+        return health
+
+    def record_success(
+        self, model_id: str, latency: Optional[float] = None, ttft: Optional[float] = None
+    ) -> None:
+        """
+        记录一次成功的上游调用
+
+        Args:
+          model_id: 目标模型ID
+          latency: 总耗时（秒，非流式请求）
+          ttft: 首Token时间（秒，流式请求）
+        """
+        with self._lock:
+            health = self._target(model_id)
+            if latency is not None:
+                health.latency = _ewma(health.latency, latency, self.alpha)
+            if ttft is not None:
+                health.ttft = _ewma(health.ttft, ttft, self.alpha)
+            health.error_rate = _ewma(health.error_rate, 0.0, self.alpha)
+            health.samples += 1
+            health.updated_at = self._clock()
+
+    def record_failure(self, model_id: str) -> None:
+        """
+        记录一次失败的上游调用
+
+        Args:
+          model_id: 目标模型ID
+        """
+        with self._lock:
+            health = self._target(model_id)
+            health.error_rate = _ewma(health.error_rate, 1.0, self.alpha)
+            health.samples += 1
+            health.updated_at = self._clock()
+
+    def get(self, model_id: str) -> Optional[TargetHealth]:
+        """
+        获取目标模型的健康状况
+
+        Args:
+          model_id: 目标模型ID
+
+        Returns:
+          TargetHealth: 健康状况副本，没有记录时返回None
+        """
+        with self._lock:
+            health = self._targets.get(model_id)
+            return TargetHealth(**vars(health)) if health is not None else None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        获取所有目标模型的健康状况
+
+        Returns:
+          list: 每个目标模型的 model、latency、ttft、error_rate、samples
+        """
+        with self._lock:
+            return [
+                {
+                    "model": model_id,
+                    "latency": health.latency,
+                    "ttft": health.ttft,
+                    "error_rate": health.error_rate,
+                    "samples": health.samples,
+                }
+                for model_id, health in self._targets.items()
+            ]
+
+
+def get_health_tracker() -> HealthTracker:
+    """
+    获取上游健康状况记录（单例模式）
+
+    Returns:
+      HealthTracker: 健康状况记录实例
+    """
+    global _health_tracker
+    if _health_tracker is None:
+        _health_tracker = HealthTracker()
+    return _health_tracker
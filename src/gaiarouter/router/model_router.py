@@ -4,7 +4,8 @@
 根据模型标识符选择对应的提供商和适配器
 """
 
-from typing import Any, Dict, Optional, Tuple
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..adapters import (
     AnthropicRequestAdapter,
@@ -26,49 +27,67 @@ from ..providers import (
     OpenRouterProvider,
     Provider,
 )
-from ..router.registry import get_model_registry
+from ..providers.circuit_breaker import get_circuit_breakers
+from ..providers.credentials import split_api_keys
+from ..router.registry import AliasTarget, get_model_registry
 from ..utils.errors import ModelNotFoundError
 from ..utils.logger import get_logger
+from .health import get_health_tracker
 
 logger = get_logger(__name__)
 
+# 没有任何耗时记录时假定的耗时（秒），只用于相对比较
+DEFAULT_LATENCY = 1.0
+
 
 class ModelRouter:
     """模型路由器"""
 
-    def __init__(self):
-        """初始化路由器"""
+    def __init__(self, rng: Optional[random.Random] = None):
+        """
+        初始化路由器
+
+        Args:
+          rng: 选择逻辑模型目标时使用的随机数生成器（测试用）
+        """
         self.registry = get_model_registry()
         self.settings = get_settings()
+        self._rng = rng or random.Random()
         self._providers: Dict[str, Provider] = {}
         self._request_adapters: Dict[str, RequestAdapter] = {}
         self._response_adapters: Dict[str, ResponseAdapter] = {}
         self._init_providers()
         self._init_adapters()
 
-    def _init_providers(self):
-        """初始化提供商实例"""
-        providers_config = self.settings.providers
-
-        # OpenAI Provider
-        if providers_config.openai_api_key:
-            self._providers["openai"] = OpenAIProvider(api_key=providers_config.openai_api_key)
+    def _api_keys(self, provider_name: str) -> List[str]:
+        """
+        获取提供商配置的所有API Key（单个Key在前，再加上Key列表）
 
-        # Anthropic Provider
-        if providers_config.anthropic_api_key:
-            self._providers["anthropic"] = AnthropicProvider(
-                api_key=providers_config.anthropic_api_key
-            )
+        Args:
+          provider_name: 提供商名称
 
-        # Google Provider
-        if providers_config.google_api_key:
-            self._providers["google"] = GoogleProvider(api_key=providers_config.google_api_key)
+        Returns:
+          list: API Key列表，未配置时为空
+        """
+        providers_config = self.settings.providers
+        api_key = getattr(providers_config, f"{provider_name}_api_key")
+        api_keys = split_api_keys(getattr(providers_config, f"{provider_name}_api_keys"))
+        if api_key and api_key not in api_keys:
+            api_keys.insert(0, api_key)
+        return api_keys
 
-        # OpenRouter Provider
-        if providers_config.openrouter_api_key:
-            self._providers["openrouter"] = OpenRouterProvider(
-                api_key=providers_config.openrouter_api_key
-            )
+    def _init_providers(self):
+        """初始化提供商实例（每个提供商一个实例，持有该提供商的所有API Key）"""
+        provider_classes = {
+            "openai": OpenAIProvider,
+            "anthropic": AnthropicProvider,
+            "google": GoogleProvider,
+            "openrouter": OpenRouterProvider,
+        }
+        for provider_name, provider_class in provider_classes.items():
+            api_keys = self._api_keys(provider_name)
+            if api_keys:
+                self._providers[provider_name] = provider_class(api_keys=api_keys)
 
     def _init_adapters(self):
         """初始化适配器实例"""
@@ -86,12 +105,170 @@ class ModelRouter:
             "openrouter": OpenRouterResponseAdapter(),
         }
 
-    def route(self, model_id: str) -> Tuple[Provider, RequestAdapter, ResponseAdapter, str]:
+    def _target_provider(self, model_id: str) -> Optional[str]:
+        """目标模型的提供商名称（与 route 的解析规则一致）"""
+        if model_id.startswith("openrouter/"):
+            return "openrouter"
+        return self.registry.get_provider(model_id)
+
+    def _target_weight(self, target: AliasTarget, stream: bool, default_latency: float) -> float:
+        """
+        目标的选择权重
+
+        权重与偏好权重成正比，与（按错误率和成本放大后的）耗时的 ROUTING_LATENCY_SENSITIVITY
+        次方成反比；流式请求优先使用首Token时间。没有记录的目标按其他目标的平均耗时计算，
+        保证新目标也能分到流量
+
+        Args:
+          target: 别名目标
+          stream: 是否为流式请求
+          default_latency: 没有耗时记录时使用的耗时
+
+        Returns:
+          float: 选择权重
+        """
+        health = get_health_tracker().get(target.model_id)
+        latency = None
+        error_rate = 0.0
+        if health is not None:
+            latency = health.ttft if stream and health.ttft is not None else health.latency
+            error_rate = health.error_rate
+        if latency is None:
+            latency = default_latency
+
+        badness = (
+            max(latency, 0.001)
+            * (1 + self.settings.routing_error_penalty * error_rate)
+            * (1 + self.settings.routing_cost_weight * target.cost)
+        )
+        return target.weight / badness**self.settings.routing_latency_sensitivity
+
+    def resolve(
+        self,
+        model_id: str,
+        stream: bool = False,
+        is_enabled: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """
+        将逻辑模型解析为一个目标模型（不是逻辑模型时原样返回）
+
+        只在提供商已配置、已启用、且未熔断的目标中选择；选择按实时的EWMA耗时、
+        首Token时间和错误率加权随机，较慢或出错较多的上游分到的流量自动减少，
+        但仍保留少量流量以便恢复后重新被选中
+
+        Args:
+          model_id: 模型ID或逻辑模型ID
+          stream: 是否为流式请求（优先按首Token时间选择）
+          is_enabled: 检查目标模型是否启用的回调，为None时不检查
+
+        Returns:
+          str: 目标模型ID
+
+        Raises:
+          ModelNotFoundError: 逻辑模型没有可用的目标
+        """
+        alias = self.registry.get_alias(model_id)
+        if alias is None:
+            return model_id
+
+        candidates = [
+            target
+            for target in alias.targets
+            if self._target_provider(target.model_id) in self._providers
+            and (is_enabled is None or is_enabled(target.model_id))
+        ]
+        if not candidates:
+            raise ModelNotFoundError(f"No available target for model alias: {model_id}")
+
+        # 熔断中的目标不参与选择（全部熔断时仍然选择，由熔断器返回503）
+        breakers = get_circuit_breakers()
+        available = [
+            target
+            for target in candidates
+            if not any(
+                breaker.is_rejecting()
+                for breaker in breakers.breakers_for(
+                    self._target_provider(target.model_id),
+                    self._upstream_model_name(target.model_id),
+                )
+            )
+        ]
+        candidates = available or candidates
+        if len(candidates) == 1:
+            return candidates[0].model_id
+
+        tracker = get_health_tracker()
+        known = []
+        for target in candidates:
+            health = tracker.get(target.model_id)
+            if health is not None:
+                latency = health.ttft if stream and health.ttft is not None else health.latency
+                if latency is not None:
+                    known.append(latency)
+        default_latency = sum(known) / len(known) if known else DEFAULT_LATENCY
+
+        weights = [self._target_weight(target, stream, default_latency) for target in candidates]
+        selected = self._rng.choices(candidates, weights=weights)[0]
+        logger.debug(
+            f"Resolved model alias {model_id} to {selected.model_id}",
+            weights={t.model_id: round(w, 6) for t, w in zip(candidates, weights)},
+        )
+        return selected.model_id
+
+    def fallback_chain(
+        self,
+        model_id: str,
+        requested_model: Optional[str] = None,
+        is_enabled: Optional[Callable[[str], bool]] = None,
+    ) -> List[str]:
+        """
+        目标模型失败时按顺序尝试的回退目标
+
+        先是注册表中该模型的回退链，请求的是逻辑模型时再加上其余的别名目标；
+        跳过提供商未配置或未启用的目标（熔断状态在改用目标时检查）
+
+        Args:
+          model_id: 失败的目标模型ID
+          requested_model: 客户端请求的模型ID（可能是逻辑模型）
+          is_enabled: 检查目标模型是否启用的回调，为None时不检查
+
+        Returns:
+          list: 回退目标模型ID列表，不包含 model_id
+        """
+        chain = self.registry.get_fallbacks(model_id)
+        if requested_model is not None:
+            alias = self.registry.get_alias(requested_model)
+            if alias is not None:
+                chain.extend(target.model_id for target in alias.targets)
+
+        fallbacks: List[str] = []
+        for target in chain:
+            if target == model_id or target in fallbacks:
+                continue
+            if self._target_provider(target) not in self._providers:
+                continue
+            if is_enabled is not None and not is_enabled(target):
+                continue
+            fallbacks.append(target)
+        return fallbacks
+
+    def _upstream_model_name(self, model_id: str) -> str:
+        """目标模型发送给上游的模型名称（熔断器按该名称区分模型）"""
+        if model_id.startswith("openrouter/"):
+            return model_id[len("openrouter/") :]
+        model_config = self.registry.get(model_id)
+        return model_config.name if model_config else model_id
+
+    def route(
+        self, model_id: str, stream: bool = False
+    ) -> Tuple[Provider, RequestAdapter, ResponseAdapter, str]:
         """
         路由模型到对应的提供商和适配器
 
         Args:
-          model_id: 模型ID，格式为 {provider}/{model-name} 或 openrouter/{original-id}
+          model_id: 模型ID，格式为 {provider}/{model-name} 或 openrouter/{original-id}，
+            也可以是逻辑模型ID（先按上游健康状况选择一个目标模型）
+          stream: 是否为流式请求（用于逻辑模型的选择）
 
         Returns:
           Tuple[Provider, RequestAdapter, ResponseAdapter, str]:
@@ -100,6 +277,8 @@ class ModelRouter:
         Raises:
           ModelNotFoundError: 模型不存在
         """
+        model_id = self.resolve(model_id, stream=stream)
+
         # 处理 openrouter/ 前缀
         actual_model_id = model_id
         provider_name = None
@@ -1,13 +1,15 @@
 """
 模型注册表
 
-管理模型配置和提供商映射
+管理模型配置和提供商映射，可由多个等价上游提供的逻辑模型（别名），
+以及上游失败时按顺序尝试的回退链
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
 from ..config import get_settings
+from ..utils import json_codec
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,13 +25,55 @@ class ModelConfig:
     api_key_env: Optional[str] = None  # API Key环境变量名
 
 
+@dataclass
+class AliasTarget:
+    """逻辑模型的一个目标"""
+
+    model_id: str  # 目标模型ID，如 openrouter/gpt-4
+    weight: float = 1.0  # 偏好权重（越大越优先）
+    cost: float = 0.0  # 相对成本（越大越少使用）
+
+
+@dataclass
+class ModelAlias:
+    """逻辑模型（别名），可由多个等价的上游模型提供"""
+
+    id: str  # 逻辑模型ID，如 gpt-4
+    targets: List[AliasTarget] = field(default_factory=list)
+
+
+def _parse_alias_target(value: Any) -> AliasTarget:
+    """
+    解析别名目标配置
+
+    Args:
+      value: 模型ID字符串，或包含 model、weight、cost 的字典
+
+    Returns:
+      AliasTarget: 别名目标
+    """
+    if isinstance(value, str):
+        return AliasTarget(model_id=value)
+    return AliasTarget(
+        model_id=value["model"],
+        weight=float(value.get("weight", 1.0)),
+        cost=float(value.get("cost", 0.0)),
+    )
+
+
 class ModelRegistry:
     """模型注册表"""
 
     def __init__(self):
         """初始化模型注册表"""
         self.models: Dict[str, ModelConfig] = {}
+        self.aliases: Dict[str, ModelAlias] = {}
+        self.fallbacks: Dict[str, List[str]] = {}
         self._load_default_models()
+        self._load_default_aliases()
+        self._load_configured_aliases()
+        self._load_default_fallbacks()
+        self._load_configured_fallbacks()
 
     def _load_default_models(self):
         """加载默认模型配置"""
@@ -155,6 +199,75 @@ class ModelRegistry:
             )
         )
 
+    def _load_default_aliases(self):
+        """加载默认逻辑模型（同一模型的直连和OpenRouter上游）"""
+        self.register_alias(
+            ModelAlias(
+                id="gpt-4",
+                targets=[AliasTarget("openai/gpt-4"), AliasTarget("openrouter/gpt-4")],
+            )
+        )
+        self.register_alias(
+            ModelAlias(
+                id="gpt-3.5-turbo",
+                targets=[
+                    AliasTarget("openai/gpt-3.5-turbo"),
+                    AliasTarget("openrouter/gpt-3.5-turbo"),
+                ],
+            )
+        )
+        self.register_alias(
+            ModelAlias(
+                id="claude-3-opus",
+                targets=[
+                    AliasTarget("anthropic/claude-3-opus"),
+                    AliasTarget("openrouter/claude-3-opus"),
+                ],
+            )
+        )
+
+    def _load_configured_aliases(self):
+        """
+        加载配置的逻辑模型（MODEL_ALIASES，覆盖同名的默认别名）
+
+        格式为JSON对象，如 {"gpt-4": ["openai/gpt-4", {"model": "openrouter/gpt-4", "weight": 0.5}]}
+        """
+        value = get_settings().model_aliases
+        if not value:
+            return
+        try:
+            aliases = json_codec.loads(value)
+            for alias_id, targets in aliases.items():
+                self.register_alias(
+                    ModelAlias(id=alias_id, targets=[_parse_alias_target(t) for t in targets])
+                )
+        except (json_codec.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid MODEL_ALIASES configuration: {e}")
+
+    def _load_default_fallbacks(self):
+        """加载默认回退链（直连上游失败时改用OpenRouter上的同一模型）"""
+        self.register_fallbacks("openai/gpt-4", ["openrouter/gpt-4"])
+        self.register_fallbacks("openai/gpt-3.5-turbo", ["openrouter/gpt-3.5-turbo"])
+        self.register_fallbacks("anthropic/claude-3-opus", ["openrouter/claude-3-opus"])
+
+    def _load_configured_fallbacks(self):
+        """
+        加载配置的回退链（MODEL_FALLBACKS，覆盖同名模型的默认回退链）
+
+        格式为JSON对象，如 {"anthropic/claude-3-opus": ["openrouter/claude-3-opus"]}
+        """
+        value = get_settings().model_fallbacks
+        if not value:
+            return
+        try:
+            fallbacks = json_codec.loads(value)
+            for model_id, targets in fallbacks.items():
+                if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+                    raise ValueError(f"fallbacks of {model_id} must be a list of model IDs")
+                self.register_fallbacks(model_id, targets)
+        except (json_codec.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            logger.error(f"Invalid MODEL_FALLBACKS configuration: {e}")
+
     def register(self, model: ModelConfig):
         """
         注册模型
@@ -186,6 +299,54 @@ class ModelRegistry:
         """
         return list(self.models.values())
 
+    def register_alias(self, alias: ModelAlias):
+        """
+        注册逻辑模型
+
+        Args:
+          alias: 逻辑模型配置
+        """
+        self.aliases[alias.id] = alias
+        logger.info(
+            f"Registered model alias: {alias.id} -> "
+            f"{', '.join(target.model_id for target in alias.targets)}"
+        )
+
+    def get_alias(self, alias_id: str) -> Optional[ModelAlias]:
+        """
+        获取逻辑模型配置
+
+        Args:
+          alias_id: 逻辑模型ID
+
+        Returns:
+          逻辑模型配置，如果不存在返回None
+        """
+        return self.aliases.get(alias_id)
+
+    def register_fallbacks(self, model_id: str, fallbacks: List[str]):
+        """
+        注册模型的回退链
+
+        Args:
+          model_id: 模型ID
+          fallbacks: 按顺序尝试的回退模型ID列表
+        """
+        self.fallbacks[model_id] = list(fallbacks)
+        logger.info(f"Registered model fallbacks: {model_id} -> {', '.join(fallbacks)}")
+
+    def get_fallbacks(self, model_id: str) -> List[str]:
+        """
+        获取模型的回退链
+
+        Args:
+          model_id: 模型ID
+
+        Returns:
+          回退模型ID列表，没有配置时为空
+        """
+        return list(self.fallbacks.get(model_id, []))
+
     def get_provider(self, model_id: str) -> Optional[str]:
         """
         获取模型所属的提供商
@@ -7,6 +7,7 @@
 from .collector import StatsCollector, get_stats_collector
 from .query import StatsQuery, get_stats_query
 from .storage import StatsStorage, get_stats_storage
+from .stream_usage import StreamUsageAccumulator
 
 __all__ = [
     "StatsCollector",
@@ -15,4 +16,5 @@ __all__ = [
     "get_stats_storage",
     "StatsQuery",
     "get_stats_query",
+    "StreamUsageAccumulator",
 ]
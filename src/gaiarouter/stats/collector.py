@@ -2,15 +2,28 @@
 统计收集器
 
 负责收集和记录API请求的统计数据
+
+请求路径通过 enqueue() 将统计记录放入内存队列后立即返回，
+后台任务按批量大小/时间间隔将记录批量写入数据库；
+队列已满或数据库写入失败时记录会落盘，数据库恢复后重放
 """
 
+import asyncio
+import json
+import threading
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
+from ..config import get_settings
 from ..database.connection import get_db
 from ..database.models import Model, RequestStat
+from ..organizations.usage_counters import get_usage_counters
+from ..utils.executor import run_blocking
 from ..utils.logger import get_logger
+from .rollups import upsert_rollups
+from .storage import get_stats_storage
 
 logger = get_logger(__name__)
 
@@ -25,6 +38,27 @@ class StatsCollector:
         """初始化统计收集器"""
         self.logger = get_logger(__name__)
 
+        settings = get_settings()
+        self.queue_size = settings.stats_queue_size
+        self.batch_size = settings.stats_batch_size
+        self.flush_interval = settings.stats_flush_interval
+        self.spill_path = Path(settings.stats_spill_path)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._spill_lock = threading.Lock()
+        self._has_spill = False
+        self._overflow: List[Dict[str, Any]] = []
+        self._overflow_task: Optional[asyncio.Task] = None
+
+        # 计数在工作线程中更新（写入、落盘、重放可能并发）
+        self._counter_lock = threading.Lock()
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failed_batches = 0
+
     def calculate_cost(
         self, model_id: str, prompt_tokens: int, completion_tokens: int
     ) -> Optional[float]:
@@ -58,24 +92,19 @@ class StatsCollector:
                     )
                     return None
 
-                # 计算费用（定价单位为每1K tokens）
-                prompt_cost = (float(prompt_tokens) / 1000.0) * float(model.pricing_prompt)
-                completion_cost = (float(completion_tokens) / 1000.0) * float(
-                    model.pricing_completion
+                total_cost = self._compute_cost(
+                    model.pricing_prompt, model.pricing_completion, prompt_tokens, completion_tokens
                 )
-                total_cost = prompt_cost + completion_cost
 
                 self.logger.debug(
                     "Cost calculated",
                     model=model_id,
                     prompt_tokens=prompt_tokens,
                     completion_tokens=completion_tokens,
-                    prompt_cost=prompt_cost,
-                    completion_cost=completion_cost,
                     total_cost=total_cost,
                 )
 
-                return round(total_cost, 6)  # 保留6位小数
+                return total_cost
 
             finally:
                 db.close()
@@ -94,6 +123,7 @@ class StatsCollector:
         completion_tokens: int,
         total_tokens: int,
         cost: Optional[float] = None,
+        requested_model: Optional[str] = None,
     ) -> bool:
         """
         记录请求统计
@@ -107,6 +137,50 @@ class StatsCollector:
           completion_tokens: 输出Token数
           total_tokens: 总Token数
           cost: 费用（可选，如果不提供则自动计算）
+          requested_model: 客户端请求的模型标识（逻辑模型或发生回退时与 model 不同）
+
+        Returns:
+          bool: 是否成功记录
+        """
+        # 费用计算和数据库写入都是同步调用，在线程池中执行，不阻塞事件循环
+        return await run_blocking(
+            self.record_request_sync,
+            api_key_id,
+            organization_id,
+            model,
+            provider,
+            prompt_tokens,
+            completion_tokens,
+            total_tokens,
+            cost,
+            requested_model,
+        )
+
+    def record_request_sync(
+        self,
+        api_key_id: str,
+        organization_id: Optional[str],
+        model: str,
+        provider: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        total_tokens: int,
+        cost: Optional[float] = None,
+        requested_model: Optional[str] = None,
+    ) -> bool:
+        """
+        同步记录请求统计（用于非异步环境）
+
+        Args:
+          api_key_id: API Key ID
+          organization_id: 组织ID（可选）
+          model: 模型标识
+          provider: 提供商
+          prompt_tokens: 输入Token数
+          completion_tokens: 输出Token数
+          total_tokens: 总Token数
+          cost: 费用（可选，如果不提供则自动计算）
+          requested_model: 客户端请求的模型标识（逻辑模型或发生回退时与 model 不同）
 
         Returns:
           bool: 是否成功记录
@@ -117,27 +191,31 @@ class StatsCollector:
                 cost = self.calculate_cost(model, prompt_tokens, completion_tokens)
 
             # 创建统计记录
-            stat = RequestStat(
-                api_key_id=api_key_id,
-                organization_id=organization_id,
-                model=model,
-                provider=provider,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
-                cost=cost,
-                timestamp=datetime.utcnow(),
-            )
-
-            # 保存到数据库
+            record = {
+                "api_key_id": api_key_id,
+                "organization_id": organization_id,
+                "model": model,
+                "provider": provider,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens,
+                "cost": cost,
+                "requested_model": requested_model,
+                "timestamp": datetime.utcnow(),
+            }
+            stat = RequestStat(**record)
+
+            # 保存到数据库（同一事务内更新用量汇总）
             db = next(get_db())
             try:
                 db.add(stat)
+                upsert_rollups(db, [record])
                 db.commit()
                 db.refresh(stat)
+                get_usage_counters().add(organization_id, tokens=total_tokens, cost=cost)
 
                 self.logger.debug(
-                    "Request stat recorded",
+                    "Request stat recorded (sync)",
                     api_key_id=api_key_id,
                     model=model,
                     tokens=total_tokens,
@@ -153,10 +231,62 @@ class StatsCollector:
                 db.close()
 
         except Exception as e:
-            self.logger.exception("Failed to record request stat", exc_info=e)
+            self.logger.exception("Failed to record request stat (sync)", exc_info=e)
             return False
 
-    def record_request_sync(
+    @staticmethod
+    def _compute_cost(
+        pricing_prompt: Any, pricing_completion: Any, prompt_tokens: int, completion_tokens: int
+    ) -> float:
+        """按定价（每1K tokens）计算费用，保留6位小数"""
+        prompt_cost = (float(prompt_tokens) / 1000.0) * float(pricing_prompt)
+        completion_cost = (float(completion_tokens) / 1000.0) * float(pricing_completion)
+        return round(prompt_cost + completion_cost, 6)
+
+    def fill_costs(self, records: List[Dict[str, Any]]) -> None:
+        """
+        为一批统计记录补全费用（每批只查询一次模型定价）
+
+        Args:
+          records: 统计记录字典列表，cost为None的记录会被补全
+        """
+        model_ids = {r["model"] for r in records if r.get("cost") is None}
+        if not model_ids:
+            return
+
+        try:
+            db = next(get_db())
+            try:
+                rows = (
+                    db.query(Model.id, Model.pricing_prompt, Model.pricing_completion)
+                    .filter(Model.id.in_(model_ids))
+                    .all()
+                )
+            finally:
+                db.close()
+        except Exception as e:
+            self.logger.error(f"Failed to load model pricing: {e}")
+            return
+
+        pricing = {
+            row[0]: (row[1], row[2]) for row in rows if row[1] is not None and row[2] is not None
+        }
+        for record in records:
+            if record.get("cost") is None and record["model"] in pricing:
+                prompt_price, completion_price = pricing[record["model"]]
+                record["cost"] = self._compute_cost(
+                    prompt_price,
+                    completion_price,
+                    record["prompt_tokens"],
+                    record["completion_tokens"],
+                )
+
+    @property
+    def is_running(self) -> bool:
+        """后台批量写入任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    def enqueue(
         self,
         api_key_id: str,
         organization_id: Optional[str],
@@ -166,9 +296,13 @@ class StatsCollector:
         completion_tokens: int,
         total_tokens: int,
         cost: Optional[float] = None,
+        requested_model: Optional[str] = None,
     ) -> bool:
         """
-        同步记录请求统计（用于非异步环境）
+        提交请求统计（不阻塞，不访问数据库）
+
+        队列已满或后台任务未运行（启动前/停止后）时记录交给后台任务在线程中落盘，
+        后台任务运行后重放；不在事件循环中调用时同步写入数据库
 
         Args:
           api_key_id: API Key ID
@@ -178,18 +312,17 @@ class StatsCollector:
           prompt_tokens: 输入Token数
           completion_tokens: 输出Token数
           total_tokens: 总Token数
-          cost: 费用（可选，如果不提供则自动计算）
+          cost: 费用（可选，如果不提供则在批量写入时计算）
+          requested_model: 客户端请求的模型标识（逻辑模型或发生回退时与 model 不同）
 
         Returns:
-          bool: 是否成功记录
+          bool: 是否成功提交
         """
         try:
-            # 如果没有提供费用，则自动计算
-            if cost is None:
-                cost = self.calculate_cost(model, prompt_tokens, completion_tokens)
-
-            # 创建统计记录
-            stat = RequestStat(
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # 非异步环境，可以直接阻塞写入
+            return self.record_request_sync(
                 api_key_id=api_key_id,
                 organization_id=organization_id,
                 model=model,
@@ -198,36 +331,218 @@ class StatsCollector:
                 completion_tokens=completion_tokens,
                 total_tokens=total_tokens,
                 cost=cost,
-                timestamp=datetime.utcnow(),
+                requested_model=requested_model,
             )
 
-            # 保存到数据库
-            db = next(get_db())
-            try:
-                db.add(stat)
-                db.commit()
-                db.refresh(stat)
-
-                self.logger.debug(
-                    "Request stat recorded (sync)",
-                    api_key_id=api_key_id,
-                    model=model,
-                    tokens=total_tokens,
-                    cost=cost,
-                )
+        record = {
+            "api_key_id": api_key_id,
+            "organization_id": organization_id,
+            "model": model,
+            "provider": provider,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "cost": cost,
+            "requested_model": requested_model,
+            "timestamp": datetime.utcnow(),
+        }
+        if not self.is_running:
+            self.logger.warning("Stats collector not running, spilling record to disk")
+            self._overflow_record(record)
+            return True
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.logger.warning("Stats queue full, spilling record to disk")
+            self._overflow_record(record)
+        return True
+
+    def _overflow_record(self, record: Dict[str, Any]) -> None:
+        """将记录交给后台任务在线程中落盘（需在事件循环中调用）"""
+        self._overflow.append(record)
+        if self._overflow_task is None or self._overflow_task.done():
+            self._overflow_task = asyncio.create_task(self._spill_overflow())
+
+    async def start(self) -> None:
+        """启动后台批量写入任务"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopping = False
+        self._has_spill = self.spill_path.exists()
+        self._task = asyncio.create_task(self._run())
+        self.logger.info(
+            "Stats collector started",
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval,
+        )
+
+    async def stop(self) -> None:
+        """停止后台任务（先写完队列中剩余的记录）"""
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            await self._task
+            if self._overflow_task is not None:
+                await self._overflow_task
+        finally:
+            self._task = None
+            self._overflow_task = None
+            self._queue = None
+        self.logger.info("Stats collector stopped", **self.stats())
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取收集器运行统计
 
-                return True
+        Returns:
+          dict: 队列长度、已写入、落盘、重放和失败批次数
+        """
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "failed_batches": self.failed_batches,
+        }
+
+    async def _run(self) -> None:
+        """后台批量写入循环（单次出错只记录日志，不终止循环）"""
+        while not (self._stopping and self._queue.empty()):
+            try:
+                batch = await self._next_batch()
+                if batch:
+                    ok = await self._write_batch(batch)
+                else:
+                    ok = True
+                if ok and self._has_spill and not self._stopping:
+                    await run_blocking(self._replay_spill)
             except Exception as e:
-                db.rollback()
-                self.logger.error(f"Failed to save stat: {e}", exc_info=e)
-                raise
-            finally:
-                db.close()
+                self.logger.error(f"Stats writer loop error: {e}")
+                # 避免持续出错时空转
+                await asyncio.sleep(self.flush_interval)
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """从队列取出一批记录（达到批量大小或等待超时即返回）"""
+        batch: List[Dict[str, Any]] = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # 先取走队列中已有的记录，避免逐条等待
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size or self._stopping:
+                break
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
 
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """在线程中写入一批记录，失败时落盘"""
+        try:
+            written = await run_blocking(self._persist, batch)
+            with self._counter_lock:
+                self.written += written
+            return True
         except Exception as e:
-            self.logger.exception("Failed to record request stat (sync)", exc_info=e)
+            self.failed_batches += 1
+            self.logger.error(f"Failed to write stats batch, spilling to disk: {e}")
+            await run_blocking(self._spill, batch)
             return False
 
+    def _persist(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        补全费用并批量写入数据库（在工作线程中执行）
+
+        Returns:
+          int: 写入的记录数
+        """
+        self.fill_costs(batch)
+        written = get_stats_storage().bulk_save(batch)
+        self._count_usage(batch)
+        self.logger.debug("Stats batch written", count=len(batch))
+        return written
+
+    def _count_usage(self, records: List[Dict[str, Any]]) -> None:
+        """将已写入的记录累加到组织月度用量计数器"""
+        counters = get_usage_counters()
+        for record in records:
+            counters.add(
+                record.get("organization_id"),
+                tokens=record.get("total_tokens") or 0,
+                cost=record.get("cost"),
+                timestamp=record.get("timestamp"),
+            )
+
+    async def _spill_overflow(self) -> None:
+        """在线程中落盘队列已满时溢出的记录"""
+        while self._overflow:
+            records, self._overflow = self._overflow, []
+            await run_blocking(self._spill, records)
+
+    def _spill(self, records: List[Dict[str, Any]]) -> None:
+        """将记录追加写入落盘文件（JSON Lines，在工作线程中执行）"""
+        try:
+            with self._spill_lock:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for record in records:
+                        data = dict(record, timestamp=record["timestamp"].isoformat())
+                        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                self._has_spill = True
+            with self._counter_lock:
+                self.spilled += len(records)
+        except Exception as e:
+            self.logger.error(f"Failed to spill stats to disk, {len(records)} records lost: {e}")
+
+    def _replay_spill(self) -> None:
+        """将落盘的记录重新写入数据库（在工作线程中执行）"""
+        with self._spill_lock:
+            if not self.spill_path.exists():
+                self._has_spill = False
+                return
+            replay_path = self.spill_path.with_name(self.spill_path.name + ".replay")
+            self.spill_path.replace(replay_path)
+            self._has_spill = False
+
+        records = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+                    # 增加 requested_model 之前落盘的记录
+                    data.setdefault("requested_model", None)
+                    records.append(data)
+                except (ValueError, KeyError) as e:
+                    self.logger.warning(f"Skipping malformed spilled stat: {e}")
+
+        for i in range(0, len(records), self.batch_size):
+            chunk = records[i : i + self.batch_size]
+            try:
+                written = self._persist(chunk)
+                with self._counter_lock:
+                    self.written += written
+                    self.replayed += len(chunk)
+            except Exception as e:
+                self.logger.error(f"Failed to replay spilled stats: {e}")
+                self._spill(records[i:])
+                break
+
+        replay_path.unlink(missing_ok=True)
+        self.logger.info("Spilled stats replayed", count=self.replayed)
+
 
 def get_stats_collector() -> StatsCollector:
     """
@@ -5,10 +5,11 @@
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
+from ..config import get_settings
 from ..utils.logger import get_logger
 from .storage import StatsStorage, get_stats_storage
 
@@ -17,6 +18,9 @@ logger = get_logger(__name__)
 # 全局统计查询实例
 _stats_query: Optional["StatsQuery"] = None
 
+# 查询参数中的时间分组方式到存储层分组维度的映射
+PERIOD_GROUPS = {"day": "date", "week": "week", "month": "month"}
+
 
 class StatsQueryParams(BaseModel):
     """统计查询参数"""
@@ -33,6 +37,7 @@ class StatsQuery:
         """初始化统计查询"""
         self.logger = get_logger(__name__)
         self.storage = get_stats_storage()
+        self.source = get_settings().stats_query_source
 
     def query_key_stats(self, key_id: str, params: StatsQueryParams) -> Dict:
         """
@@ -46,25 +51,13 @@ class StatsQuery:
           Dict: 统计响应
         """
         try:
-            # 设置默认时间范围（最近30天）
-            if not params.start_date:
-                params.start_date = datetime.utcnow() - timedelta(days=30)
-            if not params.end_date:
-                params.end_date = datetime.utcnow()
-
-            # 查询统计数据
-            stats = self.storage.get_key_stats(
-                key_id=key_id,
-                start_date=params.start_date,
-                end_date=params.end_date,
-                group_by=params.group_by,
-            )
+            self._apply_default_range(params)
 
-            # 获取摘要
-            summary = self.storage.get_summary(stats)
+            # 在数据库中分组聚合，不加载原始记录
+            summary = self._summary(params, api_key_id=key_id)
 
             # 构建响应
-            response = {
+            response: Dict[str, Any] = {
                 "key_id": key_id,
                 "period": {
                     "start": params.start_date.isoformat() + "Z",
@@ -74,26 +67,20 @@ class StatsQuery:
             }
 
             # 根据分组方式聚合数据
-            if params.group_by == "day":
-                by_date = self.storage.aggregate_by_date(stats)
-                response["by_date"] = list(by_date.values())
-            elif params.group_by == "model":
-                by_model = self.storage.aggregate_by_model(stats)
-                response["by_model"] = list(by_model.values())
+            if params.group_by == "model":
+                response["by_model"] = self._aggregate(params, "model", api_key_id=key_id)
             elif params.group_by == "provider":
-                by_provider = self.storage.aggregate_by_provider(stats)
-                response["by_provider"] = list(by_provider.values())
+                response["by_provider"] = self._aggregate(params, "provider", api_key_id=key_id)
             else:
-                # 默认按日期分组
-                by_date = self.storage.aggregate_by_date(stats)
-                response["by_date"] = list(by_date.values())
+                # 按时间周期分组（day/week/month，date 为周期开始日期）
+                response["by_date"] = self._aggregate(
+                    params, PERIOD_GROUPS.get(params.group_by, "date"), api_key_id=key_id
+                )
 
             # 如果没有指定分组，提供所有聚合数据
             if params.group_by == "day":
-                by_model = self.storage.aggregate_by_model(stats)
-                by_provider = self.storage.aggregate_by_provider(stats)
-                response["by_model"] = list(by_model.values())
-                response["by_provider"] = list(by_provider.values())
+                response["by_model"] = self._aggregate(params, "model", api_key_id=key_id)
+                response["by_provider"] = self._aggregate(params, "provider", api_key_id=key_id)
 
             return response
 
@@ -101,6 +88,54 @@ class StatsQuery:
             self.logger.exception("Failed to query key stats", exc_info=e)
             raise
 
+    def query_organization_stats(self, organization_id: str, params: StatsQueryParams) -> Dict:
+        """
+        查询组织统计（按统计记录的组织ID过滤，单次分组查询）
+
+        Args:
+          organization_id: 组织ID
+          params: 查询参数
+
+        Returns:
+          Dict: 统计响应
+        """
+        try:
+            self._apply_default_range(params)
+
+            summary = self._summary(params, organization_id=organization_id)
+
+            # 构建响应
+            response: Dict[str, Any] = {
+                "organization_id": organization_id,
+                "period": {
+                    "start": params.start_date.isoformat() + "Z",
+                    "end": params.end_date.isoformat() + "Z",
+                },
+                "summary": summary,
+            }
+
+            # 根据分组方式聚合数据
+            if params.group_by == "model":
+                response["by_model"] = self._aggregate(
+                    params, "model", organization_id=organization_id
+                )
+            elif params.group_by == "provider":
+                response["by_provider"] = self._aggregate(
+                    params, "provider", organization_id=organization_id
+                )
+            else:
+                response["by_date"] = self._aggregate(
+                    params,
+                    PERIOD_GROUPS.get(params.group_by, "date"),
+                    organization_id=organization_id,
+                )
+
+            return response
+
+        except Exception as e:
+            self.logger.exception("Failed to query organization stats", exc_info=e)
+            raise
+
     def query_global_stats(self, params: StatsQueryParams) -> Dict:
         """
         查询全局统计
@@ -112,22 +147,13 @@ class StatsQuery:
           Dict: 全局统计响应
         """
         try:
-            # 设置默认时间范围（最近30天）
-            if not params.start_date:
-                params.start_date = datetime.utcnow() - timedelta(days=30)
-            if not params.end_date:
-                params.end_date = datetime.utcnow()
-
-            # 查询统计数据
-            stats = self.storage.get_global_stats(
-                start_date=params.start_date, end_date=params.end_date, group_by=params.group_by
-            )
+            self._apply_default_range(params)
 
-            # 获取摘要
-            summary = self.storage.get_summary(stats)
+            # 在数据库中分组聚合，不加载原始记录
+            summary = self._summary(params)
 
             # 构建响应
-            response = {
+            response: Dict[str, Any] = {
                 "period": {
                     "start": params.start_date.isoformat() + "Z",
                     "end": params.end_date.isoformat() + "Z",
@@ -142,8 +168,11 @@ class StatsQuery:
             }
 
             # 按提供商聚合
-            by_provider = self.storage.aggregate_by_provider(stats)
-            response["by_provider"] = list(by_provider.values())
+            response["by_provider"] = self._aggregate(params, "provider")
+
+            # 按时间周期聚合
+            if params.group_by in PERIOD_GROUPS:
+                response["by_date"] = self._aggregate(params, PERIOD_GROUPS[params.group_by])
 
             return response
 
@@ -151,6 +180,49 @@ class StatsQuery:
             self.logger.exception("Failed to query global stats", exc_info=e)
             raise
 
+    @staticmethod
+    def _apply_default_range(params: StatsQueryParams) -> None:
+        """设置默认时间范围（最近30天）"""
+        if not params.start_date:
+            params.start_date = datetime.utcnow() - timedelta(days=30)
+        if not params.end_date:
+            params.end_date = datetime.utcnow()
+
+    def _summary(self, params: StatsQueryParams, **filters) -> Dict:
+        """
+        按配置的数据来源获取统计摘要
+
+        Args:
+          params: 查询参数
+          **filters: 过滤条件（api_key_id/organization_id）
+
+        Returns:
+          Dict: 统计摘要
+        """
+        if self.source == "raw":
+            return self.storage.get_stats_summary(params.start_date, params.end_date, **filters)
+        return self.storage.get_rollup_summary(params.start_date, params.end_date, **filters)
+
+    def _aggregate(self, params: StatsQueryParams, group_by: str, **filters) -> List[Dict]:
+        """
+        按配置的数据来源分组聚合
+
+        Args:
+          params: 查询参数
+          group_by: 分组维度（date/week/month/model/provider）
+          **filters: 过滤条件（api_key_id/organization_id）
+
+        Returns:
+          List[Dict]: 聚合结果
+        """
+        if self.source == "raw":
+            return self.storage.aggregate_stats(
+                params.start_date, params.end_date, group_by=group_by, **filters
+            )
+        return self.storage.aggregate_rollups(
+            params.start_date, params.end_date, group_by=group_by, **filters
+        )
+
 
 def get_stats_query() -> StatsQuery:
     """
@@ -0,0 +1,194 @@
+"""
+用量汇总（rollup）
+
+将请求统计按小时/天、API Key、组织、模型和提供商预聚合，
+写入统计记录时在同一事务内增量更新，查询时按时间范围组合小时桶和天桶
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..database.models import UsageRollup
+
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+
+GRANULARITIES = (GRANULARITY_HOUR, GRANULARITY_DAY)
+
+# 汇总的维度列和累加列
+DIMENSIONS = ("granularity", "bucket_start", "api_key_id", "organization_id", "model", "provider")
+MEASURES = ("requests", "prompt_tokens", "completion_tokens", "total_tokens", "cost")
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """
+    计算时间所在桶的开始时间
+
+    Args:
+      timestamp: 时间
+      granularity: 粒度（hour/day）
+
+    Returns:
+      datetime: 桶开始时间
+    """
+    if granularity == GRANULARITY_DAY:
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def build_rollup_rows(
+    records: Iterable[Dict[str, Any]], granularities: Sequence[str] = GRANULARITIES
+) -> List[Dict[str, Any]]:
+    """
+    将统计记录聚合为汇总行（默认每条记录同时计入小时桶和天桶）
+
+    Args:
+      records: 统计记录字典（字段与RequestStat列一致）
+      granularities: 计入的汇总粒度
+
+    Returns:
+      List[Dict]: 汇总行
+    """
+    rows: Dict[Tuple, Dict[str, Any]] = {}
+    for record in records:
+        timestamp = record.get("timestamp") or datetime.utcnow()
+        for granularity in granularities:
+            key = (
+                granularity,
+                bucket_start(timestamp, granularity),
+                record["api_key_id"],
+                record.get("organization_id") or "",
+                record["model"],
+                record["provider"],
+            )
+            row = rows.get(key)
+            if row is None:
+                row = dict(zip(DIMENSIONS, key))
+                row.update(
+                    requests=0, prompt_tokens=0, completion_tokens=0, total_tokens=0, cost=0.0
+                )
+                rows[key] = row
+            row["requests"] += 1
+            row["prompt_tokens"] += record.get("prompt_tokens") or 0
+            row["completion_tokens"] += record.get("completion_tokens") or 0
+            row["total_tokens"] += record.get("total_tokens") or 0
+            row["cost"] += float(record.get("cost") or 0.0)
+    return list(rows.values())
+
+
+def upsert_rollups(
+    db: Session, records: Iterable[Dict[str, Any]], granularities: Sequence[str] = GRANULARITIES
+) -> int:
+    """
+    在当前事务中增量更新汇总表（不提交）
+
+    MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite/PostgreSQL 使用 ON CONFLICT DO UPDATE，
+    其他数据库逐行先 UPDATE，未命中时再 INSERT
+
+    Args:
+      db: 数据库会话
+      records: 统计记录字典
+      granularities: 更新的汇总粒度
+
+    Returns:
+      int: 更新的汇总行数
+    """
+    rows = build_rollup_rows(records, granularities)
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        mysql_stmt = mysql_insert(UsageRollup).values(rows)
+        db.execute(mysql_stmt.on_duplicate_key_update(_increments(mysql_stmt.inserted)))
+    elif dialect == "sqlite":
+        sqlite_stmt = sqlite_insert(UsageRollup).values(rows)
+        db.execute(
+            sqlite_stmt.on_conflict_do_update(
+                index_elements=list(DIMENSIONS), set_=_increments(sqlite_stmt.excluded)
+            )
+        )
+    elif dialect == "postgresql":
+        pg_stmt = pg_insert(UsageRollup).values(rows)
+        db.execute(
+            pg_stmt.on_conflict_do_update(
+                index_elements=list(DIMENSIONS), set_=_increments(pg_stmt.excluded)
+            )
+        )
+    else:
+        _update_or_insert(db, rows)
+    return len(rows)
+
+
+def _increments(new_values: Any) -> Dict[str, Any]:
+    """累加列的更新表达式（已有值加上新插入行的值）"""
+    return {name: getattr(UsageRollup, name) + getattr(new_values, name) for name in MEASURES}
+
+
+def _update_or_insert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    逐行累加汇总行，不存在时插入（不支持原生 upsert 的数据库）
+
+    并发写入同一新桶时插入可能违反唯一约束，整批写入失败后由统计收集器落盘并稍后重放
+
+    Args:
+      db: 数据库会话
+      rows: 汇总行
+    """
+    for row in rows:
+        stmt = (
+            update(UsageRollup)
+            .where(*(getattr(UsageRollup, name) == row[name] for name in DIMENSIONS))
+            .values({name: getattr(UsageRollup, name) + row[name] for name in MEASURES})
+        )
+        if db.execute(stmt).rowcount == 0:
+            db.execute(insert(UsageRollup).values(row))
+
+
+def rollup_range_filter(start_date: datetime, end_date: datetime):
+    """
+    构建覆盖时间范围的汇总行过滤条件
+
+    完整的天使用天桶，首尾不足一天的部分使用小时桶（精度为小时）
+
+    Args:
+      start_date: 开始时间
+      end_date: 结束时间
+
+    Returns:
+      SQLAlchemy过滤条件
+    """
+    start_hour = bucket_start(start_date, GRANULARITY_HOUR)
+    end_hour = bucket_start(end_date, GRANULARITY_HOUR) + timedelta(hours=1)
+
+    first_full_day = bucket_start(start_hour, GRANULARITY_DAY)
+    if first_full_day < start_hour:
+        first_full_day += timedelta(days=1)
+    last_full_day_end = bucket_start(end_hour, GRANULARITY_DAY)
+
+    def hours(start: datetime, end: datetime):
+        return and_(
+            UsageRollup.granularity == GRANULARITY_HOUR,
+            UsageRollup.bucket_start >= start,
+            UsageRollup.bucket_start < end,
+        )
+
+    if first_full_day >= last_full_day_end:
+        # 范围内没有完整的天，全部使用小时桶
+        return hours(start_hour, end_hour)
+
+    return or_(
+        hours(start_hour, first_full_day),
+        and_(
+            UsageRollup.granularity == GRANULARITY_DAY,
+            UsageRollup.bucket_start >= first_full_day,
+            UsageRollup.bucket_start < last_full_day_end,
+        ),
+        hours(last_full_day_end, end_hour),
+    )
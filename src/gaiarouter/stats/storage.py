@@ -5,20 +5,70 @@
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, insert
 from sqlalchemy.orm import Session
 
 from ..database.connection import get_db
-from ..database.models import APIKey, RequestStat
+from ..database.models import APIKey, RequestStat, UsageRollup
 from ..utils.logger import get_logger
+from .rollups import (
+    GRANULARITIES,
+    GRANULARITY_DAY,
+    GRANULARITY_HOUR,
+    bucket_start,
+    rollup_range_filter,
+    upsert_rollups,
+)
 
 logger = get_logger(__name__)
 
 # 全局统计存储实例
 _stats_storage: Optional["StatsStorage"] = None
 
+# 按时间周期分组的维度
+PERIODS = ("date", "week", "month")
+
+
+def period_column(column: Any, period: str, dialect: str) -> Any:
+    """
+    构建按时间周期分组的SQL表达式（结果为周期开始日期）
+
+    Args:
+      column: 时间列
+      period: 周期（date/week/month），周从周一开始
+      dialect: 数据库方言名称
+
+    Returns:
+      SQLAlchemy表达式
+    """
+    if period == "week":
+        if dialect == "sqlite":
+            return func.date(column, "weekday 0", "-6 days")
+        if dialect == "postgresql":
+            return func.date(func.date_trunc("week", column))
+        return func.subdate(func.date(column), func.weekday(column))
+    if period == "month":
+        if dialect == "sqlite":
+            return func.strftime("%Y-%m-01", column)
+        if dialect == "postgresql":
+            return func.date(func.date_trunc("month", column))
+        return func.date_format(column, "%Y-%m-01")
+    return func.date(column)
+
+
+def _summary_from_rows(rows: List[Dict]) -> Dict:
+    """将不分组的聚合结果转换为统计摘要"""
+    row = rows[0] if rows else {}
+    return {
+        "total_requests": row.get("requests", 0),
+        "total_prompt_tokens": row.get("prompt_tokens", 0),
+        "total_completion_tokens": row.get("completion_tokens", 0),
+        "total_tokens": row.get("total_tokens", 0),
+        "total_cost": row.get("cost", 0.0),
+    }
+
 
 class StatsStorage:
     """统计存储"""
@@ -54,215 +104,295 @@ class StatsStorage:
             self.logger.exception("Failed to save stat", exc_info=e)
             return False
 
-    def get_key_stats(
-        self,
-        key_id: str,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None,
-        group_by: str = "day",
-    ) -> List[RequestStat]:
+    def bulk_save(self, records: List[Dict[str, Any]]) -> int:
         """
-        查询API Key统计
+        批量保存统计数据（单条多行INSERT，并在同一事务内更新用量汇总）
 
         Args:
-          key_id: API Key ID
-          start_date: 开始日期
-          end_date: 结束日期
-          group_by: 分组方式（day/week/month）
+          records: 统计记录字典列表（字段与RequestStat列一致）
 
         Returns:
-          List[RequestStat]: 统计记录列表
-        """
-        try:
-            db = next(get_db())
-            try:
-                query = db.query(RequestStat).filter(RequestStat.api_key_id == key_id)
-
-                # 时间范围过滤
-                if start_date:
-                    query = query.filter(RequestStat.timestamp >= start_date)
-                if end_date:
-                    query = query.filter(RequestStat.timestamp <= end_date)
+          int: 写入的记录数
 
-                # 排序
-                query = query.order_by(RequestStat.timestamp.asc())
+        Raises:
+          Exception: 写入失败时抛出，由调用方决定如何处理
+        """
+        if not records:
+            return 0
 
-                stats = query.all()
-                return stats
-            finally:
-                db.close()
+        db = next(get_db())
+        try:
+            db.execute(insert(RequestStat), records)
+            upsert_rollups(db, records)
+            db.commit()
+            return len(records)
         except Exception as e:
-            self.logger.exception("Failed to get key stats", exc_info=e)
-            return []
+            db.rollback()
+            self.logger.error(f"Failed to bulk save stats: {e}", count=len(records))
+            raise
+        finally:
+            db.close()
 
-    def get_global_stats(
+    def aggregate_stats(
         self,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None,
-        group_by: str = "day",
-    ) -> List[RequestStat]:
+        start_date: datetime,
+        end_date: datetime,
+        group_by: Optional[str] = None,
+        api_key_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> List[Dict]:
         """
-        查询全局统计
+        在数据库中对原始统计记录分组聚合（只返回分组结果，不加载原始记录）
 
         Args:
-          start_date: 开始日期
-          end_date: 结束日期
-          group_by: 分组方式（day/week/month）
+          start_date: 开始时间
+          end_date: 结束时间
+          group_by: 分组维度（date/week/month/model/provider），None表示汇总为一行
+          api_key_id: 按API Key过滤
+          organization_id: 按组织过滤
 
         Returns:
-          List[RequestStat]: 统计记录列表
+          List[Dict]: 聚合结果，格式与 aggregate_rollups 一致
         """
+        measures = [
+            func.count(RequestStat.id).label("requests"),
+            func.sum(RequestStat.prompt_tokens).label("prompt_tokens"),
+            func.sum(RequestStat.completion_tokens).label("completion_tokens"),
+            func.sum(RequestStat.total_tokens).label("total_tokens"),
+            func.sum(RequestStat.cost).label("cost"),
+        ]
+        conditions = [RequestStat.timestamp >= start_date, RequestStat.timestamp <= end_date]
+        if api_key_id:
+            conditions.append(RequestStat.api_key_id == api_key_id)
+        if organization_id:
+            conditions.append(RequestStat.organization_id == organization_id)
+
         try:
-            db = next(get_db())
-            try:
-                query = db.query(RequestStat)
+            return self._aggregate(RequestStat, measures, conditions, group_by)
+        except Exception as e:
+            self.logger.exception("Failed to aggregate stats", exc_info=e)
+            return []
 
-                # 时间范围过滤
-                if start_date:
-                    query = query.filter(RequestStat.timestamp >= start_date)
-                if end_date:
-                    query = query.filter(RequestStat.timestamp <= end_date)
+    def get_stats_summary(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        api_key_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        在数据库中汇总原始统计记录
 
-                # 排序
-                query = query.order_by(RequestStat.timestamp.asc())
+        Args:
+          start_date: 开始时间
+          end_date: 结束时间
+          api_key_id: 按API Key过滤
+          organization_id: 按组织过滤
 
-                stats = query.all()
-                return stats
-            finally:
-                db.close()
-        except Exception as e:
-            self.logger.exception("Failed to get global stats", exc_info=e)
-            return []
+        Returns:
+          Dict: 统计摘要（total_requests/total_prompt_tokens/total_completion_tokens/total_tokens/total_cost）
+        """
+        rows = self.aggregate_stats(
+            start_date, end_date, api_key_id=api_key_id, organization_id=organization_id
+        )
+        return _summary_from_rows(rows)
 
-    def aggregate_by_date(self, stats: List[RequestStat]) -> Dict[str, Dict]:
+    def aggregate_rollups(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        group_by: Optional[str] = None,
+        api_key_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> List[Dict]:
         """
-        按日期聚合统计数据
+        从用量汇总表聚合统计（时间精度为小时）
 
         Args:
-          stats: 统计记录列表
+          start_date: 开始时间
+          end_date: 结束时间
+          group_by: 分组维度（date/week/month/model/provider），None表示汇总为一行
+          api_key_id: 按API Key过滤
+          organization_id: 按组织过滤
 
         Returns:
-          Dict[str, Dict]: 按日期聚合的统计数据
+          List[Dict]: 聚合结果，每行包含分组字段和 requests/prompt_tokens/completion_tokens/total_tokens/cost
         """
-        aggregated = {}
-
-        for stat in stats:
-            # 获取日期（YYYY-MM-DD格式）
-            date_str = stat.timestamp.strftime("%Y-%m-%d")
-
-            if date_str not in aggregated:
-                aggregated[date_str] = {
-                    "date": date_str,
-                    "requests": 0,
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0,
-                    "cost": 0.0,
-                }
-
-            aggregated[date_str]["requests"] += 1
-            aggregated[date_str]["prompt_tokens"] += stat.prompt_tokens
-            aggregated[date_str]["completion_tokens"] += stat.completion_tokens
-            aggregated[date_str]["total_tokens"] += stat.total_tokens
-            if stat.cost:
-                aggregated[date_str]["cost"] += float(stat.cost)
-
-        return aggregated
-
-    def aggregate_by_model(self, stats: List[RequestStat]) -> Dict[str, Dict]:
+        measures = [
+            func.sum(UsageRollup.requests).label("requests"),
+            func.sum(UsageRollup.prompt_tokens).label("prompt_tokens"),
+            func.sum(UsageRollup.completion_tokens).label("completion_tokens"),
+            func.sum(UsageRollup.total_tokens).label("total_tokens"),
+            func.sum(UsageRollup.cost).label("cost"),
+        ]
+        conditions = [rollup_range_filter(start_date, end_date)]
+        if api_key_id:
+            conditions.append(UsageRollup.api_key_id == api_key_id)
+        if organization_id:
+            conditions.append(UsageRollup.organization_id == organization_id)
+
+        try:
+            return self._aggregate(UsageRollup, measures, conditions, group_by)
+        except Exception as e:
+            self.logger.exception("Failed to aggregate rollups", exc_info=e)
+            return []
+
+    def get_rollup_summary(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        api_key_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> Dict:
         """
-        按模型聚合统计数据
+        从用量汇总表获取统计摘要
 
         Args:
-          stats: 统计记录列表
+          start_date: 开始时间
+          end_date: 结束时间
+          api_key_id: 按API Key过滤
+          organization_id: 按组织过滤
 
         Returns:
-          Dict[str, Dict]: 按模型聚合的统计数据
+          Dict: 统计摘要（total_requests/total_prompt_tokens/total_completion_tokens/total_tokens/total_cost）
         """
-        aggregated = {}
-
-        for stat in stats:
-            model = stat.model
-
-            if model not in aggregated:
-                aggregated[model] = {
-                    "model": model,
-                    "requests": 0,
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0,
-                    "cost": 0.0,
-                }
-
-            aggregated[model]["requests"] += 1
-            aggregated[model]["prompt_tokens"] += stat.prompt_tokens
-            aggregated[model]["completion_tokens"] += stat.completion_tokens
-            aggregated[model]["total_tokens"] += stat.total_tokens
-            if stat.cost:
-                aggregated[model]["cost"] += float(stat.cost)
-
-        return aggregated
-
-    def aggregate_by_provider(self, stats: List[RequestStat]) -> Dict[str, Dict]:
+        rows = self.aggregate_rollups(
+            start_date, end_date, api_key_id=api_key_id, organization_id=organization_id
+        )
+        return _summary_from_rows(rows)
+
+    def _aggregate(
+        self, source: Any, measures: List[Any], conditions: List[Any], group_by: Optional[str]
+    ) -> List[Dict]:
         """
-        按提供商聚合统计数据
+        执行分组聚合查询
+
+        时间分组（date/week/month）以周期开始日期作为 date 字段，周从周一开始
 
         Args:
-          stats: 统计记录列表
+          source: 查询的表模型（RequestStat 或 UsageRollup）
+          measures: 聚合列
+          conditions: 过滤条件
+          group_by: 分组维度，None表示汇总为一行
 
         Returns:
-          Dict[str, Dict]: 按提供商聚合的统计数据
+          List[Dict]: 聚合结果
         """
-        aggregated = {}
-
-        for stat in stats:
-            provider = stat.provider
-
-            if provider not in aggregated:
-                aggregated[provider] = {
-                    "provider": provider,
-                    "requests": 0,
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0,
-                    "cost": 0.0,
-                }
-
-            aggregated[provider]["requests"] += 1
-            aggregated[provider]["prompt_tokens"] += stat.prompt_tokens
-            aggregated[provider]["completion_tokens"] += stat.completion_tokens
-            aggregated[provider]["total_tokens"] += stat.total_tokens
-            if stat.cost:
-                aggregated[provider]["cost"] += float(stat.cost)
-
-        return aggregated
-
-    def get_summary(self, stats: List[RequestStat]) -> Dict:
+        db = next(get_db())
+        try:
+            group_column = None
+            field = group_by
+            if group_by in ("model", "provider"):
+                group_column = getattr(source, group_by)
+            elif group_by in PERIODS:
+                time_column = source.timestamp if source is RequestStat else source.bucket_start
+                group_column = period_column(time_column, group_by, db.get_bind().dialect.name)
+                field = "date"
+
+            columns = list(measures)
+            if group_column is not None:
+                columns.insert(0, group_column.label("group_key"))
+
+            query = db.query(*columns).filter(*conditions)
+            if group_column is not None:
+                query = query.group_by(group_column).order_by(group_column)
+
+            results = []
+            for row in query.all():
+                item = {}
+                if group_column is not None:
+                    item[field] = str(row.group_key)[:10] if field == "date" else row.group_key
+                item.update(
+                    requests=int(row.requests or 0),
+                    prompt_tokens=int(row.prompt_tokens or 0),
+                    completion_tokens=int(row.completion_tokens or 0),
+                    total_tokens=int(row.total_tokens or 0),
+                    cost=float(row.cost or 0.0),
+                )
+                results.append(item)
+            return results
+        finally:
+            db.close()
+
+    def rebuild_rollups(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        chunk_size: int = 5000,
+        granularities: Sequence[str] = GRANULARITIES,
+    ) -> int:
         """
-        获取统计摘要
+        根据原始统计记录重建时间范围内的用量汇总（用于回填历史数据）
+
+        先删除范围内的汇总行再重新聚合，统计收集器仍在增量更新的桶不能重建：
+        结束时间不能晚于当前小时的开始，重建天桶时不能晚于当天0点
 
         Args:
-          stats: 统计记录列表
+          start_date: 开始时间（需对齐到所选粒度）
+          end_date: 结束时间（需对齐到所选粒度，不包含）
+          chunk_size: 每批处理的原始记录数
+          granularities: 重建的汇总粒度
 
         Returns:
-          Dict: 统计摘要
+          int: 处理的原始记录数
+
+        Raises:
+          ValueError: 范围包含仍在写入的桶
         """
-        summary = {
-            "total_requests": len(stats),
-            "total_prompt_tokens": 0,
-            "total_completion_tokens": 0,
-            "total_tokens": 0,
-            "total_cost": 0.0,
-        }
-
-        for stat in stats:
-            summary["total_prompt_tokens"] += stat.prompt_tokens
-            summary["total_completion_tokens"] += stat.completion_tokens
-            summary["total_tokens"] += stat.total_tokens
-            if stat.cost:
-                summary["total_cost"] += float(stat.cost)
-
-        return summary
+        now = datetime.utcnow()
+        if end_date > bucket_start(now, GRANULARITY_HOUR):
+            raise ValueError("Cannot rebuild rollups for the current hour, it is still open")
+        if GRANULARITY_DAY in granularities and end_date > bucket_start(now, GRANULARITY_DAY):
+            raise ValueError("Cannot rebuild day rollups for the current day, it is still open")
+
+        db = next(get_db())
+        try:
+            db.query(UsageRollup).filter(
+                UsageRollup.granularity.in_(granularities),
+                UsageRollup.bucket_start >= start_date,
+                UsageRollup.bucket_start < end_date,
+            ).delete(synchronize_session=False)
+
+            # 按ID分页读取，避免在同一连接上同时进行流式读取和写入
+            count = 0
+            last_id = 0
+            while True:
+                rows = (
+                    db.query(
+                        RequestStat.id,
+                        RequestStat.api_key_id,
+                        RequestStat.organization_id,
+                        RequestStat.model,
+                        RequestStat.provider,
+                        RequestStat.prompt_tokens,
+                        RequestStat.completion_tokens,
+                        RequestStat.total_tokens,
+                        RequestStat.cost,
+                        RequestStat.timestamp,
+                    )
+                    .filter(
+                        RequestStat.id > last_id,
+                        RequestStat.timestamp >= start_date,
+                        RequestStat.timestamp < end_date,
+                    )
+                    .order_by(RequestStat.id)
+                    .limit(chunk_size)
+                    .all()
+                )
+                if not rows:
+                    break
+                upsert_rollups(db, [dict(row._mapping) for row in rows], granularities)
+                count += len(rows)
+                last_id = rows[-1].id
+
+            db.commit()
+            return count
+        except Exception as e:
+            db.rollback()
+            self.logger.error(f"Failed to rebuild rollups: {e}")
+            raise
+        finally:
+            db.close()
 
 
 def get_stats_storage() -> StatsStorage:
@@ -0,0 +1,116 @@
+"""
+流式请求用量统计
+
+在流式响应过程中累计Token用量：优先使用提供商在流中返回的用量，
+提供商未返回时按字符数估算
+"""
+
+from typing import Any, Dict, List, Optional
+
+from ..utils.sse import content_chars
+
+# 估算时每个Token对应的平均字符数
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    按字符数估算Token数
+
+    Args:
+      text: 文本内容
+
+    Returns:
+      int: 估算的Token数
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class StreamUsageAccumulator:
+    """流式响应用量累计器"""
+
+    def __init__(self, messages: Optional[List[Dict[str, Any]]] = None):
+        """
+        初始化累计器
+
+        Args:
+          messages: 请求消息列表（用于估算输入Token数）
+        """
+        self.reported_prompt_tokens: Optional[int] = None
+        self.reported_completion_tokens: Optional[int] = None
+        self.completion_chars = 0
+        self.chunks = 0
+
+        prompt_text = ""
+        for message in messages or []:
+            content = message.get("content")
+            if isinstance(content, str):
+                prompt_text += content
+        self.estimated_prompt_tokens = estimate_tokens(prompt_text)
+
+    def add_usage(self, usage: Optional[Dict[str, int]]) -> None:
+        """
+        合并提供商返回的用量（同一字段取最大值，兼容累计值和分段上报）
+
+        Args:
+          usage: 用量字典，可包含 prompt_tokens / completion_tokens
+        """
+        if not usage:
+            return
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is not None:
+            self.reported_prompt_tokens = max(self.reported_prompt_tokens or 0, prompt_tokens)
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is not None:
+            self.reported_completion_tokens = max(
+                self.reported_completion_tokens or 0, completion_tokens
+            )
+
+    def add_chunk(self, chunk: Dict[str, Any]) -> None:
+        """
+        记录一个统一格式的响应块（累计输出字符数用于估算）
+
+        Args:
+          chunk: 统一格式的chunk字典
+        """
+        self.chunks += 1
+        for choice in chunk.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if isinstance(content, str):
+                self.completion_chars += len(content)
+
+    def add_raw_chunk(self, data: str) -> None:
+        """
+        记录一个直通转发的原始数据行（不解析JSON，按字符串匹配累计输出字符数）
+
+        Args:
+          data: OpenAI兼容格式的 data: 行内容
+        """
+        self.chunks += 1
+        self.completion_chars += content_chars(data)
+
+    @property
+    def estimated(self) -> bool:
+        """用量是否包含估算值"""
+        return self.reported_prompt_tokens is None or self.reported_completion_tokens is None
+
+    def totals(self) -> Dict[str, int]:
+        """
+        获取最终用量
+
+        Returns:
+          dict: prompt_tokens, completion_tokens, total_tokens
+        """
+        prompt_tokens = self.reported_prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = self.estimated_prompt_tokens
+        completion_tokens = self.reported_completion_tokens
+        if completion_tokens is None:
+            completion_tokens = (self.completion_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
@@ -65,3 +65,22 @@ class OrganizationLimitError(OpenRouterError):
 
     def __init__(self, message: str = "Organization limit exceeded"):
         super().__init__(message=message, code="organization_limit_error", status_code=429)
+
+
+class ProviderUnavailableError(OpenRouterError):
+    """提供商暂不可用错误（熔断中）"""
+
+    def __init__(self, name: str, retry_after: float = None):
+        """
+        初始化错误
+
+        Args:
+          name: 熔断的提供商或模型
+          retry_after: 建议的重试等待时间（秒）
+        """
+        super().__init__(
+            message=f"Provider temporarily unavailable: {name}",
+            code="provider_unavailable",
+            status_code=503,
+        )
+        self.retry_after = retry_after
@@ -0,0 +1,211 @@
+"""
+阻塞调用线程池
+
+将同步的数据库访问和bcrypt等CPU密集调用放到有界线程池中执行，避免阻塞事件循环。
+数据库调用和密码哈希使用独立的线程池，登录请求突增时不会占满数据库调用的线程
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from ..config import get_settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 线程池名称
+DB_EXECUTOR = "db"
+CRYPTO_EXECUTOR = "crypto"
+
+# 全局线程池实例
+_executors: Dict[str, "BlockingExecutor"] = {}
+_executors_lock = threading.Lock()
+
+
+class BlockingExecutor:
+    """有界线程池（带排队深度和等待时间统计）"""
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        初始化线程池
+
+        Args:
+          name: 线程池名称（用于线程名和统计）
+          max_workers: 最大线程数
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"gaiarouter-{name}"
+        )
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_queued = 0
+        self.total_wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        """排队等待线程的调用数（排队时被取消的调用不再计入）"""
+        return self.submitted - self.started - self.cancelled
+
+    @property
+    def active(self) -> int:
+        """正在执行的调用数"""
+        return self.started - self.completed - self.failed
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在线程池中执行同步函数并等待结果
+
+        Args:
+          func: 同步函数
+          *args: 位置参数
+          **kwargs: 关键字参数
+
+        Returns:
+          函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        # 复制上下文变量，保证日志上下文等在线程中可用
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        submitted_at = time.monotonic()
+
+        with self._lock:
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        future = self._executor.submit(self._execute, call, submitted_at)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _on_done(self, future: Future) -> None:
+        """调用结束回调：排队时被取消（等待方取消或关闭线程池）的调用不会执行，从排队数中扣除"""
+        if future.cancelled():
+            with self._lock:
+                self.cancelled += 1
+
+    def _execute(self, call: Callable[[], T], submitted_at: float) -> T:
+        """在工作线程中执行调用并记录统计"""
+        with self._lock:
+            self.started += 1
+            self.total_wait_seconds += time.monotonic() - submitted_at
+        try:
+            result = call()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取线程池统计
+
+        Returns:
+          dict: 线程数、排队深度、执行中数量、累计计数和平均排队时间
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": (
+                    self.total_wait_seconds / self.started * 1000 if self.started else 0.0
+                ),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        关闭线程池
+
+        Args:
+          wait: 是否等待执行中的调用完成
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def get_executor(name: str = DB_EXECUTOR) -> BlockingExecutor:
+    """
+    获取线程池实例（每个名称一个单例）
+
+    Args:
+      name: 线程池名称（db 或 crypto）
+
+    Returns:
+      BlockingExecutor: 线程池实例
+    """
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+
+    with _executors_lock:
+        if name not in _executors:
+            settings = get_settings()
+            if name == CRYPTO_EXECUTOR:
+                max_workers = settings.crypto_executor_max_workers
+            else:
+                max_workers = settings.blocking_executor_max_workers
+            _executors[name] = BlockingExecutor(name, max_workers)
+        return _executors[name]
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在数据库调用线程池中执行同步函数
+
+    Args:
+      func: 同步函数
+      *args: 位置参数
+      **kwargs: 关键字参数
+
+    Returns:
+      函数返回值
+    """
+    return await get_executor(DB_EXECUTOR).run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有线程池的统计
+
+    Returns:
+      dict: 线程池名称到统计的映射
+    """
+    return {name: executor.stats() for name, executor in list(_executors.items())}
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """
+    关闭所有线程池
+
+    Args:
+      wait: 是否等待执行中的调用完成
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+    if executors:
+        logger.info("Blocking executors shut down", count=len(executors))
@@ -0,0 +1,171 @@
+"""
+JSON编解码
+
+统一的JSON编解码入口：安装了 orjson 时使用 orjson，否则使用标准库 json。
+请求路径上的上游响应解析、SSE数据块序列化、接口响应和结构化日志都通过这里编解码
+
+两种实现输出一致：紧凑格式（无多余空格）、非ASCII字符不转义
+"""
+
+import json
+from datetime import date
+from typing import Any, Optional, Union
+
+from starlette.responses import JSONResponse
+
+from ..config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于安装环境
+    orjson = None
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，两种实现都可以用它捕获
+JSONDecodeError = json.JSONDecodeError
+
+# 全局编解码器实例
+_codec: Optional["JSONCodec"] = None
+
+
+def _default(obj: Any) -> Any:
+    """无法直接序列化的对象：日期时间转为ISO格式（与orjson一致），其他转为字符串"""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return str(obj)
+
+
+class JSONCodec:
+    """标准库 json 实现"""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        """
+        序列化为字符串
+
+        Args:
+          obj: 要序列化的对象
+
+        Returns:
+          str: JSON字符串
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """
+        序列化为UTF-8字节串
+
+        Args:
+          obj: 要序列化的对象
+
+        Returns:
+          bytes: JSON字节串
+        """
+        return self.dumps(obj).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        反序列化
+
+        Args:
+          data: JSON字符串或字节串
+
+        Returns:
+          解析后的对象
+
+        Raises:
+          JSONDecodeError: JSON格式无效
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson 实现"""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> str:
+        """序列化为字符串"""
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """序列化为UTF-8字节串"""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """反序列化"""
+        return orjson.loads(data)
+
+
+def create_json_codec(backend: str = "auto") -> JSONCodec:
+    """
+    创建编解码器
+
+    Args:
+      backend: auto（有orjson时使用orjson）、orjson 或 json
+
+    Returns:
+      JSONCodec: 编解码器实例
+
+    Raises:
+      ValueError: 指定了orjson但未安装，或backend无效
+    """
+    if backend == "json":
+        return JSONCodec()
+    if backend == "orjson":
+        if orjson is None:
+            raise ValueError("JSON_CODEC=orjson requires the orjson package")
+        return OrjsonCodec()
+    if backend == "auto":
+        return OrjsonCodec() if orjson is not None else JSONCodec()
+    raise ValueError(f"Unknown JSON codec: {backend}")
+
+
+def get_json_codec() -> JSONCodec:
+    """
+    获取编解码器实例（单例模式，按配置选择实现）
+
+    Returns:
+      JSONCodec: 编解码器实例
+    """
+    global _codec
+    if _codec is None:
+        _codec = create_json_codec(get_settings().json_codec)
+    return _codec
+
+
+def dumps(obj: Any) -> str:
+    """序列化为字符串"""
+    return get_json_codec().dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """序列化为UTF-8字节串"""
+    return get_json_codec().dumps_bytes(obj)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """反序列化"""
+    return get_json_codec().loads(data)
+
+
+def log_serializer(obj: Any, **kwargs: Any) -> str:
+    """
+    structlog JSONRenderer 的序列化函数
+
+    Args:
+      obj: 日志事件字典
+      **kwargs: JSONRenderer传入的参数（忽略，统一使用编解码器的格式）
+
+    Returns:
+      str: JSON字符串
+    """
+    return get_json_codec().dumps(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用统一编解码器序列化的JSON响应（应用默认响应类）"""
+
+    def render(self, content: Any) -> bytes:
+        """序列化响应内容"""
+        return get_json_codec().dumps_bytes(content)
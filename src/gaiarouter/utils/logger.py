@@ -11,6 +11,7 @@ from typing import Optional
 import structlog
 
 from ..config import get_settings
+from .json_codec import log_serializer
 
 
 def setup_logger(log_level: Optional[str] = None) -> None:
@@ -41,7 +42,7 @@ def setup_logger(log_level: Optional[str] = None) -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=log_serializer),
         ],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
@@ -0,0 +1,75 @@
+"""
+SSE数据行工具
+
+用于OpenAI兼容格式流式响应的直通转发：不对每个 data: 行做JSON解析和重新序列化，
+只在需要时做字符串级别的检查和修补
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+from . import json_codec
+
+# delta 中的 content 字符串（按转义后的长度计数，用于估算输出Token数）
+_CONTENT_RE = re.compile(r'"content"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def parse_usage_chunk(data: str) -> Optional[Dict[str, Any]]:
+    """
+    仅当数据行携带非空 usage 时解析JSON
+
+    OpenAI开启 stream_options.include_usage 后，普通chunk的 usage 为 null，
+    只有最后一个chunk携带用量，因此绝大多数数据行不需要解析
+
+    Args:
+      data: data: 行的内容（不含前缀）
+
+    Returns:
+      dict: 解析后的chunk，不携带用量或解析失败时返回None
+    """
+    index = data.find('"usage"')
+    if index < 0:
+        return None
+    value = data[index + len('"usage"') :].lstrip()
+    if value.startswith(":"):
+        value = value[1:].lstrip()
+    if value.startswith("null"):
+        return None
+    try:
+        return json_codec.loads(data)
+    except json_codec.JSONDecodeError:
+        return None
+
+
+def ensure_model(data: str, model: str) -> str:
+    """
+    在缺少 model 字段时插入 model（字符串级修补，不解析JSON）
+
+    Args:
+      data: data: 行的内容（JSON对象）
+      model: 要插入的模型ID
+
+    Returns:
+      str: 修补后的数据行
+    """
+    if '"model"' in data:
+        return data
+    body = data.lstrip()
+    if not body.startswith("{"):
+        return data
+    rest = body[1:]
+    separator = "" if rest.lstrip().startswith("}") else ","
+    return '{"model":' + json_codec.dumps(model) + separator + rest
+
+
+def content_chars(data: str) -> int:
+    """
+    统计数据行中 content 字符串的长度
+
+    Args:
+      data: data: 行的内容
+
+    Returns:
+      int: 字符数（按JSON转义后的长度近似）
+    """
+    return sum(len(match) for match in _CONTENT_RE.findall(data))
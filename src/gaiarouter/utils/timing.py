@@ -0,0 +1,243 @@
+"""
+请求分阶段耗时
+
+每个请求一个计时器（通过上下文变量传递），记录认证、模型查询、限制检查、上游调用等阶段的耗时，
+用于生成 Server-Timing 响应头，请求结束时汇总到各阶段的耗时直方图
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# 直方图桶上限（毫秒），最后一个桶为 +Inf
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# 当前请求的计时器
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar("request_timer", default=None)
+
+# 全局直方图实例
+_timing_histograms: Optional["TimingHistograms"] = None
+
+
+class RequestTimer:
+    """单个请求的分阶段计时器"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._finished = False
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        累加一个阶段的耗时
+
+        Args:
+          name: 阶段名称
+          seconds: 耗时（秒）
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        记录代码块的耗时
+
+        Args:
+          name: 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        """请求开始至今的耗时（秒）"""
+        return time.perf_counter() - self.start
+
+    def header_value(self) -> str:
+        """
+        生成 Server-Timing 头的值
+
+        Returns:
+          str: 如 "auth;dur=0.8, model_lookup;dur=0.0, total;dur=1.2"（毫秒）
+        """
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def finish(self) -> None:
+        """请求结束，将各阶段耗时和总耗时汇总到直方图（只汇总一次）"""
+        if self._finished:
+            return
+        self._finished = True
+        histograms = get_timing_histograms()
+        for name, seconds in self.stages.items():
+            histograms.observe(name, seconds)
+        histograms.observe("total", self.elapsed())
+
+
+def start_request_timer() -> RequestTimer:
+    """
+    为当前请求创建计时器
+
+    Returns:
+      RequestTimer: 新的计时器
+    """
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def get_request_timer() -> Optional[RequestTimer]:
+    """
+    获取当前请求的计时器
+
+    Returns:
+      RequestTimer: 计时器，未创建时返回None
+    """
+    return _current_timer.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    在当前请求的计时器上记录代码块的耗时（没有计时器时不记录）
+
+    Args:
+      name: 阶段名称
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+class LatencyHistogram:
+    """耗时直方图（固定桶）"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        初始化直方图
+
+        Args:
+          buckets_ms: 桶上限（毫秒，升序）
+        """
+        self.buckets_ms: List[float] = list(buckets_ms)
+        self.counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        记录一次耗时
+
+        Args:
+          seconds: 耗时（秒）
+        """
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估算分位数（返回所在桶的上限）
+
+        Args:
+          q: 分位（0-1）
+
+        Returns:
+          float: 毫秒，落在 +Inf 桶时返回 inf，没有数据时返回None
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取直方图数据
+
+        Returns:
+          dict: count, sum_ms, buckets（桶上限到累计计数）, p50_ms, p99_ms
+        """
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets_ms + [float("inf")], self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": self.sum_ms,
+            "buckets": buckets,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class TimingHistograms:
+    """各阶段的耗时直方图"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        初始化
+
+        Args:
+          buckets_ms: 桶上限（毫秒，升序）
+        """
+        self.buckets_ms = buckets_ms
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        记录一个阶段的耗时
+
+        Args:
+          stage: 阶段名称
+          seconds: 耗时（秒）
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram(self.buckets_ms)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有阶段的直方图数据
+
+        Returns:
+          dict: 阶段名称到直方图数据的映射
+        """
+        with self._lock:
+            return {stage: histogram.snapshot() for stage, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        """清空所有直方图"""
+        with self._lock:
+            self._histograms.clear()
+
+
+def get_timing_histograms() -> TimingHistograms:
+    """
+    获取耗时直方图实例（单例模式）
+
+    Returns:
+      TimingHistograms: 直方图实例
+    """
+    global _timing_histograms
+    if _timing_histograms is None:
+        _timing_histograms = TimingHistograms()
+    return _timing_histograms
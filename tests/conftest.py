@@ -5,7 +5,7 @@ pytest 配置和共享 fixtures
 import sys
 from pathlib import Path
 from typing import Generator
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from sqlalchemy import create_engine
@@ -45,17 +45,57 @@ def db_session(test_db_engine) -> Generator[Session, None, None]:
     session.close()
 
 
+@pytest.fixture
+def stats_storage(db_session, test_db_engine):
+    """创建使用测试数据库的统计存储"""
+    from gaiarouter.stats.storage import StatsStorage
+
+    TestingSessionLocal = sessionmaker(bind=test_db_engine)
+
+    def get_test_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with patch("gaiarouter.stats.storage.get_db", side_effect=get_test_db):
+        yield StatsStorage()
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_state():
+    """每个测试使用新的熔断器注册表、重试预算、对冲器和上游健康状况，避免上游失败的状态影响其他测试"""
+    from gaiarouter.providers import circuit_breaker, hedging, retry
+    from gaiarouter.router import health
+
+    circuit_breaker._circuit_breakers = None
+    retry._retry_budgets = None
+    hedging._hedger = None
+    health._health_tracker = None
+    yield
+    circuit_breaker._circuit_breakers = None
+    retry._retry_budgets = None
+    hedging._hedger = None
+    health._health_tracker = None
+
+
 @pytest.fixture
 def mock_settings():
     """模拟配置对象"""
     settings = Mock()
     settings.max_retries = 3
     settings.request_timeout = 30
+    settings.hedging_enabled = False
     settings.providers = Mock()
     settings.providers.openai_api_key = "test-openai-key"
     settings.providers.anthropic_api_key = "test-anthropic-key"
     settings.providers.google_api_key = "test-google-key"
     settings.providers.openrouter_api_key = "test-openrouter-key"
+    settings.providers.openai_api_keys = None
+    settings.providers.anthropic_api_keys = None
+    settings.providers.google_api_keys = None
+    settings.providers.openrouter_api_keys = None
     return settings
 
 
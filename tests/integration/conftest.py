@@ -210,25 +210,23 @@ def mock_verify_api_key(test_api_key):
 
 @pytest.fixture
 def mock_model_manager(test_model):
-    """模拟模型管理器"""
-    from gaiarouter.models.manager import get_model_manager
+    """模拟模型目录"""
+    mock_catalog = Mock()
+    mock_catalog.get_model.return_value = test_model
 
-    mock_manager = Mock()
-    mock_manager.get_model.return_value = test_model
-
-    def override_get_model_manager():
-        return mock_manager
+    def override_get_model_catalog():
+        return mock_catalog
 
     # 使用 patch 来覆盖
     import gaiarouter.api.controllers.chat as chat_module
 
-    original = chat_module.get_model_manager
-    chat_module.get_model_manager = override_get_model_manager
+    original = chat_module.get_model_catalog
+    chat_module.get_model_catalog = override_get_model_catalog
 
-    yield mock_manager
+    yield mock_catalog
 
     # 恢复原始函数
-    chat_module.get_model_manager = original
+    chat_module.get_model_catalog = original
 
 
 @pytest.fixture
@@ -237,7 +235,7 @@ def mock_model_router():
     from gaiarouter.router import get_model_router
 
     # 创建 mock provider 和 adapters
-    mock_provider = Mock()
+    mock_provider = Mock(supports_raw_stream=False)
     mock_provider.chat_completion = AsyncMock()
 
     # 模拟响应
@@ -320,7 +318,7 @@ def mock_stats_collector():
     from gaiarouter.stats.collector import get_stats_collector
 
     mock_collector = Mock()
-    mock_collector.record_request_sync.return_value = None
+    mock_collector.enqueue.return_value = True
 
     def override_get_stats_collector():
         return mock_collector
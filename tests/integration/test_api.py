@@ -4,7 +4,7 @@
 集成测试，测试 FastAPI 端点的基础功能
 """
 
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from fastapi.testclient import TestClient
@@ -126,7 +126,7 @@ class TestAuthEndpoint:
         )
 
         user_manager = Mock()
-        user_manager.verify_user.return_value = mock_user
+        user_manager.verify_user_async = AsyncMock(return_value=mock_user)
         app.dependency_overrides[get_user_manager] = lambda: user_manager
 
         token_manager = Mock()
@@ -150,7 +150,7 @@ class TestAuthEndpoint:
         from gaiarouter.api.controllers.auth import get_user_manager
 
         user_manager = Mock()
-        user_manager.verify_user.return_value = None
+        user_manager.verify_user_async = AsyncMock(return_value=None)
         app.dependency_overrides[get_user_manager] = lambda: user_manager
 
         client = TestClient(app)
@@ -88,6 +88,20 @@ class TestOpenAIAdapters:
         # OpenAI 格式直接返回
         assert result == chunk
 
+    def test_extract_stream_usage(self, response_adapter):
+        """测试提取流式用量（include_usage 的最后一个chunk）"""
+        chunk = {
+            "id": "chatcmpl-123",
+            "choices": [],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 34, "total_tokens": 46},
+        }
+
+        assert response_adapter.extract_stream_usage(chunk) == {
+            "prompt_tokens": 12,
+            "completion_tokens": 34,
+        }
+        assert response_adapter.extract_stream_usage({"choices": []}) is None
+
 
 class TestAnthropicAdapters:
     """测试 Anthropic 适配器"""
@@ -166,6 +180,21 @@ class TestAnthropicAdapters:
         assert result["object"] == "chat.completion.chunk"
         assert result["choices"][0]["delta"]["content"] == "Hello"
 
+    def test_extract_stream_usage(self, response_adapter):
+        """测试从 message_start 和 message_delta 提取用量"""
+        start = {
+            "type": "message_start",
+            "message": {"id": "msg_1", "usage": {"input_tokens": 25, "output_tokens": 1}},
+        }
+        delta = {"type": "message_delta", "usage": {"output_tokens": 15}}
+
+        assert response_adapter.extract_stream_usage(start) == {
+            "prompt_tokens": 25,
+            "completion_tokens": 1,
+        }
+        assert response_adapter.extract_stream_usage(delta) == {"completion_tokens": 15}
+        assert response_adapter.extract_stream_usage({"type": "content_block_delta"}) is None
+
 
 class TestGoogleAdapters:
     """测试 Google 适配器"""
@@ -243,6 +272,23 @@ class TestGoogleAdapters:
         assert result["object"] == "chat.completion.chunk"
         assert result["choices"][0]["delta"]["content"] == "Hello"
 
+    def test_extract_stream_usage(self, response_adapter):
+        """测试从 usageMetadata 提取用量"""
+        chunk = {
+            "candidates": [],
+            "usageMetadata": {
+                "promptTokenCount": 8,
+                "candidatesTokenCount": 20,
+                "totalTokenCount": 28,
+            },
+        }
+
+        assert response_adapter.extract_stream_usage(chunk) == {
+            "prompt_tokens": 8,
+            "completion_tokens": 20,
+        }
+        assert response_adapter.extract_stream_usage({"candidates": []}) is None
+
 
 class TestOpenRouterAdapters:
     """测试 OpenRouter 适配器"""
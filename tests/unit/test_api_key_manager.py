@@ -5,7 +5,7 @@
 """
 
 from datetime import datetime, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
@@ -299,13 +299,18 @@ class TestAPIKeyManager:
             created_at=datetime.now(),
         )
         mock_storage.get_by_key.return_value = mock_key
-        mock_storage.update_last_used.return_value = True
+        mock_tracker = MagicMock()
 
-        result = api_key_manager.verify_key("sk-or-v1-test123")
+        with patch(
+            "gaiarouter.auth.api_key_manager.get_last_used_tracker", return_value=mock_tracker
+        ):
+            result = api_key_manager.verify_key("sk-or-v1-test123")
 
         assert result == mock_key
         mock_storage.get_by_key.assert_called_once_with("sk-or-v1-test123")
-        mock_storage.update_last_used.assert_called_once_with("ak_123")
+        # 最后使用时间由后台批量写入，验证路径不直接访问数据库
+        mock_tracker.touch.assert_called_once_with("ak_123")
+        mock_storage.update_last_used.assert_not_called()
 
     def test_verify_key_not_found(self, api_key_manager, mock_storage):
         """测试验证不存在的 API Key"""
@@ -357,6 +362,96 @@ class TestAPIKeyManager:
             api_key_manager.verify_key("sk-or-v1-test123")
 
 
+class TestAPIKeyManagerCache:
+    """测试 API Key 验证缓存与失效"""
+
+    @pytest.fixture
+    def api_key_manager(self):
+        with patch("gaiarouter.auth.api_key_manager.get_key_storage"):
+            return APIKeyManager()
+
+    @pytest.fixture
+    def mock_storage(self, api_key_manager):
+        return api_key_manager.storage
+
+    @pytest.fixture
+    def mock_key(self):
+        return APIKey(
+            id="ak_123",
+            organization_id="org_123",
+            name="Test Key",
+            key="sk-or-v1-test123",
+            status="active",
+            expires_at=None,
+            created_at=datetime.now(),
+        )
+
+    def test_verify_key_uses_cache(self, api_key_manager, mock_storage, mock_key):
+        """测试重复验证只查询一次数据库"""
+        mock_storage.get_by_key.return_value = mock_key
+
+        api_key_manager.verify_key("sk-or-v1-test123")
+        result = api_key_manager.verify_key("sk-or-v1-test123")
+
+        assert result == mock_key
+        mock_storage.get_by_key.assert_called_once_with("sk-or-v1-test123")
+        assert api_key_manager.cache.stats()["hits"] == 1
+        assert api_key_manager.cache.stats()["misses"] == 1
+
+    def test_verify_unknown_key_negative_cached(self, api_key_manager, mock_storage):
+        """测试未知 Key 被负缓存"""
+        mock_storage.get_by_key.return_value = None
+
+        for _ in range(3):
+            with pytest.raises(AuthenticationError, match="Invalid API Key"):
+                api_key_manager.verify_key("sk-or-v1-unknown")
+
+        mock_storage.get_by_key.assert_called_once()
+        assert api_key_manager.cache.stats()["negative_hits"] == 2
+
+    def test_update_key_invalidates_cache(self, api_key_manager, mock_storage, mock_key):
+        """测试更新 Key 后缓存失效"""
+        mock_storage.get_by_key.return_value = mock_key
+        api_key_manager.verify_key("sk-or-v1-test123")
+
+        mock_storage.update.return_value = True
+        api_key_manager.update_key("ak_123", status="inactive")
+
+        inactive_key = APIKey(
+            id="ak_123",
+            organization_id="org_123",
+            name="Test Key",
+            key="sk-or-v1-test123",
+            status="inactive",
+            created_at=datetime.now(),
+        )
+        mock_storage.get_by_key.return_value = inactive_key
+
+        with pytest.raises(AuthenticationError, match="API Key is inactive"):
+            api_key_manager.verify_key("sk-or-v1-test123")
+        assert mock_storage.get_by_key.call_count == 2
+
+    def test_delete_key_invalidates_cache(self, api_key_manager, mock_storage, mock_key):
+        """测试删除 Key 后缓存失效"""
+        mock_storage.get_by_key.return_value = mock_key
+        api_key_manager.verify_key("sk-or-v1-test123")
+
+        mock_storage.delete.return_value = True
+        api_key_manager.delete_key("ak_123")
+
+        hit, _ = api_key_manager.cache.get("sk-or-v1-test123")
+        assert hit is False
+
+    def test_storage_error_not_cached(self, api_key_manager, mock_storage, mock_key):
+        """测试数据库异常不会写入缓存"""
+        mock_storage.get_by_key.side_effect = [Exception("Database error"), mock_key]
+
+        with pytest.raises(AuthenticationError, match="Failed to verify API Key"):
+            api_key_manager.verify_key("sk-or-v1-test123")
+
+        assert api_key_manager.verify_key("sk-or-v1-test123") == mock_key
+
+
 class TestGetAPIKeyManager:
     """测试获取 API Key 管理器单例"""
 
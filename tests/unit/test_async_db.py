@@ -0,0 +1,186 @@
+"""
+测试异步数据访问层
+
+使用 aiosqlite 文件数据库测试异步引擎、异步存储查询和请求路径上的异步验证/限制检查
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import pytest_asyncio
+
+from gaiarouter.auth.api_key_manager import APIKeyManager
+from gaiarouter.auth.key_storage import KeyStorage
+from gaiarouter.config.settings import DatabaseSettings
+from gaiarouter.database import connection
+from gaiarouter.database.models import APIKey, Base, Organization, RequestStat
+from gaiarouter.organizations.limits import LimitChecker
+from gaiarouter.organizations.storage import OrganizationStorage
+from gaiarouter.organizations.usage_counters import UsageCounters
+from gaiarouter.utils.errors import AuthenticationError, OrganizationLimitError
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path):
+    """初始化 aiosqlite 异步引擎并写入测试数据"""
+    connection.init_async_db(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with connection.get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with connection.get_async_session() as db:
+        db.add_all(
+            [
+                Organization(id="org_1", name="Org", monthly_requests_limit=3),
+                APIKey(
+                    id="ak_1",
+                    organization_id="org_1",
+                    name="Key",
+                    key="sk-or-v1-async",
+                    status="active",
+                ),
+                RequestStat(
+                    api_key_id="ak_1",
+                    organization_id="org_1",
+                    model="openai/gpt-4",
+                    provider="openai",
+                    total_tokens=30,
+                    cost=0.01,
+                    timestamp=datetime.utcnow(),
+                ),
+                RequestStat(
+                    api_key_id="ak_1",
+                    organization_id="org_1",
+                    model="openai/gpt-4",
+                    provider="openai",
+                    total_tokens=70,
+                    cost=0.02,
+                    timestamp=datetime.utcnow(),
+                ),
+            ]
+        )
+        await db.commit()
+
+    yield
+
+    await connection.close_async_db()
+
+
+class TestPoolLimits:
+    """测试同步和异步引擎划分连接池"""
+
+    @staticmethod
+    def _settings(**kwargs):
+        return DatabaseSettings(host="db", user="u", password="p", name="n", **kwargs)
+
+    def test_default_split(self):
+        """测试默认各占一半，总数不超过 DB_POOL_SIZE / DB_MAX_OVERFLOW"""
+        settings = self._settings(pool_size=10, max_overflow=20)
+
+        assert settings.pool_limits() == (5, 10)
+        assert settings.pool_limits(async_engine=True) == (5, 10)
+
+    def test_configured_async_share(self):
+        """测试配置异步引擎占用的连接数，其余归同步引擎"""
+        settings = self._settings(
+            pool_size=10, max_overflow=20, async_pool_size=3, async_max_overflow=0
+        )
+
+        assert settings.pool_limits() == (7, 20)
+        assert settings.pool_limits(async_engine=True) == (3, 0)
+
+
+class TestAsyncStorage:
+    """测试异步存储查询"""
+
+    @pytest.mark.asyncio
+    async def test_get_async_db_dependency(self, async_db):
+        """测试依赖注入生成器返回可用会话"""
+        async for db in connection.get_async_db():
+            assert await db.get(Organization, "org_1") is not None
+
+    @pytest.mark.asyncio
+    async def test_get_by_key_async(self, async_db):
+        """测试异步按Key值查询"""
+        storage = KeyStorage()
+
+        key = await storage.get_by_key_async("sk-or-v1-async")
+        missing = await storage.get_by_key_async("sk-or-v1-missing")
+
+        assert key.id == "ak_1"
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_get_organization_async(self, async_db):
+        """测试异步查询组织"""
+        org = await OrganizationStorage().get_async("org_1")
+
+        assert org.monthly_requests_limit == 3
+
+    @pytest.mark.asyncio
+    async def test_usage_counters_load_async(self, async_db):
+        """测试异步加载组织本月用量"""
+        counters = UsageCounters(reconcile_interval=0)
+
+        usage = await counters.get_async("org_1")
+
+        assert usage == {"requests": 2, "tokens": 100, "cost": pytest.approx(0.03)}
+        # 已加载的组织只读内存
+        with patch.object(counters, "_load_async") as mock_load:
+            await counters.get_async("org_1")
+        mock_load.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_query_failure_returns_none(self):
+        """测试数据库不可用时返回None"""
+        with patch(
+            "gaiarouter.auth.key_storage.get_async_session", side_effect=Exception("db down")
+        ):
+            assert await KeyStorage().get_by_key_async("sk-or-v1-async") is None
+
+
+class TestAsyncRequestPath:
+    """测试请求路径上的异步验证和限制检查"""
+
+    @pytest.mark.asyncio
+    async def test_verify_key_async_caches_result(self):
+        """测试异步验证只在缓存未命中时查询数据库"""
+        api_key = APIKey(id="ak_1", key="sk-or-v1-async", status="active")
+        with (
+            patch("gaiarouter.auth.api_key_manager.get_key_storage") as mock_get_storage,
+            patch("gaiarouter.auth.api_key_manager.get_last_used_tracker"),
+        ):
+            storage = Mock()
+            storage.get_by_key_async = AsyncMock(return_value=api_key)
+            mock_get_storage.return_value = storage
+            manager = APIKeyManager()
+
+            first = await manager.verify_key_async("sk-or-v1-async")
+            second = await manager.verify_key_async("sk-or-v1-async")
+
+        assert first is api_key
+        assert second is api_key
+        storage.get_by_key_async.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_verify_key_async_invalid(self):
+        """测试异步验证不存在的Key"""
+        with patch("gaiarouter.auth.api_key_manager.get_key_storage") as mock_get_storage:
+            storage = Mock()
+            storage.get_by_key_async = AsyncMock(return_value=None)
+            mock_get_storage.return_value = storage
+            manager = APIKeyManager()
+
+            with pytest.raises(AuthenticationError, match="Invalid API Key"):
+                await manager.verify_key_async("sk-or-v1-missing")
+
+    @pytest.mark.asyncio
+    async def test_check_limits_async(self):
+        """测试异步限制检查"""
+        org = Organization(id="org_1", name="Org", monthly_requests_limit=3)
+        counters = Mock()
+        counters.get_async = AsyncMock(return_value={"requests": 2, "tokens": 0, "cost": 0.0})
+
+        with patch("gaiarouter.organizations.limits.get_usage_counters", return_value=counters):
+            with pytest.raises(OrganizationLimitError):
+                await LimitChecker().check_limits_async(org, additional_requests=1)
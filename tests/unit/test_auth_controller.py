@@ -4,7 +4,7 @@
 测试认证端点的各种场景
 """
 
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -38,7 +38,7 @@ class TestLogin:
         ):
             # Setup user manager
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = mock_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=mock_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             # Setup token manager
@@ -56,7 +56,7 @@ class TestLogin:
             assert response.role == "admin"
 
             # Verify managers were called correctly
-            user_mgr_instance.verify_user.assert_called_once_with("admin", "password123")
+            user_mgr_instance.verify_user_async.assert_awaited_once_with("admin", "password123")
             token_mgr_instance.generate_token.assert_called_once_with(
                 user_id="user_123", username="admin", role="admin"
             )
@@ -67,7 +67,7 @@ class TestLogin:
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             # Setup user manager to return None (invalid credentials)
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             # Should raise 401 Unauthorized
@@ -86,14 +86,14 @@ class TestLogin:
 
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             with pytest.raises(HTTPException) as exc_info:
                 await login(request)
 
             assert exc_info.value.status_code == 401
-            user_mgr_instance.verify_user.assert_called_once_with("admin", "wrongpassword")
+            user_mgr_instance.verify_user_async.assert_awaited_once_with("admin", "wrongpassword")
 
     @pytest.mark.asyncio
     async def test_login_nonexistent_user(self):
@@ -104,7 +104,7 @@ class TestLogin:
 
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             with pytest.raises(HTTPException) as exc_info:
@@ -128,7 +128,7 @@ class TestLogin:
             patch("gaiarouter.api.controllers.auth.get_token_manager") as mock_token_mgr,
         ):
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = regular_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=regular_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             token_mgr_instance = Mock()
@@ -151,7 +151,7 @@ class TestLogin:
             patch("gaiarouter.api.controllers.auth.get_token_manager") as mock_token_mgr,
         ):
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = mock_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=mock_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             # Test with specific token
@@ -187,7 +187,7 @@ class TestLogin:
         ):
             # User verification succeeds
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = mock_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=mock_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             # Token generation fails
@@ -214,7 +214,7 @@ class TestLoginEdgeCases:
 
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             with pytest.raises(HTTPException) as exc_info:
@@ -231,7 +231,7 @@ class TestLoginEdgeCases:
 
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             with pytest.raises(HTTPException) as exc_info:
@@ -255,7 +255,7 @@ class TestLoginEdgeCases:
             patch("gaiarouter.api.controllers.auth.get_token_manager") as mock_token_mgr,
         ):
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = mock_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=mock_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             token_mgr_instance = Mock()
@@ -276,7 +276,7 @@ class TestLoginEdgeCases:
         with patch("gaiarouter.api.controllers.auth.get_user_manager") as mock_user_mgr:
             user_mgr_instance = Mock()
             # Assuming the system is case-sensitive and "Admin" != "admin"
-            user_mgr_instance.verify_user.return_value = None
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=None)
             mock_user_mgr.return_value = user_mgr_instance
 
             with pytest.raises(HTTPException) as exc_info:
@@ -284,7 +284,7 @@ class TestLoginEdgeCases:
 
             assert exc_info.value.status_code == 401
             # Verify the exact username was passed (preserving case)
-            user_mgr_instance.verify_user.assert_called_once_with("Admin", "password123")
+            user_mgr_instance.verify_user_async.assert_awaited_once_with("Admin", "password123")
 
     @pytest.mark.asyncio
     async def test_login_long_token(self):
@@ -303,7 +303,7 @@ class TestLoginEdgeCases:
             patch("gaiarouter.api.controllers.auth.get_token_manager") as mock_token_mgr,
         ):
             user_mgr_instance = Mock()
-            user_mgr_instance.verify_user.return_value = mock_user
+            user_mgr_instance.verify_user_async = AsyncMock(return_value=mock_user)
             mock_user_mgr.return_value = user_mgr_instance
 
             token_mgr_instance = Mock()
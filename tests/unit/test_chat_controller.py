@@ -4,17 +4,30 @@
 测试聊天完成端点的各种场景
 """
 
+import asyncio
 import json
 from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 from fastapi import HTTPException
-
-from gaiarouter.api.controllers.chat import create_completion
+from prometheus_client import CollectorRegistry
+from starlette.responses import Response
+
+from gaiarouter.adapters.openai import OpenAIResponseAdapter
+from gaiarouter.api.controllers.chat import (
+    _stream_chat_completion,
+    _UpstreamTarget,
+    create_completion,
+)
+from gaiarouter.config import get_settings
 from gaiarouter.database.models import APIKey, Model, Organization
+from gaiarouter.metrics import Metrics
 from gaiarouter.providers.base import ProviderResponse
+from gaiarouter.router import get_health_tracker
 from gaiarouter.utils.errors import ModelNotFoundError
+from gaiarouter.utils.timing import RequestTimer
 
 
 class TestChatCompletionNonStreaming:
@@ -76,9 +89,10 @@ class TestChatCompletionNonStreaming:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
             patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
+            patch.object(get_settings(), "server_timing_enabled", True),
         ):
             # Setup model manager
             model_mgr_instance = Mock()
@@ -86,7 +100,7 @@ class TestChatCompletionNonStreaming:
             mock_model_mgr.return_value = model_mgr_instance
 
             # Setup router
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.chat_completion.return_value = provider_response
 
             mock_request_adapter = Mock()
@@ -123,11 +137,12 @@ class TestChatCompletionNonStreaming:
 
             # Setup stats collector
             stats_instance = Mock()
-            stats_instance.record_request_sync.return_value = True
+            stats_instance.enqueue.return_value = True
             mock_stats.return_value = stats_instance
 
             # Call endpoint
-            response = await create_completion(chat_request, mock_api_key)
+            http_response = Response()
+            response = await create_completion(chat_request, mock_api_key, response=http_response)
 
             # Verify
             assert response.id == "chatcmpl-123"
@@ -136,12 +151,179 @@ class TestChatCompletionNonStreaming:
             assert response.usage.total_tokens == 30
 
             mock_provider.chat_completion.assert_called_once()
-            stats_instance.record_request_sync.assert_called_once()
+            stats_instance.enqueue.assert_called_once()
+
+            # 分阶段耗时
+            server_timing = http_response.headers["Server-Timing"]
+            for stage in ("model_lookup", "limit_check", "adapt_request", "upstream", "total"):
+                assert f"{stage};dur=" in server_timing
+
+    @pytest.mark.asyncio
+    async def test_chat_completion_alias(self, mock_api_key, chat_request):
+        """测试逻辑模型解析为已启用的目标模型，统计和健康状况按目标模型记录"""
+        chat_request.model = "gpt-4"
+        catalog = {
+            "openai/gpt-4": Model(
+                id="openai/gpt-4", name="GPT-4", provider="openai", is_enabled=True
+            ),
+            "openrouter/gpt-4": Model(
+                id="openrouter/gpt-4", name="GPT-4", provider="openrouter", is_enabled=False
+            ),
+        }
+        provider_response = ProviderResponse(
+            content="Hi", model="gpt-4", prompt_tokens=1, completion_tokens=2, total_tokens=3
+        )
+
+        with (
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_catalog,
+            patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
+            patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
+        ):
+            mock_catalog.return_value.get_model.side_effect = catalog.get
+
+            mock_provider = AsyncMock(supports_raw_stream=False)
+            mock_provider.chat_completion.return_value = provider_response
+            request_adapter = Mock()
+            request_adapter.adapt.return_value = {"messages": [{"role": "user", "content": "Hi"}]}
+            response_adapter = Mock()
+            response_adapter.adapt.return_value = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 1234567890,
+                "model": "openai/gpt-4",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Hi"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+            }
+
+            router_instance = mock_router.return_value
+            router_instance.resolve.return_value = "openai/gpt-4"
+            router_instance.route.return_value = (
+                mock_provider,
+                request_adapter,
+                response_adapter,
+                "gpt-4",
+            )
+
+            http_response = Response()
+            await create_completion(chat_request, mock_api_key, response=http_response)
+
+            # 默认不返回分阶段耗时
+            assert "Server-Timing" not in http_response.headers
+            resolve_kwargs = router_instance.resolve.call_args.kwargs
+            assert resolve_kwargs["is_enabled"]("openai/gpt-4") is True
+            assert resolve_kwargs["is_enabled"]("openrouter/gpt-4") is False
+            router_instance.route.assert_called_once_with("openai/gpt-4")
+            enqueued = mock_stats.return_value.enqueue.call_args.kwargs
+            assert enqueued["model"] == "openai/gpt-4"
+            assert enqueued["provider"] == "openai"
+            assert get_health_tracker().get("openai/gpt-4").latency is not None
+
+    @staticmethod
+    def _fallback_router(mock_router, primary_error):
+        """路由器：openai/gpt-4 返回 primary_error，openrouter/gpt-4 正常响应"""
+        primary = AsyncMock(supports_raw_stream=False)
+        primary.chat_completion.side_effect = primary_error
+        fallback = AsyncMock(supports_raw_stream=False)
+        fallback.chat_completion.return_value = ProviderResponse(
+            content="Hi", model="gpt-4", prompt_tokens=1, completion_tokens=2, total_tokens=3
+        )
+        request_adapter = Mock()
+        request_adapter.adapt.return_value = {"messages": [{"role": "user", "content": "Hi"}]}
+        response_adapter = Mock()
+        response_adapter.adapt.return_value = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 1234567890,
+            "model": "openrouter/gpt-4",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "Hi"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+        }
+        providers = {"openai/gpt-4": primary, "openrouter/gpt-4": fallback}
+
+        router_instance = mock_router.return_value
+        router_instance.route.side_effect = lambda model_id: (
+            providers[model_id],
+            request_adapter,
+            response_adapter,
+            "gpt-4",
+        )
+        router_instance.fallback_chain.return_value = ["openrouter/gpt-4"]
+        return primary, fallback
+
+    @pytest.mark.asyncio
+    async def test_chat_completion_falls_back_on_retryable_error(self, mock_api_key, chat_request):
+        """测试上游5xx时改用回退目标，统计记录实际提供服务的目标"""
+        error = httpx.HTTPStatusError(
+            "unavailable",
+            request=httpx.Request("POST", "https://api.openai.com"),
+            response=httpx.Response(503),
+        )
+
+        with (
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_catalog,
+            patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
+            patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
+        ):
+            mock_catalog.return_value.get_model.return_value = Model(
+                id="openai/gpt-4", name="GPT-4", provider="openai", is_enabled=True
+            )
+            primary, fallback = self._fallback_router(mock_router, error)
+
+            response = await create_completion(chat_request, mock_api_key)
+
+            assert response.choices[0].message.content == "Hi"
+            primary.chat_completion.assert_called_once()
+            fallback.chat_completion.assert_called_once()
+            fallback_kwargs = mock_router.return_value.fallback_chain.call_args
+            assert fallback_kwargs.args == ("openai/gpt-4",)
+            assert fallback_kwargs.kwargs["requested_model"] == "openai/gpt-4"
+            enqueued = mock_stats.return_value.enqueue.call_args.kwargs
+            assert enqueued["model"] == "openrouter/gpt-4"
+            assert enqueued["provider"] == "openrouter"
+            assert enqueued["requested_model"] == "openai/gpt-4"
+            assert get_health_tracker().get("openai/gpt-4").error_rate > 0
+            assert get_health_tracker().get("openrouter/gpt-4").latency is not None
+
+    @pytest.mark.asyncio
+    async def test_chat_completion_no_fallback_on_client_error(self, mock_api_key, chat_request):
+        """测试上游4xx（参数错误等）不回退"""
+        error = httpx.HTTPStatusError(
+            "bad request",
+            request=httpx.Request("POST", "https://api.openai.com"),
+            response=httpx.Response(400),
+        )
+
+        with (
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_catalog,
+            patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
+        ):
+            mock_catalog.return_value.get_model.return_value = Model(
+                id="openai/gpt-4", name="GPT-4", provider="openai", is_enabled=True
+            )
+            _, fallback = self._fallback_router(mock_router, error)
+
+            with pytest.raises(httpx.HTTPStatusError):
+                await create_completion(chat_request, mock_api_key)
+
+            fallback.chat_completion.assert_not_called()
+            mock_router.return_value.fallback_chain.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_chat_completion_model_not_found(self, mock_api_key, chat_request):
         """测试模型不存在"""
-        with patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr:
+        with patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr:
             model_mgr_instance = Mock()
             model_mgr_instance.get_model.return_value = None
             mock_model_mgr.return_value = model_mgr_instance
@@ -159,7 +341,7 @@ class TestChatCompletionNonStreaming:
             is_enabled=False,  # Disabled
         )
 
-        with patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr:
+        with patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr:
             model_mgr_instance = Mock()
             model_mgr_instance.get_model.return_value = mock_model
             mock_model_mgr.return_value = model_mgr_instance
@@ -203,8 +385,8 @@ class TestChatCompletionNonStreaming:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
-            patch("gaiarouter.api.controllers.chat.get_db") as mock_get_db,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_organization_storage") as mock_org_storage,
             patch("gaiarouter.api.controllers.chat.get_limit_checker") as mock_limit,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
             patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
@@ -214,21 +396,18 @@ class TestChatCompletionNonStreaming:
             model_mgr_instance.get_model.return_value = mock_model
             mock_model_mgr.return_value = model_mgr_instance
 
-            # Setup database
-            mock_db_session = Mock()
-            mock_query = Mock()
-            mock_query.filter.return_value.first.return_value = mock_org
-            mock_db_session.query.return_value = mock_query
-            mock_db_session.close = Mock()
-            mock_get_db.return_value = iter([mock_db_session])
+            # Setup organization storage
+            org_storage = Mock()
+            org_storage.get_async = AsyncMock(return_value=mock_org)
+            mock_org_storage.return_value = org_storage
 
             # Setup limit checker
             limit_checker = Mock()
-            limit_checker.check_limits.return_value = None  # No exception = OK
+            limit_checker.check_limits_async = AsyncMock(return_value=True)
             mock_limit.return_value = limit_checker
 
             # Setup router
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.chat_completion.return_value = provider_response
 
             mock_request_adapter = Mock()
@@ -262,14 +441,15 @@ class TestChatCompletionNonStreaming:
 
             # Setup stats
             stats_instance = Mock()
-            stats_instance.record_request_sync.return_value = True
+            stats_instance.enqueue.return_value = True
             mock_stats.return_value = stats_instance
 
             # Call endpoint
             response = await create_completion(chat_request, mock_api_key)
 
             # Verify limit was checked
-            limit_checker.check_limits.assert_called_once_with(
+            org_storage.get_async.assert_awaited_once_with("org_123")
+            limit_checker.check_limits_async.assert_awaited_once_with(
                 mock_org, additional_requests=1, additional_tokens=100
             )
 
@@ -294,7 +474,7 @@ class TestChatCompletionNonStreaming:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
             patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
         ):
@@ -303,7 +483,7 @@ class TestChatCompletionNonStreaming:
             model_mgr_instance.get_model.return_value = mock_model
             mock_model_mgr.return_value = model_mgr_instance
 
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.chat_completion.return_value = provider_response
 
             mock_request_adapter = Mock()
@@ -340,8 +520,8 @@ class TestChatCompletionNonStreaming:
             await create_completion(chat_request, mock_api_key)
 
             # Verify stats were recorded
-            stats_instance.record_request_sync.assert_called_once()
-            call_args = stats_instance.record_request_sync.call_args[1]
+            stats_instance.enqueue.assert_called_once()
+            call_args = stats_instance.enqueue.call_args[1]
             assert call_args["api_key_id"] == "ak_123"
             assert call_args["organization_id"] == "org_123"
             assert call_args["model"] == "openai/gpt-4"
@@ -369,7 +549,7 @@ class TestChatCompletionNonStreaming:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
             patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
         ):
@@ -378,7 +558,7 @@ class TestChatCompletionNonStreaming:
             model_mgr_instance.get_model.return_value = mock_model
             mock_model_mgr.return_value = model_mgr_instance
 
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.chat_completion.return_value = provider_response
 
             mock_request_adapter = Mock()
@@ -410,7 +590,7 @@ class TestChatCompletionNonStreaming:
 
             # Stats collector raises exception
             stats_instance = Mock()
-            stats_instance.record_request_sync.side_effect = Exception("Stats DB error")
+            stats_instance.enqueue.side_effect = Exception("Stats DB error")
             mock_stats.return_value = stats_instance
 
             # Should not raise exception - stats error is caught
@@ -468,8 +648,9 @@ class TestChatCompletionStreaming:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
+            patch.object(get_settings(), "server_timing_enabled", True),
         ):
             # Setup model manager
             model_mgr_instance = Mock()
@@ -487,7 +668,7 @@ class TestChatCompletionStreaming:
                 for chunk in chunks:
                     yield chunk
 
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.stream_chat_completion.return_value = mock_stream()
 
             mock_request_adapter = Mock()
@@ -523,6 +704,420 @@ class TestChatCompletionStreaming:
             assert response.media_type == "text/event-stream"
             assert response.headers["Cache-Control"] == "no-cache"
             assert response.headers["Connection"] == "keep-alive"
+            assert "adapt_request;dur=" in response.headers["Server-Timing"]
+
+    @pytest.mark.asyncio
+    async def test_stream_records_reported_usage(self, mock_api_key):
+        """测试流结束时按提供商返回的用量记录统计"""
+
+        async def mock_stream(**kwargs):
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "Hi"}}]}
+            yield {
+                "id": "chatcmpl-1",
+                "choices": [],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+            }
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    mock_provider,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                )
+            ]
+
+        # 仅携带用量的chunk不转发
+        assert len(chunks) == 2
+        assert chunks[-1] == "data: [DONE]\n\n"
+
+        stats_instance.enqueue.assert_called_once()
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["api_key_id"] == "ak_123"
+        assert call_args["prompt_tokens"] == 5
+        assert call_args["completion_tokens"] == 2
+        assert call_args["total_tokens"] == 7
+
+    @pytest.mark.asyncio
+    async def test_stream_records_usage_on_disconnect(self, mock_api_key):
+        """测试客户端断开时按估算用量记录统计"""
+
+        async def mock_stream(**kwargs):
+            for _ in range(10):
+                yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "abcd"}}]}
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            stream = _stream_chat_completion(
+                mock_provider,
+                OpenAIResponseAdapter(),
+                {"messages": [{"role": "user", "content": "Hello"}]},
+                "gpt-4",
+                "openai/gpt-4",
+                api_key=mock_api_key,
+                provider_name="openai",
+            )
+            await stream.__anext__()
+            await stream.__anext__()
+            await stream.aclose()
+
+        stats_instance.enqueue.assert_called_once()
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["completion_tokens"] == 2
+        assert call_args["prompt_tokens"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_passthrough(self, mock_api_key):
+        """测试直通模式原样转发数据行，只解析用量行"""
+        chunk_line = '{"id":"chatcmpl-1","model":"gpt-4","choices":[{"delta":{"content":"Hi"}}],"usage":null}'
+
+        async def mock_raw_stream(**kwargs):
+            yield chunk_line
+            yield '{"id":"chatcmpl-1","choices":[{"delta":{"content":"!"}}]}'
+            yield (
+                '{"id":"chatcmpl-1","choices":[],'
+                '"usage":{"prompt_tokens":5,"completion_tokens":2,"total_tokens":7}}'
+            )
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion_raw = mock_raw_stream
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    mock_provider,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                    passthrough=True,
+                )
+            ]
+
+        assert chunks == [
+            f"data: {chunk_line}\n\n",
+            'data: {"model":"openai/gpt-4","id":"chatcmpl-1","choices":[{"delta":{"content":"!"}}]}\n\n',
+            "data: [DONE]\n\n",
+        ]
+        mock_provider.stream_chat_completion.assert_not_called()
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["prompt_tokens"] == 5
+        assert call_args["completion_tokens"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_passthrough_disconnect_estimates_usage(self, mock_api_key):
+        """测试直通模式下客户端断开时按数据行估算用量"""
+
+        async def mock_raw_stream(**kwargs):
+            for _ in range(10):
+                yield '{"id":"chatcmpl-1","choices":[{"delta":{"content":"abcd"}}]}'
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion_raw = mock_raw_stream
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            stream = _stream_chat_completion(
+                mock_provider,
+                OpenAIResponseAdapter(),
+                {"messages": [{"role": "user", "content": "Hello"}]},
+                "gpt-4",
+                "openai/gpt-4",
+                api_key=mock_api_key,
+                provider_name="openai",
+                passthrough=True,
+            )
+            await stream.__anext__()
+            await stream.__anext__()
+            await stream.aclose()
+
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["completion_tokens"] == 2
+        assert call_args["prompt_tokens"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_stops_when_client_disconnects(self, mock_api_key):
+        """测试检测到客户端断开时停止读取并关闭上游流"""
+        upstream_closed = False
+
+        async def mock_raw_stream(**kwargs):
+            nonlocal upstream_closed
+            try:
+                for _ in range(100):
+                    yield '{"id":"chatcmpl-1","model":"gpt-4","choices":[{"delta":{"content":"abcd"}}]}'
+            finally:
+                upstream_closed = True
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion_raw = mock_raw_stream
+        is_disconnected = AsyncMock(side_effect=[False, True])
+
+        with (
+            patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
+            patch("gaiarouter.api.controllers.chat.DISCONNECT_CHECK_INTERVAL", 0),
+        ):
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    mock_provider,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                    passthrough=True,
+                    is_disconnected=is_disconnected,
+                )
+            ]
+
+        # 第一个数据块转发后检测到断开，不再发送 [DONE]
+        assert len(chunks) == 1
+        assert upstream_closed is True
+        assert is_disconnected.await_count == 2
+        # 已从上游读取的两个数据块都计入用量
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["completion_tokens"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_cancelled_while_waiting_upstream(self, mock_api_key):
+        """测试等待上游时响应任务被取消，上游流被关闭并记录用量"""
+        upstream_closed = False
+        waiting = asyncio.Event()
+
+        async def mock_stream(**kwargs):
+            nonlocal upstream_closed
+            try:
+                yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "abcd"}}]}
+                waiting.set()
+                await asyncio.sleep(3600)
+            finally:
+                upstream_closed = True
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+
+        async def consume(stream):
+            async for _ in stream:
+                pass
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            stats_instance = Mock()
+            mock_stats.return_value = stats_instance
+
+            stream = _stream_chat_completion(
+                mock_provider,
+                OpenAIResponseAdapter(),
+                {"messages": [{"role": "user", "content": "Hello"}]},
+                "gpt-4",
+                "openai/gpt-4",
+                api_key=mock_api_key,
+                provider_name="openai",
+            )
+            task = asyncio.create_task(consume(stream))
+            await waiting.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert upstream_closed is True
+        call_args = stats_instance.enqueue.call_args[1]
+        assert call_args["completion_tokens"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_first_chunk(self, mock_api_key):
+        """测试上游返回第一个数据块之前失败时改用回退目标"""
+
+        async def failing_stream(**kwargs):
+            raise httpx.ConnectError("connection refused")
+            yield  # pragma: no cover
+
+        async def fallback_stream(**kwargs):
+            assert kwargs["model"] == "openai/gpt-4"
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "Hi"}}]}
+
+        primary = Mock()
+        primary.stream_chat_completion = failing_stream
+        secondary = Mock()
+        secondary.stream_chat_completion = fallback_stream
+        fallback = Mock(
+            return_value=_UpstreamTarget(
+                model_id="openrouter/gpt-4",
+                provider_name="openrouter",
+                provider=secondary,
+                response_adapter=OpenAIResponseAdapter(),
+                adapted_request={"messages": [{"role": "user", "content": "Hello"}]},
+                model_name="openai/gpt-4",
+            )
+        )
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats:
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    primary,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                    requested_model="gpt-4",
+                    fallback=fallback,
+                )
+            ]
+
+        assert '"content":"Hi"' in chunks[0]
+        assert chunks[-1] == "data: [DONE]\n\n"
+        assert isinstance(fallback.call_args.args[0], httpx.ConnectError)
+        call_args = mock_stats.return_value.enqueue.call_args.kwargs
+        assert call_args["model"] == "openrouter/gpt-4"
+        assert call_args["provider"] == "openrouter"
+        assert call_args["requested_model"] == "gpt-4"
+        assert get_health_tracker().get("openai/gpt-4").error_rate > 0
+        assert get_health_tracker().get("openrouter/gpt-4").ttft is not None
+
+    @pytest.mark.asyncio
+    async def test_stream_no_fallback_after_first_chunk(self, mock_api_key):
+        """测试客户端已收到内容后上游失败不回退，以错误块结束"""
+
+        async def mock_stream(**kwargs):
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "Hi"}}]}
+            raise httpx.ReadError("connection reset")
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+        fallback = Mock()
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector"):
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    mock_provider,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                    fallback=fallback,
+                )
+            ]
+
+        fallback.assert_not_called()
+        assert '"stream_error"' in chunks[-1]
+
+    @pytest.mark.asyncio
+    async def test_stream_server_timing(self, mock_api_key):
+        """测试流结尾发送分阶段耗时注释并记录上游耗时"""
+
+        async def mock_stream(**kwargs):
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "Hi"}}]}
+            await asyncio.sleep(0.01)
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "!"}}]}
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+        timer = RequestTimer()
+
+        with patch("gaiarouter.api.controllers.chat.get_stats_collector"):
+            chunks = [
+                chunk
+                async for chunk in _stream_chat_completion(
+                    mock_provider,
+                    OpenAIResponseAdapter(),
+                    {"messages": [{"role": "user", "content": "Hello"}]},
+                    "gpt-4",
+                    "openai/gpt-4",
+                    api_key=mock_api_key,
+                    provider_name="openai",
+                    timer=timer,
+                    server_timing=True,
+                )
+            ]
+
+        assert chunks[-1] == "data: [DONE]\n\n"
+        assert chunks[-2].startswith(": server-timing upstream_ttfb;dur=")
+        assert "total;dur=" in chunks[-2]
+        assert timer.stages["upstream"] >= 0.01
+        assert timer.stages["upstream_ttfb"] < timer.stages["upstream"]
+        assert "stats_enqueue" in timer.stages
+
+    @pytest.mark.asyncio
+    async def test_stream_records_metrics(self, mock_api_key):
+        """测试流结束时记录请求指标和首Token时间"""
+
+        async def mock_stream(**kwargs):
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"role": "assistant"}}]}
+            yield {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": "Hi"}}]}
+
+        mock_provider = Mock()
+        mock_provider.stream_chat_completion = mock_stream
+        metrics = Metrics(max_organization_labels=100, registry=CollectorRegistry())
+
+        with (
+            patch("gaiarouter.api.controllers.chat.get_stats_collector"),
+            patch("gaiarouter.api.controllers.chat.get_metrics", return_value=metrics),
+        ):
+            stream = _stream_chat_completion(
+                mock_provider,
+                OpenAIResponseAdapter(),
+                {"messages": [{"role": "user", "content": "Hello"}]},
+                "gpt-4",
+                "openai/gpt-4",
+                api_key=mock_api_key,
+                provider_name="openai",
+            )
+            await stream.__anext__()
+            assert (
+                metrics.registry.get_sample_value(
+                    "gaiarouter_inflight_streams", {"provider": "openai"}
+                )
+                == 1
+            )
+            async for _ in stream:
+                pass
+
+        labels = {"provider": "openai", "model": "openai/gpt-4"}
+        registry = metrics.registry
+        assert registry.get_sample_value("gaiarouter_inflight_streams", {"provider": "openai"}) == 0
+        assert (
+            registry.get_sample_value(
+                "gaiarouter_requests_total",
+                {**labels, "organization": "org_123", "stream": "true", "status": "success"},
+            )
+            == 1
+        )
+        assert (
+            registry.get_sample_value("gaiarouter_time_to_first_token_seconds_count", labels) == 1
+        )
 
 
 class TestChatCompletionResponseFormatting:
@@ -566,7 +1161,7 @@ class TestChatCompletionResponseFormatting:
         )
 
         with (
-            patch("gaiarouter.api.controllers.chat.get_model_manager") as mock_model_mgr,
+            patch("gaiarouter.api.controllers.chat.get_model_catalog") as mock_model_mgr,
             patch("gaiarouter.api.controllers.chat.get_model_router") as mock_router,
             patch("gaiarouter.api.controllers.chat.get_stats_collector") as mock_stats,
         ):
@@ -574,7 +1169,7 @@ class TestChatCompletionResponseFormatting:
             model_mgr_instance.get_model.return_value = mock_model
             mock_model_mgr.return_value = model_mgr_instance
 
-            mock_provider = AsyncMock()
+            mock_provider = AsyncMock(supports_raw_stream=False)
             mock_provider.chat_completion.return_value = provider_response
 
             mock_request_adapter = Mock()
@@ -0,0 +1,285 @@
+"""
+测试熔断器
+
+测试状态切换、半开探测、失败分类、注册表和 Provider 集成
+"""
+
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry
+
+from gaiarouter.metrics import RuntimeCollector
+from gaiarouter.providers import circuit_breaker
+from gaiarouter.providers.base import Provider, ProviderResponse
+from gaiarouter.providers.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    is_circuit_failure,
+)
+from gaiarouter.utils.errors import ProviderUnavailableError, TimeoutError
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    """构造HTTP状态错误"""
+    request = httpx.Request("POST", "https://api.test.com/chat")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestCircuitBreaker:
+    """测试单个熔断器"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker("openai", failure_threshold=3, recovery_timeout=30, clock=clock)
+
+    def test_opens_after_consecutive_failures(self, breaker):
+        """测试连续失败达到阈值后打开"""
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.allow_request() is False
+        assert breaker.retry_after() == 30
+
+    def test_success_resets_failures(self, breaker):
+        """测试成功后清零失败次数（只统计连续失败）"""
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CLOSED
+        assert breaker.failures == 1
+
+    def test_half_open_probe_closes(self, breaker, clock):
+        """测试冷却后半开放行一个探测请求，探测成功后关闭"""
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30
+
+        assert breaker.is_rejecting() is False
+        assert breaker.allow_request() is True
+        assert breaker.state == HALF_OPEN
+        # 探测名额已满
+        assert breaker.allow_request() is False
+        assert breaker.is_rejecting() is True
+
+        breaker.record_success()
+
+        assert breaker.state == CLOSED
+        assert breaker.allow_request() is True
+
+    def test_half_open_probe_failure_reopens(self, breaker, clock):
+        """测试探测失败后重新打开并重新计时"""
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 31
+        assert breaker.allow_request() is True
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.retry_after() == 30
+
+    def test_release_frees_probe(self, breaker, clock):
+        """测试探测请求被取消时释放名额"""
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow_request() is True
+
+        breaker.release()
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request() is True
+
+
+class TestIsCircuitFailure:
+    """测试失败分类"""
+
+    def test_failures(self):
+        """测试超时、连接错误和5xx计入失败"""
+        assert is_circuit_failure(TimeoutError())
+        assert is_circuit_failure(httpx.ConnectError("refused"))
+        assert is_circuit_failure(status_error(502))
+
+    def test_not_failures(self):
+        """测试4xx和其他异常不计入失败"""
+        assert not is_circuit_failure(status_error(401))
+        assert not is_circuit_failure(status_error(429))
+        assert not is_circuit_failure(ValueError("bad response"))
+
+
+class TestCircuitBreakerRegistry:
+    """测试熔断器注册表"""
+
+    @pytest.fixture
+    def registry(self):
+        return CircuitBreakerRegistry(
+            enabled=True, failure_threshold=1, recovery_timeout=30, half_open_max_calls=1
+        )
+
+    def test_provider_and_model_breakers(self, registry):
+        """测试同一提供商的不同模型分别熔断，提供商级别熔断影响所有模型"""
+        registry.get("openai", "gpt-4").record_failure()
+
+        with pytest.raises(ProviderUnavailableError) as exc_info:
+            registry.ensure_available("openai", "gpt-4")
+        registry.ensure_available("openai", "gpt-4o")
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after == pytest.approx(30, abs=1)
+
+        registry.get("openai").record_failure()
+        with pytest.raises(ProviderUnavailableError):
+            registry.ensure_available("openai", "gpt-4o")
+
+    def test_acquire_releases_on_rejection(self, registry):
+        """测试模型级别拒绝时释放已占用的提供商级别探测名额"""
+        provider_breaker = registry.get("openai")
+        provider_breaker.state = HALF_OPEN
+        registry.get("openai", "gpt-4").record_failure()
+
+        with pytest.raises(ProviderUnavailableError):
+            registry.acquire("openai", "gpt-4")
+
+        assert provider_breaker._probes == 0
+        assert registry.acquire("openai", "gpt-4o") == [
+            provider_breaker,
+            registry.get("openai", "gpt-4o"),
+        ]
+
+    def test_disabled(self):
+        """测试未启用时不经过熔断器"""
+        registry = CircuitBreakerRegistry(enabled=False)
+
+        assert registry.acquire("openai", "gpt-4") == []
+        registry.ensure_available("openai", "gpt-4")
+        assert registry.snapshot() == []
+
+    def test_collector_exports_state(self, registry):
+        """测试导出熔断器状态（关闭的模型级别熔断器不导出）"""
+        registry.acquire("openai", "gpt-4o")
+        registry.get("openai", "gpt-4").record_failure()
+
+        collector_registry = CollectorRegistry()
+        collector_registry.register(RuntimeCollector())
+        with patch.object(circuit_breaker, "_circuit_breakers", registry):
+            state = {
+                labels: collector_registry.get_sample_value(
+                    "gaiarouter_circuit_breaker_state", {"provider": "openai", "model": labels}
+                )
+                for labels in ("all", "gpt-4", "gpt-4o")
+            }
+
+        assert state == {"all": 0, "gpt-4": 2, "gpt-4o": None}
+
+
+class TestProviderCircuit:
+    """测试 Provider 经过熔断器调用上游"""
+
+    class TestProvider(Provider):
+        """测试用的 Provider 实现"""
+
+        name = "test"
+
+        def get_default_base_url(self) -> str:
+            return "https://api.test.com"
+
+        async def chat_completion(self, messages, model, **kwargs):
+            return ProviderResponse(content="Test", model=model, total_tokens=10)
+
+        async def stream_chat_completion(self, messages, model, **kwargs):
+            yield {"content": "Test"}
+
+    @pytest.fixture
+    def registry(self):
+        registry = CircuitBreakerRegistry(
+            enabled=True, failure_threshold=2, recovery_timeout=30, half_open_max_calls=1
+        )
+        with patch("gaiarouter.providers.base.get_circuit_breakers", return_value=registry):
+            yield registry
+
+    @pytest.fixture
+    def settings(self):
+        settings = Mock()
+        settings.max_retries = 5
+        return settings
+
+    @pytest.mark.asyncio
+    async def test_retry_stops_when_open(self, registry, settings):
+        """测试熔断打开后立即失败，不再继续重试"""
+        provider = self.TestProvider(api_key="test-key")
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise status_error(503)
+
+        with patch("gaiarouter.providers.base.get_settings", return_value=settings):
+            with pytest.raises(ProviderUnavailableError):
+                await provider._retry_request(failing, retry_delay=0, model="m1")
+
+        assert calls == 2
+        assert registry.get("test", "m1").state == OPEN
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_open(self, registry, settings):
+        """测试4xx不计入熔断失败"""
+        provider = self.TestProvider(api_key="test-key")
+
+        async def unauthorized():
+            raise status_error(401)
+
+        with patch("gaiarouter.providers.base.get_settings", return_value=settings):
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider._retry_request(
+                    unauthorized, max_retries=3, retry_delay=0, model="m1"
+                )
+
+        assert registry.get("test").state == CLOSED
+        assert registry.get("test", "m1").failures == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_stream_releases_probe(self, registry):
+        """测试半开探测的流被取消时释放名额，不计为成功或失败"""
+        breaker = registry.get("test")
+        breaker.state = HALF_OPEN
+        provider = self.TestProvider(api_key="test-key")
+
+        async def stream():
+            async with provider.circuit():
+                yield "chunk"
+                yield "chunk"
+
+        events = stream()
+        await events.__anext__()
+        assert breaker._probes == 1
+        await events.aclose()
+
+        assert breaker.state == HALF_OPEN
+        assert breaker._probes == 0
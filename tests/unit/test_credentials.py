@@ -0,0 +1,232 @@
+"""
+测试上游凭证池
+
+测试Key解析、选择策略、429冷却、按Key的监控指标和 Provider 集成
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry
+
+from gaiarouter.metrics import Metrics
+from gaiarouter.providers.anthropic import AnthropicProvider
+from gaiarouter.providers.credentials import (
+    WEIGHTED_ROUND_ROBIN,
+    CredentialPool,
+    parse_weighted_key,
+    split_api_keys,
+)
+from gaiarouter.providers.google import GoogleProvider
+from gaiarouter.providers.openai import OpenAIProvider
+from gaiarouter.router.model_router import ModelRouter
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def status_error(status_code: int, headers: dict = None) -> httpx.HTTPStatusError:
+    """构造HTTP状态错误"""
+    request = httpx.Request("POST", "https://api.test.com/chat")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@pytest.fixture
+def metrics():
+    """使用独立注册表的监控指标"""
+    metrics = Metrics(registry=CollectorRegistry())
+    with patch("gaiarouter.providers.credentials.get_metrics", return_value=metrics):
+        yield metrics
+
+
+class TestParsing:
+    """测试Key配置解析"""
+
+    def test_split(self):
+        """测试逗号分隔并去除空白"""
+        assert split_api_keys(" sk-a, sk-b:2 ,,") == ["sk-a", "sk-b:2"]
+        assert split_api_keys(None) == []
+
+    def test_weight_suffix(self):
+        """测试 ":权重" 后缀，非正整数后缀视为Key的一部分"""
+        assert parse_weighted_key("sk-b:3").weight == 3
+        assert parse_weighted_key("sk-b:3").key == "sk-b"
+        assert parse_weighted_key("sk-b").weight == 1
+        assert parse_weighted_key("sk-b:0").key == "sk-b:0"
+        assert parse_weighted_key("sk-b:x").key == "sk-b:x"
+
+    def test_duplicates_and_label(self):
+        """测试重复的Key只保留一个，标识只含末4位"""
+        pool = CredentialPool("openai", ["sk-aaaa1234", "sk-aaaa1234:2"])
+
+        assert len(pool) == 1
+        assert pool.credentials[0].label == "...1234"
+
+
+class TestSelection:
+    """测试选择策略"""
+
+    def test_weighted_round_robin(self):
+        """测试平滑加权轮询按权重分配"""
+        pool = CredentialPool("openai", ["sk-a:3", "sk-b"], strategy=WEIGHTED_ROUND_ROBIN)
+
+        picks = [pool.select().key for _ in range(8)]
+
+        assert picks.count("sk-a") == 6
+        assert picks.count("sk-b") == 2
+        # 平滑：不会连续4次选择同一个Key
+        assert "sk-a" * 4 not in "".join(picks)
+
+    def test_least_inflight(self):
+        """测试选择进行中请求最少的Key"""
+        pool = CredentialPool("openai", ["sk-a", "sk-b", "sk-c"])
+        pool.credentials[0].in_flight = 2
+        pool.credentials[2].in_flight = 1
+
+        assert pool.select().key == "sk-b"
+
+    def test_least_inflight_rotates_ties(self):
+        """测试进行中请求数相同时轮流选择"""
+        pool = CredentialPool("openai", ["sk-a", "sk-b"])
+
+        assert {pool.select().key for _ in range(2)} == {"sk-a", "sk-b"}
+
+    def test_unknown_strategy(self):
+        """测试未知策略"""
+        with pytest.raises(ValueError):
+            CredentialPool("openai", ["sk-a"], strategy="random")
+
+    def test_empty(self):
+        """测试未配置Key"""
+        assert CredentialPool("openai", []).select() is None
+
+
+class TestLease:
+    """测试占用Key和429冷却"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_key_cools_down(self, metrics):
+        """测试429后Key在 Retry-After 期间不再被选择"""
+        clock = FakeClock()
+        pool = CredentialPool("openai", ["sk-aaaa", "sk-bbbb"], clock=clock)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with pool.lease() as api_key:
+                assert api_key == "sk-aaaa"
+                assert pool.credentials[0].in_flight == 1
+                raise status_error(429, {"Retry-After": "5"})
+
+        assert pool.credentials[0].in_flight == 0
+        assert [pool.select().key for _ in range(3)] == ["sk-bbbb"] * 3
+        assert pool.snapshot()[0]["cooling_down"] is True
+
+        clock.now += 5
+        assert pool.has_available()
+        assert {pool.select().key for _ in range(2)} == {"sk-aaaa", "sk-bbbb"}
+
+    @pytest.mark.asyncio
+    async def test_all_cooling_uses_earliest(self, metrics):
+        """测试所有Key都在冷却时使用最早结束冷却的Key"""
+        clock = FakeClock()
+        pool = CredentialPool("openai", ["sk-a", "sk-b"], cooldown=60, clock=clock)
+        pool.mark_rate_limited(pool.credentials[0], 30)
+        pool.mark_rate_limited(pool.credentials[1], None)
+
+        assert not pool.has_available()
+        assert pool.select().key == "sk-a"
+
+    @pytest.mark.asyncio
+    async def test_records_outcomes(self, metrics):
+        """测试按Key记录调用结果"""
+        pool = CredentialPool("openai", ["sk-aaaa"])
+
+        async with pool.lease():
+            pass
+        with pytest.raises(httpx.HTTPStatusError):
+            async with pool.lease():
+                raise status_error(500)
+
+        labels = {"provider": "openai", "key": "...aaaa"}
+        registry = metrics.registry
+        assert (
+            registry.get_sample_value(
+                "gaiarouter_upstream_key_requests_total", {**labels, "outcome": "success"}
+            )
+            == 1
+        )
+        assert (
+            registry.get_sample_value(
+                "gaiarouter_upstream_key_requests_total", {**labels, "outcome": "error"}
+            )
+            == 1
+        )
+
+
+class TestProviderCredentials:
+    """测试 Provider 使用凭证池"""
+
+    def test_headers_use_leased_key(self):
+        """测试请求头使用本次选中的Key"""
+        provider = AnthropicProvider(api_keys=["sk-ant-a", "sk-ant-b"])
+
+        assert provider.api_key == "sk-ant-a"
+        assert provider.get_headers("sk-ant-b")["x-api-key"] == "sk-ant-b"
+        assert GoogleProvider(api_keys=["g-a"]).get_params() == {"key": "g-a"}
+
+    @pytest.mark.asyncio
+    async def test_retry_switches_key_after_429(self, metrics):
+        """测试429后立即换用其他Key重试，不等待 Retry-After"""
+        provider = OpenAIProvider(api_keys=["sk-aaaa", "sk-bbbb"])
+        rate_limited = Mock()
+        rate_limited.raise_for_status.side_effect = status_error(429, {"Retry-After": "5"})
+        success = Mock()
+        success.content = (
+            b'{"model": "gpt-4", "choices": [{"message": {"content": "Hi"}, '
+            b'"finish_reason": "stop"}], "usage": {}}'
+        )
+
+        with (
+            patch("gaiarouter.providers.base.get_http_client_pool") as mock_pool,
+            patch("gaiarouter.providers.base.asyncio.sleep", new=AsyncMock()) as sleep,
+        ):
+            client = mock_pool.return_value.get_client.return_value
+            client.post = AsyncMock(side_effect=[rate_limited, success])
+            response = await provider.chat_completion(
+                messages=[{"role": "user", "content": "Hi"}], model="gpt-4"
+            )
+
+        assert response.content == "Hi"
+        keys = [call.kwargs["headers"]["Authorization"] for call in client.post.call_args_list]
+        assert keys == ["Bearer sk-aaaa", "Bearer sk-bbbb"]
+        assert sleep.await_args.args[0] <= provider.settings.retry_base_delay
+
+
+class TestRouterKeys:
+    """测试路由器合并Key配置"""
+
+    def test_merges_single_and_list(self, mock_settings):
+        """测试单个Key与Key列表合并（去重）"""
+        mock_settings.providers.openai_api_keys = "test-openai-key, sk-extra:2"
+        mock_settings.providers.anthropic_api_key = None
+        mock_settings.providers.anthropic_api_keys = "sk-ant-a,sk-ant-b"
+        mock_settings.upstream_key_strategy = "least_inflight"
+        mock_settings.upstream_key_cooldown = 60
+
+        with (
+            patch("gaiarouter.router.model_router.get_settings", return_value=mock_settings),
+            patch("gaiarouter.router.model_router.get_model_registry"),
+        ):
+            router = ModelRouter()
+
+        openai_keys = [c.key for c in router._providers["openai"].credentials.credentials]
+        assert openai_keys == ["test-openai-key", "sk-extra"]
+        assert len(router._providers["anthropic"].credentials) == 2
@@ -0,0 +1,209 @@
+"""
+测试阻塞调用线程池
+
+测试线程池执行、排队深度统计、异常传播以及登录验证的线程池卸载
+"""
+
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gaiarouter.auth.user_manager import UserManager
+from gaiarouter.utils import executor as executor_module
+from gaiarouter.utils.executor import (
+    CRYPTO_EXECUTOR,
+    DB_EXECUTOR,
+    BlockingExecutor,
+    executor_stats,
+    get_executor,
+    run_blocking,
+    shutdown_executors,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_executors():
+    """每个测试使用独立的全局线程池"""
+    shutdown_executors()
+    mock_settings = Mock(blocking_executor_max_workers=4, crypto_executor_max_workers=1)
+    with patch.object(executor_module, "get_settings", return_value=mock_settings):
+        yield
+    shutdown_executors()
+
+
+class TestBlockingExecutor:
+    """测试有界线程池"""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result_in_worker_thread(self):
+        """测试在工作线程中执行并返回结果"""
+        executor = BlockingExecutor("test", max_workers=2)
+        try:
+            result = await executor.run(
+                lambda x, y=0: (x + y, threading.current_thread().name), 1, y=2
+            )
+        finally:
+            executor.shutdown()
+
+        assert result[0] == 3
+        assert result[1].startswith("gaiarouter-test")
+
+    @pytest.mark.asyncio
+    async def test_stats_counters(self):
+        """测试统计计数"""
+        executor = BlockingExecutor("test", max_workers=2)
+        try:
+            await asyncio.gather(*[executor.run(lambda: None) for _ in range(5)])
+            stats = executor.stats()
+        finally:
+            executor.shutdown()
+
+        assert stats["name"] == "test"
+        assert stats["max_workers"] == 2
+        assert stats["submitted"] == 5
+        assert stats["completed"] == 5
+        assert stats["failed"] == 0
+        assert stats["queued"] == 0
+        assert stats["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_depth(self):
+        """测试线程占满时记录排队深度"""
+        executor = BlockingExecutor("test", max_workers=1)
+        release = threading.Event()
+        try:
+            tasks = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            stats = executor.stats()
+            release.set()
+            await asyncio.gather(*tasks)
+        finally:
+            executor.shutdown()
+
+        assert stats["active"] == 1
+        assert stats["queued"] == 2
+        assert executor.max_queued >= 2
+        assert executor.stats()["avg_wait_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_queued(self):
+        """测试排队时被取消的调用不再计入排队数"""
+        executor = BlockingExecutor("test", max_workers=1)
+        release = threading.Event()
+        try:
+            running = asyncio.create_task(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(executor.run(release.wait, 5), timeout=0.05)
+            release.set()
+            await running
+            stats = executor.stats()
+        finally:
+            executor.shutdown()
+
+        assert stats["queued"] == 0
+        assert stats["active"] == 0
+        assert stats["submitted"] == 2
+        assert stats["completed"] == 1
+        assert stats["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates(self):
+        """测试异常传播并计入失败数"""
+        executor = BlockingExecutor("test", max_workers=1)
+
+        def fail():
+            raise ValueError("boom")
+
+        try:
+            with pytest.raises(ValueError, match="boom"):
+                await executor.run(fail)
+        finally:
+            executor.shutdown()
+
+        assert executor.failed == 1
+        assert executor.active == 0
+
+
+class TestGlobalExecutors:
+    """测试全局线程池"""
+
+    @pytest.mark.asyncio
+    async def test_run_blocking_uses_db_executor(self):
+        """测试run_blocking使用数据库调用线程池"""
+        assert await run_blocking(sum, [1, 2, 3]) == 6
+
+        stats = executor_stats()
+        assert stats[DB_EXECUTOR]["completed"] == 1
+        assert stats[DB_EXECUTOR]["max_workers"] == 4
+
+    def test_separate_pools(self):
+        """测试数据库和密码哈希使用独立线程池"""
+        db_executor = get_executor(DB_EXECUTOR)
+        crypto_executor = get_executor(CRYPTO_EXECUTOR)
+
+        assert db_executor is get_executor(DB_EXECUTOR)
+        assert db_executor is not crypto_executor
+        assert crypto_executor.max_workers == 1
+
+    def test_shutdown_clears_executors(self):
+        """测试关闭后清空线程池"""
+        get_executor(DB_EXECUTOR)
+        shutdown_executors()
+
+        assert executor_stats() == {}
+
+
+class TestVerifyUserAsync:
+    """测试异步登录验证"""
+
+    @pytest.mark.asyncio
+    async def test_verify_user_async_success(self):
+        """测试验证成功时在线程池中校验密码并更新登录时间"""
+        user_manager = UserManager()
+        user = Mock(id="user_1", status="active", password_hash="hash")
+
+        with (
+            patch.object(user_manager, "get_user_by_username", return_value=user),
+            patch.object(user_manager, "_verify_password", return_value=True) as mock_verify,
+            patch.object(user_manager, "_update_last_login") as mock_update,
+        ):
+            result = await user_manager.verify_user_async("admin", "password")
+
+        assert result is user
+        mock_verify.assert_called_once_with("password", "hash")
+        mock_update.assert_called_once_with("user_1")
+        assert executor_stats()[CRYPTO_EXECUTOR]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_verify_user_async_wrong_password(self):
+        """测试密码错误时不更新登录时间"""
+        user_manager = UserManager()
+        user = Mock(id="user_1", status="active", password_hash="hash")
+
+        with (
+            patch.object(user_manager, "get_user_by_username", return_value=user),
+            patch.object(user_manager, "_verify_password", return_value=False),
+            patch.object(user_manager, "_update_last_login") as mock_update,
+        ):
+            result = await user_manager.verify_user_async("admin", "wrong")
+
+        assert result is None
+        mock_update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_verify_user_async_inactive_user(self):
+        """测试禁用用户不进行密码校验"""
+        user_manager = UserManager()
+        user = Mock(id="user_1", status="inactive", password_hash="hash")
+
+        with (
+            patch.object(user_manager, "get_user_by_username", return_value=user),
+            patch.object(user_manager, "_verify_password") as mock_verify,
+        ):
+            result = await user_manager.verify_user_async("admin", "password")
+
+        assert result is None
+        mock_verify.assert_not_called()
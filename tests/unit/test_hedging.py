@@ -0,0 +1,232 @@
+"""
+测试对冲请求
+
+测试对冲延迟、先成功的结果胜出、对冲预算、监控指标和 Provider 集成
+"""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry
+
+from gaiarouter.metrics import Metrics
+from gaiarouter.providers import hedging
+from gaiarouter.providers.hedging import Hedger
+from gaiarouter.providers.openai import OpenAIProvider
+from gaiarouter.providers.retry import RetryBudgets
+
+
+@pytest.fixture
+def metrics():
+    """使用独立注册表的监控指标"""
+    metrics = Metrics(registry=CollectorRegistry())
+    with (
+        patch("gaiarouter.providers.hedging.get_metrics", return_value=metrics),
+        patch("gaiarouter.providers.credentials.get_metrics", return_value=metrics),
+    ):
+        yield metrics
+
+
+def hedge_count(metrics: Metrics, outcome: str, provider: str = "openai") -> float:
+    """读取对冲结果计数"""
+    value = metrics.registry.get_sample_value(
+        "gaiarouter_upstream_hedges_total", {"provider": provider, "outcome": outcome}
+    )
+    return value or 0
+
+
+def warm_hedger(delay: float = 0.01) -> Hedger:
+    """创建已有耗时样本的对冲器"""
+    hedger = Hedger(percentile=95, min_samples=1, window=10, min_delay=0)
+    hedger.record_latency("openai", "gpt-4", delay)
+    return hedger
+
+
+class TestHedgeDelay:
+    """测试对冲延迟"""
+
+    def test_no_delay_until_enough_samples(self):
+        """测试耗时样本不足时不对冲"""
+        hedger = Hedger(percentile=95, min_samples=3, window=10, min_delay=0)
+        hedger.record_latency("openai", "gpt-4", 1.0)
+        hedger.record_latency("openai", "gpt-4", 1.0)
+
+        assert hedger.delay("openai", "gpt-4") is None
+        assert hedger.delay("openai", "gpt-3.5-turbo") is None
+
+    def test_percentile_of_recent_samples(self):
+        """测试对冲延迟为最近样本的分位数，不低于下限"""
+        hedger = Hedger(percentile=90, min_samples=10, window=10, min_delay=0.5)
+        for seconds in [100.0] + [float(i) for i in range(1, 11)]:
+            hedger.record_latency("openai", "gpt-4", seconds)
+
+        # 最早的100秒样本已被移出窗口
+        assert hedger.delay("openai", "gpt-4") == 9.0
+
+        for _ in range(10):
+            hedger.record_latency("openai", "gpt-4", 0.1)
+        assert hedger.delay("openai", "gpt-4") == 0.5
+
+
+class TestHedgedCall:
+    """测试对冲调用"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_not_hedged(self, metrics):
+        """测试首个请求在延迟内返回时不对冲"""
+        hedger = warm_hedger(delay=1.0)
+        call = Mock(side_effect=lambda: asyncio.sleep(0, result="primary"))
+
+        assert await hedger.run("openai", "gpt-4", call) == "primary"
+        assert call.call_count == 1
+        assert hedge_count(metrics, "not_hedged") == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_cancelled(self, metrics):
+        """测试首个请求较慢时对冲请求胜出，首个请求被取消"""
+        hedger = warm_hedger()
+        cancelled = asyncio.Event()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(3600)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return f"call-{calls}"
+
+        assert await hedger.run("openai", "gpt-4", call) == "call-2"
+        assert cancelled.is_set()
+        assert hedge_count(metrics, "hedge_won") == 1
+
+    @pytest.mark.asyncio
+    async def test_primary_wins_after_hedge(self, metrics):
+        """测试对冲后首个请求先返回，对冲请求被取消"""
+        hedger = warm_hedger()
+        primary_done = asyncio.Event()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await primary_done.wait()
+                return "primary"
+            primary_done.set()
+            await asyncio.sleep(3600)
+
+        assert await hedger.run("openai", "gpt-4", call) == "primary"
+        assert calls == 2
+        assert hedge_count(metrics, "primary_won") == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_waits_for_hedge(self, metrics):
+        """测试一个请求失败时等待另一个请求"""
+        hedger = warm_hedger()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await asyncio.sleep(0.05)
+                raise httpx.ConnectError("connection refused")
+            await asyncio.sleep(0.1)
+            return "hedge"
+
+        assert await hedger.run("openai", "gpt-4", call) == "hedge"
+        assert hedge_count(metrics, "hedge_won") == 1
+
+    @pytest.mark.asyncio
+    async def test_both_fail_raises_primary_error(self, metrics):
+        """测试两个请求都失败时抛出首个请求的异常"""
+        hedger = warm_hedger()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            name = f"call-{calls}"
+            await asyncio.sleep(0.05)
+            raise httpx.ConnectError(f"{name} failed")
+
+        with pytest.raises(httpx.ConnectError, match="call-1"):
+            await hedger.run("openai", "gpt-4", call)
+        assert hedge_count(metrics, "failed") == 1
+
+    @pytest.mark.asyncio
+    async def test_budget_exhausted(self, metrics):
+        """测试对冲预算用尽时只等待首个请求"""
+        hedger = warm_hedger()
+        hedger.budgets = RetryBudgets(ratio=0, min_per_second=0, burst=0)
+
+        async def call():
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        call_mock = Mock(side_effect=call)
+        assert await hedger.run("openai", "gpt-4", call_mock) == "primary"
+        assert call_mock.call_count == 1
+        assert hedge_count(metrics, "budget_exhausted") == 1
+
+
+class TestProviderHedging:
+    """测试 Provider 使用对冲请求"""
+
+    def test_should_hedge(self):
+        """测试只对冲启用时的短请求"""
+        provider = OpenAIProvider(api_key="sk-test")
+        provider.settings = Mock(hedging_enabled=False, hedging_max_tokens=256)
+        assert provider.should_hedge(100) is False
+
+        provider.settings.hedging_enabled = True
+        assert provider.should_hedge(100) is True
+        assert provider.should_hedge(1000) is False
+        assert provider.should_hedge(None) is False
+
+        provider.settings.hedging_max_tokens = 0
+        assert provider.should_hedge(None) is True
+
+    @pytest.mark.asyncio
+    async def test_hedge_uses_another_key(self, metrics):
+        """测试对冲请求使用另一个API Key，采用先返回的结果"""
+        provider = OpenAIProvider(api_keys=["sk-aaaa", "sk-bbbb"])
+        provider.settings = Mock(
+            hedging_enabled=True,
+            hedging_max_tokens=0,
+            max_retries=0,
+            retry_base_delay=0,
+            retry_max_delay=1,
+        )
+        hedging._hedger = warm_hedger()
+
+        response = Mock()
+        response.content = (
+            b'{"model": "gpt-4", "choices": [{"message": {"content": "Hi"}, '
+            b'"finish_reason": "stop"}], "usage": {}}'
+        )
+        keys = []
+
+        async def post(url, json, headers):
+            keys.append(headers["Authorization"])
+            if len(keys) == 1:
+                await asyncio.sleep(3600)
+            return response
+
+        with patch("gaiarouter.providers.base.get_http_client_pool") as mock_pool:
+            mock_pool.return_value.get_client.return_value.post = post
+            result = await provider.chat_completion(
+                messages=[{"role": "user", "content": "Hi"}], model="gpt-4", max_tokens=16
+            )
+
+        assert result.content == "Hi"
+        assert keys == ["Bearer sk-aaaa", "Bearer sk-bbbb"]
+        assert hedge_count(metrics, "hedge_won") == 1
+        # 被取消的首个请求已释放Key
+        assert all(c.in_flight == 0 for c in provider.credentials.credentials)
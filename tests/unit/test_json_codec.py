@@ -0,0 +1,118 @@
+"""
+测试JSON编解码
+
+测试标准库和orjson实现输出一致、实现选择、响应类和日志序列化函数
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gaiarouter.utils import json_codec
+from gaiarouter.utils.json_codec import (
+    FastJSONResponse,
+    JSONCodec,
+    JSONDecodeError,
+    OrjsonCodec,
+    create_json_codec,
+    log_serializer,
+)
+
+CODECS = [JSONCodec()]
+if json_codec.orjson is not None:
+    CODECS.append(OrjsonCodec())
+
+
+@pytest.fixture
+def reset_codec():
+    """重置全局编解码器"""
+    json_codec._codec = None
+    yield
+    json_codec._codec = None
+
+
+class TestJSONCodec:
+    """测试编解码器实现"""
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_dumps_compact_unicode(self, codec):
+        """测试紧凑格式且非ASCII字符不转义"""
+        data = {"model": "openai/gpt-4", "content": "你好", "choices": [1, None, True]}
+
+        assert (
+            codec.dumps(data) == '{"model":"openai/gpt-4","content":"你好","choices":[1,null,true]}'
+        )
+        assert codec.dumps_bytes(data) == codec.dumps(data).encode("utf-8")
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_dumps_fallback_types(self, codec):
+        """测试日期时间和Decimal的序列化"""
+        data = {"at": datetime(2026, 1, 2, 3, 4, 5), "cost": Decimal("0.5")}
+
+        assert codec.dumps(data) == '{"at":"2026-01-02T03:04:05","cost":"0.5"}'
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_loads(self, codec):
+        """测试解析字符串和字节串"""
+        assert codec.loads('{"a":"你好"}') == {"a": "你好"}
+        assert codec.loads('{"a":[1,2]}'.encode("utf-8")) == {"a": [1, 2]}
+
+    @pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+    def test_loads_invalid(self, codec):
+        """测试无效JSON抛出JSONDecodeError"""
+        with pytest.raises(JSONDecodeError):
+            codec.loads("not-json")
+
+
+class TestCodecSelection:
+    """测试实现选择"""
+
+    def test_json_backend(self):
+        """测试指定标准库实现"""
+        assert create_json_codec("json").name == "json"
+
+    def test_auto_without_orjson(self):
+        """测试未安装orjson时自动使用标准库"""
+        with patch.object(json_codec, "orjson", None):
+            assert create_json_codec("auto").name == "json"
+            with pytest.raises(ValueError):
+                create_json_codec("orjson")
+
+    @pytest.mark.skipif(json_codec.orjson is None, reason="orjson not installed")
+    def test_auto_with_orjson(self):
+        """测试安装了orjson时自动使用orjson"""
+        assert create_json_codec("auto").name == "orjson"
+
+    def test_unknown_backend(self):
+        """测试无效的实现名称"""
+        with pytest.raises(ValueError):
+            create_json_codec("simplejson")
+
+    def test_get_json_codec_from_settings(self, reset_codec):
+        """测试按配置创建单例"""
+        with patch.object(json_codec, "get_settings", return_value=Mock(json_codec="json")):
+            codec = json_codec.get_json_codec()
+
+        assert codec.name == "json"
+        assert json_codec.get_json_codec() is codec
+        assert json_codec.dumps({"a": 1}) == '{"a":1}'
+        assert json_codec.loads(b'{"a":1}') == {"a": 1}
+
+
+class TestIntegrations:
+    """测试响应类和日志序列化"""
+
+    def test_fast_json_response(self):
+        """测试响应类使用编解码器序列化"""
+        response = FastJSONResponse({"message": "你好"})
+
+        assert response.body == '{"message":"你好"}'.encode("utf-8")
+        assert response.headers["content-type"] == "application/json"
+
+    def test_log_serializer_ignores_renderer_kwargs(self):
+        """测试日志序列化函数忽略JSONRenderer传入的参数"""
+        result = log_serializer({"event": "Request completed", "status_code": 200}, default=repr)
+
+        assert result == '{"event":"Request completed","status_code":200}'
@@ -0,0 +1,127 @@
+"""
+测试 API Key 验证缓存
+
+测试 LRU 淘汰、TTL 过期、负缓存和统计计数
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from gaiarouter.auth.key_cache import APIKeyCache
+from gaiarouter.database.models import APIKey
+
+
+def _make_key(key_id: str, value: str) -> APIKey:
+    return APIKey(
+        id=key_id,
+        organization_id="org_123",
+        name="Test Key",
+        key=value,
+        status="active",
+        created_at=datetime.now(),
+    )
+
+
+class TestAPIKeyCache:
+    """测试 API Key 缓存"""
+
+    def test_set_and_get(self):
+        """测试写入和命中"""
+        cache = APIKeyCache()
+        key = _make_key("ak_1", "sk-1")
+
+        cache.set("sk-1", key)
+        hit, cached = cache.get("sk-1")
+
+        assert hit is True
+        assert cached is key
+
+    def test_miss(self):
+        """测试未命中"""
+        cache = APIKeyCache()
+
+        hit, cached = cache.get("sk-unknown")
+
+        assert hit is False
+        assert cached is None
+        assert cache.stats()["misses"] == 1
+
+    def test_negative_cache(self):
+        """测试负缓存命中返回 None"""
+        cache = APIKeyCache()
+
+        cache.set_missing("sk-unknown")
+        hit, cached = cache.get("sk-unknown")
+
+        assert hit is True
+        assert cached is None
+        assert cache.stats()["negative_hits"] == 1
+
+    def test_negative_cache_disabled(self):
+        """测试负缓存 TTL 为 0 时不缓存"""
+        cache = APIKeyCache(negative_ttl=0)
+
+        cache.set_missing("sk-unknown")
+
+        assert cache.get("sk-unknown") == (False, None)
+
+    def test_ttl_expiry(self):
+        """测试条目过期"""
+        cache = APIKeyCache(ttl=10)
+        key = _make_key("ak_1", "sk-1")
+
+        with patch("gaiarouter.auth.key_cache.time.monotonic", return_value=100.0):
+            cache.set("sk-1", key)
+        with patch("gaiarouter.auth.key_cache.time.monotonic", return_value=111.0):
+            hit, _ = cache.get("sk-1")
+
+        assert hit is False
+        assert cache.stats()["size"] == 0
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = APIKeyCache(max_size=2)
+        cache.set("sk-1", _make_key("ak_1", "sk-1"))
+        cache.set("sk-2", _make_key("ak_2", "sk-2"))
+
+        # 访问 sk-1，使 sk-2 成为最久未使用
+        cache.get("sk-1")
+        cache.set("sk-3", _make_key("ak_3", "sk-3"))
+
+        assert cache.get("sk-2")[0] is False
+        assert cache.get("sk-1")[0] is True
+        assert cache.get("sk-3")[0] is True
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_by_id(self):
+        """测试按 Key ID 失效"""
+        cache = APIKeyCache()
+        cache.set("sk-1", _make_key("ak_1", "sk-1"))
+
+        cache.invalidate_id("ak_1")
+
+        assert cache.get("sk-1")[0] is False
+
+    def test_disabled_cache(self):
+        """测试容量为 0 时缓存被禁用"""
+        cache = APIKeyCache(max_size=0)
+
+        cache.set("sk-1", _make_key("ak_1", "sk-1"))
+
+        assert cache.get("sk-1")[0] is False
+
+    def test_hit_ratio(self):
+        """测试命中率统计"""
+        cache = APIKeyCache()
+        cache.set("sk-1", _make_key("ak_1", "sk-1"))
+
+        cache.get("sk-1")
+        cache.get("sk-1")
+        cache.get("sk-2")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(2 / 3)
@@ -0,0 +1,72 @@
+"""
+测试 API Key 最后使用时间追踪器
+
+测试内存合并、批量写入和失败重试
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from gaiarouter.auth.last_used import LastUsedTracker
+
+
+@pytest.fixture
+def mock_storage():
+    storage = MagicMock()
+    with patch("gaiarouter.auth.last_used.get_key_storage", return_value=storage):
+        yield storage
+
+
+class TestLastUsedTracker:
+    """测试最后使用时间追踪器"""
+
+    def test_touch_keeps_latest_timestamp(self, mock_storage):
+        """测试同一Key多次使用只保留最新时间"""
+        tracker = LastUsedTracker(flush_interval=60)
+        now = datetime.utcnow()
+
+        tracker.touch("ak_1", now)
+        tracker.touch("ak_1", now - timedelta(seconds=5))
+        tracker.touch("ak_2", now)
+
+        assert tracker.pending_count == 2
+        mock_storage.bulk_update_last_used.assert_not_called()
+
+        assert tracker.flush() == 2
+        mock_storage.bulk_update_last_used.assert_called_once_with({"ak_1": now, "ak_2": now})
+        assert tracker.pending_count == 0
+
+    def test_flush_empty(self, mock_storage):
+        """测试无待写入数据时不访问数据库"""
+        tracker = LastUsedTracker(flush_interval=60)
+
+        assert tracker.flush() == 0
+        mock_storage.bulk_update_last_used.assert_not_called()
+
+    def test_flush_failure_requeues(self, mock_storage):
+        """测试写入失败时数据保留到下次刷新"""
+        tracker = LastUsedTracker(flush_interval=60)
+        now = datetime.utcnow()
+        tracker.touch("ak_1", now)
+        mock_storage.bulk_update_last_used.side_effect = Exception("db down")
+
+        assert tracker.flush() == 0
+        assert tracker.pending_count == 1
+
+        mock_storage.bulk_update_last_used.side_effect = None
+        assert tracker.flush() == 1
+        mock_storage.bulk_update_last_used.assert_called_with({"ak_1": now})
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending(self, mock_storage):
+        """测试停止时写入剩余数据"""
+        tracker = LastUsedTracker(flush_interval=3600)
+        await tracker.start()
+        tracker.touch("ak_1")
+
+        await tracker.stop()
+
+        mock_storage.bulk_update_last_used.assert_called_once()
+        assert tracker.pending_count == 0
@@ -0,0 +1,123 @@
+"""
+测试日志中间件
+
+测试纯ASGI日志中间件记录状态码、耗时和首字节时间，流式响应不被缓冲，以及请求日志采样
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from gaiarouter.api.middleware.logging import LoggingMiddleware
+
+
+def create_app(sample_rate: float = 1.0) -> FastAPI:
+    """创建带日志中间件的测试应用"""
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return JSONResponse({"status": "ok"}, status_code=201)
+
+    @app.get("/stream")
+    async def stream():
+        async def generate():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(0)
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(LoggingMiddleware, sample_rate=sample_rate)
+    return app
+
+
+def completed_calls(mock_logger):
+    """获取 "Request completed" 日志调用的参数"""
+    return [c.kwargs for c in mock_logger.info.call_args_list if c.args[0] == "Request completed"]
+
+
+def received_calls(mock_logger):
+    """获取 "Request received" 日志调用"""
+    return [c for c in mock_logger.info.call_args_list if c.args[0] == "Request received"]
+
+
+class TestLoggingMiddleware:
+    """测试日志中间件"""
+
+    def test_logs_status_and_timing(self):
+        """测试记录方法、路径、状态码、耗时和首字节时间"""
+        with patch("gaiarouter.api.middleware.logging.logger") as mock_logger:
+            response = TestClient(create_app()).get("/ok")
+
+        assert response.status_code == 201
+        assert len(received_calls(mock_logger)) == 1
+        completed = completed_calls(mock_logger)
+        assert len(completed) == 1
+        assert completed[0]["method"] == "GET"
+        assert completed[0]["path"] == "/ok"
+        assert completed[0]["status_code"] == 201
+        assert completed[0]["process_time"].endswith("s")
+        assert completed[0]["ttfb"].endswith("s")
+
+    def test_streaming_response_passthrough(self):
+        """测试流式响应逐块传递并在结束后记录日志"""
+        with patch("gaiarouter.api.middleware.logging.logger") as mock_logger:
+            with TestClient(create_app()).stream("GET", "/stream") as response:
+                chunks = [chunk for chunk in response.iter_text() if chunk]
+
+        assert "".join(chunks) == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+        completed = completed_calls(mock_logger)
+        assert completed[0]["status_code"] == 200
+        assert completed[0]["ttfb"] is not None
+
+    def test_exception_logged_as_500(self):
+        """测试未处理异常时记录500并继续抛出"""
+        with patch("gaiarouter.api.middleware.logging.logger") as mock_logger:
+            client = TestClient(create_app())
+            with pytest.raises(RuntimeError):
+                client.get("/boom")
+
+        completed = completed_calls(mock_logger)
+        assert completed[0]["status_code"] == 500
+        assert completed[0]["ttfb"] is None
+
+    def test_request_log_sampling_disabled(self):
+        """测试采样率为0时不记录请求日志，但仍记录完成日志"""
+        with patch("gaiarouter.api.middleware.logging.logger") as mock_logger:
+            client = TestClient(create_app(sample_rate=0.0))
+            for _ in range(5):
+                client.get("/ok")
+
+        assert received_calls(mock_logger) == []
+        assert len(completed_calls(mock_logger)) == 5
+
+    def test_request_log_sampling_rate(self):
+        """测试按采样率记录请求日志"""
+        with (
+            patch("gaiarouter.api.middleware.logging.logger") as mock_logger,
+            patch(
+                "gaiarouter.api.middleware.logging.random.random", side_effect=[0.1, 0.9, 0.3, 0.7]
+            ),
+        ):
+            client = TestClient(create_app(sample_rate=0.5))
+            for _ in range(4):
+                client.get("/ok")
+
+        assert len(received_calls(mock_logger)) == 2
+
+    def test_sample_rate_from_settings(self):
+        """测试默认从配置读取采样率"""
+        with patch("gaiarouter.api.middleware.logging.get_settings") as mock_settings:
+            mock_settings.return_value.request_log_sample_rate = 0.25
+            middleware = LoggingMiddleware(app=None)
+
+        assert middleware.sample_rate == 0.25
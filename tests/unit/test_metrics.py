@@ -0,0 +1,252 @@
+"""
+测试监控指标
+
+测试标签数量限制、请求指标、运行时指标和 /metrics 接口
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry
+from sqlalchemy import create_engine, text
+
+from gaiarouter.api.controllers.metrics import metrics as metrics_endpoint
+from gaiarouter.database.pool import TimedQueuePool
+from gaiarouter.metrics import LabelLimiter, Metrics, RuntimeCollector
+from gaiarouter.utils import timing
+from gaiarouter.utils.errors import AuthenticationError
+
+
+def sample(metrics: Metrics, name: str, labels: dict):
+    """读取一个样本值"""
+    return metrics.registry.get_sample_value(name, labels)
+
+
+class TestLabelLimiter:
+    """测试标签数量限制"""
+
+    def test_keeps_first_values(self):
+        """测试保留前N个取值，之后的新取值记为other"""
+        limiter = LabelLimiter(2)
+
+        assert limiter("openai/gpt-4") == "openai/gpt-4"
+        assert limiter("openai/gpt-4o") == "openai/gpt-4o"
+        assert limiter("anthropic/claude-3") == "other"
+        # 已保留的取值不受影响
+        assert limiter("openai/gpt-4") == "openai/gpt-4"
+        assert len(limiter) == 2
+
+    def test_zero_disables(self):
+        """测试上限为0时全部记为other"""
+        assert LabelLimiter(0)("org_123") == "other"
+
+
+class TestMetrics:
+    """测试请求指标"""
+
+    @pytest.fixture
+    def metrics(self):
+        """创建使用独立注册表的指标实例"""
+        return Metrics(max_model_labels=1, max_organization_labels=1, registry=CollectorRegistry())
+
+    def test_record_request(self, metrics):
+        """测试记录请求数、耗时和Token用量"""
+        metrics.record_request(
+            "openai",
+            "openai/gpt-4",
+            "org_123",
+            stream=True,
+            status="success",
+            duration=0.3,
+            prompt_tokens=10,
+            completion_tokens=20,
+        )
+
+        labels = {"provider": "openai", "model": "openai/gpt-4", "organization": "org_123"}
+        request_labels = {**labels, "stream": "true", "status": "success"}
+        assert sample(metrics, "gaiarouter_requests_total", request_labels) == 1
+        assert sample(metrics, "gaiarouter_tokens_total", {**labels, "type": "prompt"}) == 10
+        assert sample(metrics, "gaiarouter_tokens_total", {**labels, "type": "completion"}) == 20
+        assert (
+            sample(
+                metrics,
+                "gaiarouter_request_duration_seconds_count",
+                {"provider": "openai", "model": "openai/gpt-4", "stream": "true"},
+            )
+            == 1
+        )
+
+    def test_labels_limited(self, metrics):
+        """测试超出上限的模型和组织记为other"""
+        metrics.record_request("openai", "openai/gpt-4", "org_1", False, "success", 0.1)
+        metrics.record_request("openai", "openai/gpt-4o", "org_2", False, "success", 0.1)
+        metrics.record_request("openai", "openai/gpt-4o", None, False, "error", 0.1)
+
+        base = {"provider": "openai", "stream": "false"}
+        assert (
+            sample(
+                metrics,
+                "gaiarouter_requests_total",
+                {**base, "model": "other", "organization": "other", "status": "success"},
+            )
+            == 1
+        )
+        assert (
+            sample(
+                metrics,
+                "gaiarouter_requests_total",
+                {**base, "model": "other", "organization": "none", "status": "error"},
+            )
+            == 1
+        )
+
+    def test_upstream_errors_and_streams(self, metrics):
+        """测试上游错误、重试和进行中的流"""
+        metrics.record_upstream_error("openai", "openai/gpt-4", TimeoutError())
+        metrics.record_upstream_retry("openai")
+        metrics.stream_started("openai")
+        metrics.stream_started("openai")
+        metrics.stream_finished("openai")
+        metrics.record_time_to_first_token("openai", "openai/gpt-4", 0.2)
+
+        assert (
+            sample(
+                metrics,
+                "gaiarouter_upstream_errors_total",
+                {"provider": "openai", "model": "openai/gpt-4", "error_type": "TimeoutError"},
+            )
+            == 1
+        )
+        assert sample(metrics, "gaiarouter_upstream_retries_total", {"provider": "openai"}) == 1
+        assert sample(metrics, "gaiarouter_inflight_streams", {"provider": "openai"}) == 1
+        assert (
+            sample(
+                metrics,
+                "gaiarouter_time_to_first_token_seconds_bucket",
+                {"provider": "openai", "model": "openai/gpt-4", "le": "0.25"},
+            )
+            == 1
+        )
+
+
+class TestRuntimeCollector:
+    """测试运行时指标"""
+
+    @pytest.fixture(autouse=True)
+    def reset_histograms(self):
+        """使用新的分阶段耗时直方图"""
+        timing._timing_histograms = None
+        yield
+        timing._timing_histograms = None
+
+    def test_db_pool_checkout_wait(self):
+        """测试连接池记录获取连接的等待时间"""
+        engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=2)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            in_use = engine.pool.checkout_stats()
+
+        assert in_use["checked_out"] == 1
+        assert in_use["checkout_wait"]["count"] == 1
+
+        registry = CollectorRegistry()
+        registry.register(RuntimeCollector())
+        with patch("gaiarouter.database.connection._engine", engine):
+            count = registry.get_sample_value(
+                "gaiarouter_db_pool_checkout_wait_seconds_count", {"engine": "sync"}
+            )
+            checked_out = registry.get_sample_value(
+                "gaiarouter_db_pool_checked_out", {"engine": "sync"}
+            )
+        engine.dispose()
+
+        assert count == 1
+        assert checked_out == 0
+
+    def test_stage_timings(self):
+        """测试导出分阶段耗时直方图（毫秒转换为秒）"""
+        timing.get_timing_histograms().observe("upstream", 0.2)
+
+        registry = CollectorRegistry()
+        registry.register(RuntimeCollector())
+
+        assert registry.get_sample_value(
+            "gaiarouter_request_stage_seconds_sum", {"stage": "upstream"}
+        ) == pytest.approx(0.2)
+        assert (
+            registry.get_sample_value(
+                "gaiarouter_request_stage_seconds_bucket", {"stage": "upstream", "le": "0.25"}
+            )
+            == 1
+        )
+
+    def test_collector_failure_skipped(self):
+        """测试某个组件读取失败时不影响其他指标"""
+        timing.get_timing_histograms().observe("auth", 0.001)
+        registry = CollectorRegistry()
+        registry.register(RuntimeCollector())
+
+        with patch("gaiarouter.database.connection.pool_stats", side_effect=RuntimeError("boom")):
+            value = registry.get_sample_value(
+                "gaiarouter_request_stage_seconds_count", {"stage": "auth"}
+            )
+
+        assert value == 1
+
+
+class TestMetricsEndpoint:
+    """测试 /metrics 接口"""
+
+    def _settings(self, enabled=True, token=None):
+        settings = Mock()
+        settings.metrics_enabled = enabled
+        settings.metrics_token = token
+        return settings
+
+    @pytest.mark.asyncio
+    async def test_render(self):
+        """测试返回Prometheus文本格式"""
+        metrics = Metrics(registry=CollectorRegistry())
+        metrics.record_upstream_retry("openai")
+
+        with (
+            patch("gaiarouter.api.controllers.metrics.get_settings", return_value=self._settings()),
+            patch("gaiarouter.api.controllers.metrics.get_metrics", return_value=metrics),
+        ):
+            response = await metrics_endpoint(authorization=None)
+
+        assert response.headers["Content-Type"] == CONTENT_TYPE_LATEST
+        assert b'gaiarouter_upstream_retries_total{provider="openai"} 1.0' in response.body
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """测试未开放时返回404"""
+        with patch(
+            "gaiarouter.api.controllers.metrics.get_settings",
+            return_value=self._settings(enabled=False),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await metrics_endpoint(authorization=None)
+
+        assert exc_info.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_token_required(self):
+        """测试配置了Token时校验Authorization"""
+        settings = self._settings(token="secret")
+        with (
+            patch("gaiarouter.api.controllers.metrics.get_settings", return_value=settings),
+            patch(
+                "gaiarouter.api.controllers.metrics.get_metrics",
+                return_value=Metrics(registry=CollectorRegistry()),
+            ),
+        ):
+            with pytest.raises(AuthenticationError):
+                await metrics_endpoint(authorization=None)
+            with pytest.raises(AuthenticationError):
+                await metrics_endpoint(authorization="Bearer wrong")
+
+            response = await metrics_endpoint(authorization="Bearer secret")
+
+        assert response.status_code == 200
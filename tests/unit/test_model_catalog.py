@@ -0,0 +1,170 @@
+"""
+测试模型目录快照
+
+测试快照加载、版本递增、失败保留旧快照和管理器触发的刷新
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from gaiarouter.database.models import Model
+from gaiarouter.models.catalog import CatalogEntry, ModelCatalog
+from gaiarouter.models.manager import ModelManager
+
+
+def _mock_db(models):
+    db = MagicMock()
+    db.query.return_value = models
+    return db
+
+
+@pytest.fixture
+def models():
+    return [
+        Model(
+            id="openai/gpt-4",
+            name="GPT-4",
+            provider="openai",
+            is_enabled=True,
+            pricing_prompt=0.03,
+            pricing_completion=0.06,
+        ),
+        Model(id="openai/gpt-3.5-turbo", name="GPT-3.5", provider="openai", is_enabled=False),
+    ]
+
+
+class TestModelCatalog:
+    """测试模型目录"""
+
+    def test_lookup_before_load_does_not_query(self):
+        """测试快照未加载时查询返回空结果，不访问数据库"""
+        catalog = ModelCatalog(refresh_interval=0)
+
+        with patch("gaiarouter.models.catalog.get_db") as mock_get_db:
+            assert catalog.get_model("openai/gpt-4") is None
+
+        mock_get_db.assert_not_called()
+        assert catalog.loaded is False
+        assert catalog.version == 0
+
+    def test_load_and_lookup(self, models):
+        """测试加载快照后查询不再访问数据库"""
+        catalog = ModelCatalog(refresh_interval=0)
+
+        with patch("gaiarouter.models.catalog.get_db") as mock_get_db:
+            mock_get_db.side_effect = lambda: iter([_mock_db(models)])
+
+            catalog.refresh()
+            entry = catalog.get_model("openai/gpt-4")
+            disabled = catalog.get_model("openai/gpt-3.5-turbo")
+            missing = catalog.get_model("openai/unknown")
+
+        assert mock_get_db.call_count == 1
+        assert isinstance(entry, CatalogEntry)
+        assert entry.is_enabled is True
+        assert entry.pricing_prompt == 0.03
+        assert disabled.is_enabled is False
+        assert missing is None
+
+    def test_entries_are_immutable(self, models):
+        """测试快照条目不可修改"""
+        catalog = ModelCatalog(refresh_interval=0)
+
+        with patch("gaiarouter.models.catalog.get_db", return_value=iter([_mock_db(models)])):
+            snapshot = catalog.refresh()
+
+        with pytest.raises(Exception):
+            snapshot.get("openai/gpt-4").is_enabled = False
+        with pytest.raises(TypeError):
+            snapshot.entries["openai/new"] = None
+
+    def test_refresh_swaps_snapshot(self, models):
+        """测试刷新后版本递增，旧快照保持不变"""
+        catalog = ModelCatalog(refresh_interval=0)
+
+        with patch("gaiarouter.models.catalog.get_db", return_value=iter([_mock_db(models)])):
+            first = catalog.refresh()
+
+        models[1].is_enabled = True
+        with patch("gaiarouter.models.catalog.get_db", return_value=iter([_mock_db(models)])):
+            second = catalog.refresh()
+
+        assert second.version == first.version + 1
+        assert first.get("openai/gpt-3.5-turbo").is_enabled is False
+        assert catalog.get_model("openai/gpt-3.5-turbo").is_enabled is True
+
+    def test_refresh_failure_keeps_snapshot(self, models):
+        """测试刷新失败时保留旧快照"""
+        catalog = ModelCatalog(refresh_interval=0)
+
+        with patch("gaiarouter.models.catalog.get_db", return_value=iter([_mock_db(models)])):
+            first = catalog.refresh()
+
+        with patch("gaiarouter.models.catalog.get_db", side_effect=Exception("db down")):
+            with pytest.raises(Exception):
+                catalog.refresh()
+
+        assert catalog.snapshot is first
+
+    @pytest.mark.asyncio
+    async def test_start_retries_failed_load(self, models):
+        """测试启动时加载失败不抛出，后台任务重试直到加载成功"""
+        catalog = ModelCatalog(refresh_interval=0)
+        results = [Exception("db down"), iter([_mock_db(models)])]
+
+        with (
+            patch("gaiarouter.models.catalog._LOAD_RETRY_INTERVAL", 0.01),
+            patch("gaiarouter.models.catalog.get_db", side_effect=results),
+        ):
+            await catalog.start()
+            assert catalog.loaded is False
+            await asyncio.wait_for(catalog._task, timeout=1)
+
+        assert catalog.loaded is True
+        assert catalog.get_model("openai/gpt-4").is_enabled is True
+        await catalog.stop()
+
+
+class TestModelManagerCatalogRefresh:
+    """测试模型管理器触发目录刷新"""
+
+    def test_enable_model_refreshes_catalog(self):
+        """测试启用模型后刷新目录"""
+        manager = ModelManager()
+        mock_catalog = MagicMock()
+
+        with (
+            patch.object(manager, "_update_model", return_value=MagicMock()),
+            patch("gaiarouter.models.manager.get_model_catalog", return_value=mock_catalog),
+        ):
+            assert manager.enable_model("openai/gpt-4") is True
+
+        mock_catalog.refresh.assert_called_once()
+
+    def test_batch_update_refreshes_once(self):
+        """测试批量更新只刷新一次目录"""
+        manager = ModelManager()
+        mock_catalog = MagicMock()
+
+        with (
+            patch.object(manager, "_update_model", return_value=MagicMock()),
+            patch("gaiarouter.models.manager.get_model_catalog", return_value=mock_catalog),
+        ):
+            count = manager.batch_update_enabled(["a", "b", "c"], enabled=True)
+
+        assert count == 3
+        mock_catalog.refresh.assert_called_once()
+
+    def test_refresh_failure_does_not_fail_update(self):
+        """测试目录刷新失败不影响模型更新"""
+        manager = ModelManager()
+        mock_catalog = MagicMock()
+        mock_catalog.refresh.side_effect = Exception("db down")
+
+        with (
+            patch.object(manager, "_update_model", return_value=MagicMock()),
+            patch("gaiarouter.models.manager.get_model_catalog", return_value=mock_catalog),
+        ):
+            assert manager.disable_model("openai/gpt-4") is True
@@ -379,27 +379,15 @@ class TestGetOrganizationStats:
     @pytest.mark.asyncio
     async def test_get_organization_stats_success(self, mock_user):
         """测试成功获取组织统计"""
-        with (
-            patch("gaiarouter.auth.key_storage.get_key_storage") as mock_key_storage,
-            patch("gaiarouter.stats.storage.get_stats_storage") as mock_stats_storage,
-        ):
-            # Mock key storage
-            key_storage_instance = Mock()
-            mock_key = Mock()
-            mock_key.id = "ak_123"
-            key_storage_instance.list.return_value = ([mock_key], 1)
-            mock_key_storage.return_value = key_storage_instance
-
-            # Mock stats storage
-            stats_storage_instance = Mock()
-            stats_storage_instance.get_key_stats.return_value = []
-            stats_storage_instance.get_summary.return_value = {
-                "total_requests": 100,
-                "total_tokens": 10000,
-                "total_cost": 5.0,
+        with patch("gaiarouter.stats.query.get_stats_query") as mock_stats_query:
+            stats_query_instance = Mock()
+            stats_query_instance.query_organization_stats.return_value = {
+                "organization_id": "org_123",
+                "period": {"start": "2024-01-01T00:00:00Z", "end": "2024-01-31T23:59:59Z"},
+                "summary": {"total_requests": 100, "total_tokens": 10000, "total_cost": 5.0},
+                "by_date": [],
             }
-            stats_storage_instance.aggregate_by_date.return_value = {}
-            mock_stats_storage.return_value = stats_storage_instance
+            mock_stats_query.return_value = stats_query_instance
 
             response = await get_organization_stats(
                 org_id="org_123",
@@ -409,6 +397,9 @@ class TestGetOrganizationStats:
                 user=mock_user,
             )
 
+            org_id, params = stats_query_instance.query_organization_stats.call_args[0]
+            assert org_id == "org_123"
+            assert params.group_by == "day"
             assert response["organization_id"] == "org_123"
             assert "summary" in response
             assert "period" in response
@@ -440,18 +431,14 @@ class TestGetOrganizationStats:
     @pytest.mark.asyncio
     async def test_get_organization_stats_by_model(self, mock_user):
         """测试按模型分组"""
-        with (
-            patch("gaiarouter.auth.key_storage.get_key_storage") as mock_key_storage,
-            patch("gaiarouter.stats.storage.get_stats_storage") as mock_stats_storage,
-        ):
-            key_storage_instance = Mock()
-            key_storage_instance.list.return_value = ([], 0)
-            mock_key_storage.return_value = key_storage_instance
-
-            stats_storage_instance = Mock()
-            stats_storage_instance.get_summary.return_value = {}
-            stats_storage_instance.aggregate_by_model.return_value = {}
-            mock_stats_storage.return_value = stats_storage_instance
+        with patch("gaiarouter.stats.query.get_stats_query") as mock_stats_query:
+            stats_query_instance = Mock()
+            stats_query_instance.query_organization_stats.return_value = {
+                "organization_id": "org_123",
+                "summary": {},
+                "by_model": [],
+            }
+            mock_stats_query.return_value = stats_query_instance
 
             response = await get_organization_stats(
                 org_id="org_123",
@@ -462,4 +449,5 @@ class TestGetOrganizationStats:
             )
 
             assert "by_model" in response
-            stats_storage_instance.aggregate_by_model.assert_called_once()
+            _, params = stats_query_instance.query_organization_stats.call_args[0]
+            assert params.group_by == "model"
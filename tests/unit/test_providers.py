@@ -4,6 +4,7 @@
 测试各个提供商的实现、重试逻辑、错误处理等
 """
 
+import json
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -11,6 +12,7 @@ import pytest
 from gaiarouter.providers.anthropic import AnthropicProvider
 from gaiarouter.providers.base import Provider, ProviderResponse
 from gaiarouter.providers.google import GoogleProvider
+from gaiarouter.providers.http_client import HTTPClientPool
 from gaiarouter.providers.openai import OpenAIProvider
 from gaiarouter.providers.openrouter import OpenRouterProvider
 from gaiarouter.utils.errors import TimeoutError
@@ -86,11 +88,11 @@ class TestProviderBase:
             nonlocal call_count
             call_count += 1
             if call_count < 2:
-                raise Exception("Temporary error")
+                raise TimeoutError("Temporary error")
             return "success"
 
         with patch("gaiarouter.providers.base.get_settings", return_value=mock_settings):
-            result = await provider._retry_request(mock_func, max_retries=2)
+            result = await provider._retry_request(mock_func, max_retries=2, retry_delay=0)
 
         assert result == "success"
         assert call_count == 2
@@ -100,12 +102,36 @@ class TestProviderBase:
         """测试重试机制：所有尝试都失败"""
         provider = self.TestProvider(api_key="test-key")
 
+        call_count = 0
+
         async def mock_func():
-            raise Exception("Persistent error")
+            nonlocal call_count
+            call_count += 1
+            raise TimeoutError("Persistent error")
 
         with patch("gaiarouter.providers.base.get_settings", return_value=mock_settings):
-            with pytest.raises(Exception, match="Persistent error"):
-                await provider._retry_request(mock_func, max_retries=2)
+            with pytest.raises(TimeoutError, match="Persistent error"):
+                await provider._retry_request(mock_func, max_retries=2, retry_delay=0)
+
+        assert call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_request_non_retryable(self, mock_settings):
+        """测试重试机制：非超时、连接错误、429或5xx的错误不重试"""
+        provider = self.TestProvider(api_key="test-key")
+
+        call_count = 0
+
+        async def mock_func():
+            nonlocal call_count
+            call_count += 1
+            raise ValueError("Bad request")
+
+        with patch("gaiarouter.providers.base.get_settings", return_value=mock_settings):
+            with pytest.raises(ValueError, match="Bad request"):
+                await provider._retry_request(mock_func, max_retries=2, retry_delay=0)
+
+        assert call_count == 1
 
 
 class TestOpenAIProvider:
@@ -129,30 +155,32 @@ class TestOpenAIProvider:
         """测试基础聊天完成（模拟）"""
         provider = OpenAIProvider(api_key="test-key")
 
-        # Mock httpx client
-        with patch("httpx.AsyncClient") as mock_client:
+        # Mock 共享的 httpx 客户端
+        with patch("gaiarouter.providers.base.get_http_client_pool") as mock_pool:
             mock_response = Mock()
-            mock_response.json.return_value = {
-                "id": "chatcmpl-123",
-                "object": "chat.completion",
-                "model": "gpt-4",
-                "choices": [
-                    {
-                        "message": {"role": "assistant", "content": "Hello!"},
-                        "finish_reason": "stop",
-                    }
-                ],
-                "usage": {
-                    "prompt_tokens": 10,
-                    "completion_tokens": 5,
-                    "total_tokens": 15,
-                },
-            }
+            mock_response.content = json.dumps(
+                {
+                    "id": "chatcmpl-123",
+                    "object": "chat.completion",
+                    "model": "gpt-4",
+                    "choices": [
+                        {
+                            "message": {"role": "assistant", "content": "Hello!"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 10,
+                        "completion_tokens": 5,
+                        "total_tokens": 15,
+                    },
+                }
+            ).encode()
             mock_response.raise_for_status = Mock()
 
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
-                return_value=mock_response
-            )
+            mock_client = Mock()
+            mock_client.post = AsyncMock(return_value=mock_response)
+            mock_pool.return_value.get_client.return_value = mock_client
 
             result = await provider.chat_completion(
                 messages=[{"role": "user", "content": "Hi"}],
@@ -163,6 +191,53 @@ class TestOpenAIProvider:
         assert result.content == "Hello!"
         assert result.model
         assert result.total_tokens == 15
+        mock_pool.return_value.get_client.assert_called_with("https://api.openai.com/v1")
+        mock_client.post.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_chat_completion_raw(self):
+        """测试原始流式接口返回data行内容，解析接口返回chunk字典"""
+        provider = OpenAIProvider(api_key="test-key")
+        lines = [
+            'data: {"id":"c1","choices":[{"delta":{"content":"Hi"}}]}',
+            "",
+            "data: not-json",
+            "data: [DONE]",
+            'data: {"id":"after-done"}',
+        ]
+
+        async def aiter_lines():
+            for line in lines:
+                yield line
+
+        mock_response = Mock()
+        mock_response.raise_for_status = Mock()
+        mock_response.aiter_lines = aiter_lines
+        stream_context = AsyncMock()
+        stream_context.__aenter__.return_value = mock_response
+
+        with patch("gaiarouter.providers.base.get_http_client_pool") as mock_pool:
+            mock_pool.return_value.get_client.return_value.stream = Mock(
+                return_value=stream_context
+            )
+            raw = [
+                data
+                async for data in provider.stream_chat_completion_raw(
+                    messages=[{"role": "user", "content": "Hi"}], model="gpt-4"
+                )
+            ]
+            parsed = [
+                chunk
+                async for chunk in provider.stream_chat_completion(
+                    messages=[{"role": "user", "content": "Hi"}], model="gpt-4"
+                )
+            ]
+
+        assert raw == ['{"id":"c1","choices":[{"delta":{"content":"Hi"}}]}', "not-json"]
+        assert parsed == [{"id": "c1", "choices": [{"delta": {"content": "Hi"}}]}]
+        assert provider.supports_raw_stream is True
+        assert OpenRouterProvider.supports_raw_stream is True
+        assert AnthropicProvider.supports_raw_stream is False
 
 
 class TestAnthropicProvider:
@@ -232,6 +307,67 @@ class TestOpenRouterProvider:
         assert headers["Authorization"] == "Bearer test-key"
 
 
+class TestHTTPClientPool:
+    """测试上游 HTTP 连接池"""
+
+    @pytest.mark.asyncio
+    async def test_reuses_client_per_host(self):
+        """测试同一主机复用同一个客户端"""
+        pool = HTTPClientPool()
+
+        client_a = pool.get_client("https://api.openai.com/v1")
+        client_b = pool.get_client("https://api.openai.com/v1/chat")
+
+        assert client_a is client_b
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_separate_client_per_host(self):
+        """测试不同主机使用独立的客户端"""
+        pool = HTTPClientPool()
+
+        openai_client = pool.get_client("https://api.openai.com/v1")
+        anthropic_client = pool.get_client("https://api.anthropic.com/v1")
+
+        assert openai_client is not anthropic_client
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_and_recreate(self):
+        """测试关闭后重新获取会创建新客户端"""
+        pool = HTTPClientPool()
+        client = pool.get_client("https://api.openai.com/v1")
+
+        await pool.close()
+
+        assert client.is_closed
+        new_client = pool.get_client("https://api.openai.com/v1")
+        assert new_client is not client
+        assert not new_client.is_closed
+        await pool.close()
+
+    def test_limits_from_settings(self, mock_settings):
+        """测试连接池限制来自配置"""
+        mock_settings.http_max_connections = 7
+        mock_settings.http_max_keepalive_connections = 3
+        mock_settings.http_keepalive_expiry = 12.5
+        mock_settings.http_connect_timeout = 2.0
+
+        with patch("gaiarouter.providers.http_client.get_settings", return_value=mock_settings):
+            pool = HTTPClientPool()
+
+        with patch("gaiarouter.providers.http_client.httpx.AsyncClient") as mock_client_cls:
+            pool.get_client("https://api.openai.com/v1")
+
+        limits = mock_client_cls.call_args.kwargs["limits"]
+        timeout = mock_client_cls.call_args.kwargs["timeout"]
+        assert limits.max_connections == 7
+        assert limits.max_keepalive_connections == 3
+        assert limits.keepalive_expiry == 12.5
+        assert timeout.connect == 2.0
+        assert timeout.read == 30
+
+
 class TestProviderEdgeCases:
     """测试 Provider 边界情况"""
 
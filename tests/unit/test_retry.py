@@ -0,0 +1,204 @@
+"""
+测试重试策略
+
+测试错误分类、Retry-After 解析、全抖动退避、重试预算和 Provider 集成
+"""
+
+import random
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from gaiarouter.providers.base import Provider, ProviderResponse
+from gaiarouter.providers.retry import (
+    RetryBudget,
+    RetryBudgets,
+    RetryPolicy,
+    is_retryable,
+    parse_retry_after,
+)
+from gaiarouter.utils.errors import TimeoutError
+
+
+def status_error(status_code: int, headers: dict = None) -> httpx.HTTPStatusError:
+    """构造HTTP状态错误"""
+    request = httpx.Request("POST", "https://api.test.com/chat")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestClassification:
+    """测试错误分类"""
+
+    @pytest.mark.parametrize("status_code", [408, 429, 500, 502, 503])
+    def test_retryable_status(self, status_code):
+        """测试408、429和5xx可以重试"""
+        assert is_retryable(status_error(status_code))
+
+    @pytest.mark.parametrize("status_code", [400, 401, 403, 404, 422])
+    def test_non_retryable_status(self, status_code):
+        """测试其他4xx不重试"""
+        assert not is_retryable(status_error(status_code))
+
+    def test_transport_errors(self):
+        """测试超时和连接错误可以重试，其他异常不重试"""
+        assert is_retryable(TimeoutError())
+        assert is_retryable(httpx.ConnectError("refused"))
+        assert is_retryable(httpx.ReadTimeout("timeout"))
+        assert not is_retryable(ValueError("bad response"))
+
+
+class TestParseRetryAfter:
+    """测试 Retry-After 解析"""
+
+    def test_seconds(self):
+        """测试秒数"""
+        assert parse_retry_after(status_error(429, {"Retry-After": "3"})) == 3
+
+    def test_milliseconds_preferred(self):
+        """测试优先使用 retry-after-ms"""
+        error = status_error(429, {"Retry-After": "3", "retry-after-ms": "250"})
+        assert parse_retry_after(error) == 0.25
+
+    def test_http_date(self):
+        """测试HTTP日期（已过去的时间按0处理）"""
+        error = status_error(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert parse_retry_after(error) == 0
+
+    def test_missing_or_invalid(self):
+        """测试没有或无法解析时返回None"""
+        assert parse_retry_after(status_error(503)) is None
+        assert parse_retry_after(status_error(503, {"Retry-After": "soon"})) is None
+        assert parse_retry_after(TimeoutError()) is None
+
+
+class TestRetryPolicy:
+    """测试重试策略"""
+
+    @pytest.fixture
+    def policy(self):
+        return RetryPolicy(max_retries=3, base_delay=1.0, max_delay=5.0, rng=random.Random(1))
+
+    def test_full_jitter(self, policy):
+        """测试退避时间在0到指数退避上限之间"""
+        for attempt, cap in ((0, 1.0), (1, 2.0), (2, 4.0), (5, 5.0)):
+            delays = [policy.backoff(attempt) for _ in range(50)]
+            assert all(0 <= delay <= cap for delay in delays)
+            assert len(set(delays)) > 1
+
+    def test_honors_retry_after(self, policy):
+        """测试按上游 Retry-After 等待，超过上限时不重试"""
+        assert policy.delay(0, status_error(429, {"Retry-After": "2"})) == 2
+        assert policy.delay(0, status_error(429, {"Retry-After": "60"})) is None
+
+    def test_stops(self, policy):
+        """测试不可重试的错误和达到重试次数时不重试"""
+        assert policy.delay(0, status_error(400)) is None
+        assert policy.delay(3, status_error(503)) is None
+        assert policy.delay(2, status_error(503)) is not None
+
+
+class TestRetryBudget:
+    """测试重试预算"""
+
+    def test_limits_retries_to_ratio(self):
+        """测试令牌用完后按请求数的比例补充"""
+        clock = FakeClock()
+        budget = RetryBudget(ratio=0.5, min_per_second=0, burst=2, clock=clock)
+
+        assert budget.try_withdraw()
+        assert budget.try_withdraw()
+        assert not budget.try_withdraw()
+
+        budget.deposit()
+        assert not budget.try_withdraw()
+        budget.deposit()
+        assert budget.try_withdraw()
+
+    def test_time_refill_capped(self):
+        """测试按时间补充令牌，不超过上限"""
+        clock = FakeClock()
+        budget = RetryBudget(ratio=0, min_per_second=1, burst=3, clock=clock)
+        for _ in range(3):
+            assert budget.try_withdraw()
+        assert not budget.try_withdraw()
+
+        clock.now += 1
+        assert budget.try_withdraw()
+
+        clock.now += 100
+        assert budget.tokens == 3
+
+    def test_budgets_per_provider(self):
+        """测试每个提供商使用独立的预算"""
+        budgets = RetryBudgets(ratio=0.1, min_per_second=0, burst=1)
+
+        assert budgets.get("openai") is budgets.get("openai")
+        assert budgets.get("openai").try_withdraw()
+        assert budgets.get("anthropic").try_withdraw()
+
+
+class TestProviderRetry:
+    """测试 Provider 的重试"""
+
+    class TestProvider(Provider):
+        """测试用的 Provider 实现"""
+
+        name = "test"
+
+        def get_default_base_url(self) -> str:
+            return "https://api.test.com"
+
+        async def chat_completion(self, messages, model, **kwargs):
+            return ProviderResponse(content="Test", model=model, total_tokens=10)
+
+        async def stream_chat_completion(self, messages, model, **kwargs):
+            yield {"content": "Test"}
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        """测试4xx不重试"""
+        provider = self.TestProvider(api_key="test-key")
+        func = AsyncMock(side_effect=status_error(401))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider._retry_request(func, max_retries=3, retry_delay=0)
+
+        assert func.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_waits_for_retry_after(self):
+        """测试429按 Retry-After 等待后重试（没有其他可换用的API Key）"""
+        provider = self.TestProvider()
+        func = AsyncMock(side_effect=[status_error(429, {"Retry-After": "2"}), "success"])
+
+        with patch("gaiarouter.providers.base.asyncio.sleep", new=AsyncMock()) as sleep:
+            result = await provider._retry_request(func, max_retries=3)
+
+        assert result == "success"
+        sleep.assert_awaited_once_with(2.0)
+
+    @pytest.mark.asyncio
+    async def test_budget_exhausted(self):
+        """测试重试预算用尽时不再重试"""
+        provider = self.TestProvider(api_key="test-key")
+        func = AsyncMock(side_effect=status_error(503))
+        budgets = RetryBudgets(ratio=0, min_per_second=0, burst=1)
+
+        with patch("gaiarouter.providers.base.get_retry_budgets", return_value=budgets):
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider._retry_request(func, max_retries=3, retry_delay=0)
+
+        # 第一次失败后用掉唯一的令牌重试，第二次失败后不再重试
+        assert func.await_count == 2
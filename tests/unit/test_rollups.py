@@ -0,0 +1,217 @@
+"""
+测试用量汇总（rollup）
+
+使用 SQLite 内存数据库测试汇总的增量更新、时间范围组合查询和历史回填
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from gaiarouter.database.models import RequestStat, UsageRollup
+from gaiarouter.stats.query import StatsQuery, StatsQueryParams
+from gaiarouter.stats.rollups import build_rollup_rows, upsert_rollups
+
+
+def _record(timestamp, model="openai/gpt-4", provider="openai", tokens=30, cost=0.01):
+    return {
+        "api_key_id": "ak_1",
+        "organization_id": "org_1",
+        "model": model,
+        "provider": provider,
+        "prompt_tokens": tokens // 3,
+        "completion_tokens": tokens - tokens // 3,
+        "total_tokens": tokens,
+        "cost": cost,
+        "timestamp": timestamp,
+    }
+
+
+class TestBuildRollupRows:
+    """测试汇总行构建"""
+
+    def test_hour_and_day_buckets(self):
+        """测试每条记录同时计入小时桶和天桶"""
+        rows = build_rollup_rows(
+            [
+                _record(datetime(2026, 1, 5, 10, 5)),
+                _record(datetime(2026, 1, 5, 10, 55)),
+                _record(datetime(2026, 1, 5, 11, 0)),
+            ]
+        )
+
+        hours = {r["bucket_start"]: r for r in rows if r["granularity"] == "hour"}
+        days = [r for r in rows if r["granularity"] == "day"]
+
+        assert hours[datetime(2026, 1, 5, 10)]["requests"] == 2
+        assert hours[datetime(2026, 1, 5, 11)]["requests"] == 1
+        assert len(days) == 1
+        assert days[0]["requests"] == 3
+        assert days[0]["total_tokens"] == 90
+
+    def test_missing_organization(self):
+        """测试无组织的记录使用空串"""
+        record = _record(datetime(2026, 1, 5, 10))
+        record["organization_id"] = None
+
+        rows = build_rollup_rows([record])
+
+        assert all(r["organization_id"] == "" for r in rows)
+
+
+class TestRollupStorage:
+    """测试汇总表的写入和查询"""
+
+    def test_bulk_save_accumulates(self, stats_storage, db_session):
+        """测试多批写入在同一桶内累加"""
+        stats_storage.bulk_save([_record(datetime(2026, 1, 5, 10, 5))])
+        stats_storage.bulk_save([_record(datetime(2026, 1, 5, 10, 30), cost=0.02)])
+
+        assert db_session.query(RequestStat).count() == 2
+        day = db_session.query(UsageRollup).filter(UsageRollup.granularity == "day").one()
+        assert day.requests == 2
+        assert float(day.cost) == pytest.approx(0.03)
+
+    def test_generic_dialect_update_or_insert(self, stats_storage, db_session):
+        """测试不支持原生 upsert 的数据库逐行更新或插入"""
+        with patch.object(db_session.get_bind().dialect, "name", "oracle"):
+            upsert_rollups(db_session, [_record(datetime(2026, 1, 5, 10, 5))])
+            upsert_rollups(
+                db_session,
+                [_record(datetime(2026, 1, 5, 10, 30)), _record(datetime(2026, 1, 5, 11, 0))],
+            )
+        db_session.commit()
+
+        day = db_session.query(UsageRollup).filter(UsageRollup.granularity == "day").one()
+        assert day.requests == 3
+        assert day.total_tokens == 90
+        hours = db_session.query(UsageRollup).filter(UsageRollup.granularity == "hour").all()
+        assert sorted(h.requests for h in hours) == [1, 2]
+
+    def test_range_combines_hours_and_days(self, stats_storage):
+        """测试首尾不足一天的部分使用小时桶"""
+        stats_storage.bulk_save(
+            [
+                _record(datetime(2026, 1, 4, 21, 0)),  # 开始之前
+                _record(datetime(2026, 1, 4, 22, 30)),  # 首日部分
+                _record(datetime(2026, 1, 5, 12, 0)),  # 完整的一天
+                _record(datetime(2026, 1, 6, 1, 15)),  # 末日部分
+                _record(datetime(2026, 1, 6, 3, 0)),  # 结束之后
+            ]
+        )
+
+        summary = stats_storage.get_rollup_summary(
+            datetime(2026, 1, 4, 22, 0), datetime(2026, 1, 6, 1, 59)
+        )
+        by_date = stats_storage.aggregate_rollups(
+            datetime(2026, 1, 4, 22, 0), datetime(2026, 1, 6, 1, 59), group_by="date"
+        )
+
+        assert summary["total_requests"] == 3
+        assert [row["date"] for row in by_date] == ["2026-01-04", "2026-01-05", "2026-01-06"]
+        assert [row["requests"] for row in by_date] == [1, 1, 1]
+
+    def test_group_by_model_and_filter(self, stats_storage):
+        """测试按模型分组和按API Key过滤"""
+        other_key = _record(datetime(2026, 1, 5, 10))
+        other_key["api_key_id"] = "ak_2"
+        stats_storage.bulk_save(
+            [
+                _record(datetime(2026, 1, 5, 10), model="openai/gpt-4"),
+                _record(datetime(2026, 1, 5, 11), model="anthropic/claude-3", provider="anthropic"),
+                other_key,
+            ]
+        )
+
+        by_model = stats_storage.aggregate_rollups(
+            datetime(2026, 1, 5), datetime(2026, 1, 5, 23, 59), group_by="model", api_key_id="ak_1"
+        )
+
+        assert by_model == [
+            {
+                "model": "anthropic/claude-3",
+                "requests": 1,
+                "prompt_tokens": 10,
+                "completion_tokens": 20,
+                "total_tokens": 30,
+                "cost": pytest.approx(0.01),
+            },
+            {
+                "model": "openai/gpt-4",
+                "requests": 1,
+                "prompt_tokens": 10,
+                "completion_tokens": 20,
+                "total_tokens": 30,
+                "cost": pytest.approx(0.01),
+            },
+        ]
+
+    def test_rebuild_rollups(self, stats_storage, db_session):
+        """测试根据原始记录回填汇总"""
+        for hour in (1, 2, 2):
+            db_session.add(RequestStat(**_record(datetime(2026, 1, 5, hour))))
+        db_session.commit()
+
+        count = stats_storage.rebuild_rollups(
+            datetime(2026, 1, 5), datetime(2026, 1, 6), chunk_size=2
+        )
+        # 重复执行结果不变
+        stats_storage.rebuild_rollups(datetime(2026, 1, 5), datetime(2026, 1, 6), chunk_size=2)
+
+        summary = stats_storage.get_rollup_summary(
+            datetime(2026, 1, 5), datetime(2026, 1, 5, 23, 59)
+        )
+        assert count == 3
+        assert summary["total_requests"] == 3
+
+    def test_rebuild_refuses_open_buckets(self, stats_storage):
+        """测试不重建仍在写入的当前小时和当天的天桶"""
+        now = datetime(2026, 1, 5, 10, 30)
+        with patch("gaiarouter.stats.storage.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value = now
+            with pytest.raises(ValueError, match="current hour"):
+                stats_storage.rebuild_rollups(datetime(2026, 1, 5), datetime(2026, 1, 5, 11))
+            with pytest.raises(ValueError, match="current day"):
+                stats_storage.rebuild_rollups(datetime(2026, 1, 5), datetime(2026, 1, 5, 10))
+
+    def test_rebuild_closed_hours_of_open_day(self, stats_storage, db_session):
+        """测试当天只重建已结束的小时桶，保留收集器写入的天桶"""
+        stats_storage.bulk_save([_record(datetime(2026, 1, 5, 9, 30))])
+        db_session.add(RequestStat(**_record(datetime(2026, 1, 5, 8))))
+        db_session.commit()
+
+        with patch("gaiarouter.stats.storage.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value = datetime(2026, 1, 5, 10, 30)
+            count = stats_storage.rebuild_rollups(
+                datetime(2026, 1, 5), datetime(2026, 1, 5, 10), granularities=["hour"]
+            )
+
+        hours = db_session.query(UsageRollup).filter(UsageRollup.granularity == "hour").all()
+        day = db_session.query(UsageRollup).filter(UsageRollup.granularity == "day").one()
+        assert count == 2
+        assert sorted(h.requests for h in hours) == [1, 1]
+        assert day.requests == 1
+
+
+class TestStatsQueryRollups:
+    """测试统计查询使用汇总表"""
+
+    def test_query_key_stats(self, stats_storage):
+        """测试按 API Key 查询统计"""
+        stats_storage.bulk_save(
+            [_record(datetime(2026, 1, 5, 10)), _record(datetime(2026, 1, 6, 10), cost=0.02)]
+        )
+        query = StatsQuery()
+        query.storage = stats_storage
+        query.source = "rollups"
+
+        response = query.query_key_stats(
+            "ak_1",
+            StatsQueryParams(start_date=datetime(2026, 1, 5), end_date=datetime(2026, 1, 6, 23)),
+        )
+
+        assert response["summary"]["total_requests"] == 2
+        assert response["summary"]["total_cost"] == pytest.approx(0.03)
+        assert [row["date"] for row in response["by_date"]] == ["2026-01-05", "2026-01-06"]
+        assert response["by_provider"][0]["provider"] == "openai"
@@ -4,12 +4,16 @@
 测试模型路由逻辑、提供商选择、OpenRouter 前缀处理等
 """
 
+import random
+from collections import Counter
 from unittest.mock import Mock, patch
 
 import pytest
 
+from gaiarouter.providers.circuit_breaker import get_circuit_breakers
+from gaiarouter.router.health import HealthTracker, get_health_tracker
 from gaiarouter.router.model_router import ModelRouter
-from gaiarouter.router.registry import ModelConfig, ModelRegistry
+from gaiarouter.router.registry import AliasTarget, ModelAlias, ModelConfig, ModelRegistry
 from gaiarouter.utils.errors import ModelNotFoundError
 
 
@@ -87,6 +91,7 @@ class TestModelRouter:
                     name="gpt-4",
                     api_key_env="OPENAI_API_KEY",
                 )
+                registry.get_alias.return_value = None
                 mock_registry.return_value = registry
 
                 router = ModelRouter()
@@ -154,6 +159,7 @@ class TestModelRouter:
                 registry.get.return_value = ModelConfig(
                     id="openai/gpt-4", provider="openai", name="gpt-4"
                 )
+                registry.get_alias.return_value = None
                 mock_registry.return_value = registry
 
                 router = ModelRouter()
@@ -225,3 +231,199 @@ class TestModelRouterIntegration:
         # 同一提供商应该使用相同的适配器实例
         assert req1 is req2
         assert resp1 is resp2
+
+
+class TestModelAliases:
+    """测试逻辑模型（别名）配置"""
+
+    def test_default_aliases(self):
+        """测试默认别名包含直连和OpenRouter两个目标"""
+        alias = ModelRegistry().get_alias("gpt-4")
+
+        assert [t.model_id for t in alias.targets] == ["openai/gpt-4", "openrouter/gpt-4"]
+
+    def test_configured_aliases(self):
+        """测试 MODEL_ALIASES 覆盖默认别名，目标可带权重和成本"""
+        settings = Mock()
+        settings.model_aliases = (
+            '{"gpt-4": ["openai/gpt-4", {"model": "openrouter/gpt-4", "weight": 0.5, "cost": 2}]}'
+        )
+
+        with patch("gaiarouter.router.registry.get_settings", return_value=settings):
+            registry = ModelRegistry()
+
+        targets = registry.get_alias("gpt-4").targets
+        assert targets[0] == AliasTarget("openai/gpt-4")
+        assert targets[1] == AliasTarget("openrouter/gpt-4", weight=0.5, cost=2.0)
+
+    def test_invalid_configuration_ignored(self):
+        """测试配置无效时保留默认别名"""
+        settings = Mock()
+        settings.model_aliases = '{"gpt-4": [{"weight": 1}]}'
+
+        with patch("gaiarouter.router.registry.get_settings", return_value=settings):
+            registry = ModelRegistry()
+
+        assert len(registry.get_alias("gpt-4").targets) == 2
+
+
+class TestModelFallbacks:
+    """测试回退链配置"""
+
+    def test_default_fallbacks(self):
+        """测试直连模型默认回退到OpenRouter上的同一模型"""
+        registry = ModelRegistry()
+
+        assert registry.get_fallbacks("anthropic/claude-3-opus") == ["openrouter/claude-3-opus"]
+        assert registry.get_fallbacks("google/gemini-pro") == []
+
+    def test_configured_fallbacks(self):
+        """测试 MODEL_FALLBACKS 覆盖默认回退链"""
+        settings = Mock()
+        settings.model_aliases = None
+        settings.model_fallbacks = (
+            '{"openai/gpt-4": ["anthropic/claude-3-opus", "openrouter/gpt-4"]}'
+        )
+
+        with patch("gaiarouter.router.registry.get_settings", return_value=settings):
+            registry = ModelRegistry()
+
+        assert registry.get_fallbacks("openai/gpt-4") == [
+            "anthropic/claude-3-opus",
+            "openrouter/gpt-4",
+        ]
+
+    def test_invalid_configuration_ignored(self):
+        """测试配置无效时保留默认回退链"""
+        settings = Mock()
+        settings.model_aliases = None
+        settings.model_fallbacks = '{"openai/gpt-4": "openrouter/gpt-4"}'
+
+        with patch("gaiarouter.router.registry.get_settings", return_value=settings):
+            registry = ModelRegistry()
+
+        assert registry.get_fallbacks("openai/gpt-4") == ["openrouter/gpt-4"]
+
+
+class TestHealthTracker:
+    """测试上游健康状况"""
+
+    def test_ewma(self):
+        """测试耗时和错误率按EWMA更新"""
+        tracker = HealthTracker(alpha=0.5)
+
+        tracker.record_success("openai/gpt-4", latency=1.0)
+        tracker.record_success("openai/gpt-4", latency=3.0)
+        tracker.record_failure("openai/gpt-4")
+        tracker.record_success("openai/gpt-4", ttft=0.4)
+
+        health = tracker.get("openai/gpt-4")
+        assert health.latency == 2.0
+        assert health.ttft == 0.4
+        assert health.error_rate == 0.25
+        assert health.samples == 4
+        assert tracker.get("openrouter/gpt-4") is None
+
+
+class TestAliasRouting:
+    """测试逻辑模型按上游健康状况选择目标"""
+
+    @pytest.fixture
+    def router(self, mock_settings):
+        """创建配置了 gpt-4 别名的路由器"""
+        mock_settings.routing_error_penalty = 10.0
+        mock_settings.routing_cost_weight = 1.0
+        mock_settings.routing_latency_sensitivity = 2.0
+        registry = ModelRegistry()
+        registry.register_alias(
+            ModelAlias(
+                id="gpt-4",
+                targets=[AliasTarget("openai/gpt-4"), AliasTarget("openrouter/gpt-4")],
+            )
+        )
+        with (
+            patch("gaiarouter.router.model_router.get_settings", return_value=mock_settings),
+            patch("gaiarouter.router.model_router.get_model_registry", return_value=registry),
+        ):
+            yield ModelRouter(rng=random.Random(7))
+
+    def picks(self, router, count=200, **kwargs):
+        return Counter(router.resolve("gpt-4", **kwargs) for _ in range(count))
+
+    def test_not_alias(self, router):
+        """测试非逻辑模型原样返回"""
+        assert router.resolve("openai/gpt-4") == "openai/gpt-4"
+
+    def test_prefers_faster_target(self, router):
+        """测试较慢的上游分到的流量减少但不为0"""
+        tracker = get_health_tracker()
+        tracker.record_success("openai/gpt-4", latency=3.0)
+        tracker.record_success("openrouter/gpt-4", latency=1.0)
+
+        picks = self.picks(router)
+
+        assert picks["openrouter/gpt-4"] > 160
+        assert picks["openai/gpt-4"] > 0
+
+    def test_stream_uses_ttft(self, router):
+        """测试流式请求按首Token时间选择"""
+        tracker = get_health_tracker()
+        tracker.record_success("openai/gpt-4", latency=1.0, ttft=0.2)
+        tracker.record_success("openrouter/gpt-4", latency=0.5, ttft=2.0)
+
+        assert self.picks(router).most_common(1)[0][0] == "openrouter/gpt-4"
+        assert self.picks(router, stream=True).most_common(1)[0][0] == "openai/gpt-4"
+
+    def test_avoids_erroring_target(self, router):
+        """测试错误率高的上游分到的流量减少"""
+        tracker = get_health_tracker()
+        for _ in range(5):
+            tracker.record_failure("openai/gpt-4")
+
+        assert self.picks(router)["openrouter/gpt-4"] > 180
+
+    def test_skips_disabled_and_open_circuits(self, router):
+        """测试跳过未启用和熔断中的目标"""
+        assert set(self.picks(router, is_enabled=lambda m: m == "openai/gpt-4")) == {"openai/gpt-4"}
+
+        breaker = get_circuit_breakers().get("openrouter", "gpt-4")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        assert set(self.picks(router)) == {"openai/gpt-4"}
+
+    def test_no_available_target(self, router):
+        """测试没有可用目标"""
+        with pytest.raises(ModelNotFoundError):
+            router.resolve("gpt-4", is_enabled=lambda m: False)
+
+    def test_fallback_chain(self, router):
+        """测试回退目标：先是回退链，再是逻辑模型的其他目标，跳过自身、重复和未启用的目标"""
+        router.registry.register_fallbacks(
+            "openai/gpt-4", ["openrouter/gpt-4", "anthropic/claude-3-opus", "google/gemini-pro"]
+        )
+
+        assert router.fallback_chain("openai/gpt-4") == [
+            "openrouter/gpt-4",
+            "anthropic/claude-3-opus",
+            "google/gemini-pro",
+        ]
+        assert router.fallback_chain(
+            "openrouter/gpt-4",
+            requested_model="gpt-4",
+            is_enabled=lambda m: m != "anthropic/claude-3-opus",
+        ) == ["openai/gpt-4"]
+
+    def test_fallback_chain_skips_unconfigured_provider(self, router):
+        """测试跳过未配置的提供商"""
+        del router._providers["openrouter"]
+
+        assert router.fallback_chain("openai/gpt-4", requested_model="gpt-4") == []
+
+    def test_route_alias(self, router):
+        """测试直接路由逻辑模型"""
+        router.registry.get_alias("gpt-4").targets = [AliasTarget("openrouter/gpt-4")]
+
+        provider, _, _, actual_model = router.route("gpt-4")
+
+        assert provider is router._providers["openrouter"]
+        assert actual_model == "gpt-4"
@@ -0,0 +1,81 @@
+"""
+测试SSE数据行工具
+
+测试直通转发时的用量行识别、model字段修补和输出字符统计
+"""
+
+from gaiarouter.stats.stream_usage import StreamUsageAccumulator
+from gaiarouter.utils.sse import content_chars, ensure_model, parse_usage_chunk
+
+
+class TestParseUsageChunk:
+    """测试用量行识别"""
+
+    def test_no_usage_field(self):
+        """测试不含usage字段时不解析"""
+        assert parse_usage_chunk('{"id":"c1","choices":[]}') is None
+
+    def test_null_usage(self):
+        """测试usage为null时不解析"""
+        assert parse_usage_chunk('{"id":"c1","choices":[],"usage":null}') is None
+        assert parse_usage_chunk('{"id":"c1","usage" : null}') is None
+
+    def test_usage_chunk_parsed(self):
+        """测试携带用量时返回解析后的chunk"""
+        chunk = parse_usage_chunk(
+            '{"id":"c1","choices":[],"usage":{"prompt_tokens":5,"completion_tokens":2}}'
+        )
+
+        assert chunk["usage"] == {"prompt_tokens": 5, "completion_tokens": 2}
+
+    def test_invalid_json(self):
+        """测试JSON无效时返回None"""
+        assert parse_usage_chunk('{"usage":{') is None
+
+    def test_escaped_usage_in_content(self):
+        """测试内容中出现的usage文本不触发解析"""
+        assert parse_usage_chunk('{"choices":[{"delta":{"content":"\\"usage\\": 1"}}]}') is None
+
+
+class TestEnsureModel:
+    """测试model字段修补"""
+
+    def test_model_present(self):
+        """测试已有model字段时原样返回"""
+        data = '{"id":"c1","model":"gpt-4"}'
+
+        assert ensure_model(data, "openai/gpt-4") is data
+
+    def test_model_inserted(self):
+        """测试缺少model字段时插入"""
+        assert ensure_model('{"id":"c1"}', "openai/gpt-4") == '{"model":"openai/gpt-4","id":"c1"}'
+
+    def test_empty_object(self):
+        """测试空对象"""
+        assert ensure_model("{}", "openai/gpt-4") == '{"model":"openai/gpt-4"}'
+
+    def test_not_an_object(self):
+        """测试非JSON对象时原样返回"""
+        assert ensure_model("[1]", "openai/gpt-4") == "[1]"
+
+
+class TestContentChars:
+    """测试输出字符统计"""
+
+    def test_content_chars(self):
+        """测试统计content字符串长度"""
+        assert content_chars('{"choices":[{"delta":{"content":"abcd"}}]}') == 4
+        assert content_chars('{"choices":[{"delta":{"content": "a\\"b"}}]}') == 4
+
+    def test_null_content(self):
+        """测试content为null时不计数"""
+        assert content_chars('{"choices":[{"delta":{"content":null}}]}') == 0
+
+    def test_accumulator_raw_chunk(self):
+        """测试用量累计器按原始数据行估算输出Token"""
+        usage = StreamUsageAccumulator()
+        for _ in range(3):
+            usage.add_raw_chunk('{"choices":[{"delta":{"content":"abcd"}}]}')
+
+        assert usage.chunks == 3
+        assert usage.totals()["completion_tokens"] == 3
@@ -4,6 +4,7 @@
 测试统计收集器的费用计算和请求记录功能
 """
 
+import asyncio
 from datetime import datetime
 from unittest.mock import MagicMock, Mock, patch
 
@@ -11,6 +12,7 @@ import pytest
 
 from gaiarouter.database.models import Model, RequestStat
 from gaiarouter.stats.collector import StatsCollector
+from gaiarouter.stats.stream_usage import StreamUsageAccumulator
 
 
 class TestStatsCollector:
@@ -21,6 +23,12 @@ class TestStatsCollector:
         """创建统计收集器实例"""
         return StatsCollector()
 
+    @pytest.fixture(autouse=True)
+    def mock_upsert_rollups(self):
+        """Mock 用量汇总更新（Mock 会话没有真实的数据库方言）"""
+        with patch("gaiarouter.stats.collector.upsert_rollups") as mock_upsert:
+            yield mock_upsert
+
     def test_calculate_cost_success(self, collector):
         """测试成功计算费用"""
         mock_model = Model(
@@ -36,7 +44,9 @@ class TestStatsCollector:
         mock_db.close = Mock()
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
-            cost = collector.calculate_cost("openai/gpt-4", prompt_tokens=1000, completion_tokens=500)
+            cost = collector.calculate_cost(
+                "openai/gpt-4", prompt_tokens=1000, completion_tokens=500
+            )
 
         # 1000 tokens * $0.03/1K + 500 tokens * $0.06/1K = $0.03 + $0.03 = $0.06
         assert cost == 0.06
@@ -56,7 +66,9 @@ class TestStatsCollector:
         mock_db.close = Mock()
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
-            cost = collector.calculate_cost("openai/gpt-4", prompt_tokens=2500, completion_tokens=1200)
+            cost = collector.calculate_cost(
+                "openai/gpt-4", prompt_tokens=2500, completion_tokens=1200
+            )
 
         # 2500 tokens * $0.03/1K + 1200 tokens * $0.06/1K = $0.075 + $0.072 = $0.147
         assert cost == 0.147
@@ -68,7 +80,9 @@ class TestStatsCollector:
         mock_db.close = Mock()
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
-            cost = collector.calculate_cost("nonexistent/model", prompt_tokens=1000, completion_tokens=500)
+            cost = collector.calculate_cost(
+                "nonexistent/model", prompt_tokens=1000, completion_tokens=500
+            )
 
         assert cost is None
 
@@ -87,7 +101,9 @@ class TestStatsCollector:
         mock_db.close = Mock()
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
-            cost = collector.calculate_cost("openai/gpt-4", prompt_tokens=1000, completion_tokens=500)
+            cost = collector.calculate_cost(
+                "openai/gpt-4", prompt_tokens=1000, completion_tokens=500
+            )
 
         assert cost is None
 
@@ -117,11 +133,13 @@ class TestStatsCollector:
         mock_db.close = Mock()
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
-            cost = collector.calculate_cost("openai/gpt-4", prompt_tokens=1000, completion_tokens=500)
+            cost = collector.calculate_cost(
+                "openai/gpt-4", prompt_tokens=1000, completion_tokens=500
+            )
 
         assert cost is None
 
-    def test_record_request_sync_success(self, collector):
+    def test_record_request_sync_success(self, collector, mock_upsert_rollups):
         """测试同步记录请求成功"""
         mock_db = MagicMock()
         mock_db.add = Mock()
@@ -146,6 +164,8 @@ class TestStatsCollector:
         assert result is True
         mock_db.add.assert_called_once()
         mock_db.commit.assert_called_once()
+        mock_upsert_rollups.assert_called_once()
+        assert mock_upsert_rollups.call_args[0][1][0]["total_tokens"] == 1500
 
     def test_record_request_sync_with_provided_cost(self, collector):
         """测试提供费用时的同步记录"""
@@ -267,7 +287,13 @@ class TestCostCalculationAccuracy:
             (0.0001, 0.0002, 10000, 5000, 0.002),  # Cheap model
         ]
 
-        for prompt_price, completion_price, prompt_tokens, completion_tokens, expected_cost in test_cases:
+        for (
+            prompt_price,
+            completion_price,
+            prompt_tokens,
+            completion_tokens,
+            expected_cost,
+        ) in test_cases:
             mock_model = Model(
                 id="test/model",
                 name="Test Model",
@@ -301,7 +327,9 @@ class TestCostCalculationAccuracy:
 
         with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
             # 100K prompt tokens + 50K completion tokens
-            cost = collector.calculate_cost("openai/gpt-4", prompt_tokens=100000, completion_tokens=50000)
+            cost = collector.calculate_cost(
+                "openai/gpt-4", prompt_tokens=100000, completion_tokens=50000
+            )
 
         # 100K * $0.03/1K + 50K * $0.06/1K = $3.0 + $3.0 = $6.0
         assert cost == 6.0
@@ -373,3 +401,214 @@ class TestStatsRecordingIntegrity:
         assert captured_stat.total_tokens == 1500
         assert captured_stat.cost == 0.05
         assert isinstance(captured_stat.timestamp, datetime)
+
+
+class TestStatsCollectorPipeline:
+    """测试统计记录的异步批量写入"""
+
+    @pytest.fixture
+    def collector(self, tmp_path):
+        """创建使用临时落盘文件的统计收集器"""
+        collector = StatsCollector()
+        collector.batch_size = 10
+        collector.flush_interval = 0.05
+        collector.spill_path = tmp_path / "stats_spill.jsonl"
+        return collector
+
+    @staticmethod
+    def _enqueue(collector, count=1, cost=0.01):
+        for _ in range(count):
+            collector.enqueue(
+                api_key_id="ak_123",
+                organization_id="org_123",
+                model="openai/gpt-4",
+                provider="openai",
+                prompt_tokens=10,
+                completion_tokens=20,
+                total_tokens=30,
+                cost=cost,
+            )
+
+    def test_enqueue_falls_back_to_sync_without_event_loop(self, collector):
+        """测试不在事件循环中调用时同步写入"""
+        with patch.object(collector, "record_request_sync", return_value=True) as mock_sync:
+            self._enqueue(collector)
+
+        mock_sync.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_enqueue_spills_when_not_running(self, collector):
+        """测试后台任务未运行时记录在线程中落盘，启动后重放，不在事件循环中写数据库"""
+        storage = MagicMock()
+        storage.bulk_save.side_effect = lambda records: len(records)
+
+        with patch.object(collector, "record_request_sync") as mock_sync:
+            self._enqueue(collector, count=2)
+            await collector._overflow_task
+
+        mock_sync.assert_not_called()
+        assert collector.spilled == 2
+        assert collector.spill_path.exists()
+
+        with patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage):
+            await collector.start()
+            await asyncio.sleep(0.2)
+            await collector.stop()
+
+        assert collector.replayed == 2
+        assert collector.written == 2
+        assert not collector.spill_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_batches_records(self, collector):
+        """测试记录被批量写入"""
+        storage = MagicMock()
+        storage.bulk_save.side_effect = lambda records: len(records)
+
+        with patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage):
+            await collector.start()
+            self._enqueue(collector, count=25)
+            await collector.stop()
+
+        written = [len(c.args[0]) for c in storage.bulk_save.call_args_list]
+        assert sum(written) == 25
+        assert max(written) <= 10
+        assert collector.written == 25
+
+    @pytest.mark.asyncio
+    async def test_records_requested_model(self, collector):
+        """测试记录客户端请求的模型（逻辑模型或回退前的模型）"""
+        storage = MagicMock()
+        storage.bulk_save.side_effect = lambda records: len(records)
+
+        with patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage):
+            await collector.start()
+            collector.enqueue(
+                api_key_id="ak_123",
+                organization_id="org_123",
+                model="openrouter/gpt-4",
+                provider="openrouter",
+                prompt_tokens=10,
+                completion_tokens=20,
+                total_tokens=30,
+                cost=0.01,
+                requested_model="gpt-4",
+            )
+            await collector.stop()
+
+        record = storage.bulk_save.call_args.args[0][0]
+        assert record["model"] == "openrouter/gpt-4"
+        assert record["requested_model"] == "gpt-4"
+
+    @pytest.mark.asyncio
+    async def test_spill_and_replay_on_db_failure(self, collector):
+        """测试数据库写入失败时落盘，恢复后重放"""
+        storage = MagicMock()
+        storage.bulk_save.side_effect = Exception("db down")
+
+        with patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage):
+            await collector.start()
+            self._enqueue(collector, count=3)
+            await collector.stop()
+
+        assert collector.spilled == 3
+        assert collector.spill_path.exists()
+
+        storage.bulk_save.side_effect = lambda records: len(records)
+        with patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage):
+            collector._replay_spill()
+
+        replayed = storage.bulk_save.call_args[0][0]
+        assert len(replayed) == 3
+        assert isinstance(replayed[0]["timestamp"], datetime)
+        assert collector.replayed == 3
+        assert not collector.spill_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_writer_survives_replay_error(self, collector):
+        """测试重放落盘记录出错时后台任务继续运行"""
+        storage = MagicMock()
+        storage.bulk_save.side_effect = lambda records: len(records)
+        collector.spill_path.touch()
+
+        with (
+            patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage),
+            patch.object(collector, "_replay_spill", side_effect=OSError("disk error")),
+        ):
+            await collector.start()
+            self._enqueue(collector)
+            await asyncio.sleep(0.2)
+            assert collector.is_running
+            self._enqueue(collector)
+            await collector.stop()
+
+        assert collector.written == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_full_spills(self, collector):
+        """测试队列已满时记录在后台线程中落盘，不阻塞请求路径"""
+        collector.queue_size = 1
+        storage = MagicMock()
+        storage.bulk_save.side_effect = lambda records: len(records)
+
+        with (
+            patch("gaiarouter.stats.collector.get_stats_storage", return_value=storage),
+            patch.object(collector, "_spill", wraps=collector._spill) as mock_spill,
+        ):
+            await collector.start()
+            self._enqueue(collector, count=3)
+            mock_spill.assert_not_called()
+            await collector.stop()
+
+        mock_spill.assert_called_once()
+        assert collector.spilled == 2
+        assert collector.written == 1
+
+    def test_fill_costs_single_pricing_query(self, collector):
+        """测试每批只查询一次定价"""
+        records = [
+            {
+                "model": "openai/gpt-4",
+                "prompt_tokens": 1000,
+                "completion_tokens": 500,
+                "cost": None,
+            },
+            {"model": "openai/gpt-4", "prompt_tokens": 2000, "completion_tokens": 0, "cost": None},
+            {"model": "unknown/model", "prompt_tokens": 10, "completion_tokens": 10, "cost": None},
+        ]
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.return_value = [
+            ("openai/gpt-4", 0.03, 0.06)
+        ]
+
+        with patch("gaiarouter.stats.collector.get_db", return_value=iter([mock_db])):
+            collector.fill_costs(records)
+
+        mock_db.query.assert_called_once()
+        assert records[0]["cost"] == 0.06
+        assert records[1]["cost"] == 0.06
+        assert records[2]["cost"] is None
+
+
+class TestStreamUsageAccumulator:
+    """测试流式用量累计"""
+
+    def test_reported_usage_preferred(self):
+        """测试优先使用提供商返回的用量"""
+        usage = StreamUsageAccumulator([{"role": "user", "content": "Hello world"}])
+        usage.add_chunk({"choices": [{"delta": {"content": "Hi there"}}]})
+        usage.add_usage({"prompt_tokens": 9})
+        usage.add_usage({"completion_tokens": 3})
+        usage.add_usage({"completion_tokens": 7})
+
+        assert usage.totals() == {"prompt_tokens": 9, "completion_tokens": 7, "total_tokens": 16}
+        assert usage.estimated is False
+
+    def test_estimate_without_reported_usage(self):
+        """测试提供商未返回用量时按字符估算"""
+        usage = StreamUsageAccumulator([{"role": "user", "content": "x" * 40}])
+        usage.add_chunk({"choices": [{"delta": {"content": "y" * 10}}]})
+        usage.add_chunk({"choices": [{"delta": {}}]})
+
+        assert usage.totals() == {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+        assert usage.estimated is True
@@ -0,0 +1,190 @@
+"""
+测试统计存储的SQL分组聚合
+
+使用 SQLite 内存数据库测试在数据库中按日期/周/月/模型/提供商分组
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from gaiarouter.database.models import RequestStat
+from gaiarouter.stats.query import StatsQuery, StatsQueryParams
+
+
+def _stat(timestamp, model="openai/gpt-4", provider="openai", api_key_id="ak_1", cost=0.01):
+    return RequestStat(
+        api_key_id=api_key_id,
+        organization_id="org_1",
+        model=model,
+        provider=provider,
+        prompt_tokens=10,
+        completion_tokens=20,
+        total_tokens=30,
+        cost=cost,
+        timestamp=timestamp,
+    )
+
+
+@pytest.fixture
+def stats(db_session):
+    """写入跨两周、两个月的统计记录"""
+    db_session.add_all(
+        [
+            _stat(datetime(2026, 1, 28, 9)),  # 周三
+            _stat(datetime(2026, 1, 31, 18)),  # 周六
+            _stat(datetime(2026, 2, 1, 23, 30)),  # 周日
+            _stat(datetime(2026, 2, 2, 8), model="anthropic/claude-3", provider="anthropic"),
+            _stat(datetime(2026, 2, 2, 9), api_key_id="ak_2", cost=0.05),
+        ]
+    )
+    db_session.commit()
+
+
+START = datetime(2026, 1, 1)
+END = datetime(2026, 2, 28, 23, 59)
+
+
+class TestAggregateStats:
+    """测试原始统计记录的分组聚合"""
+
+    def test_summary(self, stats_storage, stats):
+        """测试汇总和按API Key过滤"""
+        summary = stats_storage.get_stats_summary(START, END)
+        key_summary = stats_storage.get_stats_summary(START, END, api_key_id="ak_1")
+
+        assert summary["total_requests"] == 5
+        assert summary["total_tokens"] == 150
+        assert summary["total_cost"] == pytest.approx(0.09)
+        assert key_summary["total_requests"] == 4
+
+    def test_group_by_date(self, stats_storage, stats):
+        """测试按日期分组"""
+        rows = stats_storage.aggregate_stats(START, END, group_by="date")
+
+        assert [(row["date"], row["requests"]) for row in rows] == [
+            ("2026-01-28", 1),
+            ("2026-01-31", 1),
+            ("2026-02-01", 1),
+            ("2026-02-02", 2),
+        ]
+
+    def test_group_by_week(self, stats_storage, stats):
+        """测试按周分组（周一为周开始）"""
+        rows = stats_storage.aggregate_stats(START, END, group_by="week")
+
+        assert [(row["date"], row["requests"]) for row in rows] == [
+            ("2026-01-26", 3),
+            ("2026-02-02", 2),
+        ]
+
+    def test_group_by_month(self, stats_storage, stats):
+        """测试按月分组"""
+        rows = stats_storage.aggregate_stats(START, END, group_by="month")
+
+        assert [(row["date"], row["requests"]) for row in rows] == [
+            ("2026-01-01", 2),
+            ("2026-02-01", 3),
+        ]
+
+    def test_group_by_provider(self, stats_storage, stats):
+        """测试按提供商分组"""
+        rows = stats_storage.aggregate_stats(START, END, group_by="provider")
+
+        assert rows[0] == {
+            "provider": "anthropic",
+            "requests": 1,
+            "prompt_tokens": 10,
+            "completion_tokens": 20,
+            "total_tokens": 30,
+            "cost": pytest.approx(0.01),
+        }
+        assert rows[1]["provider"] == "openai"
+        assert rows[1]["requests"] == 4
+
+    def test_time_range(self, stats_storage, stats):
+        """测试时间范围过滤"""
+        rows = stats_storage.aggregate_stats(
+            datetime(2026, 2, 1), datetime(2026, 2, 2, 8), group_by="date"
+        )
+
+        assert [(row["date"], row["requests"]) for row in rows] == [
+            ("2026-02-01", 1),
+            ("2026-02-02", 1),
+        ]
+
+
+class TestStatsQuerySource:
+    """测试统计查询的数据来源选择"""
+
+    @pytest.fixture
+    def query(self, stats_storage):
+        """创建使用原始记录聚合的统计查询"""
+        query = StatsQuery()
+        query.storage = stats_storage
+        query.source = "raw"
+        return query
+
+    def test_query_key_stats_by_week(self, query, stats):
+        """测试按周查询 API Key 统计"""
+        response = query.query_key_stats(
+            "ak_1", StatsQueryParams(start_date=START, end_date=END, group_by="week")
+        )
+
+        assert response["summary"]["total_requests"] == 4
+        assert [row["date"] for row in response["by_date"]] == ["2026-01-26", "2026-02-02"]
+        assert "by_model" not in response
+
+    def test_query_global_stats_by_month(self, query, stats):
+        """测试按月查询全局统计"""
+        response = query.query_global_stats(
+            StatsQueryParams(start_date=START, end_date=END, group_by="month")
+        )
+
+        assert response["summary"]["total_requests"] == 5
+        assert [row["requests"] for row in response["by_date"]] == [2, 3]
+        assert {row["provider"] for row in response["by_provider"]} == {"openai", "anthropic"}
+
+    def test_query_organization_stats(self, query, stats, db_session):
+        """测试按组织ID查询统计（单次分组查询）"""
+        other = _stat(datetime(2026, 2, 2, 10))
+        other.organization_id = "org_2"
+        db_session.add(other)
+        db_session.commit()
+
+        response = query.query_organization_stats(
+            "org_1", StatsQueryParams(start_date=START, end_date=END, group_by="model")
+        )
+
+        assert response["organization_id"] == "org_1"
+        assert response["summary"]["total_requests"] == 5
+        assert [(row["model"], row["requests"]) for row in response["by_model"]] == [
+            ("anthropic/claude-3", 1),
+            ("openai/gpt-4", 4),
+        ]
+        assert "by_date" not in response
+
+    def test_rollup_source(self, stats_storage):
+        """测试配置为 rollups 时从用量汇总表查询（默认为原始记录，回填完成后再切换）"""
+        query = StatsQuery()
+        assert query.source == "raw"
+        query.storage = stats_storage
+        query.source = "rollups"
+
+        with (
+            patch.object(stats_storage, "get_rollup_summary") as mock_summary,
+            patch.object(stats_storage, "aggregate_rollups", return_value=[]) as mock_aggregate,
+            patch.object(stats_storage, "aggregate_stats") as mock_raw,
+        ):
+            mock_summary.return_value = {
+                "total_requests": 0,
+                "total_tokens": 0,
+                "total_cost": 0.0,
+            }
+            query.query_global_stats(StatsQueryParams(start_date=START, end_date=END))
+
+        assert query.source == "rollups"
+        mock_summary.assert_called_once()
+        assert mock_aggregate.call_count == 2
+        mock_raw.assert_not_called()
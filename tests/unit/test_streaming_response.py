@@ -0,0 +1,226 @@
+"""
+测试流式响应
+
+测试客户端断开或发送失败时响应生成器被关闭，以及SSE事件合并写入
+"""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gaiarouter.api.controllers.chat import _coalesce_window
+from gaiarouter.api.streaming import ClosingStreamingResponse, coalesce_events
+
+SCOPE = {"type": "http", "method": "POST", "path": "/v1/chat/completions", "headers": []}
+
+
+class TestClosingStreamingResponse:
+    """测试关闭响应生成器的流式响应"""
+
+    @pytest.mark.asyncio
+    async def test_closes_iterator_on_disconnect(self):
+        """测试收到 http.disconnect 后生成器被关闭"""
+        closed = asyncio.Event()
+        first_sent = asyncio.Event()
+
+        async def generate():
+            try:
+                while True:
+                    yield "data: chunk\\n\\n"
+                    await asyncio.sleep(0.01)
+            finally:
+                closed.set()
+
+        async def receive():
+            await first_sent.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                first_sent.set()
+
+        response = ClosingStreamingResponse(generate(), media_type="text/event-stream")
+        await asyncio.wait_for(response(SCOPE, receive, send), timeout=5)
+
+        assert closed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_closes_iterator_on_send_error(self):
+        """测试发送失败时生成器被关闭且异常继续抛出"""
+        closed = False
+
+        async def generate():
+            nonlocal closed
+            try:
+                while True:
+                    yield "data: chunk\\n\\n"
+            finally:
+                closed = True
+
+        async def receive():
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                raise OSError("connection reset")
+
+        response = ClosingStreamingResponse(generate(), media_type="text/event-stream")
+        with pytest.raises(OSError):
+            await response(SCOPE, receive, send)
+
+        assert closed is True
+
+    @pytest.mark.asyncio
+    async def test_completed_stream(self):
+        """测试正常结束时发送全部数据"""
+        bodies = []
+
+        async def generate():
+            yield "a"
+            yield "b"
+
+        async def receive():
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                bodies.append(message.get("body", b""))
+
+        response = ClosingStreamingResponse(generate(), media_type="text/event-stream")
+        await response(SCOPE, receive, send)
+
+        assert b"".join(bodies) == b"ab"
+
+
+def sse(content):
+    """构造一个内容块事件"""
+    return f'data: {{"choices":[{{"delta":{{"content":"{content}"}}}}]}}\n\n'
+
+
+ROLE_EVENT = 'data: {"choices":[{"delta":{"role":"assistant","content":""}}]}\n\n'
+
+
+class TestCoalesceEvents:
+    """测试SSE事件合并写入"""
+
+    @pytest.mark.asyncio
+    async def test_first_content_immediate_then_coalesced(self):
+        """测试首个内容块及之前的事件立即发送，之后的事件合并"""
+
+        async def events():
+            yield ROLE_EVENT
+            for content in "abcde":
+                yield sse(content)
+            yield "data: [DONE]\n\n"
+
+        writes = [w async for w in coalesce_events(events(), window=1.0, max_bytes=100000)]
+
+        assert writes[0] == ROLE_EVENT
+        assert writes[1] == sse("a")
+        assert writes[2:] == [sse("b") + sse("c") + sse("d") + sse("e") + "data: [DONE]\n\n"]
+
+    @pytest.mark.asyncio
+    async def test_flush_on_window_while_upstream_stalls(self):
+        """测试上游停顿时缓冲区按时间窗口发送"""
+        release = asyncio.Event()
+
+        async def events():
+            yield sse("a")
+            yield sse("b")
+            yield sse("c")
+            await release.wait()
+            yield sse("d")
+
+        stream = coalesce_events(events(), window=0.02, max_bytes=100000)
+        assert await stream.__anext__() == sse("a")
+        # 上游停顿期间，缓冲的 b、c 在窗口到期后发送
+        assert await asyncio.wait_for(stream.__anext__(), timeout=1) == sse("b") + sse("c")
+        release.set()
+        assert [w async for w in stream] == [sse("d")]
+
+    @pytest.mark.asyncio
+    async def test_flush_on_max_bytes(self):
+        """测试缓冲区达到字符数上限时立即发送"""
+
+        async def events():
+            for content in "abcd":
+                yield sse(content)
+
+        max_bytes = len(sse("b")) * 2
+        writes = [w async for w in coalesce_events(events(), window=10.0, max_bytes=max_bytes)]
+
+        assert writes == [sse("a"), sse("b") + sse("c"), sse("d")]
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_upstream(self):
+        """测试关闭合并流时取消读取并关闭上游事件流"""
+        closed = False
+
+        async def events():
+            nonlocal closed
+            try:
+                yield sse("a")
+                await asyncio.sleep(3600)
+            finally:
+                closed = True
+
+        stream = coalesce_events(events(), window=0.01, max_bytes=100000)
+        await stream.__anext__()
+        await stream.aclose()
+
+        assert closed is True
+
+    @pytest.mark.asyncio
+    async def test_error_propagates(self):
+        """测试上游异常在发送缓冲区后继续抛出"""
+
+        async def events():
+            yield sse("a")
+            yield sse("b")
+            raise RuntimeError("boom")
+
+        stream = coalesce_events(events(), window=10.0, max_bytes=100000)
+        writes = []
+        with pytest.raises(RuntimeError):
+            async for write in stream:
+                writes.append(write)
+
+        assert writes == [sse("a"), sse("b")]
+
+
+class TestCoalesceWindow:
+    """测试合并写入时间窗口的解析"""
+
+    @pytest.fixture
+    def mock_settings(self):
+        settings = Mock(stream_coalesce_window_ms=10.0, stream_coalesce_max_window_ms=250.0)
+        with patch("gaiarouter.api.controllers.chat.get_settings", return_value=settings):
+            yield settings
+
+    def make_request(self, value=None):
+        request = Mock()
+        request.headers = {"X-Stream-Coalesce": value} if value is not None else {}
+        return request
+
+    def test_default_from_settings(self, mock_settings):
+        """测试未指定请求头时使用配置的默认值"""
+        assert _coalesce_window(self.make_request()) == 0.01
+        assert _coalesce_window(None) == 0.01
+
+    def test_header_overrides(self, mock_settings):
+        """测试请求头指定时间窗口"""
+        assert _coalesce_window(self.make_request("50")) == 0.05
+
+    def test_header_off(self, mock_settings):
+        """测试请求头关闭合并"""
+        assert _coalesce_window(self.make_request("off")) == 0
+        assert _coalesce_window(self.make_request("0")) == 0
+
+    def test_header_clamped(self, mock_settings):
+        """测试请求头的时间窗口不超过最大值"""
+        assert _coalesce_window(self.make_request("10000")) == 0.25
+
+    def test_invalid_header(self, mock_settings):
+        """测试无效请求头使用默认值"""
+        assert _coalesce_window(self.make_request("fast")) == 0.01
@@ -0,0 +1,163 @@
+"""
+测试请求分阶段耗时
+"""
+
+import asyncio
+
+import pytest
+
+from gaiarouter.utils import timing
+from gaiarouter.utils.timing import (
+    LatencyHistogram,
+    RequestTimer,
+    TimingHistograms,
+    get_request_timer,
+    get_timing_histograms,
+    start_request_timer,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_histograms():
+    """每个测试使用新的直方图实例"""
+    timing._timing_histograms = None
+    yield
+    timing._timing_histograms = None
+
+
+class TestRequestTimer:
+    """测试请求计时器"""
+
+    def test_stage_accumulates(self):
+        """测试同名阶段的耗时累加"""
+        timer = RequestTimer()
+        timer.add("upstream", 0.1)
+        timer.add("upstream", 0.2)
+        with timer.stage("auth"):
+            pass
+
+        assert timer.stages["upstream"] == pytest.approx(0.3)
+        assert "auth" in timer.stages
+
+    def test_stage_records_on_exception(self):
+        """测试代码块抛出异常时仍记录耗时"""
+        timer = RequestTimer()
+        with pytest.raises(ValueError):
+            with timer.stage("limit_check"):
+                raise ValueError("limit exceeded")
+
+        assert "limit_check" in timer.stages
+
+    def test_header_value(self):
+        """测试 Server-Timing 头的格式"""
+        timer = RequestTimer()
+        timer.add("auth", 0.0012)
+        timer.add("upstream", 0.25)
+
+        parts = timer.header_value().split(", ")
+        assert parts[0] == "auth;dur=1.2"
+        assert parts[1] == "upstream;dur=250.0"
+        assert parts[2].startswith("total;dur=")
+
+    def test_finish_observes_once(self):
+        """测试结束时汇总到直方图，重复调用只汇总一次"""
+        timer = RequestTimer()
+        timer.add("auth", 0.002)
+        timer.finish()
+        timer.finish()
+
+        snapshot = get_timing_histograms().snapshot()
+        assert snapshot["auth"]["count"] == 1
+        assert snapshot["total"]["count"] == 1
+
+
+class TestTimerContext:
+    """测试当前请求的计时器"""
+
+    def test_timed_without_timer(self):
+        """测试没有计时器时不记录"""
+
+        async def run():
+            assert get_request_timer() is None
+            with timed("auth"):
+                pass
+            return get_request_timer()
+
+        assert asyncio.run(run()) is None
+
+    def test_timed_records_on_current_timer(self):
+        """测试记录到当前请求的计时器"""
+
+        async def run():
+            timer = start_request_timer()
+            with timed("auth"):
+                await asyncio.sleep(0)
+            return timer
+
+        timer = asyncio.run(run())
+        assert "auth" in timer.stages
+
+    def test_timers_isolated_between_tasks(self):
+        """测试并发请求使用各自的计时器"""
+
+        async def handle(name):
+            timer = start_request_timer()
+            await asyncio.sleep(0)
+            with timed(name):
+                await asyncio.sleep(0)
+            return get_request_timer() is timer, list(timer.stages)
+
+        async def run():
+            return await asyncio.gather(handle("a"), handle("b"))
+
+        results = asyncio.run(run())
+        assert results == [(True, ["a"]), (True, ["b"])]
+
+
+class TestLatencyHistogram:
+    """测试耗时直方图"""
+
+    def test_buckets_and_quantiles(self):
+        """测试分桶和分位数估算"""
+        histogram = LatencyHistogram(buckets_ms=(10, 100, 1000))
+        for _ in range(98):
+            histogram.observe(0.005)
+        histogram.observe(0.05)
+        histogram.observe(5.0)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["buckets"][10] == 98
+        assert snapshot["buckets"][100] == 99
+        assert snapshot["buckets"][1000] == 99
+        assert snapshot["buckets"][float("inf")] == 100
+        assert snapshot["p50_ms"] == 10
+        assert snapshot["p99_ms"] == 100
+        assert histogram.quantile(1.0) == float("inf")
+
+    def test_bucket_upper_bound_inclusive(self):
+        """测试等于桶上限的值落在该桶"""
+        histogram = LatencyHistogram(buckets_ms=(10, 100))
+        histogram.observe(0.01)
+
+        assert histogram.snapshot()["buckets"][10] == 1
+
+    def test_empty_quantile(self):
+        """测试没有数据时分位数为None"""
+        assert LatencyHistogram().quantile(0.5) is None
+
+    def test_timing_histograms(self):
+        """测试按阶段分别汇总"""
+        histograms = TimingHistograms(buckets_ms=(10, 100))
+        histograms.observe("auth", 0.001)
+        histograms.observe("auth", 0.002)
+        histograms.observe("upstream", 0.05)
+
+        snapshot = histograms.snapshot()
+        assert snapshot["auth"]["count"] == 2
+        assert snapshot["auth"]["sum_ms"] == pytest.approx(3.0)
+        assert snapshot["upstream"]["buckets"][100] == 1
+
+        histograms.reset()
+        assert histograms.snapshot() == {}
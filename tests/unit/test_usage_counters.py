@@ -0,0 +1,161 @@
+"""
+测试组织月度用量计数器
+
+测试首次加载、增量累加、对账和跨月清零，以及限制检查器的读取
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from gaiarouter.database.models import Organization
+from gaiarouter.organizations.limits import LimitChecker
+from gaiarouter.organizations.usage_counters import MonthlyUsage, UsageCounters, month_range
+from gaiarouter.utils.errors import OrganizationLimitError
+
+
+@pytest.fixture
+def counters():
+    return UsageCounters(reconcile_interval=0)
+
+
+class TestUsageCounters:
+    """测试组织用量计数器"""
+
+    def test_get_loads_once(self, counters):
+        """测试首次查询从数据库加载，之后只读内存"""
+        with patch.object(
+            counters, "_load", return_value={"org_1": MonthlyUsage(10, 1000, 1.5)}
+        ) as mock_load:
+            first = counters.get("org_1")
+            second = counters.get("org_1")
+
+        assert first == {"requests": 10, "tokens": 1000, "cost": 1.5}
+        assert second == first
+        mock_load.assert_called_once()
+
+    def test_add_increments_loaded_org(self, counters):
+        """测试写入后的用量累加到已加载的组织"""
+        with patch.object(counters, "_load", return_value={}):
+            counters.get("org_1")
+
+        counters.add("org_1", tokens=30, cost=0.25)
+        counters.add("org_1", tokens=20, cost=None)
+        counters.add("org_2", tokens=50)
+        counters.add(None, tokens=50)
+
+        assert counters.get("org_1") == {"requests": 2, "tokens": 50, "cost": 0.25}
+
+    def test_add_ignores_previous_month(self, counters):
+        """测试上月的记录不计入"""
+        with patch.object(counters, "_load", return_value={}):
+            counters.get("org_1")
+
+        counters.add("org_1", tokens=30, timestamp=datetime(2000, 1, 31))
+
+        assert counters.get("org_1")["requests"] == 0
+
+    def test_reconcile_overwrites_counts(self, counters):
+        """测试对账用数据库汇总覆盖内存计数"""
+        with patch.object(counters, "_load", return_value={}):
+            counters.get("org_1")
+        counters.add("org_1", tokens=30)
+
+        with patch.object(
+            counters, "_load", return_value={"org_1": MonthlyUsage(5, 500, 0.5)}
+        ) as mock_load:
+            assert counters.reconcile() == 1
+
+        mock_load.assert_called_once_with(["org_1"])
+        assert counters.get("org_1") == {"requests": 5, "tokens": 500, "cost": 0.5}
+
+    def test_add_during_load_is_kept(self, counters):
+        """测试加载期间写入的用量在发布时合并"""
+
+        def load(organization_ids):
+            counters.add("org_1", tokens=30, cost=0.25)
+            return {"org_1": MonthlyUsage(10, 1000, 1.5)}
+
+        with patch.object(counters, "_load", side_effect=load):
+            usage = counters.get("org_1")
+
+        assert usage == {"requests": 11, "tokens": 1030, "cost": 1.75}
+        assert counters._pending == {}
+        assert counters._loading == {}
+
+    @pytest.mark.asyncio
+    async def test_add_during_async_load_is_kept(self, counters):
+        """测试异步加载期间写入的用量在发布时合并"""
+
+        async def load(organization_ids):
+            counters.add("org_1", tokens=30)
+            return {}
+
+        with patch.object(counters, "_load_async", AsyncMock(side_effect=load)):
+            usage = await counters.get_async("org_1")
+
+        assert usage == {"requests": 1, "tokens": 30, "cost": 0.0}
+
+    def test_add_during_reconcile_is_kept(self, counters):
+        """测试对账期间写入的用量不被覆盖"""
+        with patch.object(counters, "_load", return_value={}):
+            counters.get("org_1")
+
+        def load(organization_ids):
+            counters.add("org_1", tokens=30)
+            return {"org_1": MonthlyUsage(5, 500, 0.5)}
+
+        with patch.object(counters, "_load", side_effect=load):
+            counters.reconcile()
+
+        assert counters.get("org_1") == {"requests": 6, "tokens": 530, "cost": 0.5}
+
+    def test_failed_load_is_not_published(self, counters):
+        """测试加载失败时不发布计数，下次查询重新加载"""
+        with patch.object(counters, "_load", side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                counters.get("org_1")
+
+        assert counters._pending == {}
+        assert counters._loading == {}
+        with patch.object(counters, "_load", return_value={}) as mock_load:
+            assert counters.get("org_1")["requests"] == 0
+        mock_load.assert_called_once()
+
+    def test_month_rollover_clears_counts(self, counters):
+        """测试跨月后重新加载"""
+        with patch.object(counters, "_load", return_value={"org_1": MonthlyUsage(10, 0, 0)}):
+            counters.get("org_1")
+
+        counters._month_start = datetime(2000, 1, 1)
+        with patch.object(counters, "_load", return_value={}) as mock_load:
+            assert counters.get("org_1")["requests"] == 0
+
+        mock_load.assert_called_once()
+
+    def test_month_range_december(self):
+        """测试12月的月份范围"""
+        start, end = month_range(datetime(2025, 12, 15, 8, 30))
+
+        assert start == datetime(2025, 12, 1)
+        assert end == datetime(2026, 1, 1)
+
+
+class TestLimitCheckerCounters:
+    """测试限制检查器读取内存计数"""
+
+    def test_check_limits_uses_counters(self):
+        """测试限制检查读取计数器而不查询数据库"""
+        checker = LimitChecker()
+        org = Organization(id="org_1", name="Test", monthly_requests_limit=10)
+        mock_counters = MagicMock()
+        mock_counters.get.return_value = {"requests": 9, "tokens": 0, "cost": 0.0}
+
+        with patch(
+            "gaiarouter.organizations.limits.get_usage_counters", return_value=mock_counters
+        ):
+            with pytest.raises(OrganizationLimitError, match="requests limit"):
+                checker.check_limits(org, additional_requests=1)
+
+        mock_counters.get.assert_called_once_with("org_1")